@@ -0,0 +1,72 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Achievements Module
+
+Rules that turn a player's stats row into earned achievements. The catalog
+itself (names, descriptions, icons) lives in the `achievements` table, seeded
+by supabase/migrations/20261019140000_seed_achievements.sql and mirrored in
+repository.DEFAULT_ACHIEVEMENTS for the local engines.
+
+Achievements are awarded by the "achievements" stage of the game completion
+pipeline, after the stats stage has applied the game.
+"""
+
+from typing import List
+
+from profile_cache import get_profile_cache
+
+# Achievement name -> predicate over a player_stats row
+ACHIEVEMENT_RULES = {
+    "First Win": lambda s: (s.get("games_won") or 0) >= 1,
+    "Hat Trick": lambda s: (s.get("best_streak") or 0) >= 3,
+    "Unstoppable": lambda s: (s.get("best_streak") or 0) >= 10,
+    "Quick Thinker": lambda s: 0 < (s.get("fastest_win_questions") or 0) <= 5,
+    "Mind Reader": lambda s: 0 < (s.get("fastest_win_questions") or 0) <= 1,
+    "Regular": lambda s: (s.get("games_played") or 0) >= 10,
+    "Veteran": lambda s: (s.get("games_played") or 0) >= 100,
+}
+
+
+def earned_achievements(stats: dict) -> List[str]:
+    """Names of every achievement the stats row qualifies for."""
+    if not stats:
+        return []
+    return [name for name, rule in ACHIEVEMENT_RULES.items() if rule(stats)]
+
+
+def award_for_game(repository, game_id) -> dict:
+    """
+    Award newly earned achievements to every participant of a finished game.
+
+    Awarding is idempotent, so the stage can be retried safely.
+
+    Returns:
+        dict: player_id -> list of achievement names awarded by this call
+    """
+    awarded = {}
+    for participant in repository.list_participants(game_id):
+        player_id = participant["player_id"]
+        names = earned_achievements(repository.get_player_stats(player_id))
+        if names:
+            new = repository.award_achievements(player_id, names)
+            if new:
+                awarded[player_id] = new
+                # The profile returned by /auth/me lists achievements
+                get_profile_cache().invalidate(player_id)
+    return awarded
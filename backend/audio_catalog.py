@@ -0,0 +1,289 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Audio Catalog Module
+
+Pre-rendered speech for the fixed lines the game speaks: the welcome per
+difficulty, Yes/No/Maybe answers, the incorrect-guess line and the
+GAME_MESSAGES that do not contain the secret word, plus the clips
+audio_stitch joins into the win/loss reveals (template prefixes and one
+clip per secret word), for every configured voice. Served from memory with no synthesis; only dynamic text (such as
+the secret word reveal) still reaches ElevenLabs.
+
+The catalog is a versioned bundle (a zip of manifest.json plus one mp3 per
+line) built ahead of deployment and loaded at startup. Entries are keyed
+with tts_cache.tts_cache_key, so a line is served only when its text,
+voice, model and settings all match what the caller would synthesize.
+Changing a line or a setting simply leaves the old entry unused until the
+bundle is rebuilt.
+
+Build the bundle (needs ELEVENLABS_API_KEY and the Supabase env for the
+difficulty list):
+    python audio_catalog.py --voices 9BWtsMINqrJLrRacOk9x,pNInz6obpgDQGcFmaJgB
+
+Configuration (environment variables):
+    AUDIO_CATALOG_PATH      Bundle file (default assets/audio_catalog.zip next to this module)
+    AUDIO_CATALOG_VOICES    Comma-separated voice IDs to render (default ELEVENLABS_VOICE_ID)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from tts_cache import tts_cache_key
+
+AUDIO_CATALOG_PATH = os.getenv(
+    "AUDIO_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "audio_catalog.zip"),
+)
+AUDIO_CATALOG_VOICES = os.getenv(
+    "AUDIO_CATALOG_VOICES", os.getenv("ELEVENLABS_VOICE_ID", "9BWtsMINqrJLrRacOk9x")
+)
+CATALOG_FORMAT = 1
+MAX_QUESTIONS = 20
+
+
+def catalog_phrases() -> list:
+    """
+    Every fixed line, as (text, model_id, voice_settings) exactly as the
+    game synthesizes it. Imported lazily: game_logic and voice_routes
+    import this module through elevenlabs_utils.
+    """
+    import game_logic
+    import voice_routes
+    from elevenlabs_utils import DEFAULT_MODEL_ID, GAME_MESSAGES, VOICE_SETTINGS
+    from models import VoiceSettings
+
+    quick = VOICE_SETTINGS["quick_response"]
+    host = VOICE_SETTINGS["game_host"]
+    difficulties = sorted({w.get("difficulty") or 1 for w in game_logic.SECRET_WORDS} | {1})
+
+    phrases = []
+    # game_logic: generate_speech(text, voice_id) defaults
+    for difficulty in difficulties:
+        text = game_logic.WELCOME_MESSAGE.format(difficulty=difficulty)
+        phrases.append((text, DEFAULT_MODEL_ID, quick))
+    for answer in game_logic.ANSWERS:
+        phrases.append((answer, DEFAULT_MODEL_ID, quick))
+    phrases.append((game_logic.INCORRECT_GUESS_MESSAGE, DEFAULT_MODEL_ID, quick))
+
+    # elevenlabs_utils.generate_game_message_audio
+    phrases.append((GAME_MESSAGES["welcome"], DEFAULT_MODEL_ID, host))
+    for difficulty in difficulties:
+        text = GAME_MESSAGES["welcome_with_difficulty"].format(difficulty=difficulty)
+        phrases.append((text, DEFAULT_MODEL_ID, host))
+    for name in ("incorrect_guess", "final_question", "halfway_point"):
+        phrases.append((GAME_MESSAGES[name], DEFAULT_MODEL_ID, quick))
+    for count in range(1, MAX_QUESTIONS):
+        text = GAME_MESSAGES["questions_remaining"].format(count=count)
+        phrases.append((text, DEFAULT_MODEL_ID, quick))
+
+    # Clips audio_stitch joins into the reveals: each template's fixed
+    # prefix and suffix, and one clip per secret word
+    from audio_stitch import split_template
+
+    endings = set()
+    for template in game_logic.REVEAL_TEMPLATES:
+        prefix, punctuation, suffix = split_template(template)
+        phrases.extend((text, DEFAULT_MODEL_ID, quick) for text in (prefix, suffix) if text)
+        endings.add(punctuation)
+    for word in sorted({w["name"] for w in game_logic.SECRET_WORDS}):
+        phrases.extend((word + ending, DEFAULT_MODEL_ID, quick) for ending in sorted(endings))
+
+    # /ask_question_voice answers at the default VoiceSettings
+    route_settings = voice_routes.voice_settings_payload(VoiceSettings())
+    for answer in game_logic.ANSWERS:
+        phrases.append((answer, voice_routes.VOICE_MODEL_ID, route_settings))
+
+    # Drop lines that render identically (e.g. a welcome repeated across tables)
+    unique = {
+        tts_cache_key(text, "", model_id, settings): (text, model_id, settings)
+        for text, model_id, settings in phrases
+    }
+    return list(unique.values())
+
+
+def catalog_version(keys) -> str:
+    """Short digest of the catalog's contents, recorded in the manifest."""
+    return hashlib.sha256("\n".join(sorted(keys)).encode("utf-8")).hexdigest()[:16]
+
+
+class AudioCatalog:
+    """
+    Read-only, in-memory pre-rendered audio by tts_cache key.
+
+    Args:
+        entries (dict): key -> audio bytes
+        version (str): Catalog version from the bundle manifest
+    """
+
+    def __init__(self, entries: Optional[Dict[str, bytes]] = None, version: Optional[str] = None):
+        self._entries = dict(entries or {})
+        self.version = version
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self._entries.get(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return audio
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    @classmethod
+    def load(cls, path: str) -> "AudioCatalog":
+        """Read a bundle written by build_catalog."""
+        with zipfile.ZipFile(path) as bundle:
+            manifest = json.loads(bundle.read("manifest.json"))
+            if manifest.get("format") != CATALOG_FORMAT:
+                raise ValueError(f"Unsupported audio catalog format: {manifest.get('format')}")
+            entries = {
+                entry["key"]: bundle.read(f"audio/{entry['key']}.mp3")
+                for entry in manifest["entries"]
+            }
+        return cls(entries, manifest.get("version"))
+
+
+def build_catalog(path: str, voices, synthesize=None) -> dict:
+    """
+    Render every catalog line for every voice into a bundle at path.
+
+    Args:
+        path (str): Bundle file to write (replaced atomically)
+        voices (list): ElevenLabs voice IDs
+        synthesize (callable): (text, voice_id, model_id, voice_settings) -> bytes;
+            defaults to elevenlabs_utils.synthesize_speech
+
+    Returns:
+        dict: The manifest written
+    """
+    if synthesize is None:
+        from elevenlabs_utils import synthesize_speech as synthesize
+
+    entries = []
+    audio = {}
+    for voice_id in voices:
+        for text, model_id, settings in catalog_phrases():
+            key = tts_cache_key(text, voice_id, model_id, settings)
+            audio[key] = synthesize(text, voice_id, model_id, settings)
+            entries.append(
+                {
+                    "key": key,
+                    "text": text,
+                    "voice_id": voice_id,
+                    "model_id": model_id,
+                    "size": len(audio[key]),
+                }
+            )
+
+    manifest = {
+        "format": CATALOG_FORMAT,
+        "version": catalog_version(audio),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "voices": list(voices),
+        "entries": entries,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        # mp3 is already compressed: store, don't deflate
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as bundle:
+            bundle.writestr("manifest.json", json.dumps(manifest, indent=2))
+            for key, data in audio.items():
+                bundle.writestr(f"audio/{key}.mp3", data)
+        os.replace(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return manifest
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def load_audio_catalog(path: str = AUDIO_CATALOG_PATH) -> AudioCatalog:
+    """Load the bundle at path as the process-wide catalog (empty if it is missing or unreadable)."""
+    catalog = AudioCatalog()
+    if os.path.exists(path):
+        try:
+            catalog = AudioCatalog.load(path)
+            print(f"Loaded audio catalog {catalog.version} ({len(catalog)} lines)")
+        except Exception as e:
+            print(f"Error loading audio catalog {path}: {e}")
+    set_audio_catalog(catalog)
+    return catalog
+
+
+def get_audio_catalog() -> AudioCatalog:
+    """Get the process-wide catalog, loading AUDIO_CATALOG_PATH on first use."""
+    with _catalog_lock:
+        catalog = _catalog
+    if catalog is None:
+        catalog = load_audio_catalog()
+    return catalog
+
+
+def set_audio_catalog(catalog: Optional[AudioCatalog]) -> None:
+    """Replace (or with None, reset) the process-wide catalog."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the pre-recorded game audio catalog")
+    parser.add_argument("--voices", default=AUDIO_CATALOG_VOICES, help="comma-separated voice IDs")
+    parser.add_argument("--out", default=AUDIO_CATALOG_PATH, help="bundle file to write")
+    args = parser.parse_args()
+
+    voices = [v.strip() for v in args.voices.split(",") if v.strip()]
+    manifest = build_catalog(args.out, voices)
+    total = sum(entry["size"] for entry in manifest["entries"])
+    print(
+        f"Wrote {args.out}: version {manifest['version']}, "
+        f"{len(manifest['entries'])} lines for {len(voices)} voices, {total / 1024:.0f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
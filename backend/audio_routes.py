@@ -0,0 +1,91 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from audio_store import AUDIO_PATH, get_audio_store
+
+router = APIRouter()
+
+# Clips are content-addressed, so a URL's bytes never change
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int):
+    """
+    (start, end) inclusive for a single "bytes=" range, None when the header
+    is absent or not a byte range, ValueError when it cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = size - int(last), size - 1
+    except ValueError:
+        return None
+    start = max(0, start)
+    end = min(end, size - 1)
+    if start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _chunks(view):
+    for offset in range(0, len(view), CHUNK_SIZE):
+        yield view[offset : offset + CHUNK_SIZE]
+
+
+@router.api_route(AUDIO_PATH + "/{key}.mp3", methods=["GET", "HEAD"])
+def api_get_audio(
+    key: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Stream a rendered clip linked from a game response. Supports single
+    byte ranges and ETag revalidation.
+    """
+    audio = get_audio_store().view(key)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    size = len(audio)
+    etag = f'"{key}"'
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": CACHE_CONTROL, "ETag": etag}
+    if if_none_match and etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+    try:
+        requested = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    status = 200
+    start, end = 0, size - 1
+    if requested:
+        start, end = requested
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    body = audio[start : end + 1]
+    return StreamingResponse(_chunks(body), status_code=status, media_type="audio/mpeg", headers=headers)
@@ -0,0 +1,205 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Audio Stitching Module
+
+Builds spoken messages of the form "<fixed prefix> {word} <fixed suffix>"
+from already rendered clips instead of synthesizing the whole sentence.
+Clips are MPEG audio layer III (what ElevenLabs returns); they are joined at
+frame boundaries without decoding or re-encoding:
+
+- a leading ID3v2 tag and a trailing ID3v1 tag are dropped
+- the Xing/Info/VBRI header frame is dropped, since its frame count and
+  seek table describe the original clip, not the stitched one
+- every clip must share MPEG version, sample rate and mono/stereo
+
+The prefix and suffix of each template and a clip per secret word come from
+the audio catalog (or the TTS cache). When any clip is missing, or the clips
+cannot be joined, the full sentence is synthesized instead.
+
+Usage:
+    audio = compose_speech(CORRECT_GUESS_MESSAGE, "elephant", voice_id)
+"""
+
+import threading
+from typing import List, Optional
+
+import elevenlabs_utils
+
+# Layer III bitrates (kbps) by bitrate index for MPEG-1 and MPEG-2/2.5, and
+# sample rates by version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_BITRATES_MPEG1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_MPEG2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_VBR_TAGS = (b"Xing", b"Info")
+
+
+class Mp3FormatError(ValueError):
+    """Clip is not a sequence of MPEG layer III frames that can be joined."""
+
+
+def _id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _frame_header(data: bytes, offset: int):
+    """(length, format) of the frame at offset; format is what joined clips must share."""
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        raise Mp3FormatError(f"No frame sync at byte {offset}")
+    version = (b1 >> 3) & 3
+    layer = (b1 >> 1) & 3
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        raise Mp3FormatError(f"Unsupported frame header at byte {offset}")
+    bitrate = (_BITRATES_MPEG1 if version == 3 else _BITRATES_MPEG2)[bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    length = (144 if version == 3 else 72) * bitrate // sample_rate + padding
+    mono = (b3 >> 6) == 3
+    return length, (version, sample_rate, mono)
+
+
+def _is_vbr_header(frame: bytes, version: int, mono: bool) -> bool:
+    side_info = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+    return frame[4 + side_info : 8 + side_info] in _VBR_TAGS or frame[36:40] == b"VBRI"
+
+
+def mp3_frames(data: bytes):
+    """
+    Split a clip into its audio frames.
+
+    Returns:
+        tuple: (frames, format), frames a list of bytes, format shared by all frames
+
+    Raises:
+        Mp3FormatError: The clip is not clean MPEG layer III
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128 : end - 125] == b"TAG":
+        end -= 128
+    offset = _id3v2_size(data)
+    frames = []
+    clip_format = None
+    while offset + 4 <= end:
+        length, frame_format = _frame_header(data, offset)
+        if offset + length > end:
+            break  # truncated last frame
+        if clip_format is None:
+            clip_format = frame_format
+        elif frame_format != clip_format:
+            raise Mp3FormatError("Clip changes sample rate or channel mode")
+        frame = data[offset : offset + length]
+        if frames or not _is_vbr_header(frame, frame_format[0], frame_format[2]):
+            frames.append(frame)
+        offset += length
+    if not frames:
+        raise Mp3FormatError("Clip has no audio frames")
+    return frames, clip_format
+
+
+def stitch(clips: List[bytes]) -> bytes:
+    """Join clips at frame boundaries. Raises Mp3FormatError if they cannot be joined."""
+    joined = []
+    stitched_format = None
+    for clip in clips:
+        frames, clip_format = mp3_frames(clip)
+        if stitched_format is None:
+            stitched_format = clip_format
+        elif clip_format != stitched_format:
+            raise Mp3FormatError("Clips differ in sample rate or channel mode")
+        joined.extend(frames)
+    return b"".join(joined)
+
+
+def split_template(template: str):
+    """
+    Split "<prefix> {word}<punctuation> <suffix>" into (prefix, punctuation,
+    suffix). The word clip carries the punctuation that follows it, so it is
+    spoken as the end of the sentence.
+    """
+    prefix, _, suffix = template.partition("{word}")
+    rest = suffix.lstrip(".!?,")
+    return prefix.strip(), suffix[: len(suffix) - len(rest)], rest.strip()
+
+
+def template_segments(template: str, word: str) -> List[str]:
+    """Texts of the clips that make up template.format(word=word)."""
+    prefix, punctuation, suffix = split_template(template)
+    return [text for text in (prefix, word + punctuation, suffix) if text]
+
+
+_stats_lock = threading.Lock()
+_stats = {"composed": 0, "fallbacks": 0}
+
+
+def get_composition_stats() -> dict:
+    """Messages stitched from clips vs. synthesized in full."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _rendered_clips(template, word, voice_id, context):
+    voice_id = voice_id or elevenlabs_utils.ELEVENLABS_VOICE_ID
+    settings = elevenlabs_utils.VOICE_SETTINGS.get(
+        context, elevenlabs_utils.VOICE_SETTINGS["quick_response"]
+    )
+    clips = []
+    for text in template_segments(template, word):
+        clip = elevenlabs_utils.rendered_speech(
+            text, voice_id, elevenlabs_utils.DEFAULT_MODEL_ID, settings
+        )
+        if clip is None:
+            return None
+        clips.append(clip)
+    return clips
+
+
+def can_compose(template: str, word: str, voice_id=None, context="quick_response") -> bool:
+    """True if every clip of template.format(word=word) is already rendered."""
+    return _rendered_clips(template, word, voice_id, context) is not None
+
+
+def compose_speech(
+    template: str, word: str, voice_id=None, context="quick_response"
+) -> Optional[bytes]:
+    """
+    Speech for template.format(word=word), stitched from rendered clips when
+    all of them are available, otherwise synthesized in full.
+
+    Returns:
+        bytes: Audio data, or None if synthesis failed
+    """
+    clips = _rendered_clips(template, word, voice_id, context)
+    if clips:
+        try:
+            audio = stitch(clips)
+            with _stats_lock:
+                _stats["composed"] += 1
+            return audio
+        except Mp3FormatError as e:
+            print(f"Audio stitching failed, synthesizing instead: {e}")
+    with _stats_lock:
+        _stats["fallbacks"] += 1
+    return elevenlabs_utils.generate_speech(template.format(word=word), voice_id, context=context)
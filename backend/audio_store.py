@@ -0,0 +1,162 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Audio Store Module
+
+Local blob store for rendered speech delivered by URL instead of inline.
+With AUDIO_DELIVERY=url, game responses carry a short link such as
+"/audio/<sha256>.mp3" in place of a base64 string: the clip is stored once
+here and streamed by audio_routes with Range support and long-lived cache
+headers.
+
+Clips are content-addressed (the key is the SHA-256 of the bytes), so a
+URL never changes meaning and the same reveal rendered for many games is
+stored once. Storage is a tts_cache.TTSCache over its own directory: a small
+memory tier for clips being fetched right after they are rendered, and a
+disk tier bounded by AUDIO_STORE_BYTES, least recently read evicted first.
+With BLOB_STORE=segments the disk tier is a segment_store.SegmentStore and
+clips are streamed straight out of its mmap.
+
+URLs point at the instance that rendered the clip, so url delivery needs
+AUDIO_STORE_DIR on storage shared by every instance (or a single instance).
+A segment store is owned by one process: with url delivery a worker that
+cannot own it refuses to start rather than hand out links only it can
+serve, so BLOB_STORE=segments with url delivery means a single worker.
+
+Configuration (environment variables):
+    AUDIO_DELIVERY       "inline" for base64 in the JSON body (default) or "url"
+    AUDIO_STORE_DIR      Directory of stored clips (default /tmp/20q_audio)
+    AUDIO_STORE_BYTES    Bytes of clips kept (default 256 MiB)
+    AUDIO_BASE_URL       Prefix of returned URLs, e.g. "https://api.example.com"
+                         (default "", relative URLs)
+"""
+
+import base64
+import hashlib
+import os
+import re
+import threading
+from typing import Optional
+
+from segment_store import StoreLockedError
+from tts_cache import TTSCache
+
+AUDIO_DELIVERY = os.getenv("AUDIO_DELIVERY", "inline").lower()
+AUDIO_STORE_DIR = os.getenv("AUDIO_STORE_DIR", "/tmp/20q_audio")
+AUDIO_STORE_BYTES = int(os.getenv("AUDIO_STORE_BYTES", str(256 * 1024 * 1024)))
+AUDIO_BASE_URL = os.getenv("AUDIO_BASE_URL", "").rstrip("/")
+AUDIO_PATH = "/audio"
+AUDIO_MEMORY_BYTES = 8 * 1024 * 1024
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class AudioStore:
+    """
+    Content-addressed store of MP3 clips.
+
+    Args:
+        directory (str): Where clips are kept (None keeps them in memory only)
+        max_bytes (int): Budget of the directory
+        memory_bytes (int): Budget of recently stored clips kept in memory
+        require_disk (bool): Fail instead of keeping clips in memory only when
+            another process owns the directory (default: with url delivery)
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = AUDIO_STORE_DIR,
+        max_bytes: int = AUDIO_STORE_BYTES,
+        memory_bytes: int = AUDIO_MEMORY_BYTES,
+        require_disk: bool = AUDIO_DELIVERY == "url",
+    ):
+        if not directory:
+            memory_bytes = max(memory_bytes, max_bytes)
+        try:
+            self._blobs = TTSCache(
+                memory_bytes=memory_bytes,
+                directory=directory,
+                disk_bytes=max_bytes,
+                require_disk=require_disk,
+            )
+        except StoreLockedError as e:
+            raise StoreLockedError(
+                f"{e}; AUDIO_DELIVERY=url with BLOB_STORE=segments needs a single "
+                "worker, other workers' links would not resolve here"
+            ) from e
+
+    def put(self, audio: bytes) -> str:
+        """Store a clip and return its key."""
+        key = hashlib.sha256(audio).hexdigest()
+        if self._blobs.get(key) is None:
+            self._blobs.put(key, audio)
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not KEY_PATTERN.match(key):
+            return None
+        return self._blobs.get(key)
+
+    def view(self, key: str) -> Optional[memoryview]:
+        """The clip without copying it, for streaming."""
+        if not KEY_PATTERN.match(key):
+            return None
+        return self._blobs.get_view(key)
+
+    def stats(self) -> dict:
+        return self._blobs.stats()
+
+    def close(self) -> None:
+        self._blobs.close()
+
+
+def audio_url(key: str) -> str:
+    return f"{AUDIO_BASE_URL}{AUDIO_PATH}/{key}.mp3"
+
+
+_audio_store = None
+_audio_store_lock = threading.Lock()
+
+
+def get_audio_store() -> AudioStore:
+    """Get the process-wide audio store."""
+    global _audio_store
+    with _audio_store_lock:
+        if _audio_store is None:
+            _audio_store = AudioStore()
+        return _audio_store
+
+
+def set_audio_store(store: Optional[AudioStore]) -> None:
+    """Replace (or with None, reset) the process-wide audio store."""
+    global _audio_store
+    with _audio_store_lock:
+        _audio_store = store
+
+
+def deliver_audio(result: dict, field: str, audio: Optional[bytes]) -> None:
+    """
+    Attach a clip to a response: result[field] as base64, or with
+    AUDIO_DELIVERY=url, result[field + "_url"] as a link to the stored clip.
+    """
+    if not audio:
+        return
+    if AUDIO_DELIVERY == "url":
+        result[f"{field}_url"] = audio_url(get_audio_store().put(audio))
+    else:
+        result[field] = base64.b64encode(audio).decode("utf-8")
@@ -16,6 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import EmailStr
 from datetime import datetime, timezone
@@ -24,9 +25,43 @@ from datetime import datetime, timezone
 from models import UserSignUp, UserLogin, ProfileUpdateRequest, UserResponse, TokenResponse
 from supabase_client import get_supabase_client, get_supabase_auth_client
 from security import security
+from player_search import index_player
+from jwt_auth import AUTH_VERIFY_MODE, LocalVerificationUnavailable, get_token_verifier
+from profile_cache import PROFILE_COLUMNS, get_profile_cache
+from http_clients import get_http_client
 
 router = APIRouter()
 
+def _remote_user(token):
+    """Ask Supabase Auth for the token's user (one network round trip)."""
+    user = get_supabase_auth_client().auth.get_user(token)
+    return user.user if user.user else None
+
+
+def verify_token(token, remote=False):
+    """
+    Get the user for a bearer token, or None if Supabase Auth does not know it.
+
+    Tokens are verified locally (signature, expiry, audience) unless
+    AUTH_VERIFY_MODE is "remote", `remote` is set, or there is no key
+    material for the token; then Supabase Auth is asked. Invalid tokens raise.
+    """
+    if not remote and AUTH_VERIFY_MODE != "remote":
+        try:
+            return get_token_verifier().verify(token)
+        except LocalVerificationUnavailable:
+            pass
+    return _remote_user(token)
+
+
+def _unauthorized(detail):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 # Authentication dependency
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -34,24 +69,31 @@ async def get_current_user(
     """
     Verify JWT token and get current user
     """
-    token = credentials.credentials
+    # In a worker thread: a JWKS refetch or the remote check blocks on the network
+    try:
+        user = await run_in_threadpool(verify_token, credentials.credentials)
+    except Exception as e:
+        raise _unauthorized(f"Invalid authentication credentials, {str(e)}")
+    if user is None:
+        raise _unauthorized("Invalid authentication credentials")
+    return user
+
 
+# Remote-check authentication dependency for revocation-sensitive routes
+async def get_current_user_remote(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """
+    Verify the token with Supabase Auth on every call, so a signed-out or
+    deleted user is rejected before their token expires
+    """
     try:
-        # Verify token with Supabase
-        user = get_supabase_auth_client().auth.get_user(token)
-        if not user.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return user.user
+        user = await run_in_threadpool(verify_token, credentials.credentials, remote=True)
     except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Invalid authentication credentials, {str(e)}",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized(f"Invalid authentication credentials, {str(e)}")
+    if user is None:
+        raise _unauthorized("Invalid authentication credentials")
+    return user
 
 
 # Optional authentication dependency (for endpoints that can work with or without auth)
@@ -65,12 +107,42 @@ async def get_current_user_optional(
         return None
 
     try:
-        user = get_supabase_auth_client().auth.get_user(credentials.credentials)
-        return user.user if user.user else None
+        return await run_in_threadpool(verify_token, credentials.credentials)
     except:
         return None
 
 
+def _created_at(user, player):
+    """Account creation time; locally verified tokens don't carry it, the players row does."""
+    created_at = user.created_at or player.get("created_at")
+    return created_at.isoformat() if hasattr(created_at, "isoformat") else created_at
+
+
+def _written_profile(response):
+    """
+    The players row returned by an insert/update (PostgREST returns the
+    written representation, so no follow-up select is needed).
+    """
+    rows = response.data or []
+    return rows[0] if rows else {}
+
+
+def _user_response(user, player, **overrides):
+    fields = {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.user_metadata.get("full_name"),
+        "created_at": _created_at(user, player),
+        "avatar_url": player.get("avatar_url"),
+        "last_login_at": player.get("last_login_at"),
+        "bio": player.get("bio"),
+        "favorite_category": player.get("favorite_category"),
+        "achievements": player.get("achievements", []),
+    }
+    fields.update(overrides)
+    return UserResponse(**fields)
+
+
 # Authentication Routes
 @router.post("/auth/signup", response_model=TokenResponse)
 async def sign_up(user_data: UserSignUp):
@@ -93,42 +165,32 @@ async def sign_up(user_data: UserSignUp):
                 detail="User registration failed",
             )
 
-        # Insert user into players table for FK constraint
-        get_supabase_client().table("players").insert(
-            {
-                "id": response.user.id,
-                "email": response.user.email,
-                "username": response.user.user_metadata.get("full_name"),
-                "avatar_url": None,
-                "last_login_at": response.user.created_at.isoformat(),
-                "bio": None,
-                "favorite_category": None,
-                "achievements": [],
-            }
-        ).execute()
-
-        # Fetch the player record to get all fields
-        player = (
+        # Insert user into players table for FK constraint; the inserted row
+        # comes back with the response
+        player = _written_profile(
             get_supabase_client()
             .table("players")
-            .select("avatar_url, last_login_at, bio, favorite_category, achievements")
-            .eq("id", response.user.id)
-            .single()
+            .insert(
+                {
+                    "id": response.user.id,
+                    "email": response.user.email,
+                    "username": response.user.user_metadata.get("full_name"),
+                    "avatar_url": None,
+                    "last_login_at": response.user.created_at.isoformat(),
+                    "bio": None,
+                    "favorite_category": None,
+                    "achievements": [],
+                }
+            )
             .execute()
-            .data
-            or {}
         )
-        user_response = UserResponse(
-            id=response.user.id,
-            email=response.user.email,
-            full_name=response.user.user_metadata.get("full_name"),
-            created_at=response.user.created_at.isoformat(),
-            avatar_url=player.get("avatar_url"),
-            last_login_at=player.get("last_login_at"),
-            bio=player.get("bio"),
-            favorite_category=player.get("favorite_category"),
-            achievements=player.get("achievements", []),
+        get_profile_cache().put(response.user.id, player)
+        index_player(
+            response.user.id,
+            response.user.user_metadata.get("full_name"),
+            updated_at=player.get("updated_at"),
         )
+        user_response = _user_response(response.user, player)
 
         return TokenResponse(
             access_token=response.session.access_token,
@@ -160,32 +222,17 @@ async def login(user_credentials: UserLogin):
                 detail="Invalid email or password",
             )
 
-        # Update last_login_at to now
+        # Update last_login_at to now; the updated row comes back with the response
         now_iso = datetime.now(timezone.utc).isoformat()
-        get_supabase_client().table("players").update({"last_login_at": now_iso}).eq("id", response.user.id).execute()
-
-        # Fetch the updated player record
-        player = (
+        player = _written_profile(
             get_supabase_client()
             .table("players")
-            .select("avatar_url, last_login_at, bio, favorite_category, achievements")
+            .update({"last_login_at": now_iso})
             .eq("id", response.user.id)
-            .single()
             .execute()
-            .data
-            or {}
-        )
-        user_response = UserResponse(
-            id=response.user.id,
-            email=response.user.email,
-            full_name=response.user.user_metadata.get("full_name"),
-            created_at=response.user.created_at.isoformat(),
-            avatar_url=player.get("avatar_url"),
-            last_login_at=player.get("last_login_at"),
-            bio=player.get("bio"),
-            favorite_category=player.get("favorite_category"),
-            achievements=player.get("achievements", []),
         )
+        get_profile_cache().put(response.user.id, player)
+        user_response = _user_response(response.user, player)
 
         return TokenResponse(
             access_token=response.session.access_token,
@@ -221,29 +268,23 @@ async def get_current_user_info(current_user=Depends(get_current_user)):
     Get current user information
     """
     try:
-        # Fetch the complete player record from database
-        player = (
-            get_supabase_client()
-            .table("players")
-            .select("avatar_url, last_login_at, bio, favorite_category, achievements")
-            .eq("id", current_user.id)
-            .single()
-            .execute()
-            .data
-            or {}
-        )
-        
-        return UserResponse(
-            id=current_user.id,
-            email=current_user.email,
-            full_name=current_user.user_metadata.get("full_name"),
-            created_at=current_user.created_at.isoformat(),
-            avatar_url=player.get("avatar_url"),
-            last_login_at=player.get("last_login_at"),
-            bio=player.get("bio"),
-            favorite_category=player.get("favorite_category"),
-            achievements=player.get("achievements", []),
-        )
+        # Fetch the complete player record, unless it is cached
+        cache = get_profile_cache()
+        player = cache.get(current_user.id)
+        if player is None:
+            player = (
+                get_supabase_client()
+                .table("players")
+                .select(PROFILE_COLUMNS)
+                .eq("id", current_user.id)
+                .single()
+                .execute()
+                .data
+                or {}
+            )
+            cache.put(current_user.id, player)
+
+        return _user_response(current_user, player)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -268,7 +309,6 @@ async def reset_password(email: EmailStr):
 @router.post("/auth/refresh")
 async def refresh_token(request: Request, refresh_token: str = Body(None, embed=True)):
     import os
-    import requests
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
@@ -288,7 +328,7 @@ async def refresh_token(request: Request, refresh_token: str = Body(None, embed=
     }
     data = {"refresh_token": refresh_token}
 
-    response = requests.post(url, headers=headers, json=data)
+    response = get_http_client("supabase_auth").post(url, headers=headers, json=data)
     if response.status_code != 200:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -299,38 +339,29 @@ async def refresh_token(request: Request, refresh_token: str = Body(None, embed=
 @router.put("/profile", response_model=UserResponse)
 async def update_profile(
     update: ProfileUpdateRequest,
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user_remote)
 ):
-    # Update the player in the database
-    get_supabase_client().table("players").update({
-        "username": update.full_name,
-        "email": update.email,
-        "bio": update.bio,
-        "favorite_category": update.favorite_category,
-        "avatar_url": update.avatar_url,
-    }).eq("id", current_user.id).execute()
-
-    # Fetch and return the updated user
-    player = (
+    # Update the player in the database; the updated row comes back with the response
+    player = _written_profile(
         get_supabase_client()
         .table("players")
-        .select("avatar_url, last_login_at, bio, favorite_category, achievements")
+        .update({
+            "username": update.full_name,
+            "email": update.email,
+            "bio": update.bio,
+            "favorite_category": update.favorite_category,
+            "avatar_url": update.avatar_url,
+        })
         .eq("id", current_user.id)
-        .single()
         .execute()
-        .data
-        or {}
     )
-    return UserResponse(
-        id=current_user.id,
-        email=update.email,
-        full_name=update.full_name,
-        created_at=current_user.created_at.isoformat(),
-        avatar_url=player.get("avatar_url"),
-        last_login_at=player.get("last_login_at"),
-        bio=player.get("bio"),
-        favorite_category=player.get("favorite_category"),
-        achievements=player.get("achievements", []),
+    cache = get_profile_cache()
+    cache.invalidate(current_user.id)
+    cache.put(current_user.id, player)
+    index_player(
+        current_user.id, update.full_name, update.avatar_url, updated_at=player.get("updated_at")
     )
 
+    return _user_response(current_user, player, email=update.email, full_name=update.full_name)
+
 # Add other auth/profile endpoints as needed
\ No newline at end of file
@@ -0,0 +1,141 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Per-request authentication overhead: local JWT verification vs auth.get_user.
+
+Times get_current_user's token check N times in each mode:
+  1. local HS256 (SUPABASE_JWT_SECRET)
+  2. local ES256 with the signing key from a cached JWKS
+  3. remote: supabase_auth's get_user, one round trip to /auth/v1/user
+
+The remote mode runs against a local HTTP stub, optionally delayed by
+--rtt milliseconds to stand in for the network distance to Supabase Auth.
+
+Usage (from backend/):
+    python benchmarks/bench_auth.py -n 500 --rtt 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec
+from supabase_auth import SyncGoTrueClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jwt_auth import JWKSCache, TokenVerifier  # noqa: E402
+
+SECRET = "bench-secret-bench-secret-bench-secret!"
+USER = {
+    "id": str(uuid.uuid4()),
+    "aud": "authenticated",
+    "role": "authenticated",
+    "email": "bench@example.com",
+    "app_metadata": {},
+    "user_metadata": {"full_name": "Bench"},
+    "created_at": "2025-01-01T00:00:00Z",
+}
+
+
+def _stub_handler(rtt):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(rtt / 1000)
+            body = json.dumps(USER).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _timed(fn, n):
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<12} mean={statistics.mean(samples):8.3f}ms "
+        f"p50={statistics.median(samples):8.3f}ms p95={p95:8.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=500, help="checks per mode")
+    parser.add_argument("--rtt", type=float, default=0.0, help="added stub latency (ms)")
+    args = parser.parse_args()
+
+    claims = {
+        "sub": USER["id"],
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": USER["email"],
+        "exp": int(time.time()) + 3600,
+        "user_metadata": USER["user_metadata"],
+    }
+
+    hs_token = jwt.encode(claims, SECRET, algorithm="HS256")
+    hs_verifier = TokenVerifier(jwt_secret=SECRET)
+    _report("local-hs256", _timed(lambda: hs_verifier.verify(hs_token), args.n))
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key()))
+    jwks = JWKSCache("stub", fetch=lambda url: {"keys": [{**public, "kid": "k1", "alg": "ES256"}]})
+    es_token = jwt.encode(claims, private_key, algorithm="ES256", headers={"kid": "k1"})
+    es_verifier = TokenVerifier(jwks=jwks)
+    _report("local-es256", _timed(lambda: es_verifier.verify(es_token), args.n))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _stub_handler(args.rtt))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    auth = SyncGoTrueClient(
+        url=f"http://127.0.0.1:{server.server_port}/auth/v1",
+        headers={"apikey": "stub"},
+        auto_refresh_token=False,
+        persist_session=False,
+    )
+    auth.get_user(hs_token)  # exclude the first connection
+    _report("remote", _timed(lambda: auth.get_user(hs_token), args.n))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
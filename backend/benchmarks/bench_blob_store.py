@@ -0,0 +1,98 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+TTS cache disk tier: one file per clip vs the segment blob store.
+
+Writes N clips of --size bytes into a TTSCache with the memory tier off,
+then reads them back in random order, once per store:
+  files:    one file per clip under <dir>/<key[:2]>/ (BLOB_STORE=files)
+  segments: append-only segment files read through mmap (BLOB_STORE=segments)
+
+Also times opening a cache over the populated directory (index rebuild on a
+cold start). Point --dir at the filesystem to measure, e.g. Lambda /tmp or
+a container overlay.
+
+Usage (from backend/):
+    python benchmarks/bench_blob_store.py -n 5000 --size 24000 --dir /tmp
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_cache import TTSCache  # noqa: E402
+
+
+def _timed(fn, items):
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<16} mean={statistics.mean(samples):8.1f}us "
+        f"p50={statistics.median(samples):8.1f}us p95={p95:8.1f}us"
+    )
+
+
+def run(store, keys, audio, parent):
+    directory = tempfile.mkdtemp(prefix=f"bench-{store}-", dir=parent)
+    try:
+        cache = TTSCache(memory_bytes=0, directory=directory, disk_bytes=1 << 40, store=store)
+        _report(f"{store} put", _timed(lambda key: cache.put(key, audio), keys))
+        shuffled = random.sample(keys, len(keys))
+        _report(f"{store} get", _timed(cache.get, shuffled))
+        cache.close()
+        started = time.perf_counter()
+        reopened = TTSCache(memory_bytes=0, directory=directory, disk_bytes=1 << 40, store=store)
+        reopened.get(keys[0])  # the files tier indexes lazily, on first use
+        print(f"{store} open     {(time.perf_counter() - started) * 1000:8.1f}ms")
+        reopened.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=5000, help="clips")
+    parser.add_argument("--size", type=int, default=24000, help="bytes per clip")
+    parser.add_argument("--dir", default=tempfile.gettempdir(), help="filesystem to test")
+    args = parser.parse_args()
+
+    keys = [f"{random.getrandbits(256):064x}" for _ in range(args.n)]
+    audio = os.urandom(args.size)
+    for store in ("files", "segments"):
+        run(store, keys, audio, args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Full game flows against a local storage engine, without network.
+
+Each game: start_game, one guest joins, N questions (increment + record),
+then update_game_winner (which updates both players' stats). OpenAI and
+ElevenLabs are not called; only the storage path is measured.
+
+Usage (from backend/):
+    python benchmarks/bench_game_flow.py --games 2000 --threads 16
+    python benchmarks/bench_game_flow.py --backend memory,sqlite,supabase --games 50
+
+Several comma-separated backends are run one after another on the same
+workload, so the SQLite engine can be compared with the Supabase path
+(which needs SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY and real players).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def play_one(game_logic, index, questions):
+    host, guest = f"host-{index}", f"guest-{index}"
+    game = game_logic.start_game(host, 1 + index % 3, max_players=2)
+    game_logic.join_game(game["id"], guest)
+    for _ in range(questions):
+        count = game_logic.increment_questions_asked(game["id"])
+        game_logic.record_question(game["id"], host, "Is it alive?", "No", count)
+    game_logic.update_game_winner(game["id"], host)
+    # start (insert game + host) + join, 3 calls per question, and the finish:
+    # update + apply_game_result, then achievements (participants, a stats
+    # read per player, and the host's award)
+    return 3 + questions * 3 + 7
+
+
+def run(game_logic, backend, args):
+    from repository import create_repository
+
+    kwargs = {}
+    if backend == "sqlite":
+        kwargs["path"] = args.sqlite_path
+    game_logic.set_repository(create_repository(backend, **kwargs))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        ops = sum(
+            pool.map(lambda i: play_one(game_logic, i, args.questions), range(args.games))
+        )
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"backend={backend:<9} games={args.games} threads={args.threads} "
+        f"elapsed={elapsed:.2f}s games/s={args.games / elapsed:,.0f} "
+        f"ms/game={elapsed / args.games * 1000 * args.threads:.2f} "
+        f"storage ops/s~{ops / elapsed:,.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", default="memory", help="comma-separated STORAGE_BACKENDs")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument(
+        "--sqlite-path", default=os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    )
+    args = parser.parse_args()
+
+    # Import against the in-memory engine so loading secret words needs no network
+    os.environ["STORAGE_BACKEND"] = "memory"
+    # Run the post-game pipeline inline so its storage work is measured too
+    os.environ["GAME_COMPLETION_INLINE"] = "true"
+    os.environ["GAME_COMPLETION_JOURNAL_PATH"] = ""
+    import game_logic  # noqa: E402
+
+    for backend in args.backend.split(","):
+        run(game_logic, backend.strip(), args)
+
+
+if __name__ == "__main__":
+    main()
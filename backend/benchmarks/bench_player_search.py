@@ -0,0 +1,87 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Typeahead latency of the in-memory player search index.
+
+Indexes N generated usernames, then times searches for prefixes and
+substrings of 1 to 8 characters taken from them.
+
+Usage (from backend/):
+    python benchmarks/bench_player_search.py -n 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from player_search import PlayerSearchIndex  # noqa: E402
+
+WORDS = [
+    "shadow", "quiz", "master", "lucky", "pixel", "tiger", "nova", "ghost", "ember",
+    "river", "storm", "clever", "fox", "owl", "ninja", "wizard", "rocket", "maple",
+]
+
+
+def _username(rng, i):
+    return f"{rng.choice(WORDS).title()}{rng.choice(WORDS).title()}{i % 9973}"
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<10} mean={statistics.mean(samples):6.3f}ms "
+        f"p50={statistics.median(samples):6.3f}ms p95={p95:6.3f}ms max={samples[-1]:6.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=1_000_000, help="players to index")
+    parser.add_argument("-q", type=int, default=2000, help="searches per mode")
+    args = parser.parse_args()
+
+    rng = random.Random(20)
+    names = [_username(rng, i) for i in range(args.n)]
+    index = PlayerSearchIndex()
+    started = time.perf_counter()
+    for name in names:
+        index.upsert(str(uuid.UUID(int=rng.getrandbits(128))), name)
+    print(f"indexed {len(index)} players in {time.perf_counter() - started:.1f}s")
+
+    for label, pick in (
+        ("prefix", lambda name, k: name[:k]),
+        ("substring", lambda name, k: name[len(name) - k - 2 : len(name) - 2]),
+    ):
+        samples = []
+        for _ in range(args.q):
+            query = pick(rng.choice(names), rng.randint(1, 8))
+            started = time.perf_counter()
+            index.search(query, limit=10)
+            samples.append((time.perf_counter() - started) * 1000)
+        _report(label, samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Sequential query latency with and without connection reuse.
+
+Runs the same PostgREST query N times through:
+  1. the pooled keep-alive transport from supabase_client (connections reused)
+  2. a fresh httpx client per query (new TCP + TLS handshake every time)
+
+Usage (from backend/):
+    python benchmarks/bench_supabase_pool.py -n 50
+
+Uses SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY when set. Without them a local
+HTTP stub is started so the script still shows the connection counts.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import supabase_client  # noqa: E402
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'[{"id": 1}]'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", "stub-key"
+
+
+def _timed(fn, n):
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label, samples, stats=None):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    line = (
+        f"{label:<12} mean={statistics.mean(samples):7.2f}ms "
+        f"p50={statistics.median(samples):7.2f}ms p95={p95:7.2f}ms"
+    )
+    if stats:
+        line += f" new_conns={stats['new_connections']} reused={stats['reused_connections']}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=50, help="queries per mode")
+    args = parser.parse_args()
+
+    url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    server = None
+    if not url or not key:
+        server, url, key = _start_stub()
+        print(f"No Supabase credentials, using local stub at {url}")
+
+    query_url = f"{url}/rest/v1/secret_words?select=id&limit=1"
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+    config = supabase_client.get_transport_config()
+    if server is not None:
+        config["http2"] = False  # the stub only speaks HTTP/1.1
+
+    stats = supabase_client.PoolStats()
+    pooled = supabase_client.build_http_client(config, stats)
+    pooled.get(query_url, headers=headers)  # exclude the first handshake
+    stats.reset()
+    _report("reuse", _timed(lambda: pooled.get(query_url, headers=headers), args.n), stats.snapshot())
+    pooled.close()
+
+    def fresh_query():
+        with supabase_client.build_http_client(config, stats) as client:
+            client.get(query_url, headers=headers)
+
+    stats.reset()
+    _report("no-reuse", _timed(fresh_query, args.n), stats.snapshot())
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
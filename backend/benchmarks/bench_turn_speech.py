@@ -0,0 +1,170 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+End-to-end latency of ask_question_with_tts with speech synthesized in
+series with, or alongside, the turn's database writes.
+
+Upstreams are stubbed: OpenAI by a sleep of --llm-ms, ElevenLabs by a local
+HTTP server answering after --tts-ms (reached through the pooled upstream
+client, as in production), and storage by the in-memory engine with
+--db-ms added to every call. The TTS cache is disabled so every turn
+synthesizes.
+
+  serial:   the turn's speech runs inline before the writes (previous flow)
+  parallel: the speech runs on the turn executor while the writes happen
+
+Usage (from backend/):
+    python benchmarks/bench_turn_speech.py -n 50 --llm-ms 300 --tts-ms 250 --db-ms 40
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _stub_handler(delay_ms):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay_ms / 1000)
+            body = bytes([0xFF, 0xFB, 0x90, 0xC0]) + b"\x00" * 413
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class _InlineExecutor:
+    """Runs submitted work immediately: speech before the writes, as before."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def _slow_repository(delay_ms):
+    from memory_repository import MemoryRepository
+
+    class SlowRepository(MemoryRepository):
+        pass
+
+    for name in ("get_game", "insert_question", "update_game"):
+        method = getattr(MemoryRepository, name)
+
+        def slow(self, *args, _method=method, **kwargs):
+            time.sleep(delay_ms / 1000)
+            return _method(self, *args, **kwargs)
+
+        setattr(SlowRepository, name, slow)
+    return SlowRepository()
+
+
+def _timed(fn, n):
+    samples = []
+    for i in range(n):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<9} mean={statistics.mean(samples):8.1f}ms "
+        f"p50={statistics.median(samples):8.1f}ms p95={p95:8.1f}ms"
+    )
+    return statistics.mean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=50, help="questions per mode")
+    parser.add_argument("--llm-ms", type=float, default=300.0, help="stubbed OpenAI latency")
+    parser.add_argument("--tts-ms", type=float, default=250.0, help="stubbed ElevenLabs latency")
+    parser.add_argument("--db-ms", type=float, default=40.0, help="latency added per storage call")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _stub_handler(args.tts_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["STORAGE_BACKEND"] = "memory"
+    os.environ["GAME_COMPLETION_INLINE"] = "true"
+    os.environ["GAME_COMPLETION_JOURNAL_PATH"] = ""
+    os.environ["SPECULATIVE_TTS"] = "false"
+    import elevenlabs_utils  # noqa: E402
+    import game_logic  # noqa: E402
+    from audio_catalog import AudioCatalog, set_audio_catalog  # noqa: E402
+    from tts_cache import TTSCache, set_tts_cache  # noqa: E402
+
+    elevenlabs_utils.ELEVENLABS_API_KEY = "bench"
+    elevenlabs_utils.ELEVENLABS_BASE_URL = f"http://127.0.0.1:{server.server_port}"
+    set_tts_cache(TTSCache(memory_bytes=0, directory=None))
+    set_audio_catalog(AudioCatalog())
+
+    def ask_openai(secret_word, question, *args):
+        time.sleep(args_llm)
+        return {"answer": "No"}
+
+    args_llm = args.llm_ms / 1000
+    game_logic.ask_openai_question = ask_openai
+    game_logic.set_repository(_slow_repository(args.db_ms))
+
+    def play(mode):
+        parallel = game_logic.get_turn_executor
+        if mode == "serial":
+            game_logic.get_turn_executor = lambda: _InlineExecutor()
+        game = game_logic.start_game("host", 1, enable_tts=True, voice_id="bench-voice")
+        def turn(i):
+            # Stay below question 20 so every turn has the same shape
+            if i % 18 == 17:
+                game_logic.get_repository().update_game(game["id"], {"questions_asked": 0})
+            game_logic.ask_question_with_tts(game["id"], "host", f"Q{i}?")
+
+        turn(0)  # exclude the first connection
+        mean = _report(mode, _timed(turn, args.n))
+        game_logic.get_turn_executor = parallel
+        return mean
+
+    serial = play("serial")
+    parallel = play("parallel")
+    print(f"saved {serial - parallel:.1f}ms per question ({(1 - parallel / serial) * 100:.0f}%)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
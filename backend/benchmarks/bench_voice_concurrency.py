@@ -0,0 +1,166 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Voice endpoint throughput as concurrent requests grow: async upstream I/O
+vs the previous blocking calls inside async endpoints.
+
+Sends -n text-to-speech requests at each --concurrency level through the
+app in-process (httpx ASGI transport, one event loop, as under uvicorn):
+  async:    POST /voice/text-to-speech (aiohttp, shared session)
+  blocking: the same synthesis through the sync requests client, called
+            from an async endpoint the way the voice routes used to
+
+ElevenLabs is a local HTTP stub answering after --upstream-ms. Every text is
+unique and the TTS cache is off, so each request reaches the stub. With
+non-blocking I/O throughput grows with concurrency; with blocking calls the
+event loop serializes them at about 1000 / upstream-ms requests per second.
+
+Usage (from backend/):
+    python benchmarks/bench_voice_concurrency.py -n 64 --upstream-ms 100 --concurrency 1,8,32
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _stub_handler(delay_ms):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay_ms / 1000)
+            body = b"\xff\xfb\x90\xc0" + b"\x00" * 413
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _report(label, concurrency, elapsed, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<9} c={concurrency:<4} {len(samples) / elapsed:8.1f} req/s "
+        f"p50={statistics.median(samples):8.1f}ms p95={p95:8.1f}ms"
+    )
+
+
+async def _load(client, path, n, concurrency, counter):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, json={"text": f"Line {next(counter)}"})
+            assert response.status_code == 200, response.text
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    return time.perf_counter() - started, samples
+
+
+async def run(args, levels):
+    import httpx
+    from fastapi import Depends
+
+    import auth_routes
+    import voice_routes
+    from elevenlabs_utils import synthesize_speech
+    from models import TextToSpeechRequest
+    from whisper import whisper
+
+    # whisper logs at INFO; keep the per-request lines out of the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    async def current_user():
+        return object()
+
+    whisper.dependency_overrides[auth_routes.get_current_user] = current_user
+
+    @whisper.post("/bench/blocking-text-to-speech")
+    async def blocking_text_to_speech(
+        request: TextToSpeechRequest, current_user=Depends(auth_routes.get_current_user)
+    ):
+        synthesize_speech(
+            request.text,
+            request.voice_settings.voice_id,
+            voice_routes.VOICE_MODEL_ID,
+            voice_routes.voice_settings_payload(request.voice_settings),
+            base_url=voice_routes.ELEVENLABS_API_URL,
+        )
+        return {}
+
+    counter = itertools.count()
+    transport = httpx.ASGITransport(app=whisper)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for label, path in (
+            ("blocking", "/bench/blocking-text-to-speech"),
+            ("async", "/voice/text-to-speech"),
+        ):
+            await _load(client, path, levels[-1], levels[-1], counter)  # open connections
+            for concurrency in levels:
+                elapsed, samples = await _load(client, path, args.n, concurrency, counter)
+                _report(label, concurrency, elapsed, samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--upstream-ms", type=float, default=100.0, help="stubbed ElevenLabs latency")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated in-flight limits")
+    args = parser.parse_args()
+    levels = sorted(int(c) for c in args.concurrency.split(","))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _stub_handler(args.upstream_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["STORAGE_BACKEND"] = "memory"
+    os.environ["ELEVENLABS_API_KEY"] = "bench"
+    os.environ["TTS_CACHE_MEMORY_BYTES"] = "0"
+    os.environ["TTS_CACHE_DIR"] = ""
+    os.environ["HTTP_POOL_MAXSIZE"] = str(max(levels))
+    import voice_routes  # noqa: E402
+
+    voice_routes.ELEVENLABS_API_URL = f"http://127.0.0.1:{server.server_port}"
+    asyncio.run(run(args, levels))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
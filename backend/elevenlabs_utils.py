@@ -20,6 +20,11 @@ import os
 import requests
 import base64
 
+from http_clients import get_http_client
+from tts_cache import get_tts_cache, normalize_text, tts_cache_key
+from audio_catalog import get_audio_catalog
+from voice_catalog import get_voice_catalog
+
 # Optional: use dotenv only locally
 try:
     from dotenv import load_dotenv
@@ -33,6 +38,7 @@ ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "9BWtsMINqrJLrRacOk9x")
 
 # ElevenLabs API configuration
 ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL")
+DEFAULT_MODEL_ID = "eleven_turbo_v2"
 
 # Voice settings for different contexts
 VOICE_SETTINGS = {
@@ -62,8 +68,71 @@ def is_tts_available():
     return bool(ELEVENLABS_API_KEY)
 
 
+class ElevenLabsError(Exception):
+    """Non-200 response from the ElevenLabs text-to-speech API."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(f"ElevenLabs API error: {status_code} - {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def rendered_speech(text, voice_id, model_id, voice_settings):
+    """
+    Audio already rendered for these exact parameters (audio catalog or
+    TTS cache), or None. Never calls ElevenLabs.
+    """
+    key = tts_cache_key(normalize_text(text), voice_id, model_id, voice_settings)
+    audio = get_audio_catalog().get(key)
+    if audio is None:
+        audio = get_tts_cache().get(key)
+    return audio
+
+
+def synthesize_speech(
+    text, voice_id, model_id, voice_settings, api_key=None, base_url=None
+):
+    """
+    Synthesize speech through the pre-rendered audio catalog and the TTS
+    cache: catalog lines are never synthesized, and other identical text,
+    voice, model and settings are only sent to ElevenLabs once.
+
+    Args:
+        text (str): Text to convert to speech (whitespace is normalized)
+        voice_id (str): ElevenLabs voice ID
+        model_id (str): ElevenLabs model ID
+        voice_settings (dict): ElevenLabs voice_settings payload
+        api_key (str): API key (defaults to ELEVENLABS_API_KEY)
+        base_url (str): API base URL (defaults to ELEVENLABS_BASE_URL)
+
+    Returns:
+        bytes: Audio data (mp3)
+
+    Raises:
+        ElevenLabsError: ElevenLabs answered with a non-200 status
+    """
+    text = normalize_text(text)
+    audio = rendered_speech(text, voice_id, model_id, voice_settings)
+    if audio is not None:
+        return audio
+
+    url = f"{base_url or ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}"
+    headers = {
+        "Accept": "audio/mpeg",
+        "Content-Type": "application/json",
+        "xi-api-key": api_key or ELEVENLABS_API_KEY,
+    }
+    data = {"text": text, "model_id": model_id, "voice_settings": voice_settings}
+
+    response = get_http_client("elevenlabs").post(url, json=data, headers=headers)
+    if response.status_code != 200:
+        raise ElevenLabsError(response.status_code, response.text)
+    get_tts_cache().put(tts_cache_key(text, voice_id, model_id, voice_settings), response.content)
+    return response.content
+
+
 def generate_speech(
-    text, voice_id=None, model_id="eleven_turbo_v2", context="quick_response"
+    text, voice_id=None, model_id=DEFAULT_MODEL_ID, context="quick_response"
 ):
     """
     Generate speech using ElevenLabs API with context-aware settings
@@ -87,23 +156,11 @@ def generate_speech(
     # Get voice settings based on context
     voice_settings = VOICE_SETTINGS.get(context, VOICE_SETTINGS["quick_response"])
 
-    url = f"{ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}"
-
-    headers = {
-        "Accept": "audio/mpeg",
-        "Content-Type": "application/json",
-        "xi-api-key": ELEVENLABS_API_KEY,
-    }
-
-    data = {"text": text, "model_id": model_id, "voice_settings": voice_settings}
-
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=30)
-        if response.status_code == 200:
-            return response.content
-        else:
-            print(f"ElevenLabs API error: {response.status_code} - {response.text}")
-            return None
+        return synthesize_speech(text, voice_id, model_id, voice_settings)
+    except ElevenLabsError as e:
+        print(f"ElevenLabs API error: {e.status_code} - {e.detail}")
+        return None
     except requests.exceptions.Timeout:
         print("ElevenLabs API timeout")
         return None
@@ -112,8 +169,110 @@ def generate_speech(
         return None
 
 
+TERMINAL_PUNCTUATION = frozenset(".!?…")
+
+
+class SpeechPlan:
+    """
+    Everything one response says, rendered with at most one ElevenLabs
+    round trip.
+
+    Phrases are added in speaking order. render() stitches them from
+    already rendered audio (catalog, TTS cache, a template's clips or audio
+    passed in) when every phrase has some; otherwise the whole text goes out
+    as a single synthesis request.
+
+    Args:
+        voice_id (str): ElevenLabs voice ID (optional)
+        model_id (str): ElevenLabs model ID
+        context (str): Context for voice settings
+
+    Usage:
+        plan = SpeechPlan(voice_id)
+        plan.add(answer)
+        plan.add_message("halfway_point")
+        audio = plan.render()
+    """
+
+    def __init__(self, voice_id=None, model_id=DEFAULT_MODEL_ID, context="quick_response"):
+        self.voice_id = voice_id or ELEVENLABS_VOICE_ID
+        self.model_id = model_id
+        self.context = context
+        self.round_trips = 0
+        # One entry per phrase: (text, alternative clip splits, audio if already known)
+        self._phrases = []
+
+    def __bool__(self):
+        return bool(self._phrases)
+
+    @property
+    def text(self):
+        # A phrase without closing punctuation ("Yes") would run into the next
+        # one in a single synthesis: end it with a period
+        return " ".join(
+            text if text.rstrip()[-1:] in TERMINAL_PUNCTUATION else text.rstrip() + "."
+            for text, _, _ in self._phrases
+        )
+
+    def add(self, text, audio=None):
+        """Add a phrase; audio is its pre-rendered speech, if the caller has it."""
+        if text:
+            self._phrases.append((text, [], audio))
+        return self
+
+    def add_message(self, message_type, **kwargs):
+        """Add one of GAME_MESSAGES."""
+        return self.add(GAME_MESSAGES[message_type].format(**kwargs))
+
+    def add_template(self, template, word, audio=None):
+        """Add template.format(word=word), which can also be stitched from its clips."""
+        from audio_stitch import template_segments
+
+        self._phrases.append(
+            (template.format(word=word), [template_segments(template, word)], audio)
+        )
+        return self
+
+    def render(self):
+        """
+        Returns:
+            bytes: Audio for every phrase in order, or None if synthesis failed
+        """
+        from audio_stitch import Mp3FormatError, stitch
+
+        clips = self._rendered_clips()
+        if clips is not None and len(clips) == 1:
+            return clips[0]
+        if clips:
+            try:
+                return stitch(clips)
+            except Mp3FormatError as e:
+                print(f"Audio stitching failed, synthesizing instead: {e}")
+        self.round_trips += 1
+        return generate_speech(self.text, self.voice_id, self.model_id, self.context)
+
+    def _rendered_clips(self):
+        settings = VOICE_SETTINGS.get(self.context, VOICE_SETTINGS["quick_response"])
+        clips = []
+        for text, splits, audio in self._phrases:
+            if audio:
+                clips.append(audio)
+                continue
+            for segments in [[text]] + splits:
+                found = [
+                    rendered_speech(segment, self.voice_id, self.model_id, settings)
+                    for segment in segments
+                ]
+                if all(found):
+                    clips.extend(found)
+                    break
+            else:
+                return None
+        return clips
+
+
 def generate_speech_base64(
-    text, voice_id=None, model_id="eleven_turbo_v2", context="quick_response"
+    text, voice_id=None, model_id=DEFAULT_MODEL_ID, context="quick_response"
 ):
     """
     Generate speech and return as base64 string
@@ -127,47 +286,53 @@ def generate_speech_base64(
     return None
 
 
+def _voice_summaries(payload):
+    """Simplified voice info from a /voices response."""
+    return [
+        {
+            "voice_id": voice["voice_id"],
+            "name": voice["name"],
+            "category": voice.get("category", "Unknown"),
+            "description": voice.get("description", ""),
+            "preview_url": voice.get("preview_url"),
+        }
+        for voice in payload.get("voices", [])
+    ]
+
+
 def get_available_voices():
-    """Get list of available voices from ElevenLabs"""
+    """Get list of available voices from ElevenLabs (via the voice catalog cache)"""
     if not is_tts_available():
         return []
 
-    url = f"{ELEVENLABS_BASE_URL}/voices"
-    headers = {"xi-api-key": ELEVENLABS_API_KEY}
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            voices_data = response.json().get("voices", [])
-            # Return simplified voice info
-            return [
-                {
-                    "voice_id": voice["voice_id"],
-                    "name": voice["name"],
-                    "category": voice.get("category", "Unknown"),
-                    "description": voice.get("description", ""),
-                    "preview_url": voice.get("preview_url"),
-                }
-                for voice in voices_data
-            ]
-        else:
-            print(f"Error fetching voices: {response.status_code}")
-            return []
+        voices = get_voice_catalog().voices(ELEVENLABS_API_KEY, ELEVENLABS_BASE_URL)
+        return _voice_summaries({"voices": voices})
     except Exception as e:
         print(f"Error fetching voices: {e}")
         return []
 
 
 def get_voice_info(voice_id):
-    """Get information about a specific voice"""
+    """
+    Get information about a specific voice: from the voice catalog, or from
+    ElevenLabs for a voice added since the catalog was last refreshed
+    """
     if not is_tts_available():
         return None
 
+    try:
+        voice = get_voice_catalog().voice(voice_id, ELEVENLABS_API_KEY, ELEVENLABS_BASE_URL)
+        if voice is not None:
+            return voice
+    except Exception as e:
+        print(f"Voice catalog unavailable: {e}")
+
     url = f"{ELEVENLABS_BASE_URL}/voices/{voice_id}"
     headers = {"xi-api-key": ELEVENLABS_API_KEY}
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_http_client("elevenlabs").get(url, headers=headers, timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -178,6 +343,18 @@ def get_voice_info(voice_id):
         return None
 
 
+def is_known_voice(voice_id):
+    """
+    Whether voice_id is in the ElevenLabs voice catalog.
+
+    Returns:
+        bool: True or False, or None when TTS is off or the catalog cannot be loaded
+    """
+    if not is_tts_available():
+        return None
+    return get_voice_catalog().is_known(voice_id, ELEVENLABS_API_KEY, ELEVENLABS_BASE_URL)
+
+
 def get_user_subscription_info():
     """Get user's ElevenLabs subscription information"""
     if not is_tts_available():
@@ -187,7 +364,7 @@ def get_user_subscription_info():
     headers = {"xi-api-key": ELEVENLABS_API_KEY}
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_http_client("elevenlabs").get(url, headers=headers, timeout=10)
         if response.status_code == 200:
             return response.json()
         else:
@@ -236,13 +413,49 @@ def generate_game_message_audio(message_type, voice_id=None, **kwargs):
     return generate_speech_base64(message, voice_id, context=context)
 
 
-# Async version for better performance (optional)
+# Async versions, on the shared aiohttp session opened at app startup
+# (see http_clients.AsyncUpstreamClient)
 try:
     import asyncio
-    import aiohttp
+    import aiohttp  # noqa: F401
+
+    from http_clients import get_async_http_client
+
+    async def synthesize_speech_async(
+        text, voice_id, model_id, voice_settings, api_key=None, base_url=None
+    ):
+        """
+        Async version of synthesize_speech: same catalog and cache lookups,
+        with the ElevenLabs call on the shared aiohttp session. The cache can
+        read and write its disk tier, so lookups and stores run in a thread.
+
+        Raises:
+            ElevenLabsError: ElevenLabs answered with a non-200 status
+        """
+        text = normalize_text(text)
+        audio = await asyncio.to_thread(rendered_speech, text, voice_id, model_id, voice_settings)
+        if audio is not None:
+            return audio
+
+        url = f"{base_url or ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}"
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": api_key or ELEVENLABS_API_KEY,
+        }
+        data = {"text": text, "model_id": model_id, "voice_settings": voice_settings}
+
+        response = await get_async_http_client("elevenlabs").post(url, json=data, headers=headers)
+        if response.status != 200:
+            raise ElevenLabsError(response.status, await response.text())
+        audio = await response.read()
+        await asyncio.to_thread(
+            get_tts_cache().put, tts_cache_key(text, voice_id, model_id, voice_settings), audio
+        )
+        return audio
 
     async def generate_speech_async(
-        text, voice_id=None, model_id="eleven_turbo_v2", context="quick_response"
+        text, voice_id=None, model_id=DEFAULT_MODEL_ID, context="quick_response"
     ):
         """Async version of generate_speech for better performance"""
         if not is_tts_available():
@@ -252,27 +465,12 @@ try:
             voice_id = ELEVENLABS_VOICE_ID
 
         voice_settings = VOICE_SETTINGS.get(context, VOICE_SETTINGS["quick_response"])
-        url = f"{ELEVENLABS_BASE_URL}/text-to-speech/{voice_id}"
-
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ELEVENLABS_API_KEY,
-        }
-
-        data = {"text": text, "model_id": model_id, "voice_settings": voice_settings}
 
         try:
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30)
-            ) as session:
-                async with session.post(url, json=data, headers=headers) as response:
-                    if response.status == 200:
-                        return await response.read()
-                    else:
-                        error_text = await response.text()
-                        print(f"ElevenLabs API error: {response.status} - {error_text}")
-                        return None
+            return await synthesize_speech_async(text, voice_id, model_id, voice_settings)
+        except ElevenLabsError as e:
+            print(f"ElevenLabs API error: {e.status_code} - {e.detail}")
+            return None
         except asyncio.TimeoutError:
             print("ElevenLabs API timeout")
             return None
@@ -280,6 +478,50 @@ try:
             print(f"Error generating speech: {e}")
             return None
 
+    async def get_available_voices_async():
+        """Async version of get_available_voices"""
+        if not is_tts_available():
+            return []
+
+        try:
+            voices = await get_voice_catalog().voices_async(
+                ELEVENLABS_API_KEY, ELEVENLABS_BASE_URL
+            )
+            return _voice_summaries({"voices": voices})
+        except Exception as e:
+            print(f"Error fetching voices: {e}")
+            return []
+
+    async def get_voice_info_async(voice_id):
+        """Async version of get_voice_info"""
+        if not is_tts_available():
+            return None
+
+        try:
+            voice = await get_voice_catalog().voice_async(
+                voice_id, ELEVENLABS_API_KEY, ELEVENLABS_BASE_URL
+            )
+            if voice is not None:
+                return voice
+        except Exception as e:
+            print(f"Voice catalog unavailable: {e}")
+
+        url = f"{ELEVENLABS_BASE_URL}/voices/{voice_id}"
+        headers = {"xi-api-key": ELEVENLABS_API_KEY}
+
+        try:
+            response = await get_async_http_client("elevenlabs").get(
+                url, headers=headers, timeout=10
+            )
+            if response.status == 200:
+                return await response.json()
+            else:
+                print(f"Error fetching voice info: {response.status}")
+                return None
+        except Exception as e:
+            print(f"Error fetching voice info: {e}")
+            return None
+
 except ImportError:
     # aiohttp not available, async functions won't work
     pass
@@ -0,0 +1,353 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Game Completion Pipeline Module
+
+Work that follows the end of a game (player stats, achievements, history and
+leaderboard projections) runs here, after the response has been sent, instead
+of inside the request that finished the game.
+
+Key Features:
+- In-process task queue served by background worker threads
+- Ordered, named stages; a job remembers which stages already succeeded, so
+  a retry only re-runs the ones that failed
+- Retries with exponential backoff
+- Durable fallback: jobs are journaled (write_behind.AppendOnlyJournal) until
+  every stage has succeeded; jobs that exhaust their retries stay in the
+  journal and are re-queued by the next process that opens it
+- Database sweep: jobs can still be lost with the machine (a recycled Lambda
+  environment takes /tmp and its frozen threads with it), so sweep_fn is
+  asked every sweep_interval seconds for finished games whose stats were
+  never applied, and they are submitted again
+
+Stages receive the job dict ({"game_id", "winner_id", "reason", ...}) and
+must be idempotent, since a job can run again after a crash.
+
+Usage:
+    pipeline = CompletionPipeline(journal_path="/tmp/20q_game_completion.journal")
+    pipeline.register_stage("stats", lambda job: apply_stats(job["game_id"]))
+    pipeline.start()
+    pipeline.submit(game_id, winner_id=player_id, reason="guessed")
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from typing import Callable, List, Optional
+
+from write_behind import AppendOnlyJournal
+
+
+class CompletionPipeline:
+    """
+    Background runner for game completion stages.
+
+    Args:
+        journal_path (str): Journal file for pending jobs, or None for memory only
+        workers (int): Number of worker threads
+        max_attempts (int): Attempts per job before it is parked in the journal
+        retry_backoff (float): Delay in seconds before the first retry; doubles
+            on every further attempt
+        inline (bool): Run jobs synchronously inside submit() (no threads)
+        sweep_fn (callable): Returns finished games ({"id", "winner_id"}) that
+            still need completing; None disables the sweep
+        sweep_interval (float): Seconds between sweeps
+    """
+
+    def __init__(
+        self,
+        journal_path: Optional[str] = None,
+        workers: int = 2,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+        inline: bool = False,
+        sweep_fn: Optional[Callable[[], List[dict]]] = None,
+        sweep_interval: float = 300.0,
+    ):
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.inline = inline
+        self.sweep_fn = sweep_fn
+        self.sweep_interval = sweep_interval
+        self.journal = AppendOnlyJournal(journal_path) if journal_path else None
+
+        self._stages: List[tuple] = []
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []  # heap of (ready_at, seq, job)
+        self._seq = itertools.count()
+        self._jobs = {}  # job id -> job, for every job not yet completed
+        self._running = 0
+        self._failed = {}  # job id -> job that exhausted its attempts
+        self._threads: List[threading.Thread] = []
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = False
+
+        # Durable fallback: anything still journaled never finished
+        recovered = self.journal.read() if self.journal else []
+        for job in recovered:
+            job["attempts"] = 0
+            self._jobs[job["id"]] = job
+            self._push(job, 0)
+        if recovered:
+            print(f"Recovered {len(recovered)} unfinished game completion jobs")
+
+    def register_stage(self, name: str, fn: Callable[[dict], object]) -> None:
+        """Add a stage; stages run in registration order. Re-registering replaces."""
+        with self._cond:
+            self._stages = [(n, f) for n, f in self._stages if n != name]
+            self._stages.append((name, fn))
+
+    def stage_names(self) -> List[str]:
+        with self._cond:
+            return [name for name, _ in self._stages]
+
+    def submit(self, game_id, winner_id=None, reason="guessed") -> dict:
+        """
+        Queue the completion work for a finished game.
+
+        Returns once the job is journaled; the stages run in the background
+        (or before returning, in inline mode).
+        """
+        job = {
+            "id": str(uuid.uuid4()),
+            "game_id": game_id,
+            "winner_id": winner_id,
+            "reason": reason,
+            "done": [],
+            "attempts": 0,
+        }
+        with self._cond:
+            if self.journal:
+                self.journal.append([job])
+            self._jobs[job["id"]] = job
+            if not self.inline:
+                self._push(job, 0)
+                self._cond.notify()
+        if self.inline:
+            self._run_inline(job)
+        return job
+
+    def pending_count(self) -> int:
+        """Jobs queued or running (parked failures are not counted)."""
+        with self._cond:
+            return len(self._jobs) - len(self._failed)
+
+    def failed_jobs(self) -> List[dict]:
+        with self._cond:
+            return [dict(job) for job in self._failed.values()]
+
+    def retry_failed(self) -> int:
+        """Re-queue jobs that exhausted their attempts. Returns how many."""
+        with self._cond:
+            jobs = list(self._failed.values())
+            self._failed.clear()
+            for job in jobs:
+                job["attempts"] = 0
+                if not self.inline:
+                    self._push(job, 0)
+            self._cond.notify_all()
+        if self.inline:
+            for job in jobs:
+                self._run_inline(job)
+        return len(jobs)
+
+    def sweep(self) -> int:
+        """Submit the games sweep_fn returns that have no pending job. Returns how many."""
+        if self.sweep_fn is None:
+            return 0
+        try:
+            games = self.sweep_fn()
+        except Exception as e:
+            print(f"Error sweeping for unfinished game completions: {e}")
+            return 0
+        with self._cond:
+            pending = {job["game_id"] for job in self._jobs.values()}
+        submitted = 0
+        for game in games:
+            if game["id"] in pending:
+                continue
+            self.submit(game["id"], winner_id=game.get("winner_id"), reason="sweep")
+            submitted += 1
+        if submitted:
+            print(f"Sweep re-submitted {submitted} game completion jobs")
+        return submitted
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until no job is queued or running.
+
+        Runs the queue on the calling thread when no workers are started, so
+        tests and shutdown hooks can finish the work deterministically.
+
+        Returns:
+            bool: True if the queue emptied before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._threads_alive():
+            while self._process_one(deadline, block=True):
+                pass
+        with self._cond:
+            while self._queue or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.1)
+            return True
+
+    def start(self) -> None:
+        """Start the worker threads and the sweep (idempotent)."""
+        self._stop = False
+        if self.sweep_fn is not None and not (self._sweeper and self._sweeper.is_alive()):
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, name="game-completion-sweep", daemon=True
+            )
+            self._sweeper.start()
+        if self.inline or self._threads_alive():
+            return
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"game-completion-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Finish queued work (up to timeout) and stop the workers."""
+        self.drain(timeout)
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._sweeper is not None:
+            self._sweeper.join(timeout)
+            self._sweeper = None
+
+    # Internals
+
+    def _threads_alive(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def _sweep_loop(self) -> None:
+        while True:
+            self.sweep()
+            with self._cond:
+                self._cond.wait_for(lambda: self._stop, self.sweep_interval)
+                if self._stop:
+                    return
+
+    def _push(self, job: dict, delay: float) -> None:
+        heapq.heappush(self._queue, (time.monotonic() + delay, next(self._seq), job))
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                if self._stop:
+                    return
+            self._process_one(None, block=True, stop_aware=True)
+
+    def _process_one(self, deadline, block=False, stop_aware=False) -> bool:
+        """Run the next ready job. Returns False when there was nothing to run."""
+        with self._cond:
+            while True:
+                if stop_aware and self._stop:
+                    return False
+                now = time.monotonic()
+                if self._queue and self._queue[0][0] <= now:
+                    _, _, job = heapq.heappop(self._queue)
+                    self._running += 1
+                    break
+                if not self._queue and not stop_aware:
+                    return False
+                if not block:
+                    return False
+                wait = self._queue[0][0] - now if self._queue else None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+        try:
+            self._run_job(job)
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+        return True
+
+    def _run_inline(self, job: dict) -> None:
+        while job["id"] in self._jobs and job["id"] not in self._failed:
+            if self._run_job(job):
+                return
+            with self._cond:
+                entry = next((e for e in self._queue if e[2] is job), None)
+                if entry is None:
+                    return
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            time.sleep(max(0.0, entry[0] - time.monotonic()))
+
+    def _run_job(self, job: dict) -> bool:
+        """Run the job's remaining stages; schedule a retry or park it on failure."""
+        with self._cond:
+            stages = list(self._stages)
+            job["attempts"] += 1
+        for name, fn in stages:
+            if name in job["done"]:
+                continue
+            try:
+                fn(job)
+            except Exception as e:
+                print(
+                    f"Error in game completion stage {name} for game "
+                    f"{job['game_id']} (attempt {job['attempts']}): {e}"
+                )
+                self._retry_or_park(job)
+                return False
+            with self._cond:
+                job["done"].append(name)
+        self._finish(job)
+        return True
+
+    def _retry_or_park(self, job: dict) -> None:
+        with self._cond:
+            if job["attempts"] >= self.max_attempts:
+                # Stays journaled; the next process (or retry_failed) picks it up
+                self._failed[job["id"]] = job
+                self._rewrite_journal()
+                print(f"Game completion for game {job['game_id']} parked after {job['attempts']} attempts")
+                return
+            self._push(job, self.retry_backoff * (2 ** (job["attempts"] - 1)))
+            self._rewrite_journal()
+            self._cond.notify()
+
+    def _finish(self, job: dict) -> None:
+        with self._cond:
+            self._jobs.pop(job["id"], None)
+            self._failed.pop(job["id"], None)
+            self._rewrite_journal()
+
+    def _rewrite_journal(self) -> None:
+        # Caller holds _cond; records finished stages so a replay skips them
+        if self.journal:
+            self.journal.rewrite(list(self._jobs.values()))
@@ -0,0 +1,142 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Game History Module
+
+A player's finished games, served from the player_game_history projection
+(one row per player and game, written by the "history" stage of the game
+completion pipeline) plus a summary read from player_stats and
+player_stats_difficulty. Both are maintained as games finish, so a request
+reads one index range and two small rows however many games the player has
+played.
+
+Pages are newest first and use keyset cursors over (completed_at, game_id).
+"""
+
+import base64
+import json
+from typing import Optional
+
+HISTORY_RESULTS = ("won", "lost")
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(row: dict) -> str:
+    key = [str(row["completed_at"]), str(row["game_id"])]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Invalid history cursor") from e
+    if not isinstance(key, list) or len(key) != 2 or not all(isinstance(v, str) for v in key):
+        raise ValueError("Invalid history cursor")
+    return tuple(key)
+
+
+def record_for_game(repository, game_id) -> int:
+    """Write a finished game's history rows (run by the completion pipeline)."""
+    return repository.record_game_history(game_id)
+
+
+def _summary_stats(row: Optional[dict]) -> dict:
+    row = row or {}
+    played = row.get("games_played") or 0
+    won = row.get("games_won") or 0
+    return {
+        "games_played": played,
+        "games_won": won,
+        "games_lost": played - won,
+        "win_rate": row.get("win_rate") or 0,
+        "average_questions_to_win": row.get("average_questions_to_win") or 0,
+    }
+
+
+def player_summary(repository, player_id) -> dict:
+    """Totals, streaks and a per-difficulty breakdown for one player."""
+    overall = repository.get_player_stats(player_id) or {}
+    summary = _summary_stats(overall)
+    summary.update(
+        {
+            "current_streak": overall.get("current_streak") or 0,
+            "best_streak": overall.get("best_streak") or 0,
+            "fastest_win_questions": overall.get("fastest_win_questions") or None,
+            "last_game_played_at": overall.get("last_game_played_at"),
+            "by_difficulty": {
+                str(row["difficulty"]): _summary_stats(row)
+                for row in sorted(
+                    repository.list_player_stats_difficulty([player_id]),
+                    key=lambda r: r["difficulty"],
+                )
+            },
+        }
+    )
+    return summary
+
+
+def get_history(
+    repository,
+    player_id,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    result: Optional[str] = None,
+    difficulty: Optional[int] = None,
+):
+    """
+    One page of a player's history, newest first.
+
+    Returns:
+        tuple: (games, next_cursor); next_cursor is None on the last page
+    """
+    if result is not None and result not in HISTORY_RESULTS:
+        raise ValueError(f"Unknown result: {result}. Use one of {', '.join(HISTORY_RESULTS)}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    before = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether another page exists
+    rows = repository.list_game_history(
+        player_id, limit=limit + 1, before=before, result=result, difficulty=difficulty
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    opponent_ids = {o for row in rows for o in row.get("opponent_ids") or []}
+    usernames = {}
+    if opponent_ids:
+        usernames = {p["id"]: p.get("username") for p in repository.get_players(sorted(opponent_ids))}
+
+    games = []
+    for row in rows:
+        opponents = [
+            {"player_id": o, "username": usernames.get(o)} for o in row.get("opponent_ids") or []
+        ]
+        games.append(
+            {
+                "id": row["game_id"],
+                "result": row["result"],
+                "word": row.get("secret_word"),
+                "questions": row.get("questions_asked") or 0,
+                "difficulty": row.get("difficulty"),
+                "date": row["completed_at"],
+                "opponent": ", ".join(o["username"] or "Unknown" for o in opponents) or None,
+                "opponents": opponents,
+            }
+        )
+    next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+    return games, next_cursor
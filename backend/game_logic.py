@@ -16,13 +16,28 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import os
 import random
-import base64
+import asyncio
+import atexit
+import threading
+import uuid
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 from openai import OpenAI
 
-from supabase_client import get_supabase_client
-from elevenlabs_utils import generate_speech
+from supabase_client import get_supabase_client, get_async_supabase_client
+from repository import SupabaseRepository, apply_result_to_stats, create_repository
+from elevenlabs_utils import SpeechPlan, generate_speech, is_known_voice
+from write_behind import WriteBehindBuffer, process_journal_path
+from game_completion import CompletionPipeline
+from achievements import award_for_game
+from leaderboard import apply_game as apply_game_to_leaderboard
+from game_history import record_for_game as record_game_history
+from speculative_audio import SPECULATIVE_TTS, get_speculative_audio
+from audio_stitch import can_compose, compose_speech
+from audio_store import deliver_audio
+from http_clients import get_async_http_client
 
 # Optional: use dotenv only locally
 try:
@@ -39,12 +54,78 @@ ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "9BWtsMINqrJLrRacOk9x")
 # ElevenLabs API configuration
 ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL")
 
+# Write-behind configuration for game_questions inserts
+QUESTION_WRITE_BEHIND = os.getenv("QUESTION_WRITE_BEHIND", "false").lower() == "true"
+QUESTION_FLUSH_INTERVAL = float(os.getenv("QUESTION_FLUSH_INTERVAL", "1.0"))
+QUESTION_FLUSH_BATCH_SIZE = int(os.getenv("QUESTION_FLUSH_BATCH_SIZE", "50"))
+QUESTION_JOURNAL_PATH = os.getenv(
+    "QUESTION_JOURNAL_PATH", "/tmp/20q_game_questions.journal"
+)
+
+MAX_QUESTIONS = 20
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+
+# Threads synthesizing turn speech concurrently with the turn's database writes
+TURN_SPEECH_WORKERS = int(os.getenv("TURN_SPEECH_WORKERS", "8"))
+_turn_executor = None
+_turn_executor_lock = threading.Lock()
+
+# Spoken game lines. The fixed ones (every line without the secret word)
+# are pre-rendered by audio_catalog, so only the reveals reach ElevenLabs.
+WELCOME_MESSAGE = "Welcome to 20 Questions! I'm thinking of something with difficulty level {difficulty}. You have 20 questions to guess what it is. Good luck!"
+ANSWERS = ("Yes", "No", "Maybe")
+INCORRECT_GUESS_MESSAGE = "Sorry, that's not correct."
+CORRECT_GUESS_MESSAGE = "Congratulations! You guessed correctly! The answer was {word}."
+GAME_OVER_MESSAGE = "Game over! You've used all 20 questions. The answer was {word}."
+# Reveals are stitched from catalog clips by audio_stitch when it has them
+REVEAL_TEMPLATES = (CORRECT_GUESS_MESSAGE, GAME_OVER_MESSAGE)
+
+_question_buffer = None
+
+# Game completion pipeline (stats, achievements, ...) run after the response
+GAME_COMPLETION_INLINE = os.getenv("GAME_COMPLETION_INLINE", "false").lower() == "true"
+GAME_COMPLETION_WORKERS = int(os.getenv("GAME_COMPLETION_WORKERS", "2"))
+GAME_COMPLETION_MAX_ATTEMPTS = int(os.getenv("GAME_COMPLETION_MAX_ATTEMPTS", "5"))
+GAME_COMPLETION_RETRY_BACKOFF = float(os.getenv("GAME_COMPLETION_RETRY_BACKOFF", "0.5"))
+GAME_COMPLETION_JOURNAL_PATH = os.getenv(
+    "GAME_COMPLETION_JOURNAL_PATH", "/tmp/20q_game_completion.journal"
+)
+# Database sweep for finished games whose stats were never applied
+# (seconds between sweeps, 0 disables; and how old a game must be first)
+GAME_COMPLETION_SWEEP_INTERVAL = float(os.getenv("GAME_COMPLETION_SWEEP_INTERVAL", "300"))
+GAME_COMPLETION_SWEEP_GRACE = float(os.getenv("GAME_COMPLETION_SWEEP_GRACE", "120"))
+
+_completion_pipeline = None
+
+# Storage engine, chosen by STORAGE_BACKEND ("supabase" by default)
+_repository = None
+
+
+def get_repository():
+    """Get the storage repository used by all game functions."""
+    global _repository
+    if _repository is None:
+        if os.getenv("STORAGE_BACKEND", "supabase").strip().lower() == "supabase":
+            # Late-bound so the Supabase client can be swapped at runtime (and in tests)
+            _repository = SupabaseRepository(
+                lambda: get_supabase_client(), lambda: get_async_supabase_client()
+            )
+        else:
+            _repository = create_repository()
+    return _repository
+
+
+def set_repository(repository):
+    """Replace the storage repository (e.g. with a MemoryRepository for load runs)."""
+    global _repository
+    _repository = repository
+
 # Load secret words from supabase
 def load_secret_words():
-    response = get_supabase_client().table("secret_words").select("*").execute()
-    if not response.data:
+    words = get_repository().list_secret_words()
+    if not words:
         raise Exception("Supabase error: No data returned from secret_words table.")
-    return response.data
+    return words
 
 
 SECRET_WORDS = load_secret_words()
@@ -60,6 +141,16 @@ def choose_secret_word(difficulty=None):
     return random.choice(filtered)["name"]
 
 
+def _check_voice_id(voice_id):
+    """
+    Reject a voice_id the ElevenLabs voice catalog does not list, so it fails
+    here rather than at synthesis time. Not checked when TTS is off or the
+    catalog cannot be loaded.
+    """
+    if voice_id and is_known_voice(voice_id) is False:
+        raise ValueError(f"Unknown voice_id: {voice_id}")
+
+
 def start_game(
     host_player_id,
     difficulty,
@@ -70,6 +161,7 @@ def start_game(
     guessed_word=None,
 ):
     """Create a new game with a secret word, store difficulty, and support game_type, max_players, guessed_word."""
+    _check_voice_id(voice_id)
     try:
         secret_word_entry = None
         if difficulty:
@@ -108,56 +200,85 @@ def start_game(
         if guessed_word is not None and guessed_word.strip() != "":
             data["guessed_word"] = guessed_word
             
-        response = get_supabase_client().table("games").insert(data).execute()
-        if not response.data:
+        game_data = get_repository().create_game(data)
+        if not game_data:
             raise Exception("Failed to start game with the given host player ID.")
-        game_data = response.data[0]
         
         # Add host player as participant in the game
         join_game(game_data["id"], host_player_id)
+        # Both endings are fixed by the secret word: render the ones that cannot
+        # be stitched from catalog clips while the game is played
+        if enable_tts and SPECULATIVE_TTS:
+            get_speculative_audio().prefetch(
+                game_data["id"], _ending_texts(secret_word, data["voice_id"]), data["voice_id"]
+            )
         # Generate welcome message with TTS if enabled
         if enable_tts:
-            welcome_text = f"Welcome to 20 Questions! I'm thinking of something with difficulty level {difficulty_level}. You have 20 questions to guess what it is. Good luck!"
+            welcome_text = WELCOME_MESSAGE.format(difficulty=difficulty_level)
             audio_data = generate_speech(welcome_text, voice_id)
-            if audio_data:
-                game_data["welcome_audio"] = base64.b64encode(audio_data).decode(
-                    "utf-8"
-                )
+            deliver_audio(game_data, "welcome_audio", audio_data)
         return game_data
     except Exception as e:
         print(f"Error in start_game: {e}")
         raise
 
 
+def _ending_texts(secret_word, voice_id):
+    """Reveals worth rendering ahead: the ones that cannot be stitched from clips."""
+    return [
+        template.format(word=secret_word)
+        for template in REVEAL_TEMPLATES
+        if not can_compose(template, secret_word, voice_id)
+    ]
+
+
+def _take_ending(game_id, template, secret_word, voice_id):
+    """A game's win or loss reveal from its speculative render, or None."""
+    speculative = get_speculative_audio()
+    if SPECULATIVE_TTS and speculative.pending(game_id):
+        return speculative.take(game_id, template.format(word=secret_word), voice_id)
+    return None
+
+
+def _ending_speech(game_id, template, secret_word, voice_id):
+    """
+    Audio for a game's win or loss reveal: its speculative render when there
+    is one, else stitched from clips, else synthesized.
+    """
+    audio = _take_ending(game_id, template, secret_word, voice_id)
+    return audio or compose_speech(template, secret_word, voice_id)
+
+
 def join_game(game_id, player_id):
     """Add a player to a game."""
     try:
-        data = {"game_id": game_id, "player_id": player_id}
-        response = (
-            get_supabase_client().table("game_participants").insert(data).execute()
-        )
-        if not response.data:
+        participant = get_repository().add_participant(game_id, player_id)
+        if not participant:
             raise Exception("Failed to join game with the given game ID.")
-        return response.data[0]
+        return participant
     except Exception as e:
         print(f"Error in join_game: {e}")
         raise
 
 
+def _question_messages(secret_word, question):
+    """Chat messages asking OpenAI to answer a question about the secret word."""
+    instruction_prompt = f"""You are playing 20 Questions. The secret word is "{secret_word}"""
+    prompt = f"""The player asked: "{question}" Answer with only one word: Yes, No, or Maybe."""
+    return [
+        {"role": "system", "content": instruction_prompt},
+        {"role": "user", "content": prompt}
+    ]
+
+
 def ask_openai_question(secret_word, question, enable_tts=False, voice_id=None):
     """Send player question + secret word to OpenAI, get Yes/No/Maybe answer with optional TTS."""
     try:
         client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
 
-        instruction_prompt = f"""You are playing 20 Questions. The secret word is "{secret_word}"""
-        prompt = f"""The player asked: "{question}" Answer with only one word: Yes, No, or Maybe."""
-
         response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": instruction_prompt},
-                {"role": "user", "content": prompt}
-            ],
+            messages=_question_messages(secret_word, question),
             temperature=0
         )
         answer = response.choices[0].message.content.strip().rstrip('.')
@@ -166,8 +287,7 @@ def ask_openai_question(secret_word, question, enable_tts=False, voice_id=None):
         # Generate TTS if enabled
         if enable_tts and answer:
             audio_data = generate_speech(answer, voice_id)
-            if audio_data:
-                result["audio"] = base64.b64encode(audio_data).decode("utf-8")
+            deliver_audio(result, "audio", audio_data)
 
         return result
     except Exception as e:
@@ -175,6 +295,36 @@ def ask_openai_question(secret_word, question, enable_tts=False, voice_id=None):
         raise
 
 
+def get_turn_executor():
+    """Bounded pool that synthesizes a turn's speech alongside its database writes."""
+    global _turn_executor
+    with _turn_executor_lock:
+        if _turn_executor is None:
+            _turn_executor = ThreadPoolExecutor(
+                max_workers=TURN_SPEECH_WORKERS, thread_name_prefix="turn-speech"
+            )
+        return _turn_executor
+
+
+def _turn_speech(game_id, secret_word, voice_id, answer, question_count):
+    """
+    One audio clip for everything a turn says: the answer, a
+    halfway/final-question notice and the game-over reveal.
+    """
+    plan = SpeechPlan(voice_id).add(answer)
+    if question_count == MAX_QUESTIONS // 2:
+        plan.add_message("halfway_point")
+    elif question_count == MAX_QUESTIONS - 1:
+        plan.add_message("final_question")
+    if question_count >= MAX_QUESTIONS:
+        plan.add_template(
+            GAME_OVER_MESSAGE,
+            secret_word,
+            audio=_take_ending(game_id, GAME_OVER_MESSAGE, secret_word, voice_id),
+        )
+    return plan.render() if plan else None
+
+
 def ask_question_with_tts(game_id, player_id, question):
     """
     Complete question flow with TTS support based on game settings.
@@ -187,10 +337,20 @@ def ask_question_with_tts(game_id, player_id, question):
         enable_tts = game.get("enable_tts", False)
         voice_id = game.get("voice_id")
 
-        # Get the AI response
-        ai_response = ask_openai_question(secret_word, question, enable_tts, voice_id)
+        # Get the AI response (speech is planned below, once per turn)
+        ai_response = ask_openai_question(secret_word, question)
         answer = ai_response["answer"]
 
+        # The turn's speech depends only on the answer and the question
+        # number, which the game row already tells us: synthesize it while
+        # the counter and the question row are written.
+        expected_count = (game.get("questions_asked") or 0) + 1
+        speech = None
+        if enable_tts:
+            speech = get_turn_executor().submit(
+                _turn_speech, game_id, secret_word, voice_id, answer, expected_count
+            )
+
         # Increment question count
         question_count = increment_questions_asked(game_id)
 
@@ -203,29 +363,31 @@ def ask_question_with_tts(game_id, player_id, question):
         result = {
             "answer": answer,
             "question_number": question_count,
-            "questions_remaining": max(0, 20 - question_count),
-            "game_over": question_count >= 20,
+            "questions_remaining": max(0, MAX_QUESTIONS - question_count),
+            "game_over": question_count >= MAX_QUESTIONS,
             "question_record": question_record,
         }
 
-        # Add audio if available
-        if "audio" in ai_response:
-            result["audio"] = ai_response["audio"]
-
         # Check if game should end due to question limit
-        if question_count >= 20:
+        if question_count >= MAX_QUESTIONS:
             # Update game status to finished (no winner)
-            get_supabase_client().table("games").update(
-                {"status": "finished", "completed_at": "now()"}
-            ).eq("id", game_id).execute()
-
-            if enable_tts:
-                game_over_text = f"Game over! You've used all 20 questions. The answer was {secret_word}."
-                audio_data = generate_speech(game_over_text, voice_id)
-                if audio_data:
-                    result["game_over_audio"] = base64.b64encode(audio_data).decode(
-                        "utf-8"
+            get_repository().update_game(
+                game_id, {"status": "finished", "completed_at": "now()"}
+            )
+            complete_game(game_id, None, reason="question_limit")
+
+        if speech is not None:
+            try:
+                audio_data = speech.result()
+                # Another question landed in between: the notices are for a
+                # different number
+                if question_count != expected_count:
+                    audio_data = _turn_speech(
+                        game_id, secret_word, voice_id, answer, question_count
                     )
+                deliver_audio(result, "audio", audio_data)
+            except Exception as e:
+                print(f"Error generating turn speech: {e}")
 
         return result
 
@@ -234,21 +396,73 @@ def ask_question_with_tts(game_id, player_id, question):
         raise
 
 
+def _insert_question_rows(rows):
+    """Multi-row insert used by the write-behind buffer.
+
+    Rows carry client-generated ids, so replaying a batch after a crash
+    ignores the rows that already made it in.
+    """
+    get_repository().insert_questions(rows)
+
+
+def get_question_buffer():
+    """Lazily create and start the game_questions write-behind buffer."""
+    global _question_buffer
+    if _question_buffer is None:
+        _question_buffer = WriteBehindBuffer(
+            "game_questions",
+            flush_fn=_insert_question_rows,
+            journal_path=(
+                process_journal_path(QUESTION_JOURNAL_PATH) if QUESTION_JOURNAL_PATH else None
+            ),
+            batch_size=QUESTION_FLUSH_BATCH_SIZE,
+            flush_interval=QUESTION_FLUSH_INTERVAL,
+        )
+        _question_buffer.start()
+    return _question_buffer
+
+
+def flush_pending_questions():
+    """
+    Push any buffered questions to the database before reading them back.
+    Raises if they could not be written, so a caller such as the stats stage
+    is retried rather than going on without them.
+    """
+    if _question_buffer is not None:
+        _question_buffer.flush(strict=True)
+
+
+def _question_row(game_id, player_id, question, answer, question_number):
+    """Build a game_questions row from an answer string or ask_openai_question result."""
+    answer_str = answer["answer"] if isinstance(answer, dict) else answer
+    data = {
+        "game_id": game_id,
+        "player_id": player_id,
+        "question": question,
+        "answer": True if answer_str.lower() == "yes" else False,
+        "question_number": question_number,
+    }
+    if QUESTION_WRITE_BEHIND:
+        data["id"] = str(uuid.uuid4())
+        data["asked_at"] = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    return data
+
+
 def record_question(game_id, player_id, question, answer, question_number):
-    """Record a question and answer in Supabase."""
+    """Record a question and answer in Supabase.
+
+    With QUESTION_WRITE_BEHIND enabled the row is journaled locally and
+    inserted in a later batch, so the caller does not wait on the database.
+    """
     try:
-        answer_str = answer["answer"] if isinstance(answer, dict) else answer
-        data = {
-            "game_id": game_id,
-            "player_id": player_id,
-            "question": question,
-            "answer": True if answer_str.lower() == "yes" else False,
-            "question_number": question_number,
-        }
-        response = get_supabase_client().table("game_questions").insert(data).execute()
-        if not response.data:
+        data = _question_row(game_id, player_id, question, answer, question_number)
+        if QUESTION_WRITE_BEHIND:
+            get_question_buffer().put(data)
+            return data
+        question_record = get_repository().insert_question(data)
+        if not question_record:
             raise Exception("Failed to record question with the given game ID.")
-        return response.data[0]
+        return question_record
     except Exception as e:
         print(f"Error in record_question: {e}")
         raise
@@ -257,17 +471,10 @@ def record_question(game_id, player_id, question, answer, question_number):
 def get_game(game_id):
     """Retrieve game data."""
     try:
-        response = (
-            get_supabase_client()
-            .table("games")
-            .select("*")
-            .eq("id", game_id)
-            .single()
-            .execute()
-        )
-        if not response.data:
+        game = get_repository().get_game(game_id)
+        if not game:
             raise Exception("No game found with the given ID.")
-        return response.data
+        return game
     except Exception as e:
         # Optionally log the error here
         print(f"Error in get_game: {e}")
@@ -279,16 +486,8 @@ def increment_questions_asked(game_id):
     try:
         game = get_game(game_id)
         new_count = (game["questions_asked"] or 0) + 1
-        response = (
-            get_supabase_client()
-            .table("games")
-            .update({"questions_asked": new_count})
-            .eq("id", game_id)
-            .execute()
-        )
-        # If your supabase client raises exceptions on error, you may not need to check response.error
-        # If not, uncomment the next lines:
-        if not response.data:
+        updated = get_repository().update_game(game_id, {"questions_asked": new_count})
+        if not updated:
             raise Exception("No question asked with the given game ID.")
         return new_count
     except Exception as e:
@@ -332,6 +531,7 @@ def get_game_audio_settings(game_id):
 
 def update_game_tts_settings(game_id, enable_tts=None, voice_id=None):
     """Update TTS settings for an existing game"""
+    _check_voice_id(voice_id)
     try:
         update_data = {}
         if enable_tts is not None:
@@ -340,16 +540,24 @@ def update_game_tts_settings(game_id, enable_tts=None, voice_id=None):
             update_data["voice_id"] = voice_id
 
         if update_data:
-            response = (
-                get_supabase_client()
-                .table("games")
-                .update(update_data)
-                .eq("id", game_id)
-                .execute()
-            )
-            if not response.data:
+            updated = get_repository().update_game(game_id, update_data)
+            if not updated:
                 raise Exception(f"Failed to update TTS settings for game ID: {game_id}")
-            return response.data[0]
+            # Renders for the old voice (or for no TTS at all) will not be used
+            if SPECULATIVE_TTS:
+                speculative = get_speculative_audio()
+                speculative.release(game_id)
+                if (
+                    updated.get("enable_tts")
+                    and updated.get("secret_word")
+                    and updated.get("status") == "playing"
+                ):
+                    speculative.prefetch(
+                        game_id,
+                        _ending_texts(updated["secret_word"], updated.get("voice_id")),
+                        updated.get("voice_id"),
+                    )
+            return updated
 
         return get_game(game_id)
     except Exception as e:
@@ -386,27 +594,25 @@ def make_guess(game_id, player_id, guess, enable_tts=False, voice_id=None):
         if result_text == "Correct":
             # Update game winner and status
             update_game_winner(game_id, player_id)
-            success_message = (
-                f"Congratulations! You guessed correctly! The answer was {secret_word}."
-            )
+            success_message = CORRECT_GUESS_MESSAGE.format(word=secret_word)
             result["message"] = success_message
             result["secret_word"] = secret_word
 
             # Generate TTS for success
             if enable_tts:
-                audio_data = generate_speech(success_message, voice_id)
-                if audio_data:
-                    result["audio"] = base64.b64encode(audio_data).decode("utf-8")
+                audio_data = _ending_speech(
+                    game_id, CORRECT_GUESS_MESSAGE, secret_word, voice_id
+                )
+                deliver_audio(result, "audio", audio_data)
         else:
-            failure_message = f"Sorry, that's not correct."
+            failure_message = INCORRECT_GUESS_MESSAGE
             result["message"] = failure_message
             result["secret_word"] = secret_word
 
             # Generate TTS for failure
             if enable_tts:
                 audio_data = generate_speech(failure_message, voice_id)
-                if audio_data:
-                    result["audio"] = base64.b64encode(audio_data).decode("utf-8")
+                deliver_audio(result, "audio", audio_data)
 
         return result
     except Exception as e:
@@ -417,70 +623,139 @@ def make_guess(game_id, player_id, guess, enable_tts=False, voice_id=None):
 def update_game_winner(game_id, winner_id):
     """Set winner and mark game as finished."""
     try:
-        response = (
-            get_supabase_client()
-            .table("games")
-            .update(
-                {"winner_id": winner_id, "status": "finished", "completed_at": "now()"}
-            )
-            .eq("id", game_id)
-            .execute()
+        updated = get_repository().update_game(
+            game_id,
+            {"winner_id": winner_id, "status": "finished", "completed_at": "now()"},
         )
 
-        if not response.data:
+        if not updated:
             raise Exception(f"Failed to update game winner for game ID: {game_id}")
 
-        # After finishing, update player stats
-        update_player_stats(winner_id, game_id)
+        # Stats and achievements are applied after the response goes out
+        complete_game(game_id, winner_id, reason="guessed")
     except Exception as e:
         print(f"Error in update_game_winner: {e}")
         raise
 
 
-def update_player_stats(winner_id, game_id):
-    try:
-        game = get_game(game_id)
-        difficulty = game.get("difficulty", 1)
-
-        participants_resp = (
-            get_supabase_client()
-            .table("game_participants")
-            .select("player_id")
-            .eq("game_id", game_id)
-            .execute()
+def _unapplied_games():
+    """Finished games older than the sweep grace period whose stats were never applied."""
+    finished_before = (
+        datetime.now(timezone.utc).replace(tzinfo=None)
+        - timedelta(seconds=GAME_COMPLETION_SWEEP_GRACE)
+    ).isoformat()
+    return get_repository().list_unapplied_games(finished_before)
+
+
+def get_completion_pipeline():
+    """Get the game completion pipeline, creating and starting it on first use."""
+    global _completion_pipeline
+    if _completion_pipeline is None:
+        pipeline = CompletionPipeline(
+            journal_path=(
+                process_journal_path(GAME_COMPLETION_JOURNAL_PATH)
+                if GAME_COMPLETION_JOURNAL_PATH
+                else None
+            ),
+            workers=GAME_COMPLETION_WORKERS,
+            max_attempts=GAME_COMPLETION_MAX_ATTEMPTS,
+            retry_backoff=GAME_COMPLETION_RETRY_BACKOFF,
+            inline=GAME_COMPLETION_INLINE,
+            sweep_fn=_unapplied_games if GAME_COMPLETION_SWEEP_INTERVAL > 0 else None,
+            sweep_interval=GAME_COMPLETION_SWEEP_INTERVAL,
         )
-        if not participants_resp.data:
-            raise Exception(f"Failed to get participants for game ID: {game_id}")
-        players = participants_resp.data
-
-        for p in players:
-            player_id = p["player_id"]
-            is_winner = player_id == winner_id
-
-            # Get current stats
-            overall_stats = get_or_create_player_stats(player_id)
-            diff_stats = get_or_create_player_stats_difficulty(player_id, difficulty)
-
-            # Count questions asked by this player in this game
-            questions_resp = (
-                get_supabase_client()
-                .table("game_questions")
-                .select("*")
-                .eq("game_id", game_id)
-                .eq("player_id", player_id)
-                .execute()
-            )
-            questions_asked = len(questions_resp.data)
+        # Other workers' buffered questions get every attempt but the last to
+        # land; a row that never does (e.g. dead-lettered) must not hold the
+        # game's stats back for good
+        pipeline.register_stage(
+            "stats",
+            lambda job: update_player_stats(
+                job["winner_id"],
+                job["game_id"],
+                wait_for_questions=job["attempts"] < pipeline.max_attempts,
+            ),
+        )
+        pipeline.register_stage(
+            "history", lambda job: record_game_history(get_repository(), job["game_id"])
+        )
+        pipeline.register_stage(
+            "achievements", lambda job: award_for_game(get_repository(), job["game_id"])
+        )
+        pipeline.register_stage(
+            "leaderboard", lambda job: apply_game_to_leaderboard(get_repository(), job["game_id"])
+        )
+        pipeline.start()
+        atexit.register(pipeline.close)
+        _completion_pipeline = pipeline
+    return _completion_pipeline
+
+
+def set_completion_pipeline(pipeline):
+    """Replace the completion pipeline (e.g. with an inline one in tests)."""
+    global _completion_pipeline
+    _completion_pipeline = pipeline
 
-            # Update overall and difficulty stats
-            updated_overall = update_stats_data(
-                overall_stats, is_winner, questions_asked
-            )
-            updated_diff = update_stats_data(diff_stats, is_winner, questions_asked)
 
-            # Upsert both stats
-            upsert_player_stats(player_id, updated_overall)
-            upsert_player_stats_difficulty(player_id, difficulty, updated_diff)
+def close_completion_pipeline(timeout=5.0):
+    """Finish queued completion jobs and stop the workers (called on shutdown)."""
+    if _completion_pipeline is not None:
+        _completion_pipeline.close(timeout)
+
+
+def complete_game(game_id, winner_id=None, reason="guessed"):
+    """
+    Queue the post-game work (stats, history, achievements, ...) for a finished game.
+
+    Returns once the job is journaled, so a crash before the stages run does
+    not lose the result.
+    """
+    try:
+        return get_completion_pipeline().submit(game_id, winner_id=winner_id, reason=reason)
+    except Exception as e:
+        print(f"Error in complete_game: {e}")
+        raise
+
+
+def _require_questions_stored(game_id):
+    """
+    With write-behind, a game's last questions can still be buffered by
+    another worker or instance. games.questions_asked is written before the
+    question row, so raise until as many rows are stored.
+    """
+    repository = get_repository()
+    game = repository.get_game(game_id) or {}
+    asked = game.get("questions_asked") or 0
+    stored = sum(
+        repository.count_questions(game_id, p["player_id"])
+        for p in repository.list_participants(game_id)
+    )
+    if stored < asked:
+        raise Exception(f"{asked - stored} questions of game {game_id} are not stored yet")
+
+
+def update_player_stats(winner_id, game_id, wait_for_questions=False):
+    """
+    Apply a finished game to every participant's overall and per-difficulty
+    stats. The winner is read from the game row (set by update_game_winner),
+    and the aggregation runs atomically in the storage engine
+    (the apply_game_result() function on Supabase).
+
+    Args:
+        wait_for_questions (bool): With QUESTION_WRITE_BEHIND, raise (to be
+            retried) while the game has questions not yet stored
+
+    Returns:
+        bool: False if this game's result had already been applied
+    """
+    try:
+        # Stats count this game's questions, so buffered rows must land first
+        flush_pending_questions()
+        if QUESTION_WRITE_BEHIND and wait_for_questions:
+            _require_questions_stored(game_id)
+        applied = get_repository().apply_game_result(game_id)
+        if not applied:
+            print(f"Stats for game {game_id} were already applied")
+        return applied
     except Exception as e:
         print(f"Error in update_player_stats: {e}")
         raise
@@ -488,15 +763,9 @@ def update_player_stats(winner_id, game_id):
 
 def get_or_create_player_stats(player_id):
     try:
-        resp = (
-            get_supabase_client()
-            .table("player_stats")
-            .select("*")
-            .eq("player_id", player_id)
-            .execute()
-        )
-        if resp.data:
-            return resp.data[0]
+        stats = get_repository().get_player_stats(player_id)
+        if stats:
+            return stats
         # If none exists, create default stats object
         return {
             "player_id": player_id,
@@ -513,16 +782,9 @@ def get_or_create_player_stats(player_id):
 
 def get_or_create_player_stats_difficulty(player_id, difficulty):
     try:
-        resp = (
-            get_supabase_client()
-            .table("player_stats_difficulty")
-            .select("*")
-            .eq("player_id", player_id)
-            .eq("difficulty", difficulty)
-            .execute()
-        )
-        if resp.data:
-            return resp.data[0]
+        stats = get_repository().get_player_stats_difficulty(player_id, difficulty)
+        if stats:
+            return stats
         # Create default stats if missing
         return {
             "player_id": player_id,
@@ -539,36 +801,13 @@ def get_or_create_player_stats_difficulty(player_id, difficulty):
 
 
 def update_stats_data(current_stats, is_winner, questions_asked):
-    games_played = current_stats.get("games_played", 0) + 1
-    games_won = current_stats.get("games_won", 0) + (1 if is_winner else 0)
-    total_questions_asked = (
-        current_stats.get("total_questions_asked", 0) + questions_asked
-    )
-
-    # Update average questions to win only if player won
-    avg_qtw = current_stats.get("average_questions_to_win", 0)
-    if is_winner:
-        total_win_q = avg_qtw * current_stats.get("games_won", 0)
-        average_questions_to_win = (total_win_q + questions_asked) / games_won
-    else:
-        average_questions_to_win = avg_qtw
-
-    win_rate = round((games_won / games_played) * 100, 2) if games_played > 0 else 0
-
-    return {
-        "player_id": current_stats["player_id"],
-        "games_played": games_played,
-        "games_won": games_won,
-        "total_questions_asked": total_questions_asked,
-        "average_questions_to_win": average_questions_to_win,
-        "win_rate": win_rate,
-    }
+    """Return current_stats with one more game result folded in."""
+    return apply_result_to_stats(current_stats, is_winner, questions_asked)
 
 
 def upsert_player_stats(player_id, stats):
     try:
-        resp = get_supabase_client().table("player_stats").upsert(stats).execute()
-        if not resp.data:
+        if not get_repository().upsert_player_stats(stats):
             raise Exception(f"Failed to upsert player_stats for player ID: {player_id}")
     except Exception as e:
         print(f"Error in upsert_player_stats: {e}")
@@ -579,13 +818,7 @@ def upsert_player_stats_difficulty(player_id, difficulty, stats):
     try:
         # Make sure difficulty field is present
         stats["difficulty"] = difficulty
-        resp = (
-            get_supabase_client()
-            .table("player_stats_difficulty")
-            .upsert(stats)
-            .execute()
-        )
-        if not resp.data:
+        if not get_repository().upsert_player_stats_difficulty(stats):
             raise Exception(
                 f"Failed to upsert player_stats_difficulty for player ID: {player_id}"
             )
@@ -594,17 +827,107 @@ def upsert_player_stats_difficulty(player_id, difficulty, stats):
         raise
 
 
+# Async versions of the hot-path functions for `async def` routes.
+# They use the repository's async methods (the async Supabase client for the
+# default engine), so awaiting them never blocks the event loop.
+
+
+async def get_game_async(game_id):
+    """Retrieve game data."""
+    try:
+        game = await get_repository().get_game_async(game_id)
+        if not game:
+            raise Exception("No game found with the given ID.")
+        return game
+    except Exception as e:
+        print(f"Error in get_game_async: {e}")
+        raise
+
+
+async def ask_openai_question_async(secret_word, question):
+    """ask_openai_question without TTS, on the shared async OpenAI session."""
+    try:
+        response = await get_async_http_client("openai").post(
+            OPENAI_CHAT_URL,
+            headers={"Authorization": f"Bearer {os.environ['OPENAI_API_KEY']}"},
+            json={
+                "model": "gpt-4o-mini",
+                "messages": _question_messages(secret_word, question),
+                "temperature": 0,
+            },
+        )
+        if response.status != 200:
+            raise Exception(f"OpenAI API error: {response.status} - {await response.text()}")
+        completion = await response.json()
+        answer = completion["choices"][0]["message"]["content"].strip().rstrip('.')
+        return {"answer": answer}
+    except Exception as e:
+        print(f"Error in ask_openai_question_async: {e}")
+        raise
+
+
+async def join_game_async(game_id, player_id):
+    """Add a player to a game."""
+    try:
+        participant = await get_repository().add_participant_async(game_id, player_id)
+        if not participant:
+            raise Exception("Failed to join game with the given game ID.")
+        return participant
+    except Exception as e:
+        print(f"Error in join_game_async: {e}")
+        raise
+
+
+async def increment_questions_asked_async(game_id):
+    """Increment questions_asked count for the game."""
+    try:
+        game = await get_game_async(game_id)
+        new_count = (game["questions_asked"] or 0) + 1
+        updated = await get_repository().update_game_async(
+            game_id, {"questions_asked": new_count}
+        )
+        if not updated:
+            raise Exception("No question asked with the given game ID.")
+        return new_count
+    except Exception as e:
+        print(f"Error in increment_questions_asked_async: {e}")
+        raise
+
+
+async def record_question_async(game_id, player_id, question, answer, question_number):
+    """Record a question and answer in Supabase."""
+    try:
+        data = _question_row(game_id, player_id, question, answer, question_number)
+        if QUESTION_WRITE_BEHIND:
+            # The journal append fsyncs, so keep it off the event loop
+            await asyncio.to_thread(get_question_buffer().put, data)
+            return data
+        question_record = await get_repository().insert_question_async(data)
+        if not question_record:
+            raise Exception("Failed to record question with the given game ID.")
+        return question_record
+    except Exception as e:
+        print(f"Error in record_question_async: {e}")
+        raise
+
+
+async def update_player_stats_async(winner_id, game_id):
+    try:
+        if _question_buffer is not None:
+            await asyncio.to_thread(flush_pending_questions)
+        applied = await get_repository().apply_game_result_async(game_id)
+        if not applied:
+            print(f"Stats for game {game_id} were already applied")
+        return applied
+    except Exception as e:
+        print(f"Error in update_player_stats_async: {e}")
+        raise
+
+
 def get_remaining_slots(game_id):
     game = get_game(game_id)
     max_players = game.get("max_players")
     if max_players is None:
         max_players = 1
-    participants_resp = (
-        get_supabase_client()
-        .table("game_participants")
-        .select("player_id")
-        .eq("game_id", game_id)
-        .execute()
-    )
-    current_count = len(participants_resp.data) if participants_resp.data else 0
+    current_count = len(get_repository().list_participants(game_id))
     return max_players - current_count
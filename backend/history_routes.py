@@ -0,0 +1,56 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth_routes import get_current_user
+from game_history import get_history, player_summary
+from game_logic import get_repository
+
+router = APIRouter()
+
+
+@router.get("/history")
+def api_get_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    result: Optional[str] = None,
+    difficulty: Optional[int] = None,
+    current_user=Depends(get_current_user),
+):
+    """
+    Get one page of the authenticated player's finished games, newest first,
+    with their summary stats (requires authentication). Filter by result
+    ("won" or "lost") or difficulty, and pass the previous page's
+    next_cursor to continue.
+    """
+    try:
+        repository = get_repository()
+        games, next_cursor = get_history(
+            repository, current_user.id, limit, cursor, result, difficulty
+        )
+        return {
+            "summary": player_summary(repository, current_user.id),
+            "games": games,
+            "next_cursor": next_cursor,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
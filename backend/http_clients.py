@@ -0,0 +1,445 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Upstream HTTP Clients Module
+
+One pooled requests.Session per upstream service (ElevenLabs, OpenAI,
+Supabase Auth), shared by every call site instead of bare requests.get/post,
+so connections are kept alive and reused between calls.
+
+Each client has:
+- a per-host connection pool (HTTP_POOL_MAXSIZE connections per host)
+- default connect/read timeouts, applied when a call does not pass one
+- a retry policy: connection failures are always retried; 429/502/503/504
+  responses only for the methods the upstream marks safe to repeat
+  (Retry-After is honoured)
+- request, error, connection and latency counters (see get_http_client_stats)
+
+Async code uses the aiohttp equivalent, AsyncUpstreamClient: one shared
+ClientSession per upstream with a connector pool, cached DNS lookups and
+keep-alive, opened on app startup (open_async_http_clients) and closed on
+shutdown (close_async_http_clients). Its responses are read in full
+before they are returned, so the connection goes straight back to the pool.
+
+Usage:
+    response = get_http_client("elevenlabs").post(url, json=data, headers=headers)
+    response = await get_async_http_client("elevenlabs").post(url, json=data)
+    stats = get_http_client_stats()["elevenlabs"]
+
+Configuration (environment variables):
+    HTTP_POOL_MAXSIZE       Connections kept per upstream host (default 10)
+    HTTP_CONNECT_TIMEOUT    Connect timeout in seconds (default 5)
+    HTTP_MAX_RETRIES        Retries per call (default 2)
+    HTTP_RETRY_BACKOFF      Backoff factor between retries, seconds (default 0.3)
+    HTTP_KEEPALIVE_TIMEOUT  Seconds an idle async connection is kept (default 60)
+    HTTP_DNS_CACHE_TTL      Seconds async clients cache DNS lookups (default 300)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - async clients need aiohttp
+    aiohttp = None
+
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+RETRY_STATUSES = (429, 502, 503, 504)
+LATENCY_SAMPLES = 1000
+
+# Upstream name -> read timeout and the methods safe to retry on a 429/5xx.
+# Token refresh is not retried after the request was sent: Supabase rotates
+# the refresh token, so a repeated POST would fail with the spent token.
+UPSTREAMS = {
+    "elevenlabs": {"read_timeout": 30.0, "retry_methods": {"GET", "POST"}},
+    "openai": {"read_timeout": 60.0, "retry_methods": {"GET", "POST"}},
+    "supabase_auth": {"read_timeout": 10.0, "retry_methods": {"GET"}},
+}
+
+
+class UpstreamStats:
+    """
+    Request, error, connection and latency counters for one upstream.
+
+    New connections are counted when urllib3 opens one, so every request
+    that did not open a connection reused a pooled one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.new_connections = 0
+            self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def on_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def on_response(self, latency: float, error: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self._latencies.append(latency)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+            "avg_latency_ms": (
+                round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0
+            ),
+            "p50_latency_ms": percentile(0.5),
+            "p95_latency_ms": percentile(0.95),
+        }
+
+
+def _counting_pool(base, stats):
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.on_new_connection()
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class _CountingAdapter(HTTPAdapter):
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self._stats),
+            "https": _counting_pool(HTTPSConnectionPool, self._stats),
+        }
+
+
+class UpstreamClient:
+    """
+    Pooled, retrying HTTP client for one upstream service.
+
+    Args:
+        name (str): Upstream name, used in stats
+        read_timeout (float): Default read timeout in seconds
+        connect_timeout (float): Default connect timeout in seconds
+        retry_methods (set): Methods retried on RETRY_STATUSES
+        max_retries (int): Retries per call
+        backoff (float): urllib3 backoff factor
+        pool_maxsize (int): Connections kept per host
+    """
+
+    def __init__(
+        self,
+        name: str,
+        read_timeout: float = 30.0,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        retry_methods=frozenset({"GET"}),
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    ):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = UpstreamStats()
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(retry_methods),
+            backoff_factor=backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = _CountingAdapter(
+            self.stats, pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        error = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            self.stats.on_response(time.perf_counter() - started, error)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(name: str) -> UpstreamClient:
+    """Get the shared client for an upstream in UPSTREAMS, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            if name not in UPSTREAMS:
+                raise ValueError(f"Unknown upstream: {name}")
+            client = _clients[name] = UpstreamClient(name, **UPSTREAMS[name])
+        return client
+
+
+def get_http_client_stats() -> dict:
+    """
+    Connection reuse and latency statistics per upstream.
+
+    Returns:
+        dict: {"elevenlabs": {...}, "elevenlabs_async": {...}, ...} for the
+        clients used so far
+    """
+    with _clients_lock:
+        clients = dict(_clients)
+        # Clients of finished event loops (e.g. asyncio.run) are gone for good
+        finished = [n for n, c in _async_clients.items() if c.loop.is_closed()]
+        finished = [_async_clients.pop(n) for n in finished]
+        clients.update({f"{n}_async": c for n, c in _async_clients.items()})
+    for client in finished:
+        client.discard()
+    return {name: client.stats.snapshot() for name, client in clients.items()}
+
+
+def close_http_clients(name: Optional[str] = None) -> None:
+    """Close one upstream's client (or all of them); the next call opens a new one."""
+    with _clients_lock:
+        names = [name] if name else list(_clients)
+        closing = [_clients.pop(n) for n in names if n in _clients]
+    for client in closing:
+        client.close()
+
+
+class AsyncUpstreamResponse:
+    """A finished async response: status, headers and the whole body."""
+
+    def __init__(self, status: int, headers, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    async def json(self):
+        return json.loads(self.body)
+
+
+class UpstreamTimeout(asyncio.TimeoutError):
+    """An async upstream call timed out (after any retries it was allowed)."""
+
+
+class AsyncUpstreamClient:
+    """
+    Shared aiohttp session for one upstream service, bound to the event loop
+    it was opened on. Same defaults, retry policy and stats as UpstreamClient.
+
+    Args:
+        name (str): Upstream name, used in stats
+        read_timeout (float): Default read timeout in seconds
+        connect_timeout (float): Default connect timeout in seconds
+        retry_methods (set): Methods retried on RETRY_STATUSES
+        max_retries (int): Retries per call
+        backoff (float): Backoff factor between retries
+        pool_maxsize (int): Connections kept per host
+    """
+
+    def __init__(
+        self,
+        name: str,
+        read_timeout: float = 30.0,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        retry_methods=frozenset({"GET"}),
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF,
+        pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    ):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for async upstream clients")
+        self.name = name
+        self.retry_methods = frozenset(retry_methods)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.stats = UpstreamStats()
+        self.loop = asyncio.get_running_loop()
+        trace = aiohttp.TraceConfig()
+
+        async def on_connection_create_end(session, context, params):
+            self.stats.on_new_connection()
+
+        trace.on_connection_create_end.append(on_connection_create_end)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit_per_host=pool_maxsize,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ),
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+            trace_configs=[trace],
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> AsyncUpstreamResponse:
+        """Send a request, retrying like UpstreamClient."""
+        timeout = kwargs.pop("timeout", None)
+        if timeout is not None and not isinstance(timeout, aiohttp.ClientTimeout):
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        elif timeout is not None:
+            kwargs["timeout"] = timeout
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            error = True
+            try:
+                async with self.session.request(method, url, **kwargs) as raw:
+                    response = AsyncUpstreamResponse(raw.status, raw.headers, await raw.read())
+                error = response.status >= 500
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+                # As in UpstreamClient: a failed connect is retried for any
+                # method, a timeout once the request may have been sent only
+                # for retry_methods
+                timed_out = isinstance(exc, asyncio.TimeoutError)
+                sent = timed_out and not isinstance(exc, aiohttp.ConnectionTimeoutError)
+                if attempt >= self.max_retries or (sent and method not in self.retry_methods):
+                    if timed_out:
+                        raise UpstreamTimeout(f"{self.name}: {method} {url} timed out") from exc
+                    raise
+                response = None
+            finally:
+                self.stats.on_response(time.perf_counter() - started, error)
+            retry = response is None or (
+                response.status in RETRY_STATUSES and method in self.retry_methods
+            )
+            if not retry or attempt >= self.max_retries:
+                return response
+            delay = self.backoff * (2**attempt)
+            if response is not None and response.headers.get("Retry-After", "").isdigit():
+                delay = max(delay, float(response.headers["Retry-After"]))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> AsyncUpstreamResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> AsyncUpstreamResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    def discard(self) -> None:
+        """
+        Close from outside the client's event loop: on that loop while it still
+        runs, otherwise in a helper thread (its connections died with the loop).
+        """
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.close(), self.loop)
+            return
+        closer = threading.Thread(target=asyncio.run, args=(self.close(),), daemon=True)
+        closer.start()
+        closer.join(timeout=5)
+
+
+_async_clients = {}
+
+
+def get_async_http_client(name: str) -> AsyncUpstreamClient:
+    """
+    Get the shared async client for an upstream in UPSTREAMS. Must be called
+    from a running event loop; a client opened on another loop is closed and
+    replaced.
+    """
+    loop = asyncio.get_running_loop()
+    replaced = None
+    with _clients_lock:
+        client = _async_clients.get(name)
+        if client is None or client.loop is not loop:
+            if name not in UPSTREAMS:
+                raise ValueError(f"Unknown upstream: {name}")
+            replaced = client
+            client = _async_clients[name] = AsyncUpstreamClient(name, **UPSTREAMS[name])
+    if replaced is not None:
+        replaced.discard()
+    return client
+
+
+async def open_async_http_clients() -> None:
+    """Open every upstream's async client on the running loop (app startup)."""
+    if aiohttp is None:
+        return
+    for name in UPSTREAMS:
+        get_async_http_client(name)
+
+
+async def close_async_http_clients() -> None:
+    """Close the async clients opened on the running loop (app shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        closing = [c for c in _async_clients.values() if c.loop is loop]
+        for client in closing:
+            _async_clients.pop(client.name, None)
+    for client in closing:
+        await client.close()
@@ -0,0 +1,244 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Local JWT Verification Module
+
+Verifies Supabase access tokens in-process instead of asking Supabase Auth
+(auth.get_user) on every request:
+- signature: HS256 with the project's JWT secret, or an asymmetric key
+  (ES256 / RS256) from the project's JWKS endpoint
+- expiry (exp, with a small leeway) and audience (aud)
+- a subject (sub) must be present, so anon and service keys are rejected
+
+JWKS keys are cached for JWKS_CACHE_TTL seconds. A token signed with a key
+id that is not in the cache triggers a refetch (at most once per
+JWKS_MIN_REFRESH_INTERVAL), which picks up rotated keys without a restart.
+If a refetch fails the cached keys stay in use, and the endpoint is not
+asked again for JWKS_MIN_REFRESH_INTERVAL; only a cache with no keys at all
+fails verification.
+
+Tokens this module cannot check locally (an HS256 token with no
+SUPABASE_JWT_SECRET configured) are reported with LocalVerificationUnavailable
+so the caller can fall back to the remote check.
+
+Configuration (environment variables):
+    AUTH_VERIFY_MODE            "local" (default) or "remote" (auth.get_user on every request)
+    SUPABASE_JWT_SECRET         Legacy HS256 JWT secret (Project Settings > API)
+    SUPABASE_JWT_AUDIENCE       Expected aud claim (default "authenticated")
+    JWKS_CACHE_TTL              Seconds JWKS keys are trusted (default 600)
+    JWT_LEEWAY                  Clock skew allowed on exp/iat, seconds (default 30)
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+import jwt
+
+from http_clients import get_http_client
+
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "local").lower()
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "600"))
+JWKS_MIN_REFRESH_INTERVAL = 30.0
+JWT_LEEWAY = float(os.getenv("JWT_LEEWAY", "30"))
+ASYMMETRIC_ALGORITHMS = {"ES256", "RS256"}
+
+
+class LocalVerificationUnavailable(Exception):
+    """The token is well-formed but cannot be verified without Supabase Auth."""
+
+
+class TokenUser:
+    """
+    The authenticated user, built from verified token claims.
+
+    Has the attributes routes read from Supabase's User (id, email,
+    user_metadata, app_metadata, role); created_at is not part of the token
+    and is None.
+    """
+
+    def __init__(self, claims: dict):
+        self.claims = claims
+        self.id = claims["sub"]
+        self.email = claims.get("email")
+        self.phone = claims.get("phone")
+        self.role = claims.get("role")
+        self.aud = claims.get("aud")
+        self.user_metadata = claims.get("user_metadata") or {}
+        self.app_metadata = claims.get("app_metadata") or {}
+        self.is_anonymous = claims.get("is_anonymous", False)
+        self.created_at = None
+
+    def __repr__(self):
+        return f"TokenUser(id={self.id!r}, email={self.email!r})"
+
+
+class JWKSCache:
+    """
+    Signing keys from a JWKS endpoint, by key id.
+
+    Args:
+        url (str): JWKS URL
+        ttl (float): Seconds before the key set is refetched
+        fetch (callable): url -> JWKS dict; defaults to an HTTP GET
+    """
+
+    def __init__(self, url: str, ttl: float = JWKS_CACHE_TTL, fetch=None, headers=None):
+        self.url = url
+        self.ttl = ttl
+        self._fetch = fetch or self._http_fetch
+        self._headers = headers or {}
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._fetched_at = None
+        self._failed_at = None
+        self._error = None
+        self.fetches = 0
+
+    def _http_fetch(self, url):
+        # Pooled and retried like the other Supabase Auth calls, and counted in its stats
+        response = get_http_client("supabase_auth").get(url, headers=self._headers)
+        response.raise_for_status()
+        return response.json()
+
+    def _refresh(self):
+        jwks = self._fetch(self.url)
+        keys = {}
+        for data in jwks.get("keys", []):
+            try:
+                keys[data.get("kid")] = jwt.PyJWK.from_dict(data)
+            except Exception as e:
+                print(f"Skipping unusable JWKS key {data.get('kid')}: {e}")
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._failed_at = None
+        self.fetches += 1
+
+    def _try_refresh(self):
+        """Refetch, keeping the cached keys (and backing off) if that fails."""
+        now = time.monotonic()
+        if self._failed_at is not None and now - self._failed_at < JWKS_MIN_REFRESH_INTERVAL:
+            if not self._keys:
+                raise self._error
+            return
+        try:
+            self._refresh()
+        except Exception as e:
+            self._failed_at = now
+            self._error = e
+            if not self._keys:
+                raise
+            print(f"JWKS refresh failed, using cached keys: {e}")
+
+    def get_key(self, kid):
+        """The key for a key id, refetching on expiry or an unknown id."""
+        with self._lock:
+            age = None if self._fetched_at is None else time.monotonic() - self._fetched_at
+            if age is None or age >= self.ttl:
+                self._try_refresh()
+            elif kid not in self._keys and age >= JWKS_MIN_REFRESH_INTERVAL:
+                # Possibly a rotated key
+                self._try_refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"No signing key found for kid {kid}")
+        return key
+
+
+class TokenVerifier:
+    """
+    Verifies Supabase access tokens.
+
+    Args:
+        jwt_secret (str): HS256 secret; HS256 tokens are not verified locally without it
+        jwks (JWKSCache): Key source for asymmetric tokens
+        audience (str): Required aud claim
+        leeway (float): Allowed clock skew in seconds
+    """
+
+    def __init__(
+        self,
+        jwt_secret: Optional[str] = None,
+        jwks: Optional[JWKSCache] = None,
+        audience: str = SUPABASE_JWT_AUDIENCE,
+        leeway: float = JWT_LEEWAY,
+    ):
+        self.jwt_secret = jwt_secret
+        self.jwks = jwks
+        self.audience = audience
+        self.leeway = leeway
+
+    def verify(self, token: str) -> TokenUser:
+        """
+        Returns the user for a valid token.
+
+        Raises:
+            jwt.InvalidTokenError: bad signature, expired, wrong audience, ...
+            LocalVerificationUnavailable: no key material for this token's algorithm
+        """
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.jwt_secret:
+                raise LocalVerificationUnavailable("SUPABASE_JWT_SECRET is not configured")
+            key = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            if self.jwks is None:
+                raise LocalVerificationUnavailable("No JWKS endpoint configured")
+            key = self.jwks.get_key(header.get("kid"))
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub"]},
+        )
+        return TokenUser(claims)
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_token_verifier() -> TokenVerifier:
+    """Get the process-wide verifier, configured from the environment on first use."""
+    global _verifier
+    with _verifier_lock:
+        if _verifier is None:
+            supabase_url = os.getenv("SUPABASE_URL")
+            jwks = None
+            if supabase_url:
+                anon_key = os.getenv("SUPABASE_ANON_KEY")
+                jwks = JWKSCache(
+                    f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json",
+                    headers={"apikey": anon_key} if anon_key else None,
+                )
+            _verifier = TokenVerifier(jwt_secret=os.getenv("SUPABASE_JWT_SECRET"), jwks=jwks)
+        return _verifier
+
+
+def set_token_verifier(verifier: Optional[TokenVerifier]) -> None:
+    """Replace (or with None, reset) the process-wide verifier."""
+    global _verifier
+    with _verifier_lock:
+        _verifier = verifier
@@ -0,0 +1,328 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Leaderboard Module
+
+In-memory rankings over player_stats (the overall board) and
+player_stats_difficulty (one board per difficulty), kept in
+ranking.OrderStatisticList structures so a page, a player's rank or the
+players around them are answered without sorting or scanning the tables.
+
+How the rankings stay current:
+- load(): one paged pass over the stats tables the first time a board is read
+- update(): the "leaderboard" stage of the game completion pipeline pushes
+  each participant's new rows in as soon as stats are applied
+- refresh(): every LEADERBOARD_REFRESH_INTERVAL seconds, rows changed by
+  other instances are pulled by last_game_played_at (never a full rescan).
+  The watermark only follows pulled rows, and each pull reaches back
+  LEADERBOARD_REFRESH_OVERLAP seconds before it, so rows committed late or
+  played earlier on another instance are not skipped; re-pulled rows are
+  just re-applied
+
+Pages use keyset cursors: the cursor is the sort key of the last entry
+returned, so pages stay consistent while rankings move underneath them.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from ranking import OrderStatisticList
+
+LEADERBOARD_REFRESH_INTERVAL = float(os.getenv("LEADERBOARD_REFRESH_INTERVAL", "30"))
+LEADERBOARD_MIN_GAMES = int(os.getenv("LEADERBOARD_MIN_GAMES", "1"))
+LEADERBOARD_REFRESH_OVERLAP = float(
+    os.getenv("LEADERBOARD_REFRESH_OVERLAP", str(LEADERBOARD_REFRESH_INTERVAL))
+)
+LEADERBOARD_PAGE_SIZE = 1000
+# Refresh floor when no loaded row has a last_game_played_at yet
+EPOCH = "1970-01-01T00:00:00"
+
+
+def _num(row, column):
+    return row.get(column) or 0
+
+
+# Sort name -> key over a stats row (ascending key = better rank)
+SORTS = {
+    "win_rate": lambda r: (-_num(r, "win_rate"), -_num(r, "games_won"), -_num(r, "games_played")),
+    "wins": lambda r: (-_num(r, "games_won"), -_num(r, "win_rate")),
+    "streak": lambda r: (-_num(r, "current_streak"), -_num(r, "best_streak"), -_num(r, "games_won")),
+}
+# Streak columns exist only on player_stats
+OVERALL_ONLY_SORTS = {"streak"}
+
+
+def rewind(timestamp: str, seconds: float) -> str:
+    """An ISO timestamp moved `seconds` earlier (unchanged if it cannot be parsed)."""
+    try:
+        moved = datetime.fromisoformat(timestamp) - timedelta(seconds=seconds)
+    except ValueError:
+        return timestamp
+    return moved.isoformat()
+
+
+def encode_cursor(sort: str, key) -> str:
+    """Cursor after `key` in the `sort` order; it names the sort it belongs to."""
+    return base64.urlsafe_b64encode(json.dumps([sort, *key]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """The ranking key of a cursor; ValueError unless it is a `sort` cursor."""
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Invalid leaderboard cursor") from e
+    if not isinstance(value, list) or not value or value[0] != sort:
+        raise ValueError(f"Invalid leaderboard cursor for sort {sort}")
+    key = value[1:]
+    if (
+        len(key) != len(SORTS[sort]({})) + 1
+        or not isinstance(key[-1], str)
+        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in key[:-1])
+    ):
+        raise ValueError("Invalid leaderboard cursor")
+    return tuple(key)
+
+
+class Leaderboard:
+    """
+    Thread-safe ranking of players per board and sort order.
+
+    Args:
+        min_games (int): Players with fewer games played are not ranked
+        overlap (float): Seconds each refresh re-reads before the watermark
+    """
+
+    def __init__(
+        self, min_games: int = LEADERBOARD_MIN_GAMES, overlap: float = LEADERBOARD_REFRESH_OVERLAP
+    ):
+        self.min_games = min_games
+        self.overlap = overlap
+        self._lock = threading.RLock()
+        self._rows = {}  # board (None or difficulty) -> {player_id: stats row}
+        self._rankings = {}  # (board, sort) -> OrderStatisticList of keys
+        self._watermark = None  # latest last_game_played_at pulled from the repository
+        self.loaded = False
+        self._refreshed_at = 0.0
+
+    # Maintenance
+
+    def update(self, row: dict) -> None:
+        """Insert or replace one stats row (overall when it has no "difficulty")."""
+        board = row.get("difficulty")
+        player_id = row["player_id"]
+        with self._lock:
+            rows = self._rows.setdefault(board, {})
+            previous = rows.get(player_id)
+            for sort, key_fn in self._sorts(board):
+                ranking = self._ranking(board, sort)
+                if previous is not None:
+                    ranking.discard(key_fn(previous) + (player_id,))
+                if _num(row, "games_played") >= self.min_games:
+                    ranking.add(key_fn(row) + (player_id,))
+            rows[player_id] = dict(row)
+
+    def load(self, repository, page_size: int = LEADERBOARD_PAGE_SIZE) -> int:
+        """Build every board with one keyset-paged pass. Returns rows loaded."""
+        count = self._pull(repository, page_size, changed_since=None)
+        with self._lock:
+            self.loaded = True
+            self._refreshed_at = time.monotonic()
+        return count
+
+    def refresh(self, repository, page_size: int = LEADERBOARD_PAGE_SIZE) -> int:
+        """Pull rows changed since shortly before the newest one pulled so far."""
+        with self._lock:
+            watermark = rewind(self._watermark, self.overlap) if self._watermark else EPOCH
+        count = self._pull(repository, page_size, changed_since=watermark)
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+        return count
+
+    def ensure_fresh(self, repository, interval: float = LEADERBOARD_REFRESH_INTERVAL) -> None:
+        """Load on first use, then refresh incrementally once per interval."""
+        with self._lock:
+            if not self.loaded:
+                self.load(repository)
+                return
+            stale = time.monotonic() - self._refreshed_at >= interval
+        if stale:
+            self.refresh(repository)
+
+    def _pull(self, repository, page_size, changed_since):
+        count = 0
+        after = None
+        while True:
+            page = repository.list_player_stats(
+                after=after, limit=page_size, changed_since=changed_since
+            )
+            if not page:
+                break
+            for row in page:
+                self.update(row)
+                played_at = row.get("last_game_played_at")
+                with self._lock:
+                    if played_at and (self._watermark is None or played_at > self._watermark):
+                        self._watermark = played_at
+            for row in repository.list_player_stats_difficulty([r["player_id"] for r in page]):
+                self.update(row)
+            count += len(page)
+            after = page[-1]["player_id"]
+            if len(page) < page_size:
+                break
+        return count
+
+    # Queries
+
+    def count(self, sort: str = "win_rate", difficulty: Optional[int] = None) -> int:
+        self._check(sort, difficulty)
+        with self._lock:
+            return len(self._ranking(difficulty, sort))
+
+    def page(
+        self,
+        sort: str = "win_rate",
+        difficulty: Optional[int] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ):
+        """
+        One page of the board.
+
+        Returns:
+            tuple: (entries, next_cursor); next_cursor is None on the last page
+        """
+        self._check(sort, difficulty)
+        with self._lock:
+            ranking = self._ranking(difficulty, sort)
+            start = ranking.bisect_right(decode_cursor(cursor, sort)) if cursor else 0
+            keys = ranking.slice(start, start + limit)
+            entries = [
+                self._entry(difficulty, sort, key, start + i) for i, key in enumerate(keys)
+            ]
+            has_more = start + len(keys) < len(ranking)
+        next_cursor = encode_cursor(sort, keys[-1]) if keys and has_more else None
+        return entries, next_cursor
+
+    def rank(self, player_id, sort: str = "win_rate", difficulty: Optional[int] = None):
+        """1-based rank of a player, or None if they are not ranked."""
+        self._check(sort, difficulty)
+        with self._lock:
+            row = self._rows.get(difficulty, {}).get(player_id)
+            if row is None:
+                return None
+            key = SORTS[sort](row) + (player_id,)
+            ranking = self._ranking(difficulty, sort)
+            if key not in ranking:
+                return None
+            return ranking.index(key) + 1
+
+    def around(
+        self, player_id, sort: str = "win_rate", difficulty: Optional[int] = None, radius: int = 5
+    ) -> List[dict]:
+        """The player's entry with up to `radius` entries on either side."""
+        position = self.rank(player_id, sort, difficulty)
+        if position is None:
+            return []
+        with self._lock:
+            ranking = self._ranking(difficulty, sort)
+            start = max(0, position - 1 - radius)
+            keys = ranking.slice(start, position + radius)
+            return [self._entry(difficulty, sort, key, start + i) for i, key in enumerate(keys)]
+
+    # Internals
+
+    @staticmethod
+    def _sorts(board):
+        return [(s, fn) for s, fn in SORTS.items() if board is None or s not in OVERALL_ONLY_SORTS]
+
+    @staticmethod
+    def _check(sort, difficulty):
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort: {sort}. Use one of {', '.join(SORTS)}")
+        if difficulty is not None and sort in OVERALL_ONLY_SORTS:
+            raise ValueError(f"Sort {sort} is only available on the overall leaderboard")
+
+    def _ranking(self, board, sort):
+        ranking = self._rankings.get((board, sort))
+        if ranking is None:
+            ranking = self._rankings[(board, sort)] = OrderStatisticList()
+        return ranking
+
+    def _entry(self, board, sort, key, index):
+        player_id = key[-1]
+        row = self._rows[board][player_id]
+        entry = {
+            "rank": index + 1,
+            "player_id": player_id,
+            "games_played": _num(row, "games_played"),
+            "wins": _num(row, "games_won"),
+            "win_rate": _num(row, "win_rate"),
+            "cursor": encode_cursor(sort, key),
+        }
+        if board is None:
+            entry["streak"] = _num(row, "current_streak")
+            entry["best_streak"] = _num(row, "best_streak")
+        return entry
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard() -> Leaderboard:
+    """Get the process-wide leaderboard."""
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is None:
+            _leaderboard = Leaderboard()
+        return _leaderboard
+
+
+def set_leaderboard(leaderboard: Optional[Leaderboard]) -> None:
+    """Replace (or with None, reset) the process-wide leaderboard."""
+    global _leaderboard
+    with _leaderboard_lock:
+        _leaderboard = leaderboard
+
+
+def apply_game(repository, game_id) -> None:
+    """
+    Push a finished game's participants' new stats rows into the leaderboard.
+
+    Run by the game completion pipeline after the stats stage. Skipped until
+    the leaderboard has been loaded, since loading picks the rows up anyway.
+    """
+    leaderboard = get_leaderboard()
+    if not leaderboard.loaded:
+        return
+    game = repository.get_game(game_id) or {}
+    difficulty = game.get("difficulty") or 1
+    for participant in repository.list_participants(game_id):
+        player_id = participant["player_id"]
+        overall = repository.get_player_stats(player_id)
+        if overall:
+            leaderboard.update(overall)
+        by_difficulty = repository.get_player_stats_difficulty(player_id, difficulty)
+        if by_difficulty:
+            leaderboard.update(by_difficulty)
@@ -0,0 +1,115 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from auth_routes import get_current_user
+from game_logic import get_repository
+from leaderboard import get_leaderboard
+from player_search import search_players
+
+router = APIRouter()
+
+
+def _ready_leaderboard():
+    leaderboard = get_leaderboard()
+    leaderboard.ensure_fresh(get_repository())
+    return leaderboard
+
+
+def _with_players(entries):
+    """Attach username and avatar_url to leaderboard entries (one lookup per page)."""
+    players = {
+        p["id"]: p for p in get_repository().get_players([e["player_id"] for e in entries])
+    }
+    for entry in entries:
+        player = players.get(entry["player_id"], {})
+        entry["username"] = player.get("username")
+        entry["avatar_url"] = player.get("avatar_url")
+    return entries
+
+
+# Public leaderboard (no auth required)
+@router.get("/leaderboard")
+def api_get_leaderboard(
+    sort: str = "win_rate",
+    difficulty: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    """
+    Get one page of the leaderboard, sorted by win_rate, wins or streak.
+    Pass difficulty for a per-difficulty board, and the previous page's
+    next_cursor to continue.
+    """
+    try:
+        leaderboard = _ready_leaderboard()
+        entries, next_cursor = leaderboard.page(sort, difficulty, limit, cursor)
+        return {
+            "sort": sort,
+            "difficulty": difficulty,
+            "total": leaderboard.count(sort, difficulty),
+            "entries": _with_players(entries),
+            "next_cursor": next_cursor,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/leaderboard/around_me")
+def api_get_leaderboard_around_me(
+    sort: str = "win_rate",
+    difficulty: Optional[int] = None,
+    radius: int = Query(5, ge=0, le=50),
+    current_user=Depends(get_current_user),
+):
+    """
+    Get the authenticated player's rank with the players ranked just above
+    and below them (requires authentication)
+    """
+    try:
+        leaderboard = _ready_leaderboard()
+        entries = leaderboard.around(current_user.id, sort, difficulty, radius)
+        return {
+            "sort": sort,
+            "difficulty": difficulty,
+            "rank": leaderboard.rank(current_user.id, sort, difficulty),
+            "entries": _with_players(entries),
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/players/search")
+def api_search_players(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Typeahead search over usernames: players whose name starts with q,
+    then (for 3+ characters) ones whose name contains it.
+    """
+    try:
+        return {"query": q, "players": search_players(get_repository(), q, limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
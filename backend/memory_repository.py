@@ -0,0 +1,385 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+In-Memory Storage Engine
+
+A thread-safe, in-process implementation of GameRepository for tests and
+offline load runs. It follows the semantics of the Supabase schema
+(supabase/migrations) closely enough that game flows behave the same:
+
+- column defaults (ids, status, counters, timestamps) are applied on insert
+- primary keys, unique columns and foreign keys to `games` are enforced
+- stats upserts merge into the existing row, like PostgREST's merge-duplicates
+- question counts per (game, player) are maintained incrementally
+- game results are applied to stats once, under the lock
+
+Usage:
+    repo = MemoryRepository()
+    game = repo.create_game({"host_player_id": "p1", "secret_word": "cat"})
+"""
+
+import threading
+import uuid
+from typing import List, Optional
+
+from ranking import OrderStatisticList
+from repository import (
+    DEFAULT_ACHIEVEMENTS,
+    DEFAULT_SECRET_WORDS,
+    GAME_DEFAULTS,
+    PLAYER_STATS_DEFAULTS,
+    QUESTION_DEFAULTS,
+    STATS_DEFAULTS,
+    GameRepository,
+    IntegrityError,
+    apply_result_to_stats,
+    resolve_now,
+    utc_now,
+)
+
+
+class MemoryRepository(GameRepository):
+    """
+    Thread-safe in-memory repository.
+
+    Args:
+        secret_words (list): Word rows to serve from list_secret_words;
+            defaults to DEFAULT_SECRET_WORDS
+    """
+
+    blocking = False
+
+    def __init__(self, secret_words: Optional[List[dict]] = None):
+        self._lock = threading.RLock()
+        self._secret_words = [
+            {"id": str(uuid.uuid4()), "is_active": True, **w}
+            for w in (secret_words if secret_words is not None else DEFAULT_SECRET_WORDS)
+        ]
+        self._games = {}
+        self._game_codes = {}
+        self._participants = {}  # (game_id, player_id) -> row
+        self._participants_by_game = {}  # game_id -> [player_id, ...]
+        self._questions = {}
+        self._question_counts = {}  # (game_id, player_id) -> int
+        self._player_stats = {}
+        self._player_stats_difficulty = {}
+        self._players = {}
+        self._history = {}  # player_id -> {game_id: row}
+        self._history_order = {}  # player_id -> OrderStatisticList of (completed_at, game_id)
+        self._achievement_names = {a["name"] for a in DEFAULT_ACHIEVEMENTS}
+        self._player_achievements = {}  # player_id -> [name, ...] in award order
+
+    def list_secret_words(self):
+        with self._lock:
+            return [dict(w) for w in self._secret_words]
+
+    def create_game(self, data):
+        with self._lock:
+            row = {**GAME_DEFAULTS, **{k: resolve_now(v) for k, v in data.items()}}
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", utc_now())
+            if not row.get("secret_word"):
+                raise IntegrityError('null value in column "secret_word" violates not-null constraint')
+            if row["id"] in self._games:
+                raise IntegrityError("duplicate key value violates unique constraint \"games_pkey\"")
+            code = row.get("game_code")
+            if code is not None and code in self._game_codes:
+                raise IntegrityError("duplicate key value violates unique constraint \"games_game_code_key\"")
+            self._games[row["id"]] = row
+            if code is not None:
+                self._game_codes[code] = row["id"]
+            return dict(row)
+
+    def get_game(self, game_id):
+        with self._lock:
+            row = self._games.get(game_id)
+            return dict(row) if row else None
+
+    def update_game(self, game_id, fields):
+        with self._lock:
+            row = self._games.get(game_id)
+            if row is None:
+                return None
+            new_code = fields.get("game_code", row.get("game_code"))
+            if new_code != row.get("game_code") and new_code in self._game_codes:
+                raise IntegrityError("duplicate key value violates unique constraint \"games_game_code_key\"")
+            if "game_code" in fields:
+                self._game_codes.pop(row.get("game_code"), None)
+                if new_code is not None:
+                    self._game_codes[new_code] = game_id
+            row.update({k: resolve_now(v) for k, v in fields.items()})
+            return dict(row)
+
+    def add_participant(self, game_id, player_id):
+        with self._lock:
+            if game_id not in self._games:
+                raise IntegrityError("insert on game_participants violates foreign key constraint \"game_participants_game_id_fkey\"")
+            key = (game_id, player_id)
+            if key in self._participants:
+                raise IntegrityError("duplicate key value violates unique constraint \"game_participants_pkey\"")
+            row = {
+                "game_id": game_id,
+                "player_id": player_id,
+                "joined_at": utc_now(),
+                "role": None,
+                "score": 0,
+            }
+            self._participants[key] = row
+            self._participants_by_game.setdefault(game_id, []).append(player_id)
+            return dict(row)
+
+    def list_participants(self, game_id):
+        with self._lock:
+            return [{"player_id": p} for p in self._participants_by_game.get(game_id, [])]
+
+    def _insert_question(self, row):
+        if not row.get("question"):
+            raise IntegrityError('null value in column "question" violates not-null constraint')
+        if row.get("game_id") is not None and row["game_id"] not in self._games:
+            raise IntegrityError("insert on game_questions violates foreign key constraint \"game_questions_game_id_fkey\"")
+        stored = {**QUESTION_DEFAULTS, **row}
+        stored.setdefault("id", str(uuid.uuid4()))
+        stored.setdefault("asked_at", utc_now())
+        if stored["id"] in self._questions:
+            raise IntegrityError("duplicate key value violates unique constraint \"game_questions_pkey\"")
+        self._questions[stored["id"]] = stored
+        key = (stored["game_id"], stored["player_id"])
+        self._question_counts[key] = self._question_counts.get(key, 0) + 1
+        return stored
+
+    def insert_question(self, row):
+        with self._lock:
+            return dict(self._insert_question(row))
+
+    def insert_questions(self, rows):
+        with self._lock:
+            for row in rows:
+                if row.get("id") in self._questions:
+                    continue
+                self._insert_question(row)
+
+    def count_questions(self, game_id, player_id):
+        with self._lock:
+            return self._question_counts.get((game_id, player_id), 0)
+
+    def get_player_stats(self, player_id):
+        with self._lock:
+            row = self._player_stats.get(player_id)
+            return dict(row) if row else None
+
+    def get_player_stats_difficulty(self, player_id, difficulty):
+        with self._lock:
+            row = self._player_stats_difficulty.get((player_id, difficulty))
+            return dict(row) if row else None
+
+    def upsert_player_stats(self, stats):
+        with self._lock:
+            player_id = stats["player_id"]
+            row = self._player_stats.get(player_id) or {**PLAYER_STATS_DEFAULTS}
+            row.update(stats)
+            self._player_stats[player_id] = row
+            return dict(row)
+
+    def upsert_player_stats_difficulty(self, stats):
+        with self._lock:
+            key = (stats["player_id"], stats["difficulty"])
+            row = self._player_stats_difficulty.get(key) or {**STATS_DEFAULTS}
+            row.update(stats)
+            self._player_stats_difficulty[key] = row
+            return dict(row)
+
+    def list_player_stats(self, after=None, limit=1000, changed_since=None):
+        with self._lock:
+            rows = [
+                dict(row)
+                for player_id, row in sorted(self._player_stats.items())
+                if (after is None or player_id > after)
+                and (
+                    changed_since is None
+                    or (row.get("last_game_played_at") or "") > changed_since
+                )
+            ]
+            return rows[:limit]
+
+    def list_player_stats_difficulty(self, player_ids):
+        with self._lock:
+            wanted = set(player_ids)
+            return [
+                dict(row)
+                for (player_id, _), row in self._player_stats_difficulty.items()
+                if player_id in wanted
+            ]
+
+    def record_game_history(self, game_id):
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None or game.get("status") != "finished":
+                return 0
+            completed_at = game.get("completed_at") or utc_now()
+            players = self._participants_by_game.get(game_id, [])
+            written = 0
+            for player_id in players:
+                rows = self._history.setdefault(player_id, {})
+                if game_id in rows:
+                    continue
+                rows[game_id] = {
+                    "player_id": player_id,
+                    "game_id": game_id,
+                    "completed_at": completed_at,
+                    "difficulty": game.get("difficulty"),
+                    "result": "won" if player_id == game.get("winner_id") else "lost",
+                    "secret_word": game.get("secret_word"),
+                    "questions_asked": self._question_counts.get((game_id, player_id), 0),
+                    "opponent_ids": [p for p in players if p != player_id],
+                }
+                self._history_order.setdefault(player_id, OrderStatisticList()).add(
+                    (completed_at, game_id)
+                )
+                written += 1
+            return written
+
+    def list_game_history(self, player_id, limit=20, before=None, result=None, difficulty=None):
+        with self._lock:
+            order = self._history_order.get(player_id)
+            if order is None:
+                return []
+            rows = self._history[player_id]
+            end = order.bisect_left(tuple(before)) if before else len(order)
+            page = []
+            # Walk backwards from the cursor one chunk at a time
+            while end > 0 and len(page) < limit:
+                chunk = order.slice(max(0, end - limit), end)
+                end -= len(chunk)
+                for _, game_id in reversed(chunk):
+                    row = rows[game_id]
+                    if result is not None and row["result"] != result:
+                        continue
+                    if difficulty is not None and row["difficulty"] != difficulty:
+                        continue
+                    page.append(dict(row))
+                    if len(page) == limit:
+                        break
+            return page
+
+    def get_players(self, player_ids):
+        with self._lock:
+            return [
+                {k: self._players[p].get(k) for k in ("id", "username", "avatar_url")}
+                for p in dict.fromkeys(player_ids)
+                if p in self._players
+            ]
+
+    def upsert_player(self, player):
+        with self._lock:
+            row = self._players.get(player["id"]) or {
+                "created_at": utc_now(),
+                "achievements": [],
+            }
+            row.update(player)
+            row["updated_at"] = utc_now()
+            self._players[player["id"]] = row
+            return dict(row)
+
+    def list_players(self, after=None, limit=1000, changed_since=None):
+        with self._lock:
+            ids = sorted(
+                p
+                for p, row in self._players.items()
+                if (after is None or p > after)
+                and (changed_since is None or (row.get("updated_at") or "") > changed_since)
+            )[:limit]
+            return [
+                {k: self._players[p].get(k) for k in ("id", "username", "avatar_url", "updated_at")}
+                for p in ids
+            ]
+
+    def search_players(self, query, limit=10):
+        term = query.strip().casefold()
+        if not term:
+            return []
+        with self._lock:
+            rows = sorted(
+                self._players.values(), key=lambda r: ((r.get("username") or "").casefold(), r["id"])
+            )
+            names = [(r, (r.get("username") or "").casefold()) for r in rows]
+            prefix = [r for r, name in names if name.startswith(term)]
+            infix = []
+            if len(term) >= 3:
+                infix = [r for r, name in names if term in name and not name.startswith(term)]
+            return [
+                {k: r.get(k) for k in ("id", "username", "avatar_url")}
+                for r in (prefix + infix)[:limit]
+            ]
+
+    def award_achievements(self, player_id, names):
+        with self._lock:
+            earned = self._player_achievements.setdefault(player_id, [])
+            awarded = [
+                n for n in dict.fromkeys(names) if n in self._achievement_names and n not in earned
+            ]
+            earned.extend(awarded)
+            return awarded
+
+    def list_player_achievements(self, player_id):
+        with self._lock:
+            return list(self._player_achievements.get(player_id, []))
+
+    def apply_game_result(self, game_id):
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None or game.get("stats_applied_at"):
+                return False
+            now = utc_now()
+            game["stats_applied_at"] = now
+            difficulty = game.get("difficulty") or 1
+            for player_id in self._participants_by_game.get(game_id, []):
+                won = player_id == game.get("winner_id")
+                questions = self._question_counts.get((game_id, player_id), 0)
+
+                overall = self._player_stats.get(player_id) or {
+                    **PLAYER_STATS_DEFAULTS,
+                    "player_id": player_id,
+                }
+                self._player_stats[player_id] = apply_result_to_stats(
+                    overall, won, questions, now
+                )
+
+                key = (player_id, difficulty)
+                by_difficulty = self._player_stats_difficulty.get(key) or {
+                    **STATS_DEFAULTS,
+                    "player_id": player_id,
+                    "difficulty": difficulty,
+                }
+                self._player_stats_difficulty[key] = apply_result_to_stats(
+                    by_difficulty, won, questions, now
+                )
+            return True
+
+    def list_unapplied_games(self, finished_before, limit=100):
+        with self._lock:
+            games = sorted(
+                (
+                    g
+                    for g in self._games.values()
+                    if g.get("status") == "finished"
+                    and not g.get("stats_applied_at")
+                    and (g.get("completed_at") or "") < finished_before
+                ),
+                key=lambda g: g.get("completed_at") or "",
+            )
+            return [{"id": g["id"], "winner_id": g.get("winner_id")} for g in games[:limit]]
@@ -0,0 +1,325 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Player Search Module
+
+Typeahead search over players.username, answered from memory:
+- prefix matches come from a ranking.OrderStatisticList of
+  (folded username, player_id), so a query is one bisect plus a slice
+- substring matches come from a trigram index (trigram -> player slots);
+  the rarest trigram of the query picks the candidates, which are then
+  checked against the username
+
+The index is loaded in the background at startup (and by the first search
+on a process that skipped startup), then kept current by signup and
+profile updates on this instance and, for players who sign up or rename
+through other instances, by a background pull of the players whose
+updated_at changed, at most every PLAYER_SEARCH_REFRESH_INTERVAL seconds
+(reaching back PLAYER_SEARCH_REFRESH_OVERLAP seconds, like the
+leaderboard). Every indexed player remembers the updated_at it was indexed
+at, so a row read before a newer update never overwrites it. Until the
+index is loaded, searches go to the database (the search_players()
+function over the pg_trgm index on Supabase).
+"""
+
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from ranking import OrderStatisticList
+
+PLAYER_SEARCH_INDEX = os.getenv("PLAYER_SEARCH_INDEX", "true").lower() == "true"
+PLAYER_SEARCH_REFRESH_INTERVAL = float(os.getenv("PLAYER_SEARCH_REFRESH_INTERVAL", "60"))
+PLAYER_SEARCH_REFRESH_OVERLAP = float(
+    os.getenv("PLAYER_SEARCH_REFRESH_OVERLAP", str(PLAYER_SEARCH_REFRESH_INTERVAL))
+)
+PLAYER_SEARCH_PAGE_SIZE = 5000
+MIN_INFIX_LENGTH = 3
+
+
+def fold(username: str) -> str:
+    return (username or "").strip().casefold()
+
+
+def trigrams(text: str) -> set:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def version(updated_at) -> Optional[datetime]:
+    """A players.updated_at value as a naive UTC datetime (None if missing or unparsable)."""
+    if not updated_at:
+        return None
+    try:
+        moment = datetime.fromisoformat(str(updated_at))
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class PlayerSearchIndex:
+    """
+    Thread-safe in-memory username index.
+
+    Trigram postings are append-only arrays of slots; renaming a player
+    gives them a new slot and leaves the old one dead, and the postings are
+    rebuilt once dead slots outnumber live ones.
+
+    Args:
+        refresh_interval (float): Seconds between pulls of changed players
+        overlap (float): Seconds each pull re-reads before the watermark
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = PLAYER_SEARCH_REFRESH_INTERVAL,
+        overlap: float = PLAYER_SEARCH_REFRESH_OVERLAP,
+    ):
+        self.refresh_interval = refresh_interval
+        self.overlap = overlap
+        self._lock = threading.RLock()
+        self._players = {}  # player_id -> (folded, username, avatar_url)
+        self._versions = {}  # player_id -> updated_at it was indexed at
+        self._watermark = None  # latest updated_at pulled from the repository
+        self._refreshed_at = 0.0
+        self._prefix = OrderStatisticList()
+        self._slots = []  # slot -> player_id, or None once dead
+        self._slot_of = {}  # player_id -> live slot
+        self._grams = {}  # trigram -> array of slots
+        self.loaded = False
+        self._loading = False
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    # Maintenance
+
+    def upsert(
+        self,
+        player_id,
+        username: Optional[str],
+        avatar_url: Optional[str] = None,
+        updated_at=None,
+    ) -> None:
+        """
+        Add a player or update their username / avatar. Ignored when
+        updated_at is older than the version already indexed.
+        """
+        folded = fold(username)
+        moment = version(updated_at)
+        with self._lock:
+            known = self._versions.get(player_id)
+            if moment is not None and known is not None and moment < known:
+                return
+            if moment is not None:
+                self._versions[player_id] = moment
+            previous = self._players.get(player_id)
+            if previous is not None and previous[0] == folded:
+                self._players[player_id] = (folded, username, avatar_url)
+                return
+            self.remove(player_id)
+            if not folded:
+                return
+            self._players[player_id] = (folded, username, avatar_url)
+            self._prefix.add((folded, player_id))
+            slot = len(self._slots)
+            self._slots.append(player_id)
+            self._slot_of[player_id] = slot
+            for gram in trigrams(folded):
+                postings = self._grams.get(gram)
+                if postings is None:
+                    postings = self._grams[gram] = array("l")
+                postings.append(slot)
+
+    def remove(self, player_id) -> None:
+        with self._lock:
+            previous = self._players.pop(player_id, None)
+            if previous is None:
+                return
+            self._prefix.discard((previous[0], player_id))
+            self._slots[self._slot_of.pop(player_id)] = None
+            if len(self._slots) > 2 * len(self._slot_of) + 1024:
+                self._rebuild_grams()
+
+    def _rebuild_grams(self):
+        self._slots, self._slot_of, self._grams = [], {}, {}
+        for slot, (player_id, (folded, _, _)) in enumerate(self._players.items()):
+            self._slots.append(player_id)
+            self._slot_of[player_id] = slot
+            for gram in trigrams(folded):
+                self._grams.setdefault(gram, array("l")).append(slot)
+
+    def load(self, repository, page_size: int = PLAYER_SEARCH_PAGE_SIZE) -> int:
+        """Index every player with one keyset-paged pass. Returns rows loaded."""
+        count = self._pull(repository, page_size, changed_since=None)
+        with self._lock:
+            self.loaded = True
+            self._loading = False
+            self._refreshed_at = time.monotonic()
+        return count
+
+    def refresh(self, repository, page_size: int = PLAYER_SEARCH_PAGE_SIZE) -> int:
+        """Pull players updated since shortly before the newest one pulled so far."""
+        with self._lock:
+            watermark = self._watermark
+        changed_since = None
+        if watermark is not None:
+            changed_since = (watermark - timedelta(seconds=self.overlap)).isoformat()
+        try:
+            return self._pull(repository, page_size, changed_since)
+        finally:
+            with self._lock:
+                self._loading = False
+                self._refreshed_at = time.monotonic()
+
+    def _pull(self, repository, page_size, changed_since):
+        count = 0
+        after = None
+        while True:
+            page = repository.list_players(
+                after=after, limit=page_size, changed_since=changed_since
+            )
+            for row in page:
+                updated_at = row.get("updated_at")
+                self.upsert(row["id"], row.get("username"), row.get("avatar_url"), updated_at)
+                moment = version(updated_at)
+                with self._lock:
+                    if moment is not None and (self._watermark is None or moment > self._watermark):
+                        self._watermark = moment
+            count += len(page)
+            if len(page) < page_size:
+                break
+            after = page[-1]["id"]
+        return count
+
+    def start_loading(self, repository) -> bool:
+        """
+        Load in a background thread, or once loaded, refresh when the refresh
+        interval has passed; unless a load or refresh is already running.
+        """
+        with self._lock:
+            if self._loading:
+                return False
+            if self.loaded and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return False
+            self._loading = True
+            work = self.refresh if self.loaded else self.load
+
+        def run():
+            try:
+                work(repository)
+            except Exception as e:
+                print(f"Error loading player search index: {e}")
+                with self._lock:
+                    self._loading = False
+
+        threading.Thread(target=run, name="player-search-load", daemon=True).start()
+        return True
+
+    # Queries
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        Players whose username starts with the query (alphabetical), then
+        ones that contain it (queries of 3+ characters), case-insensitive.
+        """
+        term = fold(query)
+        if not term or limit <= 0:
+            return []
+        with self._lock:
+            start = self._prefix.bisect_left((term,))
+            matches = []
+            for folded, player_id in self._prefix.slice(start, start + limit):
+                if not folded.startswith(term):
+                    break
+                matches.append(player_id)
+            if len(matches) < limit and len(term) >= MIN_INFIX_LENGTH:
+                matches.extend(self._infix(term, limit - len(matches)))
+            return [self._row(player_id) for player_id in matches]
+
+    def _infix(self, term, limit):
+        postings = []
+        for gram in trigrams(term):
+            slots = self._grams.get(gram)
+            if slots is None:
+                return []
+            postings.append(slots)
+        found = []
+        for slot in min(postings, key=len):
+            player_id = self._slots[slot]
+            if player_id is None:
+                continue
+            folded = self._players[player_id][0]
+            if term in folded and not folded.startswith(term):
+                found.append((folded, player_id))
+        # Every match, then the alphabetical first `limit`
+        return [player_id for _, player_id in sorted(found)[:limit]]
+
+    def _row(self, player_id):
+        _, username, avatar_url = self._players[player_id]
+        return {"id": player_id, "username": username, "avatar_url": avatar_url}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_player_search() -> PlayerSearchIndex:
+    """Get the process-wide player search index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PlayerSearchIndex()
+        return _index
+
+
+def set_player_search(index: Optional[PlayerSearchIndex]) -> None:
+    """Replace (or with None, reset) the process-wide index."""
+    global _index
+    with _index_lock:
+        _index = index
+
+
+def search_players(repository, query: str, limit: int = 10) -> List[dict]:
+    """Search the in-memory index, or the database while it is loading."""
+    if not fold(query):
+        return []
+    if PLAYER_SEARCH_INDEX:
+        index = get_player_search()
+        if index.loaded:
+            index.start_loading(repository)  # a background refresh, when due
+            return index.search(query, limit)
+        index.start_loading(repository)
+    return repository.search_players(query, limit)
+
+
+def index_player(player_id, username, avatar_url=None, updated_at=None) -> None:
+    """
+    Keep the index current after a signup or profile update. updated_at is
+    the written row's (now, if it has none).
+    """
+    if PLAYER_SEARCH_INDEX:
+        get_player_search().upsert(player_id, username, avatar_url, updated_at or utc_now())
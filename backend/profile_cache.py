@@ -0,0 +1,117 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Player Profile Cache Module
+
+Per-player cache of the players row fields returned with the user
+(/auth/me, login, signup and PUT /profile), so /auth/me does not re-select
+them on every call.
+
+Entries are written from the rows that signup, login and profile updates
+get back from their insert/update (no extra select), and dropped when the
+profile changes or new achievements are awarded. Entries expire after
+PROFILE_CACHE_TTL seconds, which bounds how long a change made through
+another instance can go unseen.
+
+Configuration (environment variables):
+    PROFILE_CACHE_TTL       Seconds an entry is served (default 300; 0 disables the cache)
+    PROFILE_CACHE_MAX       Max cached players, least recently used evicted (default 10000)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+PROFILE_CACHE_MAX = int(os.getenv("PROFILE_CACHE_MAX", "10000"))
+
+# players columns returned with the user
+PROFILE_COLUMNS = "created_at, avatar_url, last_login_at, bio, favorite_category, achievements"
+
+
+class ProfileCache:
+    """
+    Thread-safe TTL + LRU cache of profile rows by player id.
+
+    Args:
+        ttl (float): Seconds an entry is served
+        max_entries (int): Entries kept before the least recently used is evicted
+    """
+
+    def __init__(self, ttl: float = PROFILE_CACHE_TTL, max_entries: int = PROFILE_CACHE_MAX):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # player_id -> (expires_at, row)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, player_id) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[player_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(player_id)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, player_id, row: Optional[dict]) -> None:
+        if not row or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[player_id] = (time.monotonic() + self.ttl, dict(row))
+            self._entries.move_to_end(player_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, player_id) -> None:
+        with self._lock:
+            self._entries.pop(player_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_profile_cache() -> ProfileCache:
+    """Get the process-wide profile cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProfileCache()
+        return _cache
+
+
+def set_profile_cache(cache: Optional[ProfileCache]) -> None:
+    """Replace (or with None, reset) the process-wide profile cache."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
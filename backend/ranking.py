@@ -0,0 +1,177 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Order-Statistic List Module
+
+A sorted collection of unique, comparable keys that supports insert, remove,
+rank (position of a key) and select (key at a position) without re-sorting.
+Used by the leaderboard to keep rankings current as stats change one row at
+a time.
+
+Keys are stored in a list of sorted buckets (each at most 2 * `load` long),
+so insert and remove move at most one bucket's worth of items, and rank or
+select only sums bucket lengths. With the default load that stays in the tens
+of microseconds at a million keys.
+
+Usage:
+    ranking = OrderStatisticList()
+    ranking.add((-75.0, "player-1"))
+    ranking.index((-75.0, "player-1"))    # 0
+    ranking[0]                            # (-75.0, "player-1")
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List
+
+
+class OrderStatisticList:
+    """
+    Sorted list of unique keys with rank and select queries.
+
+    Args:
+        keys (iterable): Initial keys (sorted once on construction)
+        load (int): Target bucket size
+    """
+
+    def __init__(self, keys: Iterable = (), load: int = 512):
+        self._load = max(8, load)
+        self._buckets: List[list] = []
+        self._maxes: list = []
+        self._len = 0
+        initial = sorted(set(keys))
+        for start in range(0, len(initial), self._load):
+            bucket = initial[start : start + self._load]
+            self._buckets.append(bucket)
+            self._maxes.append(bucket[-1])
+        self._len = len(initial)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __contains__(self, key) -> bool:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        return j < len(bucket) and bucket[j] == key
+
+    def add(self, key) -> bool:
+        """Insert a key. Returns False if it was already present."""
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            return True
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j < len(bucket) and bucket[j] == key:
+            return False
+        bucket.insert(j, key)
+        self._maxes[i] = bucket[-1]
+        self._len += 1
+        if len(bucket) > 2 * self._load:
+            half = len(bucket) // 2
+            self._buckets[i : i + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[i : i + 1] = [bucket[half - 1], bucket[-1]]
+        return True
+
+    def discard(self, key) -> bool:
+        """Remove a key if present. Returns True if it was removed."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            return False
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+        return True
+
+    def remove(self, key) -> None:
+        """Remove a key; raises KeyError if it is missing."""
+        if not self.discard(key):
+            raise KeyError(key)
+
+    def bisect_left(self, key) -> int:
+        """Number of keys strictly less than key."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        before = sum(map(len, self._buckets[:i]))
+        return before + bisect_left(self._buckets[i], key)
+
+    def bisect_right(self, key) -> int:
+        """Number of keys less than or equal to key."""
+        i = bisect_right(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        before = sum(map(len, self._buckets[:i]))
+        return before + bisect_right(self._buckets[i], key)
+
+    def index(self, key) -> int:
+        """Zero-based rank of a key; raises KeyError if it is missing."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            raise KeyError(key)
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            raise KeyError(key)
+        return sum(map(len, self._buckets[:i])) + j
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("OrderStatisticList index out of range")
+        for bucket in self._buckets:
+            if index < len(bucket):
+                return bucket[index]
+            index -= len(bucket)
+        raise IndexError("OrderStatisticList index out of range")
+
+    def slice(self, start: int, stop: int) -> list:
+        """Keys at positions [start, stop), like list slicing with non-negative bounds."""
+        start = max(0, start)
+        stop = min(self._len, stop)
+        result = []
+        if start >= stop:
+            return result
+        offset = 0
+        for bucket in self._buckets:
+            end = offset + len(bucket)
+            if end > start:
+                result.extend(bucket[max(0, start - offset) : stop - offset])
+                if end >= stop:
+                    break
+            offset = end
+        return result
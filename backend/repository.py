@@ -0,0 +1,737 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Game Storage Repository Module
+
+This module defines the storage operations game_logic needs (games,
+participants, questions, player stats and secret words) behind a single
+repository interface, so the same game code can run against Supabase or
+against a local engine.
+
+Engines:
+- SupabaseRepository: PostgREST queries through the Supabase client (default)
+- MemoryRepository (memory_repository.py): thread-safe, in-process, for tests
+  and offline load runs
+- SQLiteRepository (sqlite_repository.py): embedded WAL database for
+  single-node self-hosted deployments
+
+Methods return plain row dicts (or lists of them), mirroring what PostgREST
+returns in `response.data`. A lookup that finds nothing returns None or an
+empty list; callers decide whether that is an error.
+
+Usage:
+    repo = create_repository()          # engine chosen by STORAGE_BACKEND
+    game = repo.create_game({...})
+    repo.add_participant(game["id"], player_id)
+
+    # From async code
+    game = await repo.get_game_async(game_id)
+"""
+
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from supabase_client import get_supabase_client, get_async_supabase_client
+
+
+# Used when no words are supplied, so local engines work without setup
+DEFAULT_SECRET_WORDS = [
+    {"name": "elephant", "category": "animals", "difficulty": 1},
+    {"name": "pizza", "category": "food", "difficulty": 1},
+    {"name": "bicycle", "category": "objects", "difficulty": 1},
+    {"name": "computer", "category": "objects", "difficulty": 2},
+    {"name": "volcano", "category": "places", "difficulty": 2},
+    {"name": "telescope", "category": "objects", "difficulty": 3},
+    {"name": "platypus", "category": "animals", "difficulty": 3},
+]
+
+# Achievement catalog, as seeded by 20261019140000_seed_achievements.sql
+DEFAULT_ACHIEVEMENTS = [
+    {"name": "First Win", "description": "Win your first game", "icon_name": "trophy", "rarity": "common"},
+    {"name": "Hat Trick", "description": "Win three games in a row", "icon_name": "flame", "rarity": "rare"},
+    {"name": "Unstoppable", "description": "Win ten games in a row", "icon_name": "zap", "rarity": "epic"},
+    {"name": "Quick Thinker", "description": "Win a game in five questions or fewer", "icon_name": "timer", "rarity": "rare"},
+    {"name": "Mind Reader", "description": "Win a game with a single question", "icon_name": "brain", "rarity": "epic"},
+    {"name": "Regular", "description": "Play ten games", "icon_name": "calendar", "rarity": "common"},
+    {"name": "Veteran", "description": "Play one hundred games", "icon_name": "medal", "rarity": "rare"},
+]
+
+# Column defaults from supabase/migrations, applied by the local engines
+GAME_DEFAULTS = {
+    "host_player_id": None,
+    "current_player_id": None,
+    "status": "waiting",
+    "questions_asked": 0,
+    "winner_id": None,
+    "completed_at": None,
+    "difficulty": None,
+    "enable_tts": False,
+    "voice_id": None,
+    "game_type": None,
+    "max_players": None,
+    "game_code": None,
+    "is_private": False,
+    "guessed_word": None,
+    "stats_applied_at": None,
+}
+
+QUESTION_DEFAULTS = {
+    "game_id": None,
+    "player_id": None,
+    "answer": None,
+    "question_number": None,
+    "is_final_guess": False,
+    "audio_url": None,
+    "ai_response_audio_url": None,
+}
+
+STATS_DEFAULTS = {
+    "games_won": 0,
+    "games_played": 0,
+    "total_questions_asked": 0,
+    "average_questions_to_win": None,
+    "win_rate": None,
+}
+
+PLAYER_STATS_DEFAULTS = {
+    **STATS_DEFAULTS,
+    "current_streak": 0,
+    "best_streak": 0,
+    "fastest_win_questions": 0,
+    "total_time_played": 0,
+    "last_game_played_at": None,
+}
+
+
+def utc_now():
+    """Current time in the format of a `timestamp without time zone` column."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def resolve_now(value):
+    # game_logic sends the literal "now()" for completed_at
+    return utc_now() if value == "now()" else value
+
+
+def apply_result_to_stats(stats: dict, won: bool, questions_asked: int, played_at=None) -> dict:
+    """
+    Fold one game result into a stats row.
+
+    This is the Python twin of the apply_game_result() SQL function, used by
+    the local engines. Streak, fastest-win and last-played columns are only
+    maintained when the row has them (player_stats, not the per-difficulty rows).
+    """
+    games_won = stats.get("games_won") or 0
+    games_played = (stats.get("games_played") or 0) + 1
+    new_won = games_won + (1 if won else 0)
+
+    average = stats.get("average_questions_to_win") or 0
+    if won:
+        average = (average * games_won + questions_asked) / new_won
+
+    updated = {
+        **stats,
+        "games_played": games_played,
+        "games_won": new_won,
+        "total_questions_asked": (stats.get("total_questions_asked") or 0) + questions_asked,
+        "average_questions_to_win": average,
+        "win_rate": round((new_won / games_played) * 100, 2),
+    }
+    if "current_streak" in stats:
+        streak = (stats.get("current_streak") or 0) + 1 if won else 0
+        fastest = stats.get("fastest_win_questions") or 0
+        if won and (fastest == 0 or questions_asked < fastest):
+            fastest = questions_asked
+        updated["current_streak"] = streak
+        updated["best_streak"] = max(stats.get("best_streak") or 0, streak)
+        updated["fastest_win_questions"] = fastest
+        updated["last_game_played_at"] = played_at or utc_now()
+    return updated
+
+
+class IntegrityError(Exception):
+    """Raised by local engines when a write violates a table constraint."""
+
+
+class GameRepository(ABC):
+    """
+    Storage interface used by game_logic.
+
+    Engines implement the sync methods, which are abstract: an engine missing
+    one fails when it is instantiated. The `*_async` variants default to
+    running the sync method in a worker thread; engines whose calls never
+    block (in-memory) set `blocking = False` to run them inline, and engines
+    with a native async driver override them.
+    """
+
+    blocking = True
+
+    # Secret words
+    @abstractmethod
+    def list_secret_words(self) -> List[dict]:
+        raise NotImplementedError
+
+    # Games
+    @abstractmethod
+    def create_game(self, data: dict) -> Optional[dict]:
+        """Insert a game and return the stored row (with defaults applied)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_game(self, game_id) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_game(self, game_id, fields: dict) -> Optional[dict]:
+        """Update a game and return the updated row, or None if it does not exist."""
+        raise NotImplementedError
+
+    # Participants
+    @abstractmethod
+    def add_participant(self, game_id, player_id) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_participants(self, game_id) -> List[dict]:
+        raise NotImplementedError
+
+    # Questions
+    @abstractmethod
+    def insert_question(self, row: dict) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert_questions(self, rows: List[dict]) -> None:
+        """Multi-row insert that skips rows whose id is already stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_questions(self, game_id, player_id) -> int:
+        raise NotImplementedError
+
+    # Player stats
+    @abstractmethod
+    def get_player_stats(self, player_id) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_player_stats_difficulty(self, player_id, difficulty) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_player_stats(self, stats: dict) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_player_stats_difficulty(self, stats: dict) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_player_stats(
+        self, after=None, limit: int = 1000, changed_since=None
+    ) -> List[dict]:
+        """
+        Page through player_stats ordered by player_id.
+
+        Args:
+            after: Return rows with player_id greater than this (keyset cursor)
+            limit (int): Page size
+            changed_since: Only rows whose last_game_played_at is later than this
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_player_stats_difficulty(self, player_ids: List) -> List[dict]:
+        """Every per-difficulty stats row for the given players."""
+        raise NotImplementedError
+
+    # Game history
+    @abstractmethod
+    def record_game_history(self, game_id) -> int:
+        """
+        Write one player_game_history row per participant of a finished game.
+        Rows that already exist are left alone. Returns the number written.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_game_history(
+        self, player_id, limit: int = 20, before=None, result=None, difficulty=None
+    ) -> List[dict]:
+        """
+        A page of a player's history, newest first.
+
+        Args:
+            before (tuple): (completed_at, game_id) of the previous page's last row
+            result (str): "won" or "lost"
+            difficulty (int): Only games of this difficulty
+        """
+        raise NotImplementedError
+
+    # Players
+    @abstractmethod
+    def get_players(self, player_ids: List) -> List[dict]:
+        """Player rows (id, username, avatar_url) for the given ids; missing ids are skipped."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_player(self, player: dict) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_players(self, after=None, limit: int = 1000, changed_since=None) -> List[dict]:
+        """
+        Player rows (id, username, avatar_url, updated_at) ordered by id,
+        starting after `after`.
+
+        Args:
+            changed_since: Only rows whose updated_at is later than this
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def search_players(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        Players (id, username, avatar_url) whose username starts with the
+        query, then ones that contain it, case-insensitive.
+        """
+        raise NotImplementedError
+
+    # Achievements
+    @abstractmethod
+    def award_achievements(self, player_id, names: List[str]) -> List[str]:
+        """
+        Record achievements for a player, ignoring ones already earned and
+        names missing from the catalog. Also refreshes the player's cached
+        `players.achievements` list when something new was awarded.
+
+        Returns:
+            list: The names that were newly awarded
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_player_achievements(self, player_id) -> List[str]:
+        """Names of the achievements a player has earned, oldest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def apply_game_result(self, game_id) -> bool:
+        """
+        Atomically add a finished game to every participant's player_stats and
+        player_stats_difficulty rows, using the game's winner_id and difficulty.
+
+        Returns:
+            bool: False if the game does not exist or was already applied
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_unapplied_games(self, finished_before, limit: int = 100) -> List[dict]:
+        """
+        Finished games (id, winner_id) whose stats were never applied
+        (stats_applied_at is null) and that completed before finished_before,
+        oldest first. The completion pipeline's sweep re-runs them.
+        """
+        raise NotImplementedError
+
+    # Async variants
+    async def _call(self, fn, *args):
+        if not self.blocking:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def get_game_async(self, game_id):
+        return await self._call(self.get_game, game_id)
+
+    async def update_game_async(self, game_id, fields):
+        return await self._call(self.update_game, game_id, fields)
+
+    async def add_participant_async(self, game_id, player_id):
+        return await self._call(self.add_participant, game_id, player_id)
+
+    async def list_participants_async(self, game_id):
+        return await self._call(self.list_participants, game_id)
+
+    async def insert_question_async(self, row):
+        return await self._call(self.insert_question, row)
+
+    async def count_questions_async(self, game_id, player_id):
+        return await self._call(self.count_questions, game_id, player_id)
+
+    async def get_player_stats_async(self, player_id):
+        return await self._call(self.get_player_stats, player_id)
+
+    async def get_player_stats_difficulty_async(self, player_id, difficulty):
+        return await self._call(self.get_player_stats_difficulty, player_id, difficulty)
+
+    async def upsert_player_stats_async(self, stats):
+        return await self._call(self.upsert_player_stats, stats)
+
+    async def upsert_player_stats_difficulty_async(self, stats):
+        return await self._call(self.upsert_player_stats_difficulty, stats)
+
+    async def apply_game_result_async(self, game_id):
+        return await self._call(self.apply_game_result, game_id)
+
+
+def _first(data):
+    return data[0] if data else None
+
+
+class SupabaseRepository(GameRepository):
+    """
+    Repository backed by Supabase PostgREST.
+
+    Args:
+        client_factory (callable): Returns the sync Supabase client
+        async_client_factory (callable): Coroutine function returning the async client
+
+    The factories are called on every operation, so the client can be swapped
+    (or patched in tests) after the repository is created.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable = get_supabase_client,
+        async_client_factory: Callable = get_async_supabase_client,
+    ):
+        self._client = client_factory
+        self._async_client = async_client_factory
+        self._achievement_ids = None  # name -> id, loaded on first award
+
+    def list_secret_words(self):
+        return self._client().table("secret_words").select("*").execute().data or []
+
+    def create_game(self, data):
+        return _first(self._client().table("games").insert(data).execute().data)
+
+    def get_game(self, game_id):
+        return (
+            self._client()
+            .table("games")
+            .select("*")
+            .eq("id", game_id)
+            .single()
+            .execute()
+            .data
+        )
+
+    def update_game(self, game_id, fields):
+        return _first(
+            self._client().table("games").update(fields).eq("id", game_id).execute().data
+        )
+
+    def add_participant(self, game_id, player_id):
+        data = {"game_id": game_id, "player_id": player_id}
+        return _first(self._client().table("game_participants").insert(data).execute().data)
+
+    def list_participants(self, game_id):
+        return (
+            self._client()
+            .table("game_participants")
+            .select("player_id")
+            .eq("game_id", game_id)
+            .execute()
+            .data
+            or []
+        )
+
+    def insert_question(self, row):
+        return _first(self._client().table("game_questions").insert(row).execute().data)
+
+    def insert_questions(self, rows):
+        self._client().table("game_questions").upsert(
+            rows, on_conflict="id", ignore_duplicates=True
+        ).execute()
+
+    def count_questions(self, game_id, player_id):
+        resp = (
+            self._client()
+            .table("game_questions")
+            .select("id", count="exact", head=True)
+            .eq("game_id", game_id)
+            .eq("player_id", player_id)
+            .execute()
+        )
+        return resp.count or 0
+
+    def get_player_stats(self, player_id):
+        return _first(
+            self._client()
+            .table("player_stats")
+            .select("*")
+            .eq("player_id", player_id)
+            .execute()
+            .data
+        )
+
+    def get_player_stats_difficulty(self, player_id, difficulty):
+        return _first(
+            self._client()
+            .table("player_stats_difficulty")
+            .select("*")
+            .eq("player_id", player_id)
+            .eq("difficulty", difficulty)
+            .execute()
+            .data
+        )
+
+    def upsert_player_stats(self, stats):
+        return _first(self._client().table("player_stats").upsert(stats).execute().data)
+
+    def upsert_player_stats_difficulty(self, stats):
+        return _first(
+            self._client().table("player_stats_difficulty").upsert(stats).execute().data
+        )
+
+    def list_player_stats(self, after=None, limit=1000, changed_since=None):
+        query = self._client().table("player_stats").select("*")
+        if after is not None:
+            query = query.gt("player_id", after)
+        if changed_since is not None:
+            query = query.gt("last_game_played_at", changed_since)
+        return query.order("player_id").limit(limit).execute().data or []
+
+    def list_player_stats_difficulty(self, player_ids):
+        if not player_ids:
+            return []
+        return (
+            self._client()
+            .table("player_stats_difficulty")
+            .select("*")
+            .in_("player_id", list(player_ids))
+            .execute()
+            .data
+            or []
+        )
+
+    def record_game_history(self, game_id):
+        # supabase/migrations/20261019160000_player_game_history.sql
+        response = self._client().rpc("record_game_history", {"p_game_id": game_id}).execute()
+        return response.data or 0
+
+    def list_game_history(self, player_id, limit=20, before=None, result=None, difficulty=None):
+        params = {"p_player_id": player_id, "p_limit": limit}
+        if before is not None:
+            params["p_before_completed_at"], params["p_before_game_id"] = before
+        if result is not None:
+            params["p_result"] = result
+        if difficulty is not None:
+            params["p_difficulty"] = difficulty
+        return self._client().rpc("player_game_history_page", params).execute().data or []
+
+    def get_players(self, player_ids):
+        if not player_ids:
+            return []
+        return (
+            self._client()
+            .table("players")
+            .select("id, username, avatar_url")
+            .in_("id", list(player_ids))
+            .execute()
+            .data
+            or []
+        )
+
+    def upsert_player(self, player):
+        return _first(self._client().table("players").upsert(player).execute().data)
+
+    def list_players(self, after=None, limit=1000, changed_since=None):
+        # updated_at: supabase/migrations/20261019190000_players_updated_at.sql
+        query = self._client().table("players").select("id, username, avatar_url, updated_at")
+        if after is not None:
+            query = query.gt("id", after)
+        if changed_since is not None:
+            query = query.gt("updated_at", changed_since)
+        return query.order("id").limit(limit).execute().data or []
+
+    def search_players(self, query, limit=10):
+        # supabase/migrations/20261019170000_player_search.sql
+        params = {"p_query": query, "p_limit": limit}
+        return self._client().rpc("search_players", params).execute().data or []
+
+    def _achievement_catalog(self):
+        if self._achievement_ids is None:
+            rows = self._client().table("achievements").select("id, name").execute().data or []
+            self._achievement_ids = {r["name"]: r["id"] for r in rows}
+        return self._achievement_ids
+
+    def award_achievements(self, player_id, names):
+        catalog = self._achievement_catalog()
+        rows = [
+            {"player_id": player_id, "achievement_id": catalog[n]} for n in names if n in catalog
+        ]
+        if not rows:
+            return []
+        response = (
+            self._client()
+            .table("player_achievements")
+            .upsert(rows, on_conflict="player_id,achievement_id", ignore_duplicates=True)
+            .execute()
+        )
+        # Only inserted rows come back when duplicates are ignored
+        new_ids = {r["achievement_id"] for r in response.data or []}
+        awarded = [n for n in names if catalog.get(n) in new_ids]
+        if awarded:
+            self._client().table("players").update(
+                {"achievements": self.list_player_achievements(player_id)}
+            ).eq("id", player_id).execute()
+        return awarded
+
+    def list_player_achievements(self, player_id):
+        rows = (
+            self._client()
+            .table("player_achievements")
+            .select("achievement_id, earned_at")
+            .eq("player_id", player_id)
+            .order("earned_at")
+            .execute()
+            .data
+            or []
+        )
+        names = {v: k for k, v in self._achievement_catalog().items()}
+        return [names[r["achievement_id"]] for r in rows if r["achievement_id"] in names]
+
+    def apply_game_result(self, game_id):
+        # supabase/migrations/20261019130000_apply_game_result.sql
+        response = self._client().rpc("apply_game_result", {"p_game_id": game_id}).execute()
+        return bool(response.data)
+
+    def list_unapplied_games(self, finished_before, limit=100):
+        # Partial index: supabase/migrations/20261019180000_unapplied_games_index.sql
+        return (
+            self._client()
+            .table("games")
+            .select("id, winner_id")
+            .eq("status", "finished")
+            .is_("stats_applied_at", "null")
+            .lt("completed_at", finished_before)
+            .order("completed_at")
+            .limit(limit)
+            .execute()
+            .data
+            or []
+        )
+
+    # Native async versions (same queries through the async client)
+    async def get_game_async(self, game_id):
+        client = await self._async_client()
+        response = await (
+            client.table("games").select("*").eq("id", game_id).single().execute()
+        )
+        return response.data
+
+    async def update_game_async(self, game_id, fields):
+        client = await self._async_client()
+        response = await client.table("games").update(fields).eq("id", game_id).execute()
+        return _first(response.data)
+
+    async def add_participant_async(self, game_id, player_id):
+        client = await self._async_client()
+        data = {"game_id": game_id, "player_id": player_id}
+        response = await client.table("game_participants").insert(data).execute()
+        return _first(response.data)
+
+    async def list_participants_async(self, game_id):
+        client = await self._async_client()
+        response = await (
+            client.table("game_participants")
+            .select("player_id")
+            .eq("game_id", game_id)
+            .execute()
+        )
+        return response.data or []
+
+    async def insert_question_async(self, row):
+        client = await self._async_client()
+        response = await client.table("game_questions").insert(row).execute()
+        return _first(response.data)
+
+    async def count_questions_async(self, game_id, player_id):
+        client = await self._async_client()
+        response = await (
+            client.table("game_questions")
+            .select("id", count="exact", head=True)
+            .eq("game_id", game_id)
+            .eq("player_id", player_id)
+            .execute()
+        )
+        return response.count or 0
+
+    async def get_player_stats_async(self, player_id):
+        client = await self._async_client()
+        response = await (
+            client.table("player_stats").select("*").eq("player_id", player_id).execute()
+        )
+        return _first(response.data)
+
+    async def get_player_stats_difficulty_async(self, player_id, difficulty):
+        client = await self._async_client()
+        response = await (
+            client.table("player_stats_difficulty")
+            .select("*")
+            .eq("player_id", player_id)
+            .eq("difficulty", difficulty)
+            .execute()
+        )
+        return _first(response.data)
+
+    async def upsert_player_stats_async(self, stats):
+        client = await self._async_client()
+        response = await client.table("player_stats").upsert(stats).execute()
+        return _first(response.data)
+
+    async def upsert_player_stats_difficulty_async(self, stats):
+        client = await self._async_client()
+        response = await client.table("player_stats_difficulty").upsert(stats).execute()
+        return _first(response.data)
+
+    async def apply_game_result_async(self, game_id):
+        client = await self._async_client()
+        response = await client.rpc("apply_game_result", {"p_game_id": game_id}).execute()
+        return bool(response.data)
+
+
+def create_repository(backend: Optional[str] = None, **kwargs) -> GameRepository:
+    """
+    Create a repository for the configured storage engine.
+
+    Args:
+        backend (str): "supabase", "memory" or "sqlite"; defaults to the STORAGE_BACKEND
+            environment variable, then "supabase"
+        **kwargs: Passed to the engine's constructor
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND", "supabase")).strip().lower()
+    if backend == "supabase":
+        return SupabaseRepository(**kwargs)
+    if backend == "memory":
+        from memory_repository import MemoryRepository
+
+        return MemoryRepository(**kwargs)
+    if backend == "sqlite":
+        from sqlite_repository import SQLiteRepository
+
+        return SQLiteRepository(**kwargs)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -0,0 +1,323 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Segment Blob Store Module
+
+Key/value store for binary blobs (cached speech, linked clips) that keeps
+them in a few large append-only segment files instead of one file per
+blob, which is slow to create, stat and walk on Lambda /tmp and container
+overlay filesystems.
+
+Layout under the store directory:
+- segment-00000001.dat ...: records of [header | key | data]; the newest
+  segment is appended to, older ones are sealed once SEGMENT_BYTES is reached
+- LOCK: held (flock) by the one process that owns the directory
+
+Each record header is MAGIC, a flag (put or delete), the key length and
+the data length. Opening the store scans the headers once to rebuild the
+index, a dict of key -> (segment, offset, length), dropping a torn record
+at the tail of the last segment. Reads go through a read-only mmap of the
+segment and return a memoryview into it, so a blob is streamed without
+being copied.
+
+Writes that replace or delete a key, and LRU eviction past max_bytes,
+leave dead records behind; once they outweigh the live data, compaction
+copies the live records of the sealed segments forward and deletes those
+segments.
+
+Usage:
+    store = SegmentStore("/tmp/20q_blobs", max_bytes=256 * 1024 * 1024)
+    store.put(key, audio)
+    view = store.get(key)  # memoryview, or None
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# "files" keeps one file per blob (the default); "segments" uses SegmentStore
+BLOB_STORE = os.getenv("BLOB_STORE", "files").lower()
+SEGMENT_BYTES = int(os.getenv("BLOB_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+
+MAGIC = b"20QS"
+HEADER = struct.Struct("<4sBBI")  # magic, flags, key length, data length
+PUT = 0
+DELETE = 1
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{8})\.dat$")
+
+
+class StoreLockedError(OSError):
+    """Raised when another process owns the store directory."""
+
+
+class SegmentStore:
+    """
+    Thread-safe append-only blob store with an in-memory index.
+
+    Args:
+        directory (str): Where segments are kept (created if missing)
+        max_bytes (int): Live data kept; least recently read blobs are evicted past it
+        segment_bytes (int): Size at which the active segment is sealed
+        compact_ratio (float): Compact when dead bytes exceed this share of the sealed segments
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        segment_bytes: int = SEGMENT_BYTES,
+        compact_ratio: float = 0.5,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._index = OrderedDict()  # key -> (segment, offset, length), LRU first
+        self._segments = {}  # segment -> [record bytes, dead record bytes]
+        self._maps = {}  # segment -> read-only mmap
+        self._live_bytes = 0
+        self._active = None
+        self._active_file = None
+        self.evictions = 0
+        self.compactions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._acquire()
+        self._load()
+
+    # Public API
+
+    def get(self, key: str) -> Optional[memoryview]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            self._index.move_to_end(key)
+            segment, offset, length = entry
+            return memoryview(self._map(segment, offset + length))[offset : offset + length]
+
+    def put(self, key: str, data) -> None:
+        with self._lock:
+            self._append(PUT, key, data)
+            self._evict()
+            self._maybe_compact()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._index:
+                return False
+            self._append(DELETE, key, b"")
+            self._maybe_compact()
+            return True
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    def compact(self) -> int:
+        """Copy the live records of sealed segments forward and delete them. Returns bytes freed."""
+        with self._lock:
+            sealed = {s for s in self._segments if s != self._active}
+            if not sealed:
+                return 0
+            freed = sum(self._segments[s][0] for s in sealed)
+            order = list(self._index)
+            for key in order:
+                segment, offset, length = self._index[key]
+                if segment in sealed:
+                    data = self._map(segment, offset + length)[offset : offset + length]
+                    freed -= self._append(PUT, key, data)
+            # Copying is not a read: keep each blob's place in the LRU order
+            for key in order:
+                self._index.move_to_end(key)
+            for segment in sealed:
+                self._drop_segment(segment)
+            self.compactions += 1
+            return freed
+
+    def clear(self) -> None:
+        with self._lock:
+            for segment in list(self._segments):
+                self._drop_segment(segment)
+            self._index.clear()
+            self._live_bytes = 0
+            self._open_segment(1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(s[0] for s in self._segments.values())
+            dead = sum(s[1] for s in self._segments.values())
+            return {
+                "entries": len(self._index),
+                "bytes": self._live_bytes,
+                "segments": len(self._segments),
+                "segment_bytes": total,
+                "dead_bytes": dead,
+                "evictions": self.evictions,
+                "compactions": self.compactions,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._active_file is not None:
+                self._active_file.close()
+                self._active_file = None
+            # Views handed out keep their mapping alive; just drop ours
+            self._maps.clear()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    # Internals (callers hold the lock)
+
+    def _acquire(self):
+        if fcntl is None:
+            return None
+        lock_file = open(os.path.join(self.directory, "LOCK"), "a+b")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise StoreLockedError(f"Blob store {self.directory} is in use by another process")
+        return lock_file
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:08d}.dat")
+
+    def _load(self):
+        segments = sorted(
+            int(m.group(1))
+            for m in map(SEGMENT_PATTERN.match, os.listdir(self.directory))
+            if m
+        )
+        for segment in segments:
+            self._segments[segment] = [0, 0]
+            end = self._scan(segment)
+            if end < os.path.getsize(self._path(segment)):
+                # A torn record from a crash mid-append: drop it
+                print(f"Truncating blob segment {segment} at byte {end}")
+                os.truncate(self._path(segment), end)
+                self._maps.pop(segment, None)
+        self._open_segment(segments[-1] if segments else 1)
+
+    def _scan(self, segment):
+        """Index one segment's records; returns the offset after the last whole one."""
+        size = os.path.getsize(self._path(segment))
+        if size == 0:
+            return 0
+        view = self._map(segment, size)
+        position = 0
+        while position + HEADER.size <= size:
+            magic, flags, key_length, data_length = HEADER.unpack_from(view, position)
+            end = position + HEADER.size + key_length + data_length
+            if magic != MAGIC or end > size:
+                break
+            key_start = position + HEADER.size
+            key = bytes(view[key_start : key_start + key_length]).decode("utf-8")
+            self._record(segment, flags, key, key_start + key_length, data_length, end - position)
+            position = end
+        return position
+
+    def _record(self, segment, flags, key, offset, length, record_size):
+        """Apply one record to the index and the per-segment accounting."""
+        self._segments[segment][0] += record_size
+        previous = self._index.pop(key, None)
+        if previous is not None:
+            self._live_bytes -= previous[2]
+            self._segments[previous[0]][1] += HEADER.size + len(key.encode("utf-8")) + previous[2]
+        if flags == PUT:
+            self._index[key] = (segment, offset, length)
+            self._live_bytes += length
+        else:
+            # A delete record is dead as soon as it is written
+            self._segments[segment][1] += record_size
+
+    def _open_segment(self, segment):
+        if self._active_file is not None:
+            self._active_file.close()
+        self._active = segment
+        self._segments.setdefault(segment, [0, 0])
+        self._active_file = open(self._path(segment), "ab")
+
+    def _append(self, flags, key, data):
+        """Write one record to the active segment; returns its size."""
+        key_bytes = key.encode("utf-8")
+        if len(key_bytes) > 255:
+            raise ValueError("Blob keys are limited to 255 bytes")
+        record_size = HEADER.size + len(key_bytes) + len(data)
+        if self._segments[self._active][0] and (
+            self._segments[self._active][0] + record_size > self.segment_bytes
+        ):
+            self._open_segment(self._active + 1)
+        offset = self._segments[self._active][0]
+        self._active_file.write(HEADER.pack(MAGIC, flags, len(key_bytes), len(data)))
+        self._active_file.write(key_bytes)
+        self._active_file.write(data)
+        self._active_file.flush()
+        self._record(
+            self._active, flags, key, offset + HEADER.size + len(key_bytes), len(data), record_size
+        )
+        return record_size
+
+    def _map(self, segment, needed):
+        """A read-only mapping of the segment covering at least `needed` bytes."""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < needed:
+            # The active segment grows: map it again at its current size
+            with open(self._path(segment), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def _evict(self):
+        while self._live_bytes > self.max_bytes and len(self._index) > 1:
+            key = next(iter(self._index))
+            self._append(DELETE, key, b"")
+            self.evictions += 1
+
+    def _maybe_compact(self):
+        sealed = [v for s, v in self._segments.items() if s != self._active]
+        total = sum(v[0] for v in sealed)
+        if total and sum(v[1] for v in sealed) > self.compact_ratio * total:
+            self.compact()
+
+    def _drop_segment(self, segment):
+        if segment == self._active and self._active_file is not None:
+            self._active_file.close()
+            self._active_file = None
+        # Outstanding views keep the mapping (and the unlinked file) readable
+        self._maps.pop(segment, None)
+        self._segments.pop(segment, None)
+        try:
+            os.remove(self._path(segment))
+        except OSError:
+            pass
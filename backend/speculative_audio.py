@@ -0,0 +1,223 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Speculative Audio Module
+
+Background rendering of speech that is known before it is needed. When a
+TTS game starts, both endings ("Congratulations! ... The answer was
+{word}." and "Game over! ... The answer was {word}.") are fixed by the
+secret word, so they are synthesized while the game is played and the
+final guess or 20th question does not wait on ElevenLabs.
+
+Renders run on a small thread pool through elevenlabs_utils.generate_speech,
+so they land in the TTS cache like any other speech. When the game's
+ending is taken both renders are dropped from the cache (they only serve this
+game's word), and the one that was not used is counted as wasted. Games abandoned without an ending are swept after
+SPECULATIVE_TTS_TTL seconds.
+
+Metrics (SpeculativeAudio.stats()):
+    prefetched   renders started
+    hits         endings served from a render (possibly waiting for it to finish)
+    misses       endings that had no usable render and were synthesized inline
+    wasted       renders that were never served
+    hit_rate     hits / (hits + misses)
+
+Configuration (environment variables):
+    SPECULATIVE_TTS          "false" to disable speculative rendering (default "true")
+    SPECULATIVE_TTS_WORKERS  Render threads (default 2)
+    SPECULATIVE_TTS_TTL      Seconds a game's renders are kept without an ending (default 7200)
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import elevenlabs_utils
+from tts_cache import get_tts_cache, normalize_text, tts_cache_key
+
+SPECULATIVE_TTS = os.getenv("SPECULATIVE_TTS", "true").lower() == "true"
+SPECULATIVE_TTS_WORKERS = int(os.getenv("SPECULATIVE_TTS_WORKERS", "2"))
+SPECULATIVE_TTS_TTL = float(os.getenv("SPECULATIVE_TTS_TTL", "7200"))
+
+
+def _speech_key(text, voice_id):
+    """TTS cache key of generate_speech(text, voice_id) with its defaults."""
+    return tts_cache_key(
+        text,
+        voice_id or elevenlabs_utils.ELEVENLABS_VOICE_ID,
+        elevenlabs_utils.DEFAULT_MODEL_ID,
+        elevenlabs_utils.VOICE_SETTINGS["quick_response"],
+    )
+
+
+class SpeculativeAudio:
+    """
+    Per-game speculative renders with hit and waste accounting.
+
+    Args:
+        workers (int): Render threads
+        ttl (float): Seconds a game's renders are kept without an ending
+        synthesize (callable): (text, voice_id) -> bytes or None
+    """
+
+    def __init__(
+        self,
+        workers: int = SPECULATIVE_TTS_WORKERS,
+        ttl: float = SPECULATIVE_TTS_TTL,
+        synthesize=None,
+    ):
+        self.ttl = ttl
+        self._synthesize = synthesize or elevenlabs_utils.generate_speech
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="tts-prefetch"
+        )
+        self._lock = threading.Lock()
+        self._games = {}  # game_id -> (started_at, {key: future})
+        self._holders = {}  # key -> number of games holding it (games can share a word and voice)
+        self.prefetched = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+
+    def prefetch(self, game_id, texts, voice_id=None) -> None:
+        """Start rendering texts for a game in the background."""
+        self._sweep()
+        if not texts:
+            return
+        renders = {}
+        for text in texts:
+            key = _speech_key(text, voice_id)
+            if key not in renders:
+                renders[key] = self._executor.submit(self._synthesize, normalize_text(text), voice_id)
+        with self._lock:
+            if game_id in self._games:
+                for future in renders.values():
+                    future.cancel()
+                return
+            self._games[game_id] = (time.monotonic(), renders)
+            for key in renders:
+                self._holders[key] = self._holders.get(key, 0) + 1
+            self.prefetched += len(renders)
+
+    def pending(self, game_id) -> bool:
+        """True if the game has renders waiting to be taken."""
+        with self._lock:
+            return game_id in self._games
+
+    def take(self, game_id, text, voice_id=None) -> Optional[bytes]:
+        """
+        Audio for a game's ending, or None if there is no usable render
+        (the caller then synthesizes it). Ends the game's speculation either way.
+        """
+        key = _speech_key(text, voice_id)
+        with self._lock:
+            entry = self._games.pop(game_id, None)
+        renders = entry[1] if entry else {}
+        future = renders.pop(key, None)
+        audio = None
+        # A render still queued is cancelled: synthesizing now is no slower.
+        # One already running is waited for, since it is ahead of a new request.
+        if future is not None and not future.cancel():
+            try:
+                audio = future.result()
+            except Exception as e:
+                print(f"Speculative render failed: {e}")
+        with self._lock:
+            if audio:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if future is not None:
+            self._release(key)
+        self._discard(renders)
+        return audio
+
+    def release(self, game_id) -> None:
+        """Drop a game's renders without serving them (e.g. TTS turned off)."""
+        with self._lock:
+            entry = self._games.pop(game_id, None)
+        if entry:
+            self._discard(entry[1])
+
+    def stats(self) -> dict:
+        with self._lock:
+            served = self.hits + self.misses
+            return {
+                "prefetched": self.prefetched,
+                "hits": self.hits,
+                "misses": self.misses,
+                "wasted": self.wasted,
+                "hit_rate": round(self.hits / served, 3) if served else 0.0,
+                "pending_games": len(self._games),
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _discard(self, renders):
+        for key, future in renders.items():
+            if not future.cancel():
+                with self._lock:
+                    self.wasted += 1
+            # A render already running cannot be cancelled and puts its audio
+            # in the TTS cache when it finishes: release the key after that
+            # (at once for a cancelled or finished render)
+            future.add_done_callback(lambda _, key=key: self._release(key))
+
+    def _release(self, key):
+        """Forget one game's hold on a render; the last holder drops it from the TTS cache."""
+        with self._lock:
+            remaining = self._holders.get(key, 1) - 1
+            if remaining > 0:
+                self._holders[key] = remaining
+                return
+            self._holders.pop(key, None)
+        get_tts_cache().discard(key)
+
+    def _sweep(self):
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [g for g, (started, _) in self._games.items() if started < cutoff]
+            entries = [self._games.pop(g) for g in expired]
+        for _, renders in entries:
+            self._discard(renders)
+
+
+_speculative_audio = None
+_speculative_audio_lock = threading.Lock()
+
+
+def get_speculative_audio() -> SpeculativeAudio:
+    """Get the process-wide speculative renderer."""
+    global _speculative_audio
+    with _speculative_audio_lock:
+        if _speculative_audio is None:
+            _speculative_audio = SpeculativeAudio()
+        return _speculative_audio
+
+
+def set_speculative_audio(speculative: Optional[SpeculativeAudio]) -> None:
+    """Replace (or with None, reset) the process-wide speculative renderer."""
+    global _speculative_audio
+    with _speculative_audio_lock:
+        previous, _speculative_audio = _speculative_audio, speculative
+    if previous is not None and previous is not speculative:
+        previous.close()
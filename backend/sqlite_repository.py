@@ -0,0 +1,682 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Embedded SQLite Storage Engine
+
+A GameRepository for single-node, self-hosted deployments where a round trip
+to Supabase would dominate every request. The schema mirrors
+supabase/migrations/20250622181000_init_schema.sql with SQLite types:
+
+- uuid / varchar / timestamp columns are TEXT (ISO-8601 timestamps)
+- boolean columns are INTEGER 0/1 (converted back to bool on read)
+- jsonb / text[] columns are TEXT holding JSON
+
+Player ids are not foreign keys here: players are still created through
+Supabase Auth on signup, so only the references to `games` are enforced.
+
+Performance notes:
+- WAL journal mode with synchronous=NORMAL: readers never block the writer
+- one connection per thread (threading.local), so no connection is shared
+- every query is a constant SQL string, so sqlite3's per-connection
+  statement cache reuses the prepared statement on each call
+
+Configuration:
+    STORAGE_BACKEND=sqlite
+    SQLITE_DB_PATH=data/20q.sqlite3   (default)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+from repository import (
+    DEFAULT_ACHIEVEMENTS,
+    DEFAULT_SECRET_WORDS,
+    GAME_DEFAULTS,
+    PLAYER_STATS_DEFAULTS,
+    QUESTION_DEFAULTS,
+    STATS_DEFAULTS,
+    GameRepository,
+    IntegrityError,
+    apply_result_to_stats,
+    resolve_now,
+    utc_now,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+  id TEXT PRIMARY KEY,
+  username TEXT NOT NULL UNIQUE,
+  email TEXT UNIQUE,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  avatar_url TEXT,
+  last_login_at TEXT,
+  bio TEXT,
+  favorite_category TEXT,
+  achievements TEXT DEFAULT '[]',
+  updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS games (
+  id TEXT PRIMARY KEY,
+  host_player_id TEXT,
+  current_player_id TEXT,
+  secret_word TEXT NOT NULL,
+  status TEXT DEFAULT 'waiting',
+  questions_asked INTEGER DEFAULT 0,
+  winner_id TEXT,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  completed_at TEXT,
+  difficulty INTEGER,
+  enable_tts INTEGER DEFAULT 0,
+  voice_id TEXT,
+  game_type TEXT,
+  max_players INTEGER,
+  game_code TEXT UNIQUE,
+  is_private INTEGER DEFAULT 0,
+  guessed_word TEXT,
+  stats_applied_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS game_participants (
+  game_id TEXT NOT NULL REFERENCES games(id),
+  player_id TEXT NOT NULL,
+  joined_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  role TEXT,
+  score INTEGER DEFAULT 0,
+  PRIMARY KEY (game_id, player_id)
+);
+
+CREATE TABLE IF NOT EXISTS game_questions (
+  id TEXT PRIMARY KEY,
+  game_id TEXT REFERENCES games(id),
+  player_id TEXT,
+  question TEXT NOT NULL,
+  answer INTEGER,
+  question_number INTEGER,
+  asked_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  is_final_guess INTEGER DEFAULT 0,
+  audio_url TEXT,
+  ai_response_audio_url TEXT
+);
+
+CREATE INDEX IF NOT EXISTS game_questions_game_player_idx
+  ON game_questions (game_id, player_id);
+
+CREATE INDEX IF NOT EXISTS game_participants_player_joined_idx
+  ON game_participants (player_id, joined_at DESC);
+
+CREATE INDEX IF NOT EXISTS games_host_status_created_idx
+  ON games (host_player_id, status, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS games_status_created_idx
+  ON games (status, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS player_stats (
+  player_id TEXT PRIMARY KEY,
+  games_won INTEGER DEFAULT 0,
+  games_played INTEGER DEFAULT 0,
+  total_questions_asked INTEGER DEFAULT 0,
+  average_questions_to_win REAL,
+  win_rate REAL,
+  current_streak INTEGER DEFAULT 0,
+  best_streak INTEGER DEFAULT 0,
+  fastest_win_questions INTEGER DEFAULT 0,
+  total_time_played INTEGER DEFAULT 0,
+  last_game_played_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS player_stats_last_game_played_at_idx
+  ON player_stats (last_game_played_at);
+
+CREATE TABLE IF NOT EXISTS player_stats_difficulty (
+  player_id TEXT NOT NULL,
+  difficulty INTEGER NOT NULL,
+  games_won INTEGER DEFAULT 0,
+  games_played INTEGER DEFAULT 0,
+  total_questions_asked INTEGER DEFAULT 0,
+  average_questions_to_win REAL,
+  win_rate REAL,
+  PRIMARY KEY (player_id, difficulty)
+);
+
+CREATE TABLE IF NOT EXISTS player_game_history (
+  player_id TEXT NOT NULL,
+  game_id TEXT NOT NULL,
+  completed_at TEXT NOT NULL,
+  difficulty INTEGER,
+  result TEXT NOT NULL,
+  secret_word TEXT,
+  questions_asked INTEGER NOT NULL DEFAULT 0,
+  opponent_ids TEXT NOT NULL DEFAULT '[]',
+  PRIMARY KEY (player_id, game_id)
+);
+
+CREATE INDEX IF NOT EXISTS player_game_history_recent_idx
+  ON player_game_history (player_id, completed_at, game_id);
+
+CREATE INDEX IF NOT EXISTS player_game_history_result_idx
+  ON player_game_history (player_id, result, completed_at, game_id);
+
+CREATE INDEX IF NOT EXISTS player_game_history_difficulty_idx
+  ON player_game_history (player_id, difficulty, completed_at, game_id);
+
+CREATE TABLE IF NOT EXISTS secret_words (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL,
+  category TEXT,
+  difficulty INTEGER,
+  is_active INTEGER DEFAULT 1,
+  hints TEXT DEFAULT '[]',
+  description TEXT,
+  image_url TEXT
+);
+
+CREATE TABLE IF NOT EXISTS achievements (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL UNIQUE,
+  description TEXT,
+  icon_name TEXT,
+  rarity TEXT,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS player_achievements (
+  player_id TEXT NOT NULL,
+  achievement_id TEXT NOT NULL REFERENCES achievements(id),
+  earned_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (player_id, achievement_id)
+);
+"""
+
+BOOLEAN_COLUMNS = {"enable_tts", "is_private", "answer", "is_final_guess", "is_active"}
+JSON_COLUMNS = {"hints", "achievements", "opponent_ids"}
+
+GAME_COLUMNS = ["id", "secret_word", "created_at", *GAME_DEFAULTS]
+QUESTION_COLUMNS = ["id", "question", "asked_at", *QUESTION_DEFAULTS]
+PLAYER_STATS_COLUMNS = ["player_id", *PLAYER_STATS_DEFAULTS]
+STATS_DIFFICULTY_COLUMNS = ["player_id", "difficulty", *STATS_DEFAULTS]
+PLAYER_COLUMNS = [
+    "id",
+    "username",
+    "email",
+    "created_at",
+    "avatar_url",
+    "last_login_at",
+    "bio",
+    "favorite_category",
+    "achievements",
+    "updated_at",
+]
+
+
+def _insert_sql(table, columns, suffix=""):
+    names = ", ".join(columns)
+    params = ", ".join(f":{c}" for c in columns)
+    return f"INSERT INTO {table} ({names}) VALUES ({params}) {suffix}".strip()
+
+
+INSERT_GAME = _insert_sql("games", GAME_COLUMNS, "RETURNING *")
+INSERT_QUESTION = _insert_sql("game_questions", QUESTION_COLUMNS, "RETURNING *")
+INSERT_QUESTION_IGNORE = _insert_sql(
+    "game_questions", QUESTION_COLUMNS, "ON CONFLICT (id) DO NOTHING"
+)
+INSERT_PARTICIPANT = (
+    "INSERT INTO game_participants (game_id, player_id, joined_at) "
+    "VALUES (?, ?, ?) RETURNING *"
+)
+SELECT_GAME = "SELECT * FROM games WHERE id = ?"
+SELECT_PARTICIPANTS = "SELECT player_id FROM game_participants WHERE game_id = ?"
+COUNT_QUESTIONS = "SELECT COUNT(*) FROM game_questions WHERE game_id = ? AND player_id = ?"
+SELECT_PLAYER_STATS = "SELECT * FROM player_stats WHERE player_id = ?"
+SELECT_STATS_DIFFICULTY = (
+    "SELECT * FROM player_stats_difficulty WHERE player_id = ? AND difficulty = ?"
+)
+SELECT_SECRET_WORDS = "SELECT * FROM secret_words"
+INSERT_PLAYER_ACHIEVEMENT = (
+    "INSERT INTO player_achievements (player_id, achievement_id, earned_at) "
+    "SELECT ?, id, ? FROM achievements WHERE name = ? "
+    "ON CONFLICT (player_id, achievement_id) DO NOTHING"
+)
+SELECT_PLAYER_ACHIEVEMENTS = (
+    "SELECT a.name FROM player_achievements pa "
+    "JOIN achievements a ON a.id = pa.achievement_id "
+    "WHERE pa.player_id = ? ORDER BY pa.earned_at, pa.rowid"
+)
+CLAIM_GAME_RESULT = (
+    "UPDATE games SET stats_applied_at = ? "
+    "WHERE id = ? AND stats_applied_at IS NULL RETURNING winner_id, difficulty"
+)
+
+# Same projection as the record_game_history SQL function in Supabase
+RECORD_GAME_HISTORY = """
+INSERT INTO player_game_history (
+  player_id, game_id, completed_at, difficulty, result, secret_word,
+  questions_asked, opponent_ids
+)
+SELECT gp.player_id,
+       g.id,
+       COALESCE(g.completed_at, ?),
+       g.difficulty,
+       CASE WHEN gp.player_id = g.winner_id THEN 'won' ELSE 'lost' END,
+       g.secret_word,
+       (SELECT COUNT(*) FROM game_questions q
+         WHERE q.game_id = g.id AND q.player_id = gp.player_id),
+       (SELECT json_group_array(player_id) FROM (
+          SELECT o.player_id FROM game_participants o
+           WHERE o.game_id = g.id AND o.player_id <> gp.player_id
+           ORDER BY o.joined_at))
+  FROM games g
+  JOIN game_participants gp ON gp.game_id = g.id
+ WHERE g.id = ? AND g.status = 'finished'
+ON CONFLICT (player_id, game_id) DO NOTHING
+"""
+
+# Prefix matches first, then (for 3+ characters) substring matches
+SEARCH_PLAYERS = """
+SELECT id, username, avatar_url FROM players
+ WHERE username LIKE :prefix ESCAPE '\\'
+    OR (:infix IS NOT NULL AND username LIKE :infix ESCAPE '\\')
+ ORDER BY username NOT LIKE :prefix ESCAPE '\\', lower(username), id
+ LIMIT :limit
+"""
+
+
+def _to_db(column, value):
+    if column in BOOLEAN_COLUMNS and value is not None:
+        return int(bool(value))
+    if column in JSON_COLUMNS and value is not None and not isinstance(value, str):
+        return json.dumps(value)
+    return value
+
+
+def _from_db(row):
+    if row is None:
+        return None
+    data = dict(row)
+    for column in BOOLEAN_COLUMNS & data.keys():
+        if data[column] is not None:
+            data[column] = bool(data[column])
+    for column in JSON_COLUMNS & data.keys():
+        if isinstance(data[column], str):
+            data[column] = json.loads(data[column])
+    return data
+
+
+class SQLiteRepository(GameRepository):
+    """
+    SQLite-backed repository with one connection per thread.
+
+    Args:
+        path (str): Database file, created with the schema if missing.
+            Defaults to SQLITE_DB_PATH or data/20q.sqlite3.
+        secret_words (list): Words to seed into an empty secret_words table;
+            defaults to DEFAULT_SECRET_WORDS
+    """
+
+    def __init__(self, path=None, secret_words=None):
+        self.path = path or os.getenv("SQLITE_DB_PATH", "data/20q.sqlite3")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._init_schema(secret_words if secret_words is not None else DEFAULT_SECRET_WORDS)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; multi-statement writes open their own transaction
+            conn = sqlite3.connect(
+                self.path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=256,
+                timeout=5.0,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _init_schema(self, secret_words):
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(games)")}
+        if "stats_applied_at" not in columns:
+            # Databases created before apply_game_result existed; their
+            # finished games were already counted into the stats tables
+            conn.execute("ALTER TABLE games ADD COLUMN stats_applied_at TEXT")
+            conn.execute(
+                "UPDATE games SET stats_applied_at = COALESCE(completed_at, ?) "
+                "WHERE status = 'finished'",
+                (utc_now(),),
+            )
+        player_columns = {r["name"] for r in conn.execute("PRAGMA table_info(players)")}
+        if "updated_at" not in player_columns:
+            # Databases created before the search index refreshed from it
+            conn.execute("ALTER TABLE players ADD COLUMN updated_at TEXT")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS players_updated_at_idx ON players (updated_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS games_unapplied_idx ON games (completed_at) "
+            "WHERE status = 'finished' AND stats_applied_at IS NULL"
+        )
+        if conn.execute("SELECT COUNT(*) FROM achievements").fetchone()[0] == 0:
+            conn.executemany(
+                "INSERT INTO achievements (id, name, description, icon_name, rarity) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (str(uuid.uuid4()), a["name"], a["description"], a["icon_name"], a["rarity"])
+                    for a in DEFAULT_ACHIEVEMENTS
+                ],
+            )
+        if conn.execute("SELECT COUNT(*) FROM secret_words").fetchone()[0] == 0:
+            conn.executemany(
+                "INSERT INTO secret_words (id, name, category, difficulty) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (str(uuid.uuid4()), w["name"], w.get("category"), w.get("difficulty"))
+                    for w in secret_words
+                ],
+            )
+
+    def _execute(self, sql, params=()):
+        try:
+            return self._connect().execute(sql, params)
+        except sqlite3.IntegrityError as e:
+            raise IntegrityError(str(e)) from e
+
+    def close(self):
+        """Close every thread's connection."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def list_secret_words(self):
+        return [_from_db(r) for r in self._execute(SELECT_SECRET_WORDS).fetchall()]
+
+    def create_game(self, data):
+        row = {**GAME_DEFAULTS, **{k: resolve_now(v) for k, v in data.items()}}
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", utc_now())
+        row.setdefault("secret_word", None)
+        params = {c: _to_db(c, row.get(c)) for c in GAME_COLUMNS}
+        return _from_db(self._execute(INSERT_GAME, params).fetchone())
+
+    def get_game(self, game_id):
+        return _from_db(self._execute(SELECT_GAME, (game_id,)).fetchone())
+
+    def update_game(self, game_id, fields):
+        columns = [c for c in fields if c in GAME_DEFAULTS or c == "secret_word"]
+        if not columns:
+            return self.get_game(game_id)
+        assignments = ", ".join(f"{c} = :{c}" for c in columns)
+        params = {c: _to_db(c, resolve_now(fields[c])) for c in columns}
+        params["_id"] = game_id
+        cursor = self._execute(
+            f"UPDATE games SET {assignments} WHERE id = :_id RETURNING *", params
+        )
+        return _from_db(cursor.fetchone())
+
+    def add_participant(self, game_id, player_id):
+        cursor = self._execute(INSERT_PARTICIPANT, (game_id, player_id, utc_now()))
+        return _from_db(cursor.fetchone())
+
+    def list_participants(self, game_id):
+        return [dict(r) for r in self._execute(SELECT_PARTICIPANTS, (game_id,)).fetchall()]
+
+    def _question_params(self, row):
+        stored = {**QUESTION_DEFAULTS, **row}
+        stored.setdefault("id", str(uuid.uuid4()))
+        stored.setdefault("asked_at", utc_now())
+        stored.setdefault("question", None)
+        return {c: _to_db(c, stored.get(c)) for c in QUESTION_COLUMNS}
+
+    def insert_question(self, row):
+        cursor = self._execute(INSERT_QUESTION, self._question_params(row))
+        return _from_db(cursor.fetchone())
+
+    def insert_questions(self, rows):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(INSERT_QUESTION_IGNORE, [self._question_params(r) for r in rows])
+            conn.execute("COMMIT")
+        except sqlite3.IntegrityError as e:
+            conn.execute("ROLLBACK")
+            raise IntegrityError(str(e)) from e
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count_questions(self, game_id, player_id):
+        return self._execute(COUNT_QUESTIONS, (game_id, player_id)).fetchone()[0]
+
+    def get_player_stats(self, player_id):
+        return _from_db(self._execute(SELECT_PLAYER_STATS, (player_id,)).fetchone())
+
+    def get_player_stats_difficulty(self, player_id, difficulty):
+        cursor = self._execute(SELECT_STATS_DIFFICULTY, (player_id, difficulty))
+        return _from_db(cursor.fetchone())
+
+    def _upsert(self, table, all_columns, key_columns, stats):
+        # Merge semantics: only the supplied columns change on conflict
+        columns = [c for c in all_columns if c in stats]
+        updates = [c for c in columns if c not in key_columns]
+        conflict = ", ".join(key_columns)
+        action = (
+            "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates)
+            if updates
+            else "DO NOTHING"
+        )
+        sql = _insert_sql(table, columns, f"ON CONFLICT ({conflict}) {action} RETURNING *")
+        row = self._execute(sql, {c: stats[c] for c in columns}).fetchone()
+        if row is None:
+            # DO NOTHING returns no row; read the existing one back
+            where = " AND ".join(f"{c} = :{c}" for c in key_columns)
+            row = self._execute(
+                f"SELECT * FROM {table} WHERE {where}", {c: stats[c] for c in key_columns}
+            ).fetchone()
+        return _from_db(row)
+
+    def upsert_player_stats(self, stats):
+        return self._upsert("player_stats", PLAYER_STATS_COLUMNS, ["player_id"], stats)
+
+    def upsert_player_stats_difficulty(self, stats):
+        return self._upsert(
+            "player_stats_difficulty",
+            STATS_DIFFICULTY_COLUMNS,
+            ["player_id", "difficulty"],
+            stats,
+        )
+
+    def list_player_stats(self, after=None, limit=1000, changed_since=None):
+        clauses, params = [], []
+        if after is not None:
+            clauses.append("player_id > ?")
+            params.append(after)
+        if changed_since is not None:
+            clauses.append("last_game_played_at > ?")
+            params.append(changed_since)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        cursor = self._execute(
+            f"SELECT * FROM player_stats {where}ORDER BY player_id LIMIT ?", (*params, limit)
+        )
+        return [_from_db(r) for r in cursor.fetchall()]
+
+    def list_player_stats_difficulty(self, player_ids):
+        ids = list(player_ids)
+        rows = []
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            marks = ", ".join("?" for _ in chunk)
+            cursor = self._execute(
+                f"SELECT * FROM player_stats_difficulty WHERE player_id IN ({marks})", chunk
+            )
+            rows.extend(_from_db(r) for r in cursor.fetchall())
+        return rows
+
+    def record_game_history(self, game_id):
+        return self._execute(RECORD_GAME_HISTORY, (utc_now(), game_id)).rowcount
+
+    def list_game_history(self, player_id, limit=20, before=None, result=None, difficulty=None):
+        clauses, params = ["player_id = ?"], [player_id]
+        if result is not None:
+            clauses.append("result = ?")
+            params.append(result)
+        if difficulty is not None:
+            clauses.append("difficulty = ?")
+            params.append(difficulty)
+        if before is not None:
+            clauses.append("(completed_at, game_id) < (?, ?)")
+            params.extend(before)
+        cursor = self._execute(
+            f"SELECT * FROM player_game_history WHERE {' AND '.join(clauses)} "
+            "ORDER BY completed_at DESC, game_id DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [_from_db(r) for r in cursor.fetchall()]
+
+    def get_players(self, player_ids):
+        ids = list(dict.fromkeys(player_ids))
+        rows = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            marks = ", ".join("?" for _ in chunk)
+            cursor = self._execute(
+                f"SELECT id, username, avatar_url FROM players WHERE id IN ({marks})", chunk
+            )
+            rows.extend(dict(r) for r in cursor.fetchall())
+        return rows
+
+    def upsert_player(self, player):
+        row = {c: _to_db(c, player[c]) for c in PLAYER_COLUMNS if c in player}
+        row["updated_at"] = utc_now()
+        return self._upsert("players", PLAYER_COLUMNS, ["id"], row)
+
+    def list_players(self, after=None, limit=1000, changed_since=None):
+        clauses, params = [], []
+        if after is not None:
+            clauses.append("id > ?")
+            params.append(after)
+        if changed_since is not None:
+            clauses.append("updated_at > ?")
+            params.append(changed_since)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        cursor = self._execute(
+            f"SELECT id, username, avatar_url, updated_at FROM players {where}ORDER BY id LIMIT ?",
+            (*params, limit),
+        )
+        return [dict(r) for r in cursor.fetchall()]
+
+    def search_players(self, query, limit=10):
+        term = query.strip().lower()
+        if not term:
+            return []
+        pattern = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        # LIKE is case-insensitive for ASCII in SQLite
+        params = {
+            "prefix": f"{pattern}%",
+            "infix": f"%{pattern}%" if len(term) >= 3 else None,
+            "limit": limit,
+        }
+        cursor = self._execute(SEARCH_PLAYERS, params)
+        return [dict(r) for r in cursor.fetchall()]
+
+    def award_achievements(self, player_id, names):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = utc_now()
+            awarded = [
+                n
+                for n in dict.fromkeys(names)
+                if conn.execute(INSERT_PLAYER_ACHIEVEMENT, (player_id, now, n)).rowcount
+            ]
+            if awarded:
+                names_json = json.dumps(
+                    [r[0] for r in conn.execute(SELECT_PLAYER_ACHIEVEMENTS, (player_id,))]
+                )
+                conn.execute(
+                    "UPDATE players SET achievements = ? WHERE id = ?", (names_json, player_id)
+                )
+            conn.execute("COMMIT")
+            return awarded
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def list_player_achievements(self, player_id):
+        rows = self._execute(SELECT_PLAYER_ACHIEVEMENTS, (player_id,)).fetchall()
+        return [r[0] for r in rows]
+
+    def apply_game_result(self, game_id):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = utc_now()
+            game = conn.execute(CLAIM_GAME_RESULT, (now, game_id)).fetchone()
+            if game is None:
+                conn.execute("ROLLBACK")
+                return False
+            difficulty = game["difficulty"] or 1
+            for row in conn.execute(SELECT_PARTICIPANTS, (game_id,)).fetchall():
+                player_id = row["player_id"]
+                won = player_id == game["winner_id"]
+                questions = conn.execute(COUNT_QUESTIONS, (game_id, player_id)).fetchone()[0]
+
+                overall = self.get_player_stats(player_id) or {
+                    **PLAYER_STATS_DEFAULTS,
+                    "player_id": player_id,
+                }
+                self.upsert_player_stats(apply_result_to_stats(overall, won, questions, now))
+
+                by_difficulty = self.get_player_stats_difficulty(player_id, difficulty) or {
+                    **STATS_DEFAULTS,
+                    "player_id": player_id,
+                    "difficulty": difficulty,
+                }
+                self.upsert_player_stats_difficulty(
+                    apply_result_to_stats(by_difficulty, won, questions, now)
+                )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def list_unapplied_games(self, finished_before, limit=100):
+        cursor = self._execute(
+            "SELECT id, winner_id FROM games "
+            "WHERE status = 'finished' AND stats_applied_at IS NULL AND completed_at < ? "
+            "ORDER BY completed_at LIMIT ?",
+            (finished_before, limit),
+        )
+        return [dict(r) for r in cursor.fetchall()]
@@ -26,9 +26,12 @@ client types for different use cases.
 Key Features:
 - Lazy initialization: Clients are only created when first accessed
 - Two client types: Service role (admin) and Anonymous (auth)
+- Async service role client for use inside the event loop
 - Environment variable validation
 - Backward compatibility with property access
 - Singleton pattern to prevent multiple client instances
+- Configurable pooled HTTP transport (limits, keep-alive, HTTP/2, timeouts)
+- Optional connection pre-warming and connection reuse statistics
 
 Usage:
     # For database operations (server-side)
@@ -39,13 +42,35 @@ Usage:
     auth_client = get_supabase_auth_client()
     user = auth_client.auth.get_user(token)
 
+    # For database operations from async code (does not block the event loop)
+    client = await get_async_supabase_client()
+    result = await client.table('games').select('*').execute()
+
     # Backward compatibility (deprecated but supported)
     from supabase_client import supabase, supabase_auth
     result = supabase.table('games').select('*').execute()
+
+    # Connection reuse statistics for the configured transports
+    stats = get_pool_stats()
+    print(stats["service"]["reused_connections"])
+
+Transport configuration (environment variables, read when a client is created):
+    SUPABASE_POOL_MAX_CONNECTIONS   Max open connections per client (default 20)
+    SUPABASE_POOL_MAX_KEEPALIVE     Max idle keep-alive connections (default 10)
+    SUPABASE_KEEPALIVE_EXPIRY       Seconds an idle connection is kept (default 60)
+    SUPABASE_HTTP2                  "true"/"false" HTTP/2 negotiation (default true)
+    SUPABASE_CONNECT_TIMEOUT        Connect timeout in seconds (default 5)
+    SUPABASE_READ_TIMEOUT           Read/write/pool timeout in seconds (default 30)
+    SUPABASE_PREWARM                "true" to open a connection at client creation
 """
 
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+import asyncio
+import httpx
 import os
+import threading
+import time
 from typing import Optional
 
 # Optional: use dotenv only locally for development
@@ -64,6 +89,218 @@ except ImportError:
 # This implements a singleton pattern to ensure only one instance of each client type
 _supabase_client: Optional[Client] = None  # Service role client for admin operations
 _supabase_auth_client: Optional[Client] = None  # Anonymous client for auth operations
+_supabase_async_client: Optional[AsyncClient] = None  # Service role client for async code
+_async_client_lock: Optional[asyncio.Lock] = None
+_async_client_loop = None  # event loop the async client and its lock belong to
+_async_http_client: Optional[httpx.AsyncClient] = None  # connection pool of the async client
+_async_client_closer: Optional[asyncio.Task] = None  # closes that pool when its loop shuts down
+
+
+class PoolStats:
+    """
+    Request and connection counters for one HTTP transport.
+
+    New connections are counted from httpcore's trace events, so every
+    request that did not open a TCP connection reused a pooled one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+            self.total_latency = 0.0
+            self._started = {}
+
+    def on_request(self, request: httpx.Request):
+        request.extensions["trace"] = self._trace
+        with self._lock:
+            self.requests += 1
+            self._started[id(request)] = time.perf_counter()
+
+    def on_response(self, response: httpx.Response):
+        with self._lock:
+            started = self._started.pop(id(response.request), None)
+            if started is not None:
+                self.total_latency += time.perf_counter() - started
+
+    async def on_request_async(self, request: httpx.Request):
+        self.on_request(request)
+
+    async def on_response_async(self, response: httpx.Response):
+        self.on_response(response)
+
+    def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+                "avg_latency_ms": (
+                    round(self.total_latency / self.requests * 1000, 2)
+                    if self.requests
+                    else 0.0
+                ),
+            }
+
+
+# Transport statistics, one per client type
+_pool_stats = {"service": PoolStats(), "auth": PoolStats(), "service_async": PoolStats()}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_transport_config() -> dict:
+    """
+    Read the HTTP transport settings from the environment.
+
+    Returns:
+        dict: Pool limits, keep-alive expiry, HTTP/2 flag, timeouts and pre-warm flag
+    """
+    return {
+        "max_connections": int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "20")),
+        "max_keepalive_connections": int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10")),
+        "keepalive_expiry": float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60")),
+        "http2": _env_bool("SUPABASE_HTTP2", True),
+        "connect_timeout": float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5")),
+        "read_timeout": float(os.getenv("SUPABASE_READ_TIMEOUT", "30")),
+        "prewarm": _env_bool("SUPABASE_PREWARM", False),
+    }
+
+
+def _resolve_http2(requested: bool) -> bool:
+    if not requested:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        # httpx needs the h2 package for HTTP/2; fall back to HTTP/1.1
+        print("h2 package not installed, using HTTP/1.1 for Supabase")
+        return False
+    return True
+
+
+def build_http_client(config: Optional[dict] = None, stats: Optional[PoolStats] = None) -> httpx.Client:
+    """
+    Build the pooled httpx client shared by the PostgREST, auth and storage clients.
+
+    Args:
+        config (dict): Transport settings, defaults to get_transport_config()
+        stats (PoolStats): Counters to update from request/response hooks
+
+    Returns:
+        httpx.Client: A keep-alive client with the configured limits and timeouts
+    """
+    config = config or get_transport_config()
+    http2 = _resolve_http2(config["http2"])
+
+    event_hooks = {"request": [], "response": []}
+    if stats is not None:
+        event_hooks = {"request": [stats.on_request], "response": [stats.on_response]}
+
+    return httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(config["read_timeout"], connect=config["connect_timeout"]),
+        follow_redirects=True,
+        event_hooks=event_hooks,
+    )
+
+
+def build_async_http_client(
+    config: Optional[dict] = None, stats: Optional[PoolStats] = None
+) -> httpx.AsyncClient:
+    """
+    Async counterpart of build_http_client, used by the async Supabase client.
+
+    Returns:
+        httpx.AsyncClient: A keep-alive client with the configured limits and timeouts
+    """
+    config = config or get_transport_config()
+    http2 = _resolve_http2(config["http2"])
+
+    event_hooks = {"request": [], "response": []}
+    if stats is not None:
+        event_hooks = {
+            "request": [stats.on_request_async],
+            "response": [stats.on_response_async],
+        }
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(config["read_timeout"], connect=config["connect_timeout"]),
+        follow_redirects=True,
+        event_hooks=event_hooks,
+    )
+
+
+def _create_pooled_client(supabase_url: str, supabase_key: str, stats_key: str) -> Client:
+    config = get_transport_config()
+    http_client = build_http_client(config, _pool_stats[stats_key])
+    options = ClientOptions(httpx_client=http_client)
+    client = create_client(supabase_url, supabase_key, options)
+    if config["prewarm"]:
+        prewarm(http_client, supabase_url, supabase_key)
+    return client
+
+
+def prewarm(http_client: httpx.Client, supabase_url: str, supabase_key: str) -> bool:
+    """
+    Open a connection to Supabase ahead of the first real query.
+
+    The TCP and TLS handshakes (and HTTP/2 negotiation) happen here, so the
+    first game request reuses a warm pooled connection.
+
+    Returns:
+        bool: True if the warm-up request completed
+    """
+    try:
+        http_client.get(
+            f"{supabase_url}/rest/v1/",
+            headers={"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"},
+        )
+        return True
+    except Exception as e:
+        print(f"Supabase pre-warm failed: {e}")
+        return False
+
+
+def get_pool_stats() -> dict:
+    """
+    Get connection reuse statistics for the Supabase transports.
+
+    Returns:
+        dict: {"service": {...}, "auth": {...}} with request, new/reused
+        connection counts, reuse ratio and average latency
+    """
+    return {name: stats.snapshot() for name, stats in _pool_stats.items()}
+
+
+def reset_pool_stats() -> None:
+    """Reset the transport counters (useful around a benchmark run)."""
+    for stats in _pool_stats.values():
+        stats.reset()
 
 
 def get_supabase_client() -> Client:
@@ -101,7 +338,7 @@ def get_supabase_client() -> Client:
             )
 
         # Create the client instance (this is the expensive operation we're deferring)
-        _supabase_client = create_client(supabase_url, supabase_key)
+        _supabase_client = _create_pooled_client(supabase_url, supabase_key, "service")
 
     return _supabase_client
 
@@ -142,11 +379,104 @@ def get_supabase_auth_client() -> Client:
             )
 
         # Create the client instance (this is the expensive operation we're deferring)
-        _supabase_auth_client = create_client(supabase_url, supabase_key)
+        _supabase_auth_client = _create_pooled_client(supabase_url, supabase_key, "auth")
 
     return _supabase_auth_client
 
 
+async def _close_on_loop_shutdown(http_client: httpx.AsyncClient) -> None:
+    """
+    Close an async client's connection pool when its event loop shuts down:
+    asyncio.run cancels the tasks still pending before closing the loop.
+    """
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await http_client.aclose()
+
+
+def _discard_async_http_client(http_client: httpx.AsyncClient, loop) -> None:
+    """
+    Close the pool of a client replaced by one on another loop: on its own
+    loop while that still runs, otherwise from a helper thread (a no-op when
+    the loop's shutdown already closed it).
+    """
+    if http_client.is_closed:
+        return
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(http_client.aclose(), loop)
+        return
+
+    def close():
+        try:
+            asyncio.run(http_client.aclose())
+        except Exception as e:
+            print(f"Error closing async Supabase HTTP client: {e}")
+
+    closer = threading.Thread(target=close, daemon=True)
+    closer.start()
+    closer.join(timeout=5)
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Get the async Supabase service role client with lazy initialization.
+
+    Same permissions as get_supabase_client(), but every query is awaited on
+    the event loop instead of blocking it. Use it from `async def` routes.
+    The client is bound to the loop it was created on; a call from another
+    loop (a later Mangum invocation, a test) gets a new client, and the old
+    one's connection pool is closed.
+
+    Returns:
+        AsyncClient: A configured async Supabase client with service role permissions
+
+    Raises:
+        ValueError: If required environment variables are not set
+
+    Example:
+        client = await get_async_supabase_client()
+        game = await client.table('games').select('*').eq('id', game_id).execute()
+    """
+    global _supabase_async_client, _async_client_lock, _async_client_loop
+    global _async_http_client, _async_client_closer
+    loop = asyncio.get_running_loop()
+    if _async_client_loop is not loop:
+        # The old client's connections (and the lock) belong to the old loop
+        if _async_http_client is not None:
+            _discard_async_http_client(_async_http_client, _async_client_loop)
+        _supabase_async_client = None
+        _async_http_client = None
+        _async_client_closer = None
+        _async_client_lock = asyncio.Lock()
+        _async_client_loop = loop
+    if _supabase_async_client is not None:
+        return _supabase_async_client
+
+    async with _async_client_lock:
+        if _supabase_async_client is None:
+            supabase_url = os.getenv("SUPABASE_URL")
+            supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+            if not supabase_url or not supabase_key:
+                raise ValueError(
+                    "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables are required. "
+                    "Please check your environment configuration."
+                )
+
+            http_client = build_async_http_client(
+                get_transport_config(), _pool_stats["service_async"]
+            )
+            options = AsyncClientOptions(httpx_client=http_client)
+            _supabase_async_client = await acreate_client(
+                supabase_url, supabase_key, options
+            )
+            _async_http_client = http_client
+            _async_client_closer = loop.create_task(_close_on_loop_shutdown(http_client))
+
+    return _supabase_async_client
+
+
 # Backward compatibility properties
 # These properties provide the same interface as the old direct client access
 # They're deprecated but maintained for compatibility with existing code
@@ -19,9 +19,11 @@ import auth_routes as auth_routes
 import game_routes as game_routes
 import voice_routes as voice_routes
 import supabase as supabase
+import tts_cache as tts_cache
+import voice_catalog as voice_catalog
 
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from whisper import whisper
 from security import security
 import pytest
@@ -80,6 +82,16 @@ def override_auth_dependencies():
     whisper.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def fresh_tts_cache():
+    # Memory-only and empty per test, so TTS tests always reach the mocked API
+    tts_cache.set_tts_cache(tts_cache.TTSCache(directory=None))
+    voice_catalog.set_voice_catalog(None)
+    yield
+    tts_cache.set_tts_cache(None)
+    voice_catalog.set_voice_catalog(None)
+
+
 def test_start_game_success():
     with patch("supabase_client.get_supabase_client") as mock_supabase, \
          patch("supabase_client.get_supabase_client") as mock_supabase_rel, \
@@ -282,14 +294,13 @@ def test_auth_signup_success():
         mock_response.user = mock_user
         mock_response.session = mock_session
         mock_auth.return_value.auth.sign_up.return_value = mock_response
-        mock_table.return_value.table.return_value.insert.return_value.execute.return_value = MagicMock()
-        mock_table.return_value.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value.data = {
+        mock_table.return_value.table.return_value.insert.return_value.execute.return_value.data = [{
             "avatar_url": None,
             "last_login_at": None,
             "bio": None,
             "favorite_category": None,
             "achievements": [],
-        }
+        }]
         resp = client.post(
             "/auth/signup",
             json={
@@ -307,6 +318,8 @@ def test_auth_signup_success():
         assert data["user"]["bio"] is None
         assert data["user"]["favorite_category"] is None
         assert data["user"]["achievements"] == []
+        # The inserted row is returned by the insert itself
+        mock_table.return_value.table.return_value.select.assert_not_called()
 
 
 def test_auth_signup_failure():
@@ -337,13 +350,13 @@ def test_auth_login_success():
         mock_response.user = mock_user
         mock_response.session = mock_session
         mock_auth.return_value.auth.sign_in_with_password.return_value = mock_response
-        mock_table.return_value.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value.data = {
+        mock_table.return_value.table.return_value.update.return_value.eq.return_value.execute.return_value.data = [{
             "avatar_url": None,
             "last_login_at": None,
             "bio": None,
             "favorite_category": None,
             "achievements": [],
-        }
+        }]
         resp = client.post(
             "/auth/login",
             json={"email": "test@example.com", "password": "password123"},
@@ -404,13 +417,20 @@ def test_auth_reset_password_success():
 
 
 # Voice-related Tests
+def _upstream_response(status, content=b"", json=None, text=""):
+    """A read AsyncUpstreamClient response."""
+    response = MagicMock()
+    response.status = status
+    response.read = AsyncMock(return_value=content)
+    response.json = AsyncMock(return_value=json)
+    response.text = AsyncMock(return_value=text)
+    return response
+
+
 def test_voice_text_to_speech_success():
-    with patch("os.getenv") as mock_getenv, patch("requests.post") as mock_post:
+    with patch("os.getenv") as mock_getenv, patch("http_clients.AsyncUpstreamClient.post", new_callable=AsyncMock) as mock_post:
         mock_getenv.return_value = "test-api-key"
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.content = b"audio-data"
-        mock_post.return_value = mock_response
+        mock_post.return_value = _upstream_response(200, content=b"audio-data")
         with patch("voice_routes.get_current_user", return_value=MagicMock()):
             resp = client.post(
                 "/voice/text-to-speech",
@@ -439,11 +459,9 @@ def test_voice_text_to_speech_no_api_key():
 
 
 def test_voice_get_voices_success():
-    with patch("os.getenv") as mock_getenv, patch("requests.get") as mock_get:
+    with patch("os.getenv") as mock_getenv, patch("http_clients.AsyncUpstreamClient.get", new_callable=AsyncMock) as mock_get:
         mock_getenv.return_value = "test-api-key"
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_get.return_value = _upstream_response(200, json={
             "voices": [
                 {
                     "voice_id": "voice1",
@@ -452,8 +470,7 @@ def test_voice_get_voices_success():
                     "description": "A test voice",
                 }
             ]
-        }
-        mock_get.return_value = mock_response
+        })
         with patch("voice_routes.get_current_user", return_value=MagicMock()):
             resp = client.get("/voice/voices", headers={"Authorization": "Bearer testtoken"})
             assert resp.status_code == 200
@@ -463,12 +480,9 @@ def test_voice_get_voices_success():
 
 
 def test_voice_speech_to_text_success():
-    with patch("os.getenv") as mock_getenv, patch("requests.post") as mock_post:
+    with patch("os.getenv") as mock_getenv, patch("http_clients.AsyncUpstreamClient.post", new_callable=AsyncMock) as mock_post:
         mock_getenv.return_value = "test-api-key"
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"text": "Hello world"}
-        mock_post.return_value = mock_response
+        mock_post.return_value = _upstream_response(200, json={"text": "Hello world"})
         from io import BytesIO
         audio_file = BytesIO(b"fake-audio-data")
         with patch("voice_routes.get_current_user", return_value=MagicMock()):
@@ -483,21 +497,18 @@ def test_voice_speech_to_text_success():
 
 # Enhanced Game Endpoints Tests
 def test_ask_question_voice_success():
-    with patch("voice_routes.get_game") as mock_get_game, \
-         patch("voice_routes.ask_openai_question") as mock_ask, \
-         patch("voice_routes.increment_questions_asked") as mock_inc, \
-         patch("voice_routes.record_question") as mock_record, \
+    with patch("voice_routes.get_game_async", new_callable=AsyncMock) as mock_get_game, \
+         patch("voice_routes.ask_openai_question_async", new_callable=AsyncMock) as mock_ask, \
+         patch("voice_routes.increment_questions_asked_async", new_callable=AsyncMock) as mock_inc, \
+         patch("voice_routes.record_question_async", new_callable=AsyncMock) as mock_record, \
          patch("os.getenv") as mock_getenv, \
-         patch("requests.post") as mock_post, \
+         patch("http_clients.AsyncUpstreamClient.post", new_callable=AsyncMock) as mock_post, \
          patch("voice_routes.get_current_user", return_value=MagicMock()):
         mock_get_game.return_value = {"status": "playing", "secret_word": "test"}
-        mock_ask.return_value = "Yes"
+        mock_ask.return_value = {"answer": "Yes"}
         mock_inc.return_value = 1
         mock_getenv.return_value = "test-api-key"
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.content = b"audio-data"
-        mock_post.return_value = mock_response
+        mock_post.return_value = _upstream_response(200, content=b"audio-data")
         resp = client.post(
             "/ask_question_voice",
             json={"req": {"game_id": "game-uuid", "question": "Is it big?"}},
@@ -512,14 +523,14 @@ def test_ask_question_voice_success():
 
 
 def test_ask_question_voice_no_audio():
-    with patch("voice_routes.get_game") as mock_get_game, \
-         patch("voice_routes.ask_openai_question") as mock_ask, \
-         patch("voice_routes.increment_questions_asked") as mock_inc, \
-         patch("voice_routes.record_question") as mock_record, \
+    with patch("voice_routes.get_game_async", new_callable=AsyncMock) as mock_get_game, \
+         patch("voice_routes.ask_openai_question_async", new_callable=AsyncMock) as mock_ask, \
+         patch("voice_routes.increment_questions_asked_async", new_callable=AsyncMock) as mock_inc, \
+         patch("voice_routes.record_question_async", new_callable=AsyncMock) as mock_record, \
          patch("os.getenv") as mock_getenv, \
          patch("voice_routes.get_current_user", return_value=MagicMock()):
         mock_get_game.return_value = {"status": "playing", "secret_word": "test"}
-        mock_ask.return_value = "Yes"
+        mock_ask.return_value = {"answer": "Yes"}
         mock_inc.return_value = 1
         mock_getenv.return_value = None  # No API key
         resp = client.post(
@@ -536,7 +547,7 @@ def test_ask_question_voice_no_audio():
 
 
 def test_ask_question_voice_game_not_active():
-    with patch("voice_routes.get_game") as mock_get_game, \
+    with patch("voice_routes.get_game_async", new_callable=AsyncMock) as mock_get_game, \
          patch("voice_routes.get_current_user", return_value=MagicMock()):
         mock_get_game.return_value = {"status": "finished"}
         resp = client.post(
@@ -617,12 +628,9 @@ def test_root_health_check():
 
 # Error Handling Tests
 def test_voice_text_to_speech_api_error():
-    with patch("os.getenv") as mock_getenv, patch("requests.post") as mock_post:
+    with patch("os.getenv") as mock_getenv, patch("http_clients.AsyncUpstreamClient.post", new_callable=AsyncMock) as mock_post:
         mock_getenv.return_value = "test-api-key"
-        mock_response = MagicMock()
-        mock_response.status_code = 400
-        mock_response.text = "Bad Request"
-        mock_post.return_value = mock_response
+        mock_post.return_value = _upstream_response(400, text="Bad Request")
 
         resp = client.post("/voice/text-to-speech", json={"text": "Hello world"}, headers={"Authorization": "Bearer testtoken"})
 
@@ -631,12 +639,9 @@ def test_voice_text_to_speech_api_error():
 
 
 def test_voice_get_voices_api_error():
-    with patch("os.getenv") as mock_getenv, patch("requests.get") as mock_get:
+    with patch("os.getenv") as mock_getenv, patch("http_clients.AsyncUpstreamClient.get", new_callable=AsyncMock) as mock_get:
         mock_getenv.return_value = "test-api-key"
-        mock_response = MagicMock()
-        mock_response.status_code = 401
-        mock_response.text = "Unauthorized"
-        mock_get.return_value = mock_response
+        mock_get.return_value = _upstream_response(401, text="Unauthorized")
 
         resp = client.get("/voice/voices", headers={"Authorization": "Bearer testtoken"})
 
@@ -0,0 +1,100 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import audio_catalog as audio_catalog
+import elevenlabs_utils as elevenlabs_utils
+import game_logic as game_logic
+import tts_cache as tts_cache
+from audio_catalog import AudioCatalog, build_catalog, catalog_phrases
+
+
+def _fake_synthesize(text, voice_id, model_id, voice_settings):
+    return f"{voice_id}:{text}".encode("utf-8")
+
+
+@pytest.fixture
+def catalog_env(monkeypatch):
+    words = [{"name": "car", "difficulty": 1}, {"name": "atom", "difficulty": 3}]
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", words)
+    monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_API_KEY", "test-api-key")
+    monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1")
+    tts_cache.set_tts_cache(tts_cache.TTSCache(directory=None))
+    yield
+    audio_catalog.set_audio_catalog(None)
+    tts_cache.set_tts_cache(None)
+
+
+def test_catalog_covers_fixed_lines_only(catalog_env):
+    texts = {text for text, _, _ in catalog_phrases()}
+    assert game_logic.WELCOME_MESSAGE.format(difficulty=3) in texts
+    assert {"Yes", "No", "Maybe", game_logic.INCORRECT_GUESS_MESSAGE} <= texts
+    assert elevenlabs_utils.GAME_MESSAGES["final_question"] in texts
+    assert "You have 19 questions remaining." in texts
+    # Stitching clips for the reveals
+    assert {"Congratulations! You guessed correctly! The answer was", "car.", "atom."} <= texts
+    assert not any("{" in text for text in texts)
+
+
+def test_build_and_load_bundle(catalog_env, tmp_path):
+    path = str(tmp_path / "catalog.zip")
+    manifest = build_catalog(path, ["v1", "v2"], synthesize=_fake_synthesize)
+
+    per_voice = len(catalog_phrases())
+    assert len(manifest["entries"]) == 2 * per_voice
+    with zipfile.ZipFile(path) as bundle:
+        assert len(bundle.namelist()) == 2 * per_voice + 1
+
+    catalog = AudioCatalog.load(path)
+    assert catalog.version == manifest["version"]
+    assert len(catalog) == 2 * per_voice
+
+    # Same lines, same version; a different voice set is a different catalog
+    assert build_catalog(path, ["v1", "v2"], synthesize=_fake_synthesize)["version"] == catalog.version
+    assert build_catalog(path, ["v1"], synthesize=_fake_synthesize)["version"] != catalog.version
+
+
+def test_catalog_lines_skip_synthesis(catalog_env, tmp_path):
+    path = str(tmp_path / "catalog.zip")
+    build_catalog(path, ["v1"], synthesize=_fake_synthesize)
+    audio_catalog.load_audio_catalog(path)
+
+    with patch("http_clients.UpstreamClient.post") as mock_post:
+        mock_post.return_value = MagicMock(status_code=200, content=b"reveal-audio")
+        assert elevenlabs_utils.generate_speech("Yes", "v1") == b"v1:Yes"
+        welcome = game_logic.WELCOME_MESSAGE.format(difficulty=3)
+        assert elevenlabs_utils.generate_speech(welcome, "v1") == f"v1:{welcome}".encode()
+        mock_post.assert_not_called()
+
+        # Dynamic text and voices outside the catalog are still synthesized
+        reveal = game_logic.CORRECT_GUESS_MESSAGE.format(word="car")
+        assert elevenlabs_utils.generate_speech(reveal, "v1") == b"reveal-audio"
+        assert elevenlabs_utils.generate_speech("Yes", "v9") == b"reveal-audio"
+        assert mock_post.call_count == 2
+    assert audio_catalog.get_audio_catalog().stats()["hits"] == 2
+
+
+def test_missing_bundle_is_an_empty_catalog(tmp_path):
+    catalog = audio_catalog.load_audio_catalog(str(tmp_path / "missing.zip"))
+    assert len(catalog) == 0
+    assert catalog.get("anything") is None
+    audio_catalog.set_audio_catalog(None)
@@ -0,0 +1,122 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from unittest.mock import patch
+
+import pytest
+
+import audio_catalog as audio_catalog
+import audio_stitch as audio_stitch
+import elevenlabs_utils as elevenlabs_utils
+import tts_cache as tts_cache
+from audio_stitch import Mp3FormatError, mp3_frames, split_template, stitch
+
+
+def _frame(fill, sample_rate_index=0, mono=True, padding=0):
+    """One MPEG-1 layer III 128 kbps frame (417 bytes at 44.1 kHz, +1 padded)."""
+    flags = 0x90 | (sample_rate_index << 2) | (padding << 1)
+    header = bytes([0xFF, 0xFB, flags, 0xC0 if mono else 0x00])
+    length = 144 * 128000 // (44100, 48000, 32000)[sample_rate_index] + padding
+    return header + bytes([fill]) * (length - 4)
+
+
+def _xing_frame():
+    frame = bytearray(_frame(0))
+    frame[4 + 17 : 8 + 17] = b"Xing"
+    return bytes(frame)
+
+
+def _clip(*fills, tags=True):
+    """A clip as an encoder writes it: ID3v2 tag, Xing frame, audio frames, ID3v1 tag."""
+    id3v2 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"\x00" * 5
+    body = b"".join(_frame(f, padding=i % 2) for i, f in enumerate(fills))
+    if not tags:
+        return body
+    return id3v2 + _xing_frame() + body + b"TAG" + b"\x00" * 125
+
+
+def test_frames_skip_tags_and_vbr_header():
+    frames, clip_format = mp3_frames(_clip(1, 2, 3))
+    assert [f[4] for f in frames] == [1, 2, 3]
+    assert [len(f) for f in frames] == [417, 418, 417]
+    assert clip_format == (3, 44100, True)
+
+
+def test_stitch_joins_frames_without_reencoding():
+    audio = stitch([_clip(1, 2), _clip(3, tags=False), _clip(4)])
+    frames, _ = mp3_frames(audio)
+    assert [f[4] for f in frames] == [1, 2, 3, 4]
+    assert audio == b"".join(frames)
+
+    with pytest.raises(Mp3FormatError):
+        stitch([_clip(1), _frame(2, sample_rate_index=1)])
+    with pytest.raises(Mp3FormatError):
+        stitch([_clip(1), b"RIFF....WAVEfmt "])
+
+
+def test_split_template_keeps_word_punctuation():
+    assert split_template("The answer was {word}. Better luck next time!") == (
+        "The answer was",
+        ".",
+        "Better luck next time!",
+    )
+    segments = audio_stitch.template_segments("The answer was {word}.", "car")
+    assert segments == ["The answer was", "car."]
+
+
+@pytest.fixture
+def clips(monkeypatch):
+    monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_API_KEY", "test-api-key")
+    tts_cache.set_tts_cache(tts_cache.TTSCache(directory=None))
+    audio_catalog.set_audio_catalog(audio_catalog.AudioCatalog())
+    yield tts_cache.get_tts_cache()
+    audio_catalog.set_audio_catalog(None)
+    tts_cache.set_tts_cache(None)
+
+
+def _put_clip(cache, text, audio):
+    settings = elevenlabs_utils.VOICE_SETTINGS["quick_response"]
+    cache.put(tts_cache.tts_cache_key(text, "v1", elevenlabs_utils.DEFAULT_MODEL_ID, settings), audio)
+
+
+def test_compose_stitches_rendered_clips(clips):
+    template = "The answer was {word}. Well played!"
+    _put_clip(clips, "The answer was", _clip(1))
+    _put_clip(clips, "car.", _clip(2))
+    assert not audio_stitch.can_compose(template, "car", "v1")
+    _put_clip(clips, "Well played!", _clip(3))
+    assert audio_stitch.can_compose(template, "car", "v1")
+
+    before = audio_stitch.get_composition_stats()
+    with patch("http_clients.UpstreamClient.post") as mock_post:
+        audio = audio_stitch.compose_speech(template, "car", "v1")
+        mock_post.assert_not_called()
+    assert [f[4] for f in mp3_frames(audio)[0]] == [1, 2, 3]
+    assert audio_stitch.get_composition_stats()["composed"] == before["composed"] + 1
+
+
+def test_compose_falls_back_to_full_synthesis(clips):
+    _put_clip(clips, "The answer was", _clip(1))
+    with patch.object(audio_stitch.elevenlabs_utils, "generate_speech", return_value=b"full") as full:
+        assert audio_stitch.compose_speech("The answer was {word}.", "atom", "v1") == b"full"
+    full.assert_called_once_with("The answer was atom.", "v1", context="quick_response")
+
+    # Clips that cannot be joined are also synthesized in full
+    _put_clip(clips, "atom.", b"not an mp3")
+    with patch.object(audio_stitch.elevenlabs_utils, "generate_speech", return_value=b"full") as full:
+        assert audio_stitch.compose_speech("The answer was {word}.", "atom", "v1") == b"full"
@@ -0,0 +1,111 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import base64
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+import audio_store as audio_store
+import game_logic as game_logic
+from audio_routes import parse_range
+from audio_store import AudioStore, deliver_audio
+from memory_repository import MemoryRepository
+from whisper import whisper
+
+CLIP = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = AudioStore(directory=str(tmp_path), max_bytes=1024 * 1024)
+    audio_store.set_audio_store(store)
+    monkeypatch.setattr(audio_store, "AUDIO_DELIVERY", "url")
+    yield store
+    audio_store.set_audio_store(None)
+
+
+def test_content_addressed_and_persistent(tmp_path):
+    store = AudioStore(directory=str(tmp_path), memory_bytes=0)
+    key = store.put(CLIP)
+    assert key == hashlib.sha256(CLIP).hexdigest()
+    assert store.put(CLIP) == key
+    assert AudioStore(directory=str(tmp_path)).get(key) == CLIP
+    assert store.get("../" + key) is None
+
+
+def test_delivery_modes(store, monkeypatch):
+    result = {}
+    deliver_audio(result, "audio", CLIP)
+    assert result == {"audio_url": f"/audio/{hashlib.sha256(CLIP).hexdigest()}.mp3"}
+
+    monkeypatch.setattr(audio_store, "AUDIO_DELIVERY", "inline")
+    result = {}
+    deliver_audio(result, "audio", CLIP)
+    deliver_audio(result, "welcome_audio", None)
+    assert result == {"audio": base64.b64encode(CLIP).decode("utf-8")}
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+def test_audio_endpoint_streams_ranges(store):
+    client = TestClient(whisper)
+    key = store.put(CLIP)
+
+    response = client.get(f"/audio/{key}.mp3")
+    assert response.status_code == 200
+    assert response.content == CLIP
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+
+    partial = client.get(f"/audio/{key}.mp3", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == CLIP[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(CLIP)}"
+
+    unsatisfiable = client.get(f"/audio/{key}.mp3", headers={"Range": "bytes=5000-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(CLIP)}"
+
+    etag = response.headers["etag"]
+    assert client.get(f"/audio/{key}.mp3", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/audio/{'0' * 64}.mp3").status_code == 404
+
+
+def test_game_responses_link_audio(store, monkeypatch):
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", repo.list_secret_words())
+    monkeypatch.setattr(game_logic, "SPECULATIVE_TTS", False)
+    monkeypatch.setattr(game_logic, "generate_speech", lambda text, voice_id=None, *a, **kw: CLIP)
+
+    game = game_logic.start_game("host", 1, enable_tts=True)
+    assert "welcome_audio" not in game
+    url = game["welcome_audio_url"]
+    assert TestClient(whisper).get(url).content == CLIP
@@ -15,16 +15,25 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import threading
+
 import pytest
 from unittest.mock import patch, MagicMock
 import base64
 
 import elevenlabs_utils as elevenlabs_utils
+import tts_cache as tts_cache
+import voice_catalog as voice_catalog
 
 
 @pytest.fixture(autouse=True)
 def patch_environment_variables(monkeypatch):
     """Patch environment variables for testing"""
+    # Fresh memory-only TTS cache, so every test reaches the mocked API
+    tts_cache.set_tts_cache(tts_cache.TTSCache(directory=None))
+    # Empty voice catalog, so voice lookups reach the mocked API too
+    voice_catalog.set_voice_catalog(None)
     monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_API_KEY", "test-api-key")
     monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_VOICE_ID", "test-voice-id")
     monkeypatch.setattr(
@@ -45,7 +54,7 @@ def test_is_tts_available_without_key(monkeypatch):
 
 def test_generate_speech_success():
     """Test successful speech generation"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -62,7 +71,7 @@ def test_generate_speech_success():
 
 def test_generate_speech_with_custom_voice():
     """Test speech generation with custom voice ID"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -79,7 +88,7 @@ def test_generate_speech_with_custom_voice():
 
 def test_generate_speech_with_context():
     """Test speech generation with different contexts"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -96,7 +105,7 @@ def test_generate_speech_with_context():
 
 def test_generate_speech_api_error():
     """Test speech generation with API error"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 400
         mock_response.text = "Bad Request"
@@ -109,7 +118,7 @@ def test_generate_speech_api_error():
 
 def test_generate_speech_timeout():
     """Test speech generation with timeout"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_post.side_effect = Exception("timeout")
 
         result = elevenlabs_utils.generate_speech("Hello world")
@@ -128,7 +137,7 @@ def test_generate_speech_no_api_key(monkeypatch):
 
 def test_generate_speech_base64_success():
     """Test base64 speech generation success"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -142,7 +151,7 @@ def test_generate_speech_base64_success():
 
 def test_generate_speech_base64_failure():
     """Test base64 speech generation failure"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 400
         mock_post.return_value = mock_response
@@ -154,7 +163,7 @@ def test_generate_speech_base64_failure():
 
 def test_get_available_voices_success():
     """Test getting available voices successfully"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -180,7 +189,7 @@ def test_get_available_voices_success():
 
 def test_get_available_voices_api_error():
     """Test getting voices with API error"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 401
         mock_get.return_value = mock_response
@@ -201,7 +210,7 @@ def test_get_available_voices_no_api_key(monkeypatch):
 
 def test_get_available_voices_exception():
     """Test getting voices with exception"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_get.side_effect = Exception("Network error")
 
         result = elevenlabs_utils.get_available_voices()
@@ -211,7 +220,7 @@ def test_get_available_voices_exception():
 
 def test_get_voice_info_success():
     """Test getting voice info successfully"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -229,7 +238,7 @@ def test_get_voice_info_success():
 
 def test_get_voice_info_api_error():
     """Test getting voice info with API error"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 404
         mock_get.return_value = mock_response
@@ -250,7 +259,7 @@ def test_get_voice_info_no_api_key(monkeypatch):
 
 def test_get_voice_info_exception():
     """Test getting voice info with exception"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_get.side_effect = Exception("Network error")
 
         result = elevenlabs_utils.get_voice_info("voice1")
@@ -260,7 +269,7 @@ def test_get_voice_info_exception():
 
 def test_get_user_subscription_info_success():
     """Test getting subscription info successfully"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -278,7 +287,7 @@ def test_get_user_subscription_info_success():
 
 def test_get_user_subscription_info_api_error():
     """Test getting subscription info with API error"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 401
         mock_get.return_value = mock_response
@@ -299,7 +308,7 @@ def test_get_user_subscription_info_no_api_key(monkeypatch):
 
 def test_get_user_subscription_info_exception():
     """Test getting subscription info with exception"""
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_get.side_effect = Exception("Network error")
 
         result = elevenlabs_utils.get_user_subscription_info()
@@ -309,7 +318,7 @@ def test_get_user_subscription_info_exception():
 
 def test_generate_game_message_audio_welcome():
     """Test generating welcome message audio"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -323,7 +332,7 @@ def test_generate_game_message_audio_welcome():
 
 def test_generate_game_message_audio_with_difficulty():
     """Test generating welcome message with difficulty"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -339,7 +348,7 @@ def test_generate_game_message_audio_with_difficulty():
 
 def test_generate_game_message_audio_correct_guess():
     """Test generating correct guess message"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -362,7 +371,7 @@ def test_generate_game_message_audio_invalid_type():
 
 def test_generate_game_message_audio_failure():
     """Test generating message audio with API failure"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 400
         mock_post.return_value = mock_response
@@ -431,7 +440,7 @@ def test_default_voice_id():
 
 def test_generate_speech_uses_default_voice():
     """Test that generate_speech uses default voice when none provided"""
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.content = b"audio-data"
@@ -456,8 +465,70 @@ def test_dotenv_import_error():
 def test_get_available_voices(monkeypatch):
     monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_API_KEY", "fake-key")
     monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_BASE_URL", "http://fake-url")
-    with patch("requests.get") as mock_get:
+    with patch("http_clients.UpstreamClient.get") as mock_get:
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = {"voices": [{"voice_id": "v1"}]}
         result = elevenlabs_utils.get_available_voices()
         assert result["voice_id"] == "v1"
+
+
+def _cache_speech(text, audio, context="quick_response"):
+    settings = elevenlabs_utils.VOICE_SETTINGS[context]
+    key = tts_cache.tts_cache_key(text, "test-voice-id", elevenlabs_utils.DEFAULT_MODEL_ID, settings)
+    tts_cache.get_tts_cache().put(key, audio)
+
+
+def _mp3(fill):
+    """One MPEG-1 layer III frame (128 kbps, 44.1 kHz, mono)."""
+    return bytes([0xFF, 0xFB, 0x90, 0xC0]) + bytes([fill]) * 413
+
+
+def test_speech_plan_stitches_rendered_phrases():
+    """Every phrase already rendered: no ElevenLabs call"""
+    _cache_speech("Yes", _mp3(1))
+    _cache_speech(elevenlabs_utils.GAME_MESSAGES["final_question"], _mp3(2))
+    _cache_speech("The answer was", _mp3(3))
+    _cache_speech("car.", _mp3(4))
+
+    plan = elevenlabs_utils.SpeechPlan()
+    plan.add("Yes").add_message("final_question").add_template("The answer was {word}.", "car")
+    with patch("http_clients.UpstreamClient.post") as mock_post:
+        audio = plan.render()
+        mock_post.assert_not_called()
+    assert audio == _mp3(1) + _mp3(2) + _mp3(3) + _mp3(4)
+    assert plan.round_trips == 0
+
+
+def test_speech_plan_synthesizes_once():
+    """Any phrase missing: the whole response in one request"""
+    _cache_speech("Yes", _mp3(1))
+    plan = elevenlabs_utils.SpeechPlan()
+    plan.add("Yes").add_message("halfway_point").add("Game over!", audio=_mp3(9))
+    with patch("http_clients.UpstreamClient.post") as mock_post:
+        mock_post.return_value = MagicMock(status_code=200, content=b"combined")
+        assert plan.render() == b"combined"
+        mock_post.assert_called_once()
+        sent = mock_post.call_args[1]["json"]["text"]
+    assert sent == "Yes. You're halfway through! You have 10 questions left. Game over!"
+    assert plan.round_trips == 1
+
+
+def test_async_synthesis_keeps_cache_io_off_the_event_loop(monkeypatch):
+    """Cache lookups and stores (disk tier) run in worker threads"""
+    threads = []
+    lookup = elevenlabs_utils.rendered_speech
+
+    def recording_lookup(*args):
+        threads.append(threading.current_thread())
+        return lookup(*args)
+
+    monkeypatch.setattr(elevenlabs_utils, "rendered_speech", recording_lookup)
+    settings = elevenlabs_utils.VOICE_SETTINGS["quick_response"]
+    _cache_speech("Yes", _mp3(1))
+    audio = asyncio.run(
+        elevenlabs_utils.synthesize_speech_async(
+            "Yes", "test-voice-id", elevenlabs_utils.DEFAULT_MODEL_ID, settings
+        )
+    )
+    assert audio == _mp3(1)
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,254 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+import game_logic as game_logic
+from achievements import earned_achievements
+from game_completion import CompletionPipeline
+from memory_repository import MemoryRepository
+from sqlite_repository import SQLiteRepository
+
+
+def _flaky(failures):
+    """A stage that raises `failures` times, then succeeds."""
+    calls = []
+
+    def stage(job):
+        calls.append(job["game_id"])
+        if len(calls) <= failures:
+            raise Exception("database unavailable")
+
+    return stage, calls
+
+
+def test_stages_run_in_order_after_submit(tmp_path):
+    """Submit returns before the stages run; drain runs them in order"""
+    order = []
+    pipeline = CompletionPipeline(journal_path=str(tmp_path / "c.journal"))
+    pipeline.register_stage("stats", lambda job: order.append(("stats", job["game_id"])))
+    pipeline.register_stage("achievements", lambda job: order.append(("achievements", job["game_id"])))
+
+    job = pipeline.submit("g1", winner_id="p1")
+    assert order == []
+    assert job["winner_id"] == "p1"
+    assert pipeline.journal.read()[0]["game_id"] == "g1"
+
+    assert pipeline.drain(timeout=5)
+    assert order == [("stats", "g1"), ("achievements", "g1")]
+    assert pipeline.pending_count() == 0
+    assert pipeline.journal.read() == []
+
+
+def test_retry_skips_stages_that_succeeded(tmp_path):
+    """Only the failed stage is retried"""
+    stats = MagicMock()
+    achievements, calls = _flaky(failures=2)
+    pipeline = CompletionPipeline(retry_backoff=0.001)
+    pipeline.register_stage("stats", stats)
+    pipeline.register_stage("achievements", achievements)
+
+    pipeline.submit("g1")
+    assert pipeline.drain(timeout=5)
+    assert stats.call_count == 1
+    assert len(calls) == 3
+    assert pipeline.failed_jobs() == []
+
+
+def test_exhausted_job_stays_journaled(tmp_path):
+    """A job that keeps failing is parked and replayed by the next process"""
+    path = str(tmp_path / "c.journal")
+    stats = MagicMock()
+    pipeline = CompletionPipeline(journal_path=path, max_attempts=2, retry_backoff=0.001)
+    pipeline.register_stage("stats", stats)
+    pipeline.register_stage("achievements", MagicMock(side_effect=Exception("down")))
+
+    pipeline.submit("g1")
+    assert pipeline.drain(timeout=5)
+    assert len(pipeline.failed_jobs()) == 1
+    assert pipeline.journal.read()[0]["done"] == ["stats"]
+
+    achievements = MagicMock()
+    recovered = CompletionPipeline(journal_path=path)
+    recovered.register_stage("stats", stats)
+    recovered.register_stage("achievements", achievements)
+    assert recovered.pending_count() == 1
+    assert recovered.drain(timeout=5)
+    assert stats.call_count == 1
+    achievements.assert_called_once()
+    assert recovered.journal.read() == []
+
+
+def test_retry_failed_requeues_parked_jobs():
+    stage, calls = _flaky(failures=1)
+    pipeline = CompletionPipeline(max_attempts=1)
+    pipeline.register_stage("stats", stage)
+    pipeline.submit("g1")
+    pipeline.drain(timeout=5)
+    assert len(pipeline.failed_jobs()) == 1
+
+    assert pipeline.retry_failed() == 1
+    assert pipeline.drain(timeout=5)
+    assert pipeline.failed_jobs() == []
+    assert calls == ["g1", "g1"]
+
+
+def test_inline_mode_runs_before_submit_returns():
+    stage, calls = _flaky(failures=1)
+    pipeline = CompletionPipeline(inline=True, retry_backoff=0.001)
+    pipeline.register_stage("stats", stage)
+    pipeline.submit("g1")
+    assert calls == ["g1", "g1"]
+    assert pipeline.pending_count() == 0
+
+
+def test_worker_threads_process_jobs():
+    done = threading.Event()
+    pipeline = CompletionPipeline(workers=2)
+    pipeline.register_stage("stats", lambda job: done.set())
+    pipeline.start()
+    pipeline.submit("g1")
+    assert done.wait(5)
+    pipeline.close()
+    assert pipeline.pending_count() == 0
+
+
+def test_sweep_resubmits_games_without_applied_stats():
+    """Games found by the database sweep are completed unless already pending"""
+    stats = MagicMock()
+    unapplied = [{"id": "g1", "winner_id": "p1"}, {"id": "g2", "winner_id": None}]
+    pipeline = CompletionPipeline(sweep_fn=lambda: unapplied)
+    pipeline.register_stage("stats", stats)
+    pipeline.submit("g2")
+
+    assert pipeline.sweep() == 1
+    assert pipeline.drain(timeout=5)
+    assert sorted(call.args[0]["game_id"] for call in stats.call_args_list) == ["g1", "g2"]
+
+    failing = CompletionPipeline(sweep_fn=MagicMock(side_effect=Exception("down")))
+    assert failing.sweep() == 0
+
+
+def test_sweep_leaves_games_counted_before_the_upgrade_alone(tmp_path, monkeypatch):
+    """A game finished (and counted) before stats_applied_at existed is not re-applied"""
+    path = str(tmp_path / "20q.sqlite3")
+    repo = SQLiteRepository(path)
+    game = repo.create_game({"host_player_id": "p1", "status": "playing", "secret_word": "cat"})
+    repo.add_participant(game["id"], "p1")
+    repo.update_game(
+        game["id"],
+        {"status": "finished", "winner_id": "p1", "completed_at": "2025-01-01T00:00:00"},
+    )
+    repo.upsert_player_stats({"player_id": "p1", "games_played": 1, "games_won": 1})
+    conn = repo._connect()
+    conn.execute("DROP INDEX games_unapplied_idx")
+    conn.execute("ALTER TABLE games DROP COLUMN stats_applied_at")
+    repo.close()
+
+    upgraded = SQLiteRepository(path)
+    monkeypatch.setattr(game_logic, "_repository", upgraded)
+    stats = MagicMock(side_effect=lambda job: upgraded.apply_game_result(job["game_id"]))
+    pipeline = CompletionPipeline(sweep_fn=game_logic._unapplied_games)
+    pipeline.register_stage("stats", stats)
+
+    assert pipeline.sweep() == 0
+    assert pipeline.drain(timeout=5)
+    stats.assert_not_called()
+    player = upgraded.get_player_stats("p1")
+    assert (player["games_played"], player["games_won"]) == (1, 1)
+    upgraded.close()
+
+
+def _finished_game(repo, questions_asked):
+    game = repo.create_game({"host_player_id": "p1", "status": "playing", "secret_word": "cat"})
+    repo.add_participant(game["id"], "p1")
+    repo.update_game(
+        game["id"],
+        {"status": "finished", "winner_id": "p1", "questions_asked": questions_asked},
+    )
+    return game
+
+
+def _question(game, number):
+    return {
+        "game_id": game["id"],
+        "player_id": "p1",
+        "question": "Q",
+        "answer": True,
+        "question_number": number,
+    }
+
+
+def test_stats_wait_for_questions_buffered_elsewhere(monkeypatch):
+    """Another worker's buffered question is counted once it lands"""
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "QUESTION_WRITE_BEHIND", True)
+    monkeypatch.setattr(game_logic, "_question_buffer", None)
+    game = _finished_game(repo, questions_asked=2)
+    repo.insert_question(_question(game, 1))
+
+    with pytest.raises(Exception, match="not stored yet"):
+        game_logic.update_player_stats("p1", game["id"], wait_for_questions=True)
+    assert repo.get_player_stats("p1") is None
+
+    repo.insert_question(_question(game, 2))
+    assert game_logic.update_player_stats("p1", game["id"], wait_for_questions=True)
+    assert repo.get_player_stats("p1")["total_questions_asked"] == 2
+
+
+def test_stats_stop_waiting_on_the_last_attempt(monkeypatch):
+    """A question that never lands holds the stats back only until the last attempt"""
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "QUESTION_WRITE_BEHIND", True)
+    monkeypatch.setattr(game_logic, "_question_buffer", None)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_INLINE", True)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_JOURNAL_PATH", None)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_RETRY_BACKOFF", 0)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_SWEEP_INTERVAL", 0)
+    monkeypatch.setattr(game_logic, "_completion_pipeline", None)
+    game = _finished_game(repo, questions_asked=2)
+    repo.insert_question(_question(game, 1))
+
+    job = game_logic.complete_game(game["id"], "p1")
+    assert job["attempts"] == 3
+    assert repo.get_player_stats("p1")["total_questions_asked"] == 1
+    game_logic.get_completion_pipeline().close()
+
+
+def test_memory_repository_lists_unapplied_games():
+    repo = MemoryRepository()
+    game = repo.create_game({"host_player_id": "p1", "status": "playing", "secret_word": "cat"})
+    repo.add_participant(game["id"], "p1")
+    repo.update_game(game["id"], {"status": "finished", "winner_id": "p1", "completed_at": "2025-01-01T00:00:00"})
+
+    assert repo.list_unapplied_games("2025-01-01T00:00:00") == []
+    assert repo.list_unapplied_games("2025-01-02T00:00:00") == [{"id": game["id"], "winner_id": "p1"}]
+    assert repo.apply_game_result(game["id"])
+    assert repo.list_unapplied_games("2025-01-02T00:00:00") == []
+
+
+def test_earned_achievements_rules():
+    stats = {"games_played": 12, "games_won": 4, "best_streak": 3, "fastest_win_questions": 4}
+    assert earned_achievements(stats) == ["First Win", "Hat Trick", "Quick Thinker", "Regular"]
+    assert earned_achievements({"games_played": 1, "games_won": 0}) == []
+    assert earned_achievements(None) == []
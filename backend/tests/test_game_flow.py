@@ -15,9 +15,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 import game_logic as game_logic
+import tts_cache as tts_cache
 import openai
 
 
@@ -31,6 +32,7 @@ def patch_supabase_and_openai(monkeypatch):
         {"name": "pizza", "difficulty": 1},
     ]
     monkeypatch.setattr(game_logic, "SECRET_WORDS", mock_secret_words)
+    tts_cache.set_tts_cache(tts_cache.TTSCache(directory=None))
 
     # Patch supabase client methods
     mock_supabase = MagicMock()
@@ -190,6 +192,49 @@ def test_record_question_failure(monkeypatch):
         game_logic.record_question("game-uuid", "player-uuid", "Q", "Yes", 1)
 
 
+def test_record_question_write_behind(monkeypatch, tmp_path):
+    mock_supabase = MagicMock()
+    monkeypatch.setattr(game_logic, "get_supabase_client", lambda: mock_supabase)
+    monkeypatch.setattr(game_logic, "QUESTION_WRITE_BEHIND", True)
+    monkeypatch.setattr(
+        game_logic, "QUESTION_JOURNAL_PATH", str(tmp_path / "questions.journal")
+    )
+    monkeypatch.setattr(game_logic, "_question_buffer", None)
+
+    result = game_logic.record_question("game-uuid", "player-uuid", "Q", "Yes", 1)
+    assert result["game_id"] == "game-uuid"
+    assert result["answer"] is True
+    assert result["id"]
+    mock_supabase.table.return_value.insert.assert_not_called()
+
+    game_logic.flush_pending_questions()
+    rows = mock_supabase.table.return_value.upsert.call_args[0][0]
+    assert rows[0]["id"] == result["id"]
+    game_logic.get_question_buffer().close()
+
+
+def test_stats_wait_for_questions_that_failed_to_flush(monkeypatch, tmp_path):
+    mock_supabase = MagicMock()
+    mock_supabase.table.return_value.upsert.return_value.execute.side_effect = Exception(
+        "database unavailable"
+    )
+    monkeypatch.setattr(game_logic, "get_supabase_client", lambda: mock_supabase)
+    monkeypatch.setattr(game_logic, "QUESTION_WRITE_BEHIND", True)
+    monkeypatch.setattr(game_logic, "QUESTION_JOURNAL_PATH", str(tmp_path / "questions.journal"))
+    monkeypatch.setattr(game_logic, "_question_buffer", None)
+    game_logic.record_question("game-uuid", "player-uuid", "Q", "Yes", 1)
+
+    # Applying now would count the game without its question, for good
+    with pytest.raises(Exception, match="database unavailable"):
+        game_logic.update_player_stats("player-uuid", "game-uuid")
+    mock_supabase.rpc.assert_not_called()
+
+    mock_supabase.table.return_value.upsert.return_value.execute.side_effect = None
+    mock_supabase.rpc.return_value.execute.return_value = MagicMock(data=True)
+    assert game_logic.update_player_stats("player-uuid", "game-uuid") is True
+    game_logic.get_question_buffer().close()
+
+
 def test_increment_questions_asked_success(monkeypatch):
     monkeypatch.setattr(game_logic, "get_game", lambda game_id: {"questions_asked": 1})
     mock_response = MagicMock()
@@ -310,6 +355,17 @@ def test_update_stats_data():
     assert updated["win_rate"] == 100.0
 
 
+def test_update_player_stats_calls_rpc(monkeypatch):
+    mock_supabase = MagicMock()
+    mock_supabase.rpc.return_value.execute.return_value = MagicMock(data=True)
+    monkeypatch.setattr(game_logic, "get_supabase_client", lambda: mock_supabase)
+    assert game_logic.update_player_stats("p1", "game-uuid") is True
+    mock_supabase.rpc.assert_called_once_with(
+        "apply_game_result", {"p_game_id": "game-uuid"}
+    )
+    mock_supabase.table.assert_not_called()
+
+
 def test_upsert_player_stats(monkeypatch):
     mock_response = MagicMock()
     mock_response.data = [{"player_id": "player-uuid"}]
@@ -337,7 +393,7 @@ def test_upsert_player_stats_difficulty(monkeypatch):
 def test_generate_speech(monkeypatch):
     monkeypatch.setattr(game_logic, "ELEVENLABS_API_KEY", "fake-key")
     monkeypatch.setattr(game_logic, "ELEVENLABS_BASE_URL", "http://fake-url")
-    with patch("requests.post") as mock_post:
+    with patch("http_clients.UpstreamClient.post") as mock_post:
         mock_post.return_value.status_code = 200
         mock_post.return_value.content = b"audio-bytes"
         result = game_logic.generate_speech("hello")
@@ -364,6 +420,39 @@ def test_ask_question_with_tts(monkeypatch):
     assert result["question_number"] == 1
 
 
+def test_question_limit_queues_completion(monkeypatch):
+    monkeypatch.setattr(
+        game_logic,
+        "get_game",
+        lambda game_id: {"secret_word": "test", "enable_tts": False, "voice_id": None},
+    )
+    monkeypatch.setattr(
+        game_logic, "ask_openai_question", lambda *a, **kw: {"answer": "No"}
+    )
+    monkeypatch.setattr(game_logic, "increment_questions_asked", lambda game_id: 20)
+    monkeypatch.setattr(game_logic, "record_question", lambda *a, **kw: {"id": 1})
+    complete_game = MagicMock()
+    monkeypatch.setattr(game_logic, "complete_game", complete_game)
+    result = game_logic.ask_question_with_tts("game-uuid", "player-uuid", "Q?")
+    assert result["game_over"] is True
+    complete_game.assert_called_once_with("game-uuid", None, reason="question_limit")
+
+
+def test_update_game_winner_defers_stats(monkeypatch):
+    mock_supabase = MagicMock()
+    mock_supabase.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(
+        data=[{"id": "game-uuid"}]
+    )
+    monkeypatch.setattr(game_logic, "get_supabase_client", lambda: mock_supabase)
+    complete_game = MagicMock()
+    update_player_stats = MagicMock()
+    monkeypatch.setattr(game_logic, "complete_game", complete_game)
+    monkeypatch.setattr(game_logic, "update_player_stats", update_player_stats)
+    game_logic.update_game_winner("game-uuid", "p1")
+    complete_game.assert_called_once_with("game-uuid", "p1", reason="guessed")
+    update_player_stats.assert_not_called()
+
+
 def test_make_guess_with_tts(monkeypatch):
     monkeypatch.setattr(
         game_logic, "get_game", lambda game_id: {"enable_tts": True, "voice_id": "v1"}
@@ -470,3 +559,75 @@ def test_start_game_with_defaults():
         assert call_args["game_type"] == "solo"
         assert call_args["max_players"] == 1
         assert "guessed_word" not in call_args  # Should not be included when None
+
+
+def _async_supabase(monkeypatch, data):
+    """Patch the async client so every awaited execute() returns `data`."""
+    mock_client = MagicMock()
+    execute = AsyncMock(return_value=MagicMock(data=data))
+    table = mock_client.table.return_value
+    table.select.return_value.eq.return_value.single.return_value.execute = execute
+    table.update.return_value.eq.return_value.execute = execute
+    table.insert.return_value.execute = execute
+    monkeypatch.setattr(
+        game_logic, "get_async_supabase_client", AsyncMock(return_value=mock_client)
+    )
+    return mock_client
+
+
+@pytest.mark.asyncio
+async def test_get_game_async(monkeypatch):
+    _async_supabase(monkeypatch, {"id": "game-uuid", "status": "playing"})
+    game = await game_logic.get_game_async("game-uuid")
+    assert game["status"] == "playing"
+
+
+@pytest.mark.asyncio
+async def test_get_game_async_not_found(monkeypatch):
+    _async_supabase(monkeypatch, None)
+    with pytest.raises(Exception):
+        await game_logic.get_game_async("missing")
+
+
+@pytest.mark.asyncio
+async def test_increment_questions_asked_async(monkeypatch):
+    _async_supabase(monkeypatch, [{"id": "game-uuid"}])
+    monkeypatch.setattr(
+        game_logic, "get_game_async", AsyncMock(return_value={"questions_asked": 4})
+    )
+    assert await game_logic.increment_questions_asked_async("game-uuid") == 5
+
+
+@pytest.mark.asyncio
+async def test_record_question_async(monkeypatch):
+    mock_client = _async_supabase(monkeypatch, [{"id": 1, "game_id": "game-uuid"}])
+    result = await game_logic.record_question_async("game-uuid", "p1", "Q", "No", 2)
+    assert result["game_id"] == "game-uuid"
+    inserted = mock_client.table.return_value.insert.call_args[0][0]
+    assert inserted["answer"] is False
+    assert inserted["question_number"] == 2
+
+
+@pytest.mark.asyncio
+async def test_join_game_async(monkeypatch):
+    _async_supabase(monkeypatch, [{"game_id": "game-uuid", "player_id": "p1"}])
+    result = await game_logic.join_game_async("game-uuid", "p1")
+    assert result["player_id"] == "p1"
+
+
+@pytest.mark.asyncio
+async def test_ask_openai_question_async(monkeypatch):
+    from http_clients import AsyncUpstreamResponse
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    body = b'{"choices": [{"message": {"content": "Yes."}}]}'
+    with patch(
+        "http_clients.AsyncUpstreamClient.post",
+        new_callable=AsyncMock,
+        return_value=AsyncUpstreamResponse(200, {}, body),
+    ) as mock_post:
+        result = await game_logic.ask_openai_question_async("car", "Does it have wheels?")
+    assert result == {"answer": "Yes"}
+    sent = mock_post.call_args.kwargs["json"]
+    assert sent["messages"][0]["content"].endswith('"car')
+    assert mock_post.call_args.kwargs["headers"]["Authorization"] == "Bearer test-key"
@@ -0,0 +1,106 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import auth_routes as auth_routes
+import game_history as game_history
+import game_logic as game_logic
+from memory_repository import MemoryRepository
+from whisper import whisper
+
+
+@pytest.fixture
+def api(monkeypatch):
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", repo.list_secret_words())
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_INLINE", True)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_JOURNAL_PATH", None)
+    monkeypatch.setattr(game_logic, "_completion_pipeline", None)
+
+    user = MagicMock()
+    user.id = "guest"
+
+    async def current_user():
+        return user
+
+    whisper.dependency_overrides[auth_routes.get_current_user] = current_user
+    yield repo, TestClient(whisper)
+    whisper.dependency_overrides.pop(auth_routes.get_current_user, None)
+
+
+def _play(winner, difficulty=1, questions=1):
+    game = game_logic.start_game("host", difficulty, max_players=2)
+    game_logic.join_game(game["id"], "guest")
+    for _ in range(questions):
+        count = game_logic.increment_questions_asked(game["id"])
+        game_logic.record_question(game["id"], winner, "Is it alive?", "No", count)
+    game_logic.update_game_winner(game["id"], winner)
+    return game["id"]
+
+
+def test_history_endpoint_pages_with_summary(api):
+    repo, client = api
+    repo.upsert_player({"id": "host", "username": "hosty"})
+    played = [_play("guest", questions=2), _play("host", difficulty=2), _play("guest")]
+
+    body = client.get("/history", params={"limit": 2}).json()
+    assert [g["id"] for g in body["games"]] == played[::-1][:2]
+    newest = body["games"][0]
+    assert newest["result"] == "won"
+    assert newest["questions"] == 1
+    assert newest["opponent"] == "hosty"
+    assert newest["opponents"] == [{"player_id": "host", "username": "hosty"}]
+
+    summary = body["summary"]
+    assert summary["games_played"] == 3
+    assert summary["games_won"] == 2
+    assert summary["games_lost"] == 1
+    assert summary["current_streak"] == 1
+    assert summary["fastest_win_questions"] == 1
+    assert summary["by_difficulty"]["2"]["games_lost"] == 1
+
+    rest = client.get("/history", params={"limit": 2, "cursor": body["next_cursor"]}).json()
+    assert [g["id"] for g in rest["games"]] == [played[0]]
+    assert rest["next_cursor"] is None
+
+    lost = client.get("/history", params={"result": "lost"}).json()["games"]
+    assert [g["id"] for g in lost] == [played[1]]
+    hard = client.get("/history", params={"difficulty": 2}).json()["games"]
+    assert [g["id"] for g in hard] == [played[1]]
+
+    assert client.get("/history", params={"result": "draw"}).status_code == 400
+    assert client.get("/history", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_history_reads_one_page_from_the_repository():
+    repo = MagicMock()
+    repo.list_game_history.return_value = [
+        {"game_id": f"g{i}", "completed_at": f"2025-01-0{9 - i}", "result": "won"}
+        for i in range(3)
+    ]
+    games, cursor = game_history.get_history(repo, "p1", limit=2)
+    assert [g["id"] for g in games] == ["g0", "g1"]
+    repo.list_game_history.assert_called_once_with(
+        "p1", limit=3, before=None, result=None, difficulty=None
+    )
+    repo.get_players.assert_not_called()
+    assert game_history.decode_cursor(cursor) == ("2025-01-08", "g1")
@@ -0,0 +1,212 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+import http_clients
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    """Keep-alive stub: answers queued statuses (after queued delays), then 200."""
+
+    protocol_version = "HTTP/1.1"
+    statuses = []
+    delays = []
+    calls = []
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.calls.append((self.command, self.path))
+        if self.delays:
+            time.sleep(self.delays.pop(0))
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    _Upstream.statuses = []
+    _Upstream.delays = []
+    _Upstream.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Upstream)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused_between_calls(upstream):
+    client = http_clients.UpstreamClient("stub", backoff=0)
+    for _ in range(5):
+        assert client.get(f"{upstream}/voices").status_code == 200
+    client.post(f"{upstream}/speech", json={"text": "hi"})
+
+    stats = client.stats.snapshot()
+    assert stats["requests"] == 6
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 5
+    assert stats["p95_latency_ms"] >= stats["p50_latency_ms"] > 0
+    client.close()
+
+
+def test_retry_policy_follows_method(upstream):
+    client = http_clients.UpstreamClient("stub", retry_methods={"GET"}, backoff=0)
+
+    _Upstream.statuses = [503, 502]
+    assert client.get(f"{upstream}/voices").status_code == 200
+    assert len(_Upstream.calls) == 3
+
+    # POST is not in retry_methods: the 503 is returned as-is
+    _Upstream.calls.clear()
+    _Upstream.statuses = [503]
+    assert client.post(f"{upstream}/token").status_code == 503
+    assert len(_Upstream.calls) == 1
+    assert client.stats.snapshot()["errors"] == 1
+    client.close()
+
+
+def test_default_timeout_only_when_not_given(monkeypatch):
+    client = http_clients.UpstreamClient("stub", read_timeout=12, connect_timeout=3)
+    seen = []
+
+    def request(method, url, **kwargs):
+        seen.append(kwargs["timeout"])
+        return MagicMock(status_code=200)
+
+    monkeypatch.setattr(client.session, "request", request)
+    client.get("http://upstream.invalid/a")
+    client.get("http://upstream.invalid/b", timeout=4)
+    assert seen == [(3, 12), 4]
+
+
+def test_registry_shares_and_closes_clients():
+    http_clients.close_http_clients()
+    eleven = http_clients.get_http_client("elevenlabs")
+    assert http_clients.get_http_client("elevenlabs") is eleven
+    assert eleven.timeout[1] == 30.0
+    assert set(http_clients.get_http_client_stats()) == {"elevenlabs"}
+    with pytest.raises(ValueError):
+        http_clients.get_http_client("nope")
+
+    http_clients.close_http_clients()
+    assert http_clients.get_http_client_stats() == {}
+    assert http_clients.get_http_client("elevenlabs") is not eleven
+    http_clients.close_http_clients()
+
+
+def test_async_client_reuses_one_session(upstream):
+    async def run():
+        client = http_clients.get_async_http_client("elevenlabs")
+        assert http_clients.get_async_http_client("elevenlabs") is client
+        for _ in range(4):
+            response = await client.get(f"{upstream}/voices")
+            assert response.status == 200
+            assert await response.json() == {"ok": True}
+        await client.post(f"{upstream}/speech", json={"text": "hi"})
+        stats = http_clients.get_http_client_stats()["elevenlabs_async"]
+        await http_clients.close_async_http_clients()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert "elevenlabs_async" not in http_clients.get_http_client_stats()
+
+
+def test_async_client_retry_policy(upstream):
+    async def run():
+        client = http_clients.AsyncUpstreamClient("stub", retry_methods={"GET"}, backoff=0)
+        _Upstream.statuses = [503, 502]
+        assert (await client.get(f"{upstream}/voices")).status == 200
+        get_calls = len(_Upstream.calls)
+        _Upstream.statuses = [503]
+        assert (await client.post(f"{upstream}/token")).status == 503
+        await client.close()
+        return get_calls, len(_Upstream.calls) - get_calls
+
+    assert asyncio.run(run()) == (3, 1)
+
+
+def test_async_client_timeouts_follow_method(upstream):
+    async def run():
+        client = http_clients.AsyncUpstreamClient(
+            "stub", read_timeout=0.2, retry_methods={"GET"}, backoff=0
+        )
+        _Upstream.delays = [0.5]
+        assert (await client.get(f"{upstream}/voices")).status == 200
+        get_calls = len(_Upstream.calls)
+        _Upstream.delays = [0.5]
+        with pytest.raises(http_clients.UpstreamTimeout, match="stub: POST"):
+            await client.post(f"{upstream}/token")
+        await client.close()
+        return get_calls, len(_Upstream.calls) - get_calls
+
+    assert asyncio.run(run()) == (2, 1)
+
+
+def test_async_client_of_another_loop_is_closed():
+    async def open_client():
+        return http_clients.get_async_http_client("elevenlabs")
+
+    old = asyncio.run(open_client())
+    new = asyncio.run(open_client())
+    assert new is not old
+    assert old.session.closed and not new.session.closed
+    http_clients._async_clients.pop("elevenlabs", None)
+    new.discard()
+
+
+def test_async_voice_lookups_share_the_session(upstream, monkeypatch):
+    import elevenlabs_utils
+
+    monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_API_KEY", "test-api-key")
+    monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_BASE_URL", upstream)
+
+    async def run():
+        await http_clients.open_async_http_clients()
+        voices = await elevenlabs_utils.get_available_voices_async()
+        info = await elevenlabs_utils.get_voice_info_async("v1")
+        stats = http_clients.get_http_client_stats()["elevenlabs_async"]
+        await http_clients.close_async_http_clients()
+        return voices, info, stats
+
+    voices, info, stats = asyncio.run(run())
+    assert voices == []
+    assert info == {"ok": True}
+    assert _Upstream.calls == [("GET", "/voices"), ("GET", "/voices/v1")]
+    assert (stats["requests"], stats["new_connections"]) == (2, 1)
@@ -0,0 +1,184 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import jwt
+import pytest
+import requests
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import HTTPException
+
+import auth_routes as auth_routes
+import http_clients
+import jwt_auth as jwt_auth
+from jwt_auth import JWKSCache, LocalVerificationUnavailable, TokenVerifier
+
+SECRET = "super-secret-jwt-token-with-at-least-32-characters"
+
+
+def _claims(**overrides):
+    claims = {
+        "sub": "user-1",
+        "email": "a@example.com",
+        "aud": "authenticated",
+        "role": "authenticated",
+        "exp": int(time.time()) + 3600,
+        "user_metadata": {"full_name": "Alice"},
+    }
+    claims.update(overrides)
+    return {k: v for k, v in claims.items() if v is not None}
+
+
+def _es256_jwks(kid):
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key()))
+    return private_key, {**public, "kid": kid, "alg": "ES256", "use": "sig"}
+
+
+def test_hs256_tokens_are_checked_locally():
+    verifier = TokenVerifier(jwt_secret=SECRET)
+    user = verifier.verify(jwt.encode(_claims(), SECRET, algorithm="HS256"))
+    assert user.id == "user-1"
+    assert user.email == "a@example.com"
+    assert user.user_metadata["full_name"] == "Alice"
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.verify(jwt.encode(_claims(exp=int(time.time()) - 120), SECRET, algorithm="HS256"))
+    with pytest.raises(jwt.InvalidAudienceError):
+        verifier.verify(jwt.encode(_claims(aud="anon"), SECRET, algorithm="HS256"))
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(jwt.encode(_claims(), "x" * 40, algorithm="HS256"))
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        verifier.verify(jwt.encode(_claims(sub=None), SECRET, algorithm="HS256"))
+    with pytest.raises(LocalVerificationUnavailable):
+        TokenVerifier().verify(jwt.encode(_claims(), SECRET, algorithm="HS256"))
+
+
+def test_jwks_keys_are_cached_and_rotated(monkeypatch):
+    old_key, old_jwk = _es256_jwks("k1")
+    new_key, new_jwk = _es256_jwks("k2")
+    published = {"keys": [old_jwk]}
+    jwks = JWKSCache("https://example.supabase.co/jwks", fetch=lambda url: published)
+    verifier = TokenVerifier(jwks=jwks)
+
+    token = jwt.encode(_claims(), old_key, algorithm="ES256", headers={"kid": "k1"})
+    for _ in range(3):
+        assert verifier.verify(token).id == "user-1"
+    assert jwks.fetches == 1
+
+    # The signing key rotates: an unknown kid refetches, but not more than
+    # once per JWKS_MIN_REFRESH_INTERVAL
+    published = {"keys": [old_jwk, new_jwk]}
+    rotated = jwt.encode(_claims(), new_key, algorithm="ES256", headers={"kid": "k2"})
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.verify(rotated)
+    assert jwks.fetches == 1
+    monkeypatch.setattr(jwt_auth, "JWKS_MIN_REFRESH_INTERVAL", 0)
+    assert verifier.verify(rotated).id == "user-1"
+    assert jwks.fetches == 2
+
+    forged = jwt.encode(_claims(), old_key, algorithm="ES256", headers={"kid": "k2"})
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(forged)
+
+
+def test_jwks_outage_keeps_cached_keys():
+    key, jwk = _es256_jwks("k1")
+    fetch = MagicMock(return_value={"keys": [jwk]})
+    jwks = JWKSCache("https://example.supabase.co/jwks", ttl=0, fetch=fetch)
+    verifier = TokenVerifier(jwks=jwks)
+    token = jwt.encode(_claims(), key, algorithm="ES256", headers={"kid": "k1"})
+    assert verifier.verify(token).id == "user-1"
+
+    # Expired, and the endpoint is down: the cached key is used, and the
+    # endpoint is not retried for JWKS_MIN_REFRESH_INTERVAL
+    fetch.side_effect = requests.ConnectionError("down")
+    assert verifier.verify(token).id == "user-1"
+    assert verifier.verify(token).id == "user-1"
+    assert fetch.call_count == 2
+
+    empty = JWKSCache("https://example.supabase.co/jwks", fetch=fetch)
+    with pytest.raises(requests.ConnectionError):
+        TokenVerifier(jwks=empty).verify(token)
+
+
+@pytest.fixture
+def local_verifier(monkeypatch):
+    jwt_auth.set_token_verifier(TokenVerifier(jwt_secret=SECRET))
+    monkeypatch.setattr(auth_routes, "AUTH_VERIFY_MODE", "local")
+    yield
+    jwt_auth.set_token_verifier(None)
+
+
+def _credentials(token):
+    credentials = MagicMock()
+    credentials.credentials = token
+    return credentials
+
+
+def test_jwks_is_fetched_through_the_pooled_auth_client():
+    cache = JWKSCache("https://project.supabase.co/auth/v1/.well-known/jwks.json")
+    with patch("http_clients.UpstreamClient.get") as get:
+        get.return_value.json.return_value = {"keys": []}
+        assert cache._fetch(cache.url) == {"keys": []}
+    get.assert_called_once_with(cache.url, headers={})
+    assert "supabase_auth" in http_clients.get_http_client_stats()
+
+
+def test_get_current_user_skips_supabase_auth(local_verifier):
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+    with patch("auth_routes.get_supabase_auth_client") as mock_auth:
+        user = asyncio.run(auth_routes.get_current_user(_credentials(token)))
+        assert user.id == "user-1"
+        assert asyncio.run(auth_routes.get_current_user_optional(_credentials("bad"))) is None
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(auth_routes.get_current_user(_credentials("not-a-jwt")))
+        assert error.value.status_code == 401
+        mock_auth.assert_not_called()
+
+
+def test_remote_check_mode(local_verifier, monkeypatch):
+    remote_user = MagicMock(id="user-1")
+    token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+    with patch("auth_routes.get_supabase_auth_client") as mock_auth:
+        mock_auth.return_value.auth.get_user.return_value.user = remote_user
+        assert asyncio.run(auth_routes.get_current_user_remote(_credentials(token))) is remote_user
+
+        monkeypatch.setattr(auth_routes, "AUTH_VERIFY_MODE", "remote")
+        assert asyncio.run(auth_routes.get_current_user(_credentials(token))) is remote_user
+
+        mock_auth.return_value.auth.get_user.return_value.user = None
+        with pytest.raises(HTTPException):
+            asyncio.run(auth_routes.get_current_user(_credentials(token)))
+        assert mock_auth.return_value.auth.get_user.call_count == 3
+
+
+def test_tokens_without_local_key_fall_back_to_supabase_auth(monkeypatch):
+    jwt_auth.set_token_verifier(TokenVerifier())
+    monkeypatch.setattr(auth_routes, "AUTH_VERIFY_MODE", "local")
+    try:
+        token = jwt.encode(_claims(), SECRET, algorithm="HS256")
+        with patch("auth_routes.get_supabase_auth_client") as mock_auth:
+            mock_auth.return_value.auth.get_user.return_value.user = MagicMock(id="user-1")
+            assert auth_routes.verify_token(token).id == "user-1"
+            mock_auth.return_value.auth.get_user.assert_called_once_with(token)
+    finally:
+        jwt_auth.set_token_verifier(None)
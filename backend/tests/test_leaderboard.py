@@ -0,0 +1,227 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import random
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import auth_routes as auth_routes
+import game_logic as game_logic
+import leaderboard as leaderboard
+from memory_repository import MemoryRepository
+from ranking import OrderStatisticList
+from whisper import whisper
+
+
+def test_order_statistic_list_matches_sorted_list():
+    """Random inserts and removes keep rank/select consistent with sorted()"""
+    rng = random.Random(7)
+    ranking = OrderStatisticList(load=8)
+    reference = set()
+    for _ in range(3000):
+        key = (rng.randint(0, 50), f"p{rng.randint(0, 400)}")
+        if key in reference and rng.random() < 0.5:
+            ranking.remove(key)
+            reference.discard(key)
+        else:
+            assert ranking.add(key) is (key not in reference)
+            reference.add(key)
+    expected = sorted(reference)
+    assert list(ranking) == expected
+    assert len(ranking) == len(expected)
+    for position in (0, len(expected) // 2, len(expected) - 1):
+        assert ranking[position] == expected[position]
+        assert ranking.index(expected[position]) == position
+    assert ranking.slice(10, 25) == expected[10:25]
+    assert ranking.bisect_right(expected[5]) == 6
+    with pytest.raises(KeyError):
+        ranking.remove((999, "missing"))
+
+
+def _stats(player_id, played, won, streak=0, difficulty=None):
+    row = {
+        "player_id": player_id,
+        "games_played": played,
+        "games_won": won,
+        "win_rate": round(won / played * 100, 2),
+    }
+    if difficulty is None:
+        row.update({"current_streak": streak, "best_streak": streak})
+    else:
+        row["difficulty"] = difficulty
+    return row
+
+
+@pytest.fixture
+def board():
+    lb = leaderboard.Leaderboard()
+    lb.update(_stats("alice", 10, 9, streak=4))
+    lb.update(_stats("bob", 10, 5, streak=1))
+    lb.update(_stats("carol", 20, 15, streak=7))
+    lb.update(_stats("dave", 4, 1))
+    lb.update(_stats("alice", 3, 1, difficulty=2))
+    lb.update(_stats("bob", 3, 3, difficulty=2))
+    return lb
+
+
+def test_sorts_and_difficulty_boards(board):
+    by_rate, _ = board.page("win_rate")
+    assert [e["player_id"] for e in by_rate] == ["alice", "carol", "bob", "dave"]
+    by_wins, _ = board.page("wins")
+    assert [e["player_id"] for e in by_wins] == ["carol", "alice", "bob", "dave"]
+    by_streak, _ = board.page("streak")
+    assert by_streak[0]["player_id"] == "carol"
+    assert by_streak[0]["streak"] == 7
+
+    hard, _ = board.page("win_rate", difficulty=2)
+    assert [e["player_id"] for e in hard] == ["bob", "alice"]
+    assert "streak" not in hard[0]
+    with pytest.raises(ValueError):
+        board.page("streak", difficulty=2)
+    with pytest.raises(ValueError):
+        board.page("username")
+
+
+def test_keyset_pages_are_stable_across_updates(board):
+    first, cursor = board.page("wins", limit=2)
+    assert [e["player_id"] for e in first] == ["carol", "alice"]
+
+    # dave jumps above the page boundary; the next page continues after alice
+    board.update(_stats("dave", 30, 12))
+    second, cursor = board.page("wins", limit=2, cursor=cursor)
+    assert [e["player_id"] for e in second] == ["bob"]
+    assert second[0]["rank"] == 4
+    assert cursor is None
+    assert board.rank("dave", "wins") == 2
+
+    with pytest.raises(ValueError):
+        board.page("wins", cursor="not-a-cursor")
+    # A cursor of another order is rejected, not compared with this order's keys
+    _, rate_cursor = board.page("win_rate", limit=1)
+    with pytest.raises(ValueError):
+        board.page("wins", cursor=rate_cursor)
+    _, wins_cursor = board.page("wins", limit=1)
+    with pytest.raises(ValueError):
+        board.page("win_rate", cursor=wins_cursor)
+
+
+def test_players_around_me(board):
+    around = board.around("bob", "win_rate", radius=1)
+    assert [(e["rank"], e["player_id"]) for e in around] == [
+        (2, "carol"),
+        (3, "bob"),
+        (4, "dave"),
+    ]
+    assert board.around("nobody") == []
+
+
+def test_load_and_incremental_refresh_from_repository():
+    repo = MemoryRepository()
+    repo.upsert_player_stats({**_stats("alice", 2, 1), "last_game_played_at": "2025-01-01T00:00:00"})
+    repo.upsert_player_stats_difficulty(_stats("alice", 2, 1, difficulty=1))
+
+    lb = leaderboard.Leaderboard(overlap=0)
+    assert lb.load(repo, page_size=1) == 1
+    assert lb.rank("alice") == 1
+    assert lb.rank("alice", difficulty=1) == 1
+
+    repo.upsert_player_stats({**_stats("bob", 1, 1), "last_game_played_at": "2025-01-02T00:00:00"})
+    assert lb.refresh(repo) == 1  # only bob changed since alice's game
+    assert lb.rank("bob") == 1
+
+
+def test_refresh_does_not_skip_rows_from_other_instances():
+    """Local pushes do not move the watermark, and refresh overlaps it"""
+    repo = MemoryRepository()
+    repo.upsert_player_stats({**_stats("alice", 1, 1), "last_game_played_at": "2025-01-01T00:00:00"})
+    lb = leaderboard.Leaderboard(overlap=30)
+    lb.load(repo)
+
+    # This instance finishes carol's game at 12:00 and pushes the row itself;
+    # another instance finished bob's at 11:00 but committed only now
+    carol = {**_stats("carol", 1, 1), "last_game_played_at": "2025-01-01T12:00:00"}
+    repo.upsert_player_stats(carol)
+    lb.update(carol)
+    repo.upsert_player_stats({**_stats("bob", 1, 1), "last_game_played_at": "2025-01-01T11:00:00"})
+    lb.refresh(repo)
+    assert lb.rank("bob") is not None
+
+    # A row committed late, a few seconds behind the newest one pulled
+    repo.upsert_player_stats({**_stats("dave", 2, 2), "last_game_played_at": "2025-01-01T11:59:50"})
+    lb.refresh(repo)
+    assert lb.rank("dave") == 1
+    assert lb.count() == 4
+
+
+@pytest.fixture
+def api(monkeypatch):
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", repo.list_secret_words())
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_INLINE", True)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_JOURNAL_PATH", None)
+    monkeypatch.setattr(game_logic, "_completion_pipeline", None)
+    leaderboard.set_leaderboard(None)
+
+    user = MagicMock()
+    user.id = "guest"
+
+    async def current_user():
+        return user
+
+    whisper.dependency_overrides[auth_routes.get_current_user] = current_user
+    yield repo, TestClient(whisper)
+    whisper.dependency_overrides.pop(auth_routes.get_current_user, None)
+    leaderboard.set_leaderboard(None)
+
+
+def _play(winner, players=("host", "guest")):
+    game = game_logic.start_game(players[0], 1, max_players=len(players))
+    for player in players[1:]:
+        game_logic.join_game(game["id"], player)
+    count = game_logic.increment_questions_asked(game["id"])
+    game_logic.record_question(game["id"], winner, "Is it alive?", "No", count)
+    game_logic.update_game_winner(game["id"], winner)
+
+
+def test_leaderboard_endpoints_follow_finished_games(api):
+    repo, client = api
+    repo.upsert_player({"id": "host", "username": "hosty"})
+    repo.upsert_player({"id": "guest", "username": "guesty"})
+    _play("host")
+
+    response = client.get("/leaderboard", params={"sort": "wins"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [e["username"] for e in body["entries"]] == ["hosty", "guesty"]
+    assert body["total"] == 2
+
+    # Updated by the completion pipeline, without reloading the board
+    _play("guest")
+    _play("guest")
+    body = client.get("/leaderboard", params={"sort": "wins", "limit": 1}).json()
+    assert body["entries"][0]["player_id"] == "guest"
+    assert body["next_cursor"]
+
+    around = client.get("/leaderboard/around_me", params={"sort": "wins"}).json()
+    assert around["rank"] == 1
+    assert [e["player_id"] for e in around["entries"]] == ["guest", "host"]
+
+    assert client.get("/leaderboard", params={"sort": "bogus"}).status_code == 400
+    assert client.get("/leaderboard", params={"difficulty": 1}).json()["total"] == 2
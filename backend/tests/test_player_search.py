@@ -0,0 +1,131 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import game_logic as game_logic
+import player_search as player_search
+from memory_repository import MemoryRepository
+from player_search import PlayerSearchIndex
+from whisper import whisper
+
+NAMES = ["QuizMaster", "quizzical", "Quietus", "MasterQuiz", "Ninja_Fox", "Ninja%", "owl"]
+
+
+@pytest.fixture
+def index():
+    idx = PlayerSearchIndex()
+    for i, name in enumerate(NAMES):
+        idx.upsert(f"p{i}", name)
+    return idx
+
+
+def _names(rows):
+    return [r["username"] for r in rows]
+
+
+def test_prefix_then_substring_matches(index):
+    assert _names(index.search("qui")) == ["Quietus", "QuizMaster", "quizzical", "MasterQuiz"]
+    assert _names(index.search("QUIZ", limit=2)) == ["QuizMaster", "quizzical"]
+    # Substring matches need three characters
+    assert _names(index.search("fo")) == []
+    assert _names(index.search("fox")) == ["Ninja_Fox"]
+    assert _names(index.search("ninja%")) == ["Ninja%"]
+    assert index.search("  ") == []
+    assert index.search("zzz") == []
+
+
+def test_renames_and_removals_stay_consistent(index):
+    index.upsert("p0", "Wizard")
+    assert _names(index.search("quizm")) == []
+    assert _names(index.search("izar")) == ["Wizard"]
+    index.upsert("p0", "wizard", avatar_url="a.png")
+    assert index.search("wiz") == [{"id": "p0", "username": "wizard", "avatar_url": "a.png"}]
+    index.remove("p6")
+    assert index.search("owl") == []
+    assert len(index) == len(NAMES) - 1
+
+
+def test_dead_slots_trigger_a_rebuild():
+    idx = PlayerSearchIndex()
+    for i in range(3000):
+        idx.upsert("p1", f"name{i}")
+    assert len(idx._slots) < 3000
+    assert _names(idx.search("me2999")) == ["name2999"]
+
+
+def test_substring_matches_are_the_alphabetical_first():
+    idx = PlayerSearchIndex()
+    for i, name in enumerate(["zz_quiz", "mm_quiz", "aa_quiz"]):
+        idx.upsert(f"p{i}", name)
+    assert _names(idx.search("quiz", limit=2)) == ["aa_quiz", "mm_quiz"]
+
+
+def test_older_rows_do_not_overwrite_newer_updates():
+    idx = PlayerSearchIndex()
+    idx.upsert("p1", "Renamed", updated_at="2025-01-02T00:00:00")
+    idx.upsert("p1", "Original", updated_at="2025-01-01T00:00:00")
+    assert _names(idx.search("ren")) == ["Renamed"]
+    assert idx.search("orig") == []
+
+
+def test_refresh_picks_up_players_from_other_instances():
+    repo = MemoryRepository()
+    repo.upsert_player({"id": "p1", "username": "QuizMaster"})
+    idx = PlayerSearchIndex(refresh_interval=0)
+    idx.load(repo)
+
+    # Another instance signs a player up and renames one
+    repo.upsert_player({"id": "p2", "username": "NewQuizzer"})
+    repo.upsert_player({"id": "p1", "username": "Wizard"})
+    assert idx.refresh(repo) == 2
+    assert _names(idx.search("quiz")) == ["NewQuizzer"]
+    assert _names(idx.search("wiz")) == ["Wizard"]
+    assert idx.refresh(repo) == 2  # the overlap re-reads recent rows harmlessly
+
+
+def test_database_serves_searches_until_the_index_loads(monkeypatch):
+    repo = MemoryRepository()
+    repo.upsert_player({"id": "p1", "username": "QuizMaster"})
+    repo.search_players = MagicMock(wraps=repo.search_players)
+    idx = PlayerSearchIndex()
+    monkeypatch.setattr(player_search, "_index", idx)
+    monkeypatch.setattr(idx, "start_loading", lambda r: idx.load(r, page_size=1))
+
+    assert _names(player_search.search_players(repo, "quiz")) == ["QuizMaster"]
+    repo.search_players.assert_called_once()
+    assert idx.loaded
+    assert _names(player_search.search_players(repo, "master")) == ["QuizMaster"]
+    repo.search_players.assert_called_once()
+
+
+def test_search_endpoint(monkeypatch):
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    idx = PlayerSearchIndex()
+    idx.loaded = True
+    monkeypatch.setattr(player_search, "_index", idx)
+    player_search.index_player("p1", "QuizMaster")
+
+    client = TestClient(whisper)
+    response = client.get("/players/search", params={"q": "quiz"})
+    assert response.status_code == 200
+    assert _names(response.json()["players"]) == ["QuizMaster"]
+    assert client.get("/players/search", params={"q": ""}).status_code == 422
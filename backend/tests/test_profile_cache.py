@@ -0,0 +1,90 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import auth_routes as auth_routes
+import profile_cache as profile_cache
+from achievements import award_for_game
+from memory_repository import MemoryRepository
+from profile_cache import ProfileCache
+from whisper import whisper
+
+
+def test_entries_expire_and_evict(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(profile_cache.time, "monotonic", lambda: now[0])
+    cache = ProfileCache(ttl=10, max_entries=2)
+    cache.put("p1", {"bio": "one"})
+    cache.put("p2", {"bio": "two"})
+    assert cache.get("p1") == {"bio": "one"}
+    cache.put("p3", {"bio": "three"})  # p2 is least recently used
+    assert cache.get("p2") is None
+    cache.put("p4", {})  # missing rows are not cached
+    assert cache.get("p4") is None
+
+    now[0] += 10
+    assert cache.get("p1") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 3}
+
+
+@pytest.fixture
+def me_client(monkeypatch):
+    cache = ProfileCache(ttl=60)
+    profile_cache.set_profile_cache(cache)
+    user = MagicMock()
+    user.id = "p1"
+    user.email = "p1@example.com"
+    user.user_metadata = {"full_name": "Player One"}
+    user.created_at = None
+
+    async def current_user():
+        return user
+
+    whisper.dependency_overrides[auth_routes.get_current_user] = current_user
+    yield cache, TestClient(whisper)
+    whisper.dependency_overrides.pop(auth_routes.get_current_user, None)
+    profile_cache.set_profile_cache(None)
+
+
+def test_auth_me_is_served_from_the_cache(me_client):
+    cache, client = me_client
+    with patch("auth_routes.get_supabase_client") as mock_db:
+        select = mock_db.return_value.table.return_value.select
+        select.return_value.eq.return_value.single.return_value.execute.return_value.data = {
+            "created_at": "2025-01-01T00:00:00",
+            "bio": "hi",
+            "achievements": [],
+        }
+        for _ in range(3):
+            response = client.get("/auth/me")
+            assert response.status_code == 200
+            assert response.json()["bio"] == "hi"
+            assert response.json()["created_at"] == "2025-01-01T00:00:00"
+        assert select.call_count == 1
+
+        # A new achievement drops the entry
+        repo = MemoryRepository()
+        game = repo.create_game({"secret_word": "cat"})
+        repo.add_participant(game["id"], "p1")
+        repo.upsert_player_stats({"player_id": "p1", "games_played": 1, "games_won": 1})
+        assert award_for_game(repo, game["id"]) == {"p1": ["First Win"]}
+        client.get("/auth/me")
+        assert select.call_count == 2
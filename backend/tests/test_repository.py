@@ -0,0 +1,358 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+
+import pytest
+
+import game_logic as game_logic
+from memory_repository import MemoryRepository
+from repository import GameRepository, IntegrityError, SupabaseRepository, create_repository
+from sqlite_repository import SQLiteRepository
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryRepository()
+    else:
+        repository = SQLiteRepository(str(tmp_path / "20q.sqlite3"))
+        yield repository
+        repository.close()
+
+
+def test_create_repository_selects_engine(monkeypatch, tmp_path):
+    monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    assert isinstance(create_repository(), MemoryRepository)
+    assert isinstance(create_repository("supabase"), SupabaseRepository)
+    assert isinstance(
+        create_repository("sqlite", path=str(tmp_path / "db.sqlite3")), SQLiteRepository
+    )
+    with pytest.raises(ValueError):
+        create_repository("oracle")
+
+
+def test_engine_missing_a_method_cannot_be_created():
+    methods = {
+        name: getattr(MemoryRepository, name)
+        for name in GameRepository.__abstractmethods__
+        if name != "list_unapplied_games"
+    }
+    partial = type("PartialRepository", (GameRepository,), methods)
+    with pytest.raises(TypeError, match="list_unapplied_games"):
+        partial()
+    type("FullRepository", (GameRepository,), {**methods, "list_unapplied_games": None})()
+
+
+def test_create_game_applies_schema_defaults(repo):
+    game = repo.create_game({"host_player_id": "p1", "secret_word": "cat"})
+    assert game["id"]
+    assert game["status"] == "waiting"
+    assert game["questions_asked"] == 0
+    assert game["enable_tts"] is False
+    assert repo.get_game(game["id"]) == game
+
+
+def test_create_game_requires_secret_word(repo):
+    with pytest.raises(IntegrityError):
+        repo.create_game({"host_player_id": "p1"})
+
+
+def test_game_code_is_unique(repo):
+    repo.create_game({"secret_word": "cat", "game_code": "ABCD"})
+    with pytest.raises(IntegrityError):
+        repo.create_game({"secret_word": "dog", "game_code": "ABCD"})
+
+
+def test_update_game_resolves_now_and_misses(repo):
+    game = repo.create_game({"secret_word": "cat"})
+    updated = repo.update_game(game["id"], {"status": "finished", "completed_at": "now()"})
+    assert updated["status"] == "finished"
+    assert updated["completed_at"] != "now()"
+    assert repo.update_game("missing", {"status": "finished"}) is None
+
+
+def test_participants_enforce_keys(repo):
+    game = repo.create_game({"secret_word": "cat"})
+    repo.add_participant(game["id"], "p1")
+    with pytest.raises(IntegrityError):
+        repo.add_participant(game["id"], "p1")
+    with pytest.raises(IntegrityError):
+        repo.add_participant("missing-game", "p1")
+    assert repo.list_participants(game["id"]) == [{"player_id": "p1"}]
+
+
+def test_question_counts_and_idempotent_batch(repo):
+    game = repo.create_game({"secret_word": "cat"})
+    repo.insert_question({"game_id": game["id"], "player_id": "p1", "question": "Q1"})
+    batch = [
+        {"id": "q2", "game_id": game["id"], "player_id": "p1", "question": "Q2"},
+        {"id": "q3", "game_id": game["id"], "player_id": "p2", "question": "Q3"},
+    ]
+    repo.insert_questions(batch)
+    repo.insert_questions(batch)  # replay after a crash
+    assert repo.count_questions(game["id"], "p1") == 2
+    assert repo.count_questions(game["id"], "p2") == 1
+
+
+def test_stats_upsert_merges(repo):
+    repo.upsert_player_stats({"player_id": "p1", "games_played": 1})
+    merged = repo.upsert_player_stats({"player_id": "p1", "games_won": 1})
+    assert merged["games_played"] == 1
+    assert merged["games_won"] == 1
+    assert merged["best_streak"] == 0
+    repo.upsert_player_stats_difficulty({"player_id": "p1", "difficulty": 2, "games_played": 3})
+    assert repo.get_player_stats_difficulty("p1", 2)["games_played"] == 3
+    assert repo.get_player_stats_difficulty("p1", 1) is None
+
+
+def _finish_game(repo, winner, players=("p1", "p2"), questions=3, difficulty=2):
+    game = repo.create_game({"secret_word": "cat", "difficulty": difficulty})
+    for player in players:
+        repo.add_participant(game["id"], player)
+    for number in range(questions):
+        repo.insert_question(
+            {"game_id": game["id"], "player_id": players[0], "question": f"Q{number}"}
+        )
+    repo.update_game(game["id"], {"winner_id": winner, "status": "finished"})
+    return game
+
+
+def test_apply_game_result_updates_both_tables(repo):
+    game = _finish_game(repo, winner="p1")
+    assert repo.apply_game_result(game["id"]) is True
+
+    winner = repo.get_player_stats("p1")
+    assert winner["games_played"] == 1
+    assert winner["games_won"] == 1
+    assert winner["total_questions_asked"] == 3
+    assert winner["average_questions_to_win"] == 3
+    assert winner["win_rate"] == 100.0
+    assert winner["current_streak"] == 1
+    assert winner["fastest_win_questions"] == 3
+    assert winner["last_game_played_at"]
+
+    loser = repo.get_player_stats("p2")
+    assert loser["games_won"] == 0
+    assert loser["win_rate"] == 0
+    assert loser["current_streak"] == 0
+    assert repo.get_player_stats_difficulty("p2", 2)["games_played"] == 1
+
+
+def test_apply_game_result_is_idempotent(repo):
+    game = _finish_game(repo, winner="p1")
+    assert repo.apply_game_result(game["id"]) is True
+    assert repo.apply_game_result(game["id"]) is False
+    assert repo.apply_game_result("missing-game") is False
+    assert repo.get_player_stats("p1")["games_played"] == 1
+
+
+def test_apply_game_result_tracks_streaks(repo):
+    for winner, questions in (("p1", 5), ("p1", 2), ("p2", 4), ("p1", 7)):
+        repo.apply_game_result(_finish_game(repo, winner=winner, questions=questions)["id"])
+
+    stats = repo.get_player_stats("p1")
+    assert stats["games_played"] == 4
+    assert stats["games_won"] == 3
+    assert stats["current_streak"] == 1
+    assert stats["best_streak"] == 2
+    assert stats["fastest_win_questions"] == 2
+    assert stats["average_questions_to_win"] == pytest.approx(14 / 3)
+    assert stats["win_rate"] == 75.0
+    assert repo.get_player_stats_difficulty("p1", 2)["games_won"] == 3
+
+
+def test_game_history_pages_newest_first(repo):
+    games = []
+    for day, (winner, difficulty) in enumerate([("p1", 1), ("p2", 2), ("p1", 2), ("p1", 1)]):
+        game = _finish_game(repo, winner=winner, difficulty=difficulty)
+        repo.update_game(game["id"], {"completed_at": f"2025-01-0{day + 1}T12:00:00"})
+        assert repo.record_game_history(game["id"]) == 2
+        games.append(game["id"])
+    assert repo.record_game_history(games[0]) == 0
+    assert repo.record_game_history(repo.create_game({"secret_word": "dog"})["id"]) == 0
+
+    first = repo.list_game_history("p1", limit=3)
+    assert [r["game_id"] for r in first] == games[::-1][:3]
+    assert first[0]["result"] == "won"
+    assert first[0]["questions_asked"] == 3
+    assert first[0]["opponent_ids"] == ["p2"]
+    assert repo.list_game_history("p2", limit=3)[0]["questions_asked"] == 0
+
+    cursor = (first[-1]["completed_at"], first[-1]["game_id"])
+    assert [r["game_id"] for r in repo.list_game_history("p1", before=cursor)] == [games[0]]
+
+    lost = repo.list_game_history("p1", result="lost")
+    assert [r["game_id"] for r in lost] == [games[1]]
+    hard = repo.list_game_history("p1", difficulty=2, limit=1)
+    assert [r["game_id"] for r in hard] == [games[2]]
+    assert repo.list_game_history("nobody") == []
+
+
+def test_concurrent_game_results_are_not_lost(repo):
+    games = [_finish_game(repo, winner="p1", players=("p1",)) for _ in range(8)]
+    threads = [
+        threading.Thread(target=repo.apply_game_result, args=(g["id"],)) for g in games
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = repo.get_player_stats("p1")
+    assert stats["games_played"] == 8
+    assert stats["best_streak"] == 8
+
+
+def test_concurrent_joins_keep_constraints(repo):
+    game = repo.create_game({"secret_word": "cat"})
+    errors = []
+
+    def join():
+        try:
+            repo.add_participant(game["id"], "same-player")
+        except IntegrityError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=join) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(repo.list_participants(game["id"])) == 1
+    assert len(errors) == 7
+
+
+@pytest.mark.asyncio
+async def test_async_methods_run_inline(repo):
+    game = repo.create_game({"secret_word": "cat"})
+    assert (await repo.get_game_async(game["id"]))["secret_word"] == "cat"
+
+
+@pytest.fixture
+def game_repo(monkeypatch, repo):
+    """Route game_logic to the repo, with post-game work run synchronously."""
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", repo.list_secret_words())
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_INLINE", True)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_JOURNAL_PATH", None)
+    monkeypatch.setattr(game_logic, "_completion_pipeline", None)
+    return repo
+
+
+def test_full_game_flow(game_repo):
+    repo = game_repo
+
+    game = game_logic.start_game("host", 1, max_players=2)
+    game_logic.join_game(game["id"], "guest")
+    assert game_logic.get_remaining_slots(game["id"]) == 0
+
+    for number in (1, 2, 3):
+        count = game_logic.increment_questions_asked(game["id"])
+        game_logic.record_question(game["id"], "host", f"Q{number}", "No", count)
+    game_logic.update_game_winner(game["id"], "host")
+
+    assert game_logic.get_game(game["id"])["status"] == "finished"
+    host_stats = repo.get_player_stats("host")
+    guest_stats = repo.get_player_stats("guest")
+    assert host_stats["games_won"] == 1
+    assert host_stats["total_questions_asked"] == 3
+    assert guest_stats["games_played"] == 1
+    assert guest_stats["games_won"] == 0
+    assert repo.get_player_stats_difficulty("host", game["difficulty"])["win_rate"] == 100.0
+    assert repo.list_player_achievements("host") == ["First Win", "Quick Thinker"]
+    assert repo.list_player_achievements("guest") == []
+    history = repo.list_game_history("guest")
+    assert [(r["game_id"], r["result"]) for r in history] == [(game["id"], "lost")]
+
+
+def test_question_limit_game_flows_through_pipeline(monkeypatch, game_repo):
+    repo = game_repo
+    monkeypatch.setattr(
+        game_logic, "ask_openai_question", lambda *a, **kw: {"answer": "No"}
+    )
+    game = game_logic.start_game("host", 1)
+    for _ in range(20):
+        result = game_logic.ask_question_with_tts(game["id"], "host", "Is it big?")
+    assert result["game_over"] is True
+
+    stats = repo.get_player_stats("host")
+    assert stats["games_played"] == 1
+    assert stats["games_won"] == 0
+    assert stats["total_questions_asked"] == 20
+
+
+def test_award_achievements_is_idempotent(repo):
+    assert repo.award_achievements("p1", ["First Win", "Not In Catalog"]) == ["First Win"]
+    assert repo.award_achievements("p1", ["First Win", "Regular"]) == ["Regular"]
+    assert repo.list_player_achievements("p1") == ["First Win", "Regular"]
+
+
+def test_list_and_search_players(repo):
+    for i, name in enumerate(["QuizMaster", "quizzical", "MasterQuiz", "Ninja_Fox", "Ninja1"]):
+        repo.upsert_player({"id": f"p{i}", "username": name})
+
+    assert [p["id"] for p in repo.list_players(after="p1", limit=2)] == ["p2", "p3"]
+    found = [p["username"] for p in repo.search_players("quiz")]
+    assert found == ["QuizMaster", "quizzical", "MasterQuiz"]
+    assert [p["username"] for p in repo.search_players("qu")] == ["QuizMaster", "quizzical"]
+    # LIKE wildcards in the query are matched literally
+    assert [p["username"] for p in repo.search_players("ninja_")] == ["Ninja_Fox"]
+    assert repo.search_players(" ") == []
+
+
+def test_sqlite_uses_wal_and_persists(tmp_path):
+    path = str(tmp_path / "20q.sqlite3")
+    repo = SQLiteRepository(path)
+    mode = repo._connect().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    game = repo.create_game({"secret_word": "cat", "enable_tts": True})
+    word_count = len(repo.list_secret_words())
+    repo.close()
+
+    reopened = SQLiteRepository(path)
+    stored = reopened.get_game(game["id"])
+    assert stored["enable_tts"] is True
+    assert len(reopened.list_secret_words()) == word_count
+    reopened.close()
+
+
+def test_sqlite_upgrade_marks_finished_games_applied(tmp_path):
+    path = str(tmp_path / "20q.sqlite3")
+    repo = SQLiteRepository(path)
+    game = repo.create_game({"secret_word": "cat", "status": "finished"})
+    playing = repo.create_game({"secret_word": "dog"})
+    # Back to a database from before apply_game_result
+    conn = repo._connect()
+    conn.execute("DROP INDEX games_unapplied_idx")
+    conn.execute("ALTER TABLE games DROP COLUMN stats_applied_at")
+    repo.close()
+
+    upgraded = SQLiteRepository(path)
+    assert upgraded.get_game(game["id"])["stats_applied_at"]
+    assert upgraded.get_game(playing["id"])["stats_applied_at"] is None
+    assert upgraded.apply_game_result(game["id"]) is False
+    upgraded.close()
+
+
+def test_sqlite_connection_per_thread(tmp_path):
+    repo = SQLiteRepository(str(tmp_path / "20q.sqlite3"))
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(repo._connect()))
+    thread.start()
+    thread.join()
+    assert connections[0] is not repo._connect()
+    repo.close()
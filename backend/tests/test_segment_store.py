@@ -0,0 +1,141 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import mmap
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import audio_store as audio_store
+from audio_store import AudioStore
+from segment_store import SegmentStore, StoreLockedError
+from tts_cache import TTSCache
+from whisper import whisper
+
+
+def _blob(i, size=100):
+    return bytes([i % 256]) * size
+
+
+def test_reads_are_views_into_the_segment(tmp_path):
+    store = SegmentStore(str(tmp_path), max_bytes=1024 * 1024)
+    store.put("a", b"hello")
+    store.put("b", b"world")
+    view = store.get("a")
+    assert isinstance(view, memoryview)
+    assert isinstance(view.obj, mmap.mmap)
+    assert bytes(view) == b"hello"
+    assert bytes(store.get("b")) == b"world"
+    assert store.get("missing") is None
+
+    store.put("a", b"HELLO")
+    assert bytes(store.get("a")) == b"HELLO"
+    assert store.delete("b")
+    assert "b" not in store
+    assert store.stats()["bytes"] == 5
+
+
+def test_reopen_rebuilds_index_and_drops_torn_tail(tmp_path):
+    directory = str(tmp_path)
+    store = SegmentStore(directory, max_bytes=1024 * 1024, segment_bytes=256)
+    for i in range(10):
+        store.put(f"k{i}", _blob(i))
+    store.delete("k3")
+    store.close()
+    segments = sorted(n for n in os.listdir(directory) if n.endswith(".dat"))
+    assert len(segments) > 1
+    with open(os.path.join(directory, segments[-1]), "ab") as f:
+        f.write(b"20QS\x00\x02")  # a header cut short by a crash
+
+    reopened = SegmentStore(directory, max_bytes=1024 * 1024, segment_bytes=256)
+    assert len(reopened) == 9
+    assert "k3" not in reopened
+    assert bytes(reopened.get("k9")) == _blob(9)
+    reopened.put("k10", _blob(10))
+    assert bytes(reopened.get("k10")) == _blob(10)
+
+
+def test_evicts_least_recently_read_and_compacts(tmp_path):
+    store = SegmentStore(str(tmp_path), max_bytes=500, segment_bytes=300)
+    for i in range(5):
+        store.put(f"k{i}", _blob(i))
+    store.get("k0")  # now the most recently read
+    for i in range(5, 30):
+        store.put(f"k{i}", _blob(i))
+        store.get("k0")
+
+    assert "k0" in store
+    assert "k5" not in store
+    stats = store.stats()
+    assert stats["bytes"] <= 500
+    assert stats["evictions"] > 0
+    assert stats["compactions"] > 0
+    assert stats["dead_bytes"] <= stats["segment_bytes"]
+    assert bytes(store.get("k0")) == _blob(0)
+    assert bytes(store.get("k29")) == _blob(29)
+
+    # Compaction moved records; the index still finds them after a restart
+    expected = {f"k{i}": bytes(store.get(f"k{i}")) for i in range(30) if f"k{i}" in store}
+    store.close()
+    reopened = SegmentStore(str(tmp_path), max_bytes=500, segment_bytes=300)
+    assert {key: bytes(reopened.get(key)) for key in expected} == expected
+
+
+def test_one_process_owns_the_directory(tmp_path):
+    store = SegmentStore(str(tmp_path), max_bytes=1024)
+    with pytest.raises(StoreLockedError):
+        SegmentStore(str(tmp_path), max_bytes=1024)
+    store.close()
+    SegmentStore(str(tmp_path), max_bytes=1024).close()
+
+
+def test_tts_cache_and_audio_store_on_segments(tmp_path, monkeypatch):
+    cache = TTSCache(memory_bytes=0, directory=str(tmp_path / "tts"), store="segments")
+    cache.put("k1", b"11111")
+    assert cache.get("k1") == b"11111"
+    assert cache.stats()["disk_entries"] == 1
+    cache.discard("k1")
+    assert cache.get("k1") is None
+    cache.close()
+
+    monkeypatch.setattr("segment_store.BLOB_STORE", "segments")
+    store = AudioStore(directory=str(tmp_path / "audio"), memory_bytes=0)
+    audio_store.set_audio_store(store)
+    try:
+        key = store.put(_blob(7, 4096))
+        assert isinstance(store.view(key).obj, mmap.mmap)
+        response = TestClient(whisper).get(
+            f"/audio/{key}.mp3", headers={"Range": "bytes=0-99"}
+        )
+        assert response.status_code == 206
+        assert response.content == _blob(7)
+    finally:
+        audio_store.set_audio_store(None)
+        store.close()
+
+
+def test_url_delivery_needs_to_own_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr("segment_store.BLOB_STORE", "segments")
+    owner = AudioStore(directory=str(tmp_path), require_disk=True)
+    # A cache can do without its disk tier; links to clips only one worker
+    # holds cannot
+    AudioStore(directory=str(tmp_path), require_disk=False).close()
+    with pytest.raises(StoreLockedError, match="single worker"):
+        AudioStore(directory=str(tmp_path), require_disk=True)
+    owner.close()
@@ -0,0 +1,232 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import base64
+import threading
+
+import pytest
+
+import game_logic as game_logic
+import speculative_audio as speculative_audio
+import tts_cache as tts_cache
+from memory_repository import MemoryRepository
+from speculative_audio import SpeculativeAudio
+
+
+class _Renderer:
+    """synthesize() stand-in that records calls and can be held back."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, text, voice_id):
+        self.calls.append(text)
+        self.started.set()
+        self.release.wait(5)
+        audio = f"{voice_id}:{text}".encode("utf-8")
+        tts_cache.get_tts_cache().put(speculative_audio._speech_key(text, voice_id), audio)
+        return audio
+
+
+@pytest.fixture
+def cache():
+    cache = tts_cache.TTSCache(directory=None)
+    tts_cache.set_tts_cache(cache)
+    yield cache
+    tts_cache.set_tts_cache(None)
+
+
+def _wait_idle(speculative):
+    speculative._executor.submit(lambda: None).result(5)
+
+
+def test_hit_serves_render_and_discards_both(cache):
+    renderer = _Renderer()
+    speculative = SpeculativeAudio(workers=1, synthesize=renderer)
+    speculative.prefetch("g1", ["You won: car", "You lost: car"], "v1")
+    _wait_idle(speculative)
+    assert cache.stats()["memory_entries"] == 2
+
+    assert speculative.take("g1", "You won: car", "v1") == b"v1:You won: car"
+    stats = speculative.stats()
+    assert (stats["hits"], stats["misses"], stats["wasted"]) == (1, 0, 1)
+    assert stats["hit_rate"] == 1.0
+    assert stats["pending_games"] == 0
+    assert cache.stats()["memory_entries"] == 0
+    speculative.close()
+
+
+def test_queued_render_is_cancelled_and_missed(cache):
+    renderer = _Renderer()
+    renderer.release.clear()
+    speculative = SpeculativeAudio(workers=1, synthesize=renderer)
+    speculative.prefetch("g1", ["win", "loss"], "v1")
+
+    # "win" is running, "loss" still queued: synthesizing inline is no slower
+    assert renderer.started.wait(5)
+    assert speculative.take("g1", "loss", "v1") is None
+    renderer.release.set()
+    _wait_idle(speculative)
+    stats = speculative.stats()
+    assert (stats["hits"], stats["misses"], stats["wasted"]) == (0, 1, 1)
+    assert renderer.calls == ["win"]
+    speculative.close()
+
+
+def test_late_render_is_dropped_from_the_cache(cache):
+    renderer = _Renderer()
+    renderer.release.clear()
+    speculative = SpeculativeAudio(workers=1, synthesize=renderer)
+    speculative.prefetch("g1", ["win", "loss"], "v1")
+    assert renderer.started.wait(5)
+
+    # "win" keeps running after the game ends and writes to the cache when done
+    speculative.release("g1")
+    renderer.release.set()
+    _wait_idle(speculative)
+    assert speculative.stats()["wasted"] == 1
+    assert cache.stats()["memory_entries"] == 0
+    speculative.close()
+
+
+def test_running_render_is_waited_for(cache):
+    renderer = _Renderer()
+    renderer.release.clear()
+    speculative = SpeculativeAudio(workers=2, synthesize=renderer)
+    speculative.prefetch("g1", ["win"], "v1")
+    assert renderer.started.wait(5)
+
+    threading.Timer(0.05, renderer.release.set).start()
+    assert speculative.take("g1", "win", "v1") == b"v1:win"
+    assert speculative.stats()["hits"] == 1
+    speculative.close()
+
+
+def test_shared_renders_survive_until_last_game(cache):
+    speculative = SpeculativeAudio(workers=1, synthesize=_Renderer())
+    speculative.prefetch("g1", ["same word"], "v1")
+    speculative.prefetch("g2", ["same word"], "v1")
+    _wait_idle(speculative)
+
+    speculative.release("g1")
+    assert cache.stats()["memory_entries"] == 1
+    assert speculative.take("g2", "same word", "v1") == b"v1:same word"
+    assert cache.stats()["memory_entries"] == 0
+    speculative.close()
+
+
+def test_abandoned_games_are_swept(cache):
+    speculative = SpeculativeAudio(workers=1, ttl=0, synthesize=_Renderer())
+    speculative.prefetch("g1", ["win"], "v1")
+    _wait_idle(speculative)
+    speculative.prefetch("g2", [], "v1")  # sweeps g1
+    assert speculative.stats()["wasted"] == 1
+    assert cache.stats()["memory_entries"] == 0
+    speculative.close()
+
+
+def test_game_endings_are_prefetched_at_start(monkeypatch, cache):
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", [{"name": "car", "difficulty": 1}])
+    monkeypatch.setattr(game_logic, "compose_speech", lambda *a: b"inline")
+    renderer = _Renderer()
+    speculative_audio.set_speculative_audio(SpeculativeAudio(workers=1, synthesize=renderer))
+
+    game = game_logic.start_game("host", 1, enable_tts=True, voice_id="v1")
+    _wait_idle(speculative_audio.get_speculative_audio())
+    assert renderer.calls == [
+        game_logic.CORRECT_GUESS_MESSAGE.format(word="car"),
+        game_logic.GAME_OVER_MESSAGE.format(word="car"),
+    ]
+
+    reveal = game_logic.GAME_OVER_MESSAGE.format(word="car")
+    speech = game_logic._ending_speech(game["id"], game_logic.GAME_OVER_MESSAGE, "car", "v1")
+    assert speech == f"v1:{reveal}".encode()
+    # No render left for this game: stitched or synthesized inline
+    speech = game_logic._ending_speech(game["id"], game_logic.GAME_OVER_MESSAGE, "car", "v1")
+    assert speech == b"inline"
+    stats = speculative_audio.get_speculative_audio().stats()
+    assert (stats["hits"], stats["wasted"], stats["hit_rate"]) == (1, 1, 1.0)
+    speculative_audio.set_speculative_audio(None)
+
+
+def test_last_question_speaks_once(monkeypatch, cache):
+    """Answer, and the game-over reveal taken from its render, in one clip"""
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", [{"name": "car", "difficulty": 1}])
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_INLINE", True)
+    monkeypatch.setattr(game_logic, "GAME_COMPLETION_JOURNAL_PATH", None)
+    monkeypatch.setattr(game_logic, "_completion_pipeline", None)
+    monkeypatch.setattr(game_logic, "ask_openai_question", lambda *a, **kw: {"answer": "No"})
+    synthesized = []
+    monkeypatch.setattr(
+        game_logic.SpeechPlan, "render", lambda plan: synthesized.append(plan.text) or b"turn"
+    )
+    speculative_audio.set_speculative_audio(SpeculativeAudio(workers=1, synthesize=_Renderer()))
+
+    game = game_logic.start_game("host", 1, enable_tts=True, voice_id="v1")
+    _wait_idle(speculative_audio.get_speculative_audio())
+    repo.update_game(game["id"], {"questions_asked": 18})
+    game_logic.ask_question_with_tts(game["id"], "host", "Is it red?")
+    result = game_logic.ask_question_with_tts(game["id"], "host", "Is it big?")
+
+    assert result["game_over"] is True
+    assert result["audio"] == "dHVybg=="
+    reveal = game_logic.GAME_OVER_MESSAGE.format(word="car")
+    assert synthesized == [
+        "No. This is your final question! Make it count!",
+        f"No. {reveal}",
+    ]
+    assert speculative_audio.get_speculative_audio().stats()["hits"] == 1
+    speculative_audio.set_speculative_audio(None)
+
+
+def test_turn_speech_overlaps_database_writes(monkeypatch, cache):
+    """Speech is synthesized while the counter and question row are written"""
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", [{"name": "car", "difficulty": 1}])
+    monkeypatch.setattr(game_logic, "ask_openai_question", lambda *a, **kw: {"answer": "Yes"})
+    game = game_logic.start_game("host", 1)
+    repo.update_game(game["id"], {"enable_tts": True, "voice_id": "v1", "questions_asked": 9})
+
+    written = threading.Event()
+    increment = game_logic.increment_questions_asked
+
+    def slow_increment(game_id):
+        count = increment(game_id)
+        written.set()
+        return count
+
+    def render(plan):
+        # Would time out if synthesis waited for the writes to finish first
+        assert written.wait(5)
+        return plan.text.encode("utf-8")
+
+    monkeypatch.setattr(game_logic, "increment_questions_asked", slow_increment)
+    monkeypatch.setattr(game_logic.SpeechPlan, "render", render)
+
+    result = game_logic.ask_question_with_tts(game["id"], "host", "Is it red?")
+    assert result["question_number"] == 10
+    expected = "Yes. You're halfway through! You have 10 questions left."
+    assert base64.b64decode(result["audio"]).decode("utf-8") == expected
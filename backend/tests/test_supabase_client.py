@@ -15,8 +15,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+import httpx
 import os
 
 import backend.supabase_client as supabase_client
@@ -298,9 +301,10 @@ def test_get_supabase_client_success(monkeypatch):
 
         # Verify the client was created with correct parameters
         assert client is not None
-        mock_create_client.assert_called_once_with(
-            "https://test.supabase.co", "test-service-key"
-        )
+        mock_create_client.assert_called_once()
+        args = mock_create_client.call_args[0]
+        assert args[:2] == ("https://test.supabase.co", "test-service-key")
+        assert isinstance(args[2].httpx_client, httpx.Client)
 
 
 def test_get_supabase_client_missing_env_vars(monkeypatch):
@@ -327,3 +331,93 @@ def test_get_supabase_client_missing_env_vars(monkeypatch):
         match="SUPABASE_URL and SUPABASE_ANON_KEY environment variables are required",
     ):
         supabase_client.get_supabase_auth_client()
+
+
+def test_transport_config_from_env(monkeypatch):
+    """Transport settings are read from the environment"""
+    monkeypatch.setenv("SUPABASE_POOL_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("SUPABASE_KEEPALIVE_EXPIRY", "15")
+    monkeypatch.setenv("SUPABASE_HTTP2", "false")
+    monkeypatch.setenv("SUPABASE_CONNECT_TIMEOUT", "2")
+
+    config = supabase_client.get_transport_config()
+
+    assert config["max_connections"] == 7
+    assert config["keepalive_expiry"] == 15.0
+    assert config["http2"] is False
+    assert config["connect_timeout"] == 2.0
+    assert config["prewarm"] is False
+
+
+def test_build_http_client_applies_timeouts():
+    """The pooled client carries the configured timeouts"""
+    config = supabase_client.get_transport_config()
+    config.update({"connect_timeout": 1.5, "read_timeout": 9.0, "http2": False})
+    http_client = supabase_client.build_http_client(config)
+    assert http_client.timeout.connect == 1.5
+    assert http_client.timeout.read == 9.0
+    http_client.close()
+
+
+def test_pool_stats_count_reused_connections():
+    """Requests that do not open a TCP connection count as reused"""
+    stats = supabase_client.PoolStats()
+
+    def handler(request):
+        # Simulate httpcore opening a connection for the first request only
+        if stats.requests == 1:
+            request.extensions["trace"]("connection.connect_tcp.complete", {})
+        return httpx.Response(200, json=[])
+
+    http_client = httpx.Client(
+        transport=httpx.MockTransport(handler),
+        event_hooks={"request": [stats.on_request], "response": [stats.on_response]},
+    )
+    for _ in range(3):
+        http_client.get("https://test.supabase.co/rest/v1/games")
+
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 3
+    assert snapshot["new_connections"] == 1
+    assert snapshot["reused_connections"] == 2
+
+
+def test_prewarm_failure_is_not_fatal():
+    """A failed pre-warm request is reported, not raised"""
+    http_client = MagicMock()
+    http_client.get.side_effect = httpx.ConnectError("refused")
+    assert supabase_client.prewarm(http_client, "https://x.supabase.co", "k") is False
+
+
+def test_async_client_is_per_event_loop():
+    """A client created on one loop is not handed to the next one"""
+    supabase_client._supabase_async_client = None
+    clients = [MagicMock(), MagicMock()]
+    with patch("backend.supabase_client.acreate_client", AsyncMock(side_effect=clients)):
+
+        async def twice():
+            return (
+                await supabase_client.get_async_supabase_client(),
+                await supabase_client.get_async_supabase_client(),
+            )
+
+        first, again = asyncio.run(twice())
+        second, _ = asyncio.run(twice())
+    assert first is again is clients[0]
+    assert second is clients[1]
+
+
+def test_async_client_pool_is_closed_with_its_loop():
+    """Each loop's connection pool is closed when that loop shuts down"""
+    supabase_client._supabase_async_client = None
+    pools = []
+
+    async def create(url, key, options):
+        pools.append(options.httpx_client)
+        return MagicMock()
+
+    with patch("backend.supabase_client.acreate_client", create):
+        asyncio.run(supabase_client.get_async_supabase_client())
+        assert pools[0].is_closed
+        asyncio.run(supabase_client.get_async_supabase_client())
+    assert len(pools) == 2 and pools[1].is_closed
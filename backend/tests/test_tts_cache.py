@@ -0,0 +1,130 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import elevenlabs_utils as elevenlabs_utils
+import tts_cache as tts_cache
+from tts_cache import TTSCache, tts_cache_key
+
+
+def test_key_covers_text_voice_model_and_settings():
+    settings = {"stability": 0.5, "similarity_boost": 0.5}
+    key = tts_cache_key("Yes", "v1", "m1", settings)
+    assert tts_cache_key("  Yes\n", "v1", "m1", dict(reversed(settings.items()))) == key
+    assert tts_cache_key("yes", "v1", "m1", settings) != key
+    assert tts_cache_key("Yes", "v2", "m1", settings) != key
+    assert tts_cache_key("Yes", "v1", "m2", settings) != key
+    assert tts_cache_key("Yes", "v1", "m1", {**settings, "stability": 0.7}) != key
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TTSCache(memory_bytes=10, directory=None)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")  # over budget: b is the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    stats = cache.stats()
+    assert stats["memory_bytes"] == 8
+    assert (stats["memory_hits"], stats["misses"]) == (3, 1)
+
+
+def test_disk_tier_survives_restart_and_is_bounded(tmp_path):
+    directory = str(tmp_path / "tts")
+    cache = TTSCache(memory_bytes=0, directory=directory, disk_bytes=10)
+    cache.put("k1", b"11111")
+    cache.put("k2", b"22222")
+    assert cache.get("k1") == b"11111"  # k1 is now the most recently read
+    cache.put("k3", b"33333")
+    assert cache.stats()["disk_bytes"] == 10
+
+    restarted = TTSCache(memory_bytes=1024, directory=directory, disk_bytes=10)
+    assert restarted.get("k2") is None
+    assert restarted.get("k1") == b"11111"
+    assert restarted.get("k3") == b"33333"
+    assert restarted.stats()["disk_hits"] == 2
+    # Promoted to memory on the first disk hit
+    assert restarted.get("k1") == b"11111"
+    assert restarted.stats()["memory_hits"] == 1
+
+    restarted.clear()
+    assert not any(files for _, _, files in os.walk(directory))
+
+
+def test_disk_tier_is_shared_between_processes(tmp_path):
+    directory = str(tmp_path / "tts")
+    first = TTSCache(memory_bytes=0, directory=directory, disk_bytes=10, rescan_interval=0)
+    second = TTSCache(memory_bytes=0, directory=directory, disk_bytes=10, rescan_interval=0)
+    assert second.get("k0") is None  # indexes the (empty) directory
+
+    first.put("k1", b"11111")
+    assert second.get("k1") == b"11111"
+    assert second.stats()["disk_hits"] == 1
+
+    # Both see the whole directory when evicting: it stays within one budget
+    second.put("k2", b"22222")
+    first.put("k3", b"33333")
+    sizes = [
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(directory)
+        for name in files
+    ]
+    assert sum(sizes) <= 10
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_API_KEY", "test-api-key")
+    monkeypatch.setattr(elevenlabs_utils, "ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1")
+    cache = TTSCache(directory=str(tmp_path / "tts"))
+    tts_cache.set_tts_cache(cache)
+    yield cache
+    tts_cache.set_tts_cache(None)
+
+
+def test_generate_speech_synthesizes_each_line_once(cache):
+    with patch("http_clients.UpstreamClient.post") as mock_post:
+        mock_post.return_value = MagicMock(status_code=200, content=b"yes-audio")
+        assert elevenlabs_utils.generate_speech("Yes", "v1") == b"yes-audio"
+        assert elevenlabs_utils.generate_speech(" Yes ", "v1") == b"yes-audio"
+        assert mock_post.call_count == 1
+
+        # Different settings are different audio
+        elevenlabs_utils.generate_speech("Yes", "v1", context="dramatic")
+        assert mock_post.call_count == 2
+
+        # Failures are not cached
+        mock_post.return_value = MagicMock(status_code=500, text="down")
+        assert elevenlabs_utils.generate_speech("No", "v1") is None
+        assert elevenlabs_utils.generate_speech("No", "v1") is None
+        assert mock_post.call_count == 4
+    assert cache.stats()["disk_entries"] == 2
+
+
+def test_synthesize_speech_raises_on_api_error(cache):
+    with patch("http_clients.UpstreamClient.post") as mock_post:
+        mock_post.return_value = MagicMock(status_code=401, text="Unauthorized")
+        with pytest.raises(elevenlabs_utils.ElevenLabsError) as error:
+            elevenlabs_utils.synthesize_speech("Maybe", "v1", "m1", {})
+    assert error.value.status_code == 401
@@ -0,0 +1,200 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import game_logic as game_logic
+import voice_catalog as voice_catalog
+from http_clients import AsyncUpstreamResponse
+from memory_repository import MemoryRepository
+from voice_catalog import VoiceCatalog, VoiceCatalogError
+
+BASE = "https://api.elevenlabs.io/v1"
+VOICES = [{"voice_id": "v1", "name": "Rachel"}, {"voice_id": "v2", "name": "Adam"}]
+
+
+def _response(status, voices=None, etag=None, text=""):
+    response = MagicMock()
+    response.status_code = status
+    response.headers = {"ETag": etag} if etag else {}
+    response.json.return_value = {"voices": voices or []}
+    response.text = text
+    return response
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    client = MagicMock()
+    monkeypatch.setattr(voice_catalog, "get_http_client", lambda name: client)
+    return client
+
+
+@pytest.fixture
+def catalog():
+    return VoiceCatalog(ttl=60, stale_ttl=600, retry_interval=30, clock=_Clock())
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_fresh_list_is_served_from_memory(catalog, upstream):
+    upstream.get.return_value = _response(200, VOICES, etag='"a"')
+    assert catalog.voices("key", BASE) == VOICES
+    assert catalog.voice("v2", "key", BASE)["name"] == "Adam"
+    assert catalog.voices("other-key", BASE) == VOICES  # catalogs are per API key
+    assert upstream.get.call_count == 2
+    assert upstream.get.call_args[0][0] == f"{BASE}/voices"
+    assert catalog.stats()["hits"] == 1
+
+
+def test_stale_list_is_served_while_revalidating(catalog, upstream):
+    upstream.get.return_value = _response(200, VOICES, etag='"a"')
+    catalog.voices("key", BASE)
+
+    catalog._clock.now += 120
+    upstream.get.return_value = _response(304)
+    assert catalog.voices("key", BASE) == VOICES
+    _wait_for(lambda: catalog.stats()["not_modified"] == 1)
+    assert upstream.get.call_args[1]["headers"]["If-None-Match"] == '"a"'
+
+    # The 304 renewed the list
+    assert catalog.voices("key", BASE) == VOICES
+    assert upstream.get.call_count == 2
+
+
+def test_callers_during_a_background_refresh_are_served_stale(catalog, upstream):
+    upstream.get.return_value = _response(200, VOICES)
+    catalog.voices("key", BASE)
+
+    release = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        release.wait(5)
+        return _response(200, VOICES[:1])
+
+    upstream.get.side_effect = slow_get
+    catalog._clock.now += 120
+    for _ in range(3):
+        assert catalog.voices("key", BASE) == VOICES
+    release.set()
+    _wait_for(lambda: catalog.stats()["fetches"] == 2)
+    assert upstream.get.call_count == 2
+
+
+def test_expired_list_refreshes_inline_and_survives_errors(catalog, upstream):
+    upstream.get.return_value = _response(200, VOICES)
+    catalog.voices("key", BASE)
+
+    catalog._clock.now += 1000
+    upstream.get.return_value = _response(200, VOICES[:1])
+    assert catalog.voices("key", BASE) == VOICES[:1]
+    assert "If-None-Match" not in upstream.get.call_args[1]["headers"]
+
+    catalog._clock.now += 1000
+    upstream.get.side_effect = Exception("connection reset")
+    assert catalog.voices("key", BASE) == VOICES[:1]
+    assert catalog.stats()["errors"] == 1
+
+
+def test_failed_first_load_is_not_retried_immediately(catalog, upstream):
+    upstream.get.return_value = _response(401, text="invalid api key")
+    with pytest.raises(VoiceCatalogError) as error:
+        catalog.voices("key", BASE)
+    assert error.value.status_code == 401
+    with pytest.raises(VoiceCatalogError):
+        catalog.voices("key", BASE)
+    assert upstream.get.call_count == 1
+    assert catalog.is_known("v1", "key", BASE) is None
+
+    catalog._clock.now += 31
+    upstream.get.return_value = _response(200, VOICES)
+    assert catalog.is_known("v1", "key", BASE) is True
+    assert catalog.is_known("nope", "key", BASE) is False
+
+
+def test_async_lookups_share_the_catalog(catalog, monkeypatch):
+    client = MagicMock()
+    client.get = AsyncMock(
+        return_value=AsyncUpstreamResponse(200, {}, json.dumps({"voices": VOICES}).encode())
+    )
+    monkeypatch.setattr(voice_catalog, "get_async_http_client", lambda name: client)
+
+    async def run():
+        return (
+            await catalog.voices_async("key", BASE),
+            await catalog.voice_async("v1", "key", BASE),
+        )
+
+    voices, voice = asyncio.run(run())
+    assert voices == VOICES
+    assert voice["name"] == "Rachel"
+    assert client.get.await_count == 1
+
+
+def test_async_first_load_is_single_flight(catalog, monkeypatch):
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return AsyncUpstreamResponse(200, {}, json.dumps({"voices": VOICES}).encode())
+
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=slow_get)
+    monkeypatch.setattr(voice_catalog, "get_async_http_client", lambda name: client)
+
+    async def run():
+        return await asyncio.gather(*(catalog.voices_async("key", BASE) for _ in range(5)))
+
+    assert asyncio.run(run()) == [VOICES] * 5
+    assert client.get.await_count == 1
+
+
+def test_game_settings_reject_unknown_voice_ids(monkeypatch):
+    repo = MemoryRepository()
+    monkeypatch.setattr(game_logic, "_repository", repo)
+    monkeypatch.setattr(game_logic, "SECRET_WORDS", repo.list_secret_words())
+    monkeypatch.setattr(game_logic, "SPECULATIVE_TTS", False)
+    monkeypatch.setattr(game_logic, "is_known_voice", lambda voice_id: voice_id == "v1")
+
+    with pytest.raises(ValueError, match="Unknown voice_id: bogus"):
+        game_logic.start_game("host", 1, enable_tts=True, voice_id="bogus")
+    game = game_logic.start_game("host", 1, enable_tts=True, voice_id="v1")
+
+    with pytest.raises(ValueError):
+        game_logic.update_game_tts_settings(game["id"], voice_id="bogus")
+    assert game_logic.update_game_tts_settings(game["id"], enable_tts=False)["voice_id"] == "v1"
+
+    # Catalog unavailable (None): not validated
+    monkeypatch.setattr(game_logic, "is_known_voice", lambda voice_id: None)
+    assert game_logic.start_game("host", 1, voice_id="anything")["voice_id"] == "anything"
@@ -0,0 +1,168 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025 Barbara Bickham
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+import write_behind as write_behind
+
+
+def test_journal_append_and_read(tmp_path):
+    """Records appended to the journal are read back in order"""
+    journal = write_behind.AppendOnlyJournal(str(tmp_path / "q.journal"))
+    journal.append([{"id": 1}, {"id": 2}])
+    journal.append([{"id": 3}])
+    assert [r["id"] for r in journal.read()] == [1, 2, 3]
+
+
+def test_journal_ignores_torn_last_line(tmp_path):
+    """A partially written trailing record is dropped on read"""
+    path = tmp_path / "q.journal"
+    path.write_text('{"id": 1}\n{"id": 2')
+    journal = write_behind.AppendOnlyJournal(str(path))
+    assert journal.read() == [{"id": 1}]
+
+
+def test_flush_sends_batches(tmp_path):
+    """Flush issues one multi-row call per batch and empties the journal"""
+    flush_fn = MagicMock()
+    buffer = write_behind.WriteBehindBuffer(
+        "test", flush_fn, journal_path=str(tmp_path / "q.journal"), batch_size=2
+    )
+    for i in range(5):
+        buffer.put({"id": i})
+
+    assert buffer.flush() == 5
+    assert [len(c.args[0]) for c in flush_fn.call_args_list] == [2, 2, 1]
+    assert buffer.pending_count() == 0
+    assert buffer.journal.read() == []
+
+
+def test_failed_flush_keeps_rows(tmp_path):
+    """Rows from a failed batch stay buffered and journaled for retry"""
+    flush_fn = MagicMock(side_effect=Exception("network down"))
+    buffer = write_behind.WriteBehindBuffer(
+        "test", flush_fn, journal_path=str(tmp_path / "q.journal")
+    )
+    buffer.put({"id": 1})
+
+    assert buffer.flush() == 0
+    assert buffer.pending_count() == 1
+    assert buffer.journal.read() == [{"id": 1}]
+
+    with pytest.raises(Exception, match="network down"):
+        buffer.flush(strict=True)
+    assert buffer.pending_count() == 1
+
+    flush_fn.side_effect = None
+    assert buffer.flush() == 1
+
+
+def test_bad_row_does_not_block_the_rows_behind_it(tmp_path):
+    """A row that always fails is set aside once the rows around it get through"""
+    stored = []
+
+    def flush_fn(rows):
+        if any(r["id"] == 2 for r in rows):
+            raise Exception("foreign key violation")
+        stored.extend(r["id"] for r in rows)
+
+    buffer = write_behind.WriteBehindBuffer(
+        "test", flush_fn, journal_path=str(tmp_path / "q.journal"), batch_size=4, max_failures=2
+    )
+    for i in range(6):
+        buffer.put({"id": i})
+
+    assert buffer.flush() == 0
+    assert buffer.flush() == 5
+    assert sorted(stored) == [0, 1, 3, 4, 5]
+    assert buffer.pending_count() == 0
+    assert buffer.journal.read() == []
+    assert buffer.dead_journal.read() == [{"id": 2}]
+
+
+def test_outage_is_not_mistaken_for_bad_rows(tmp_path):
+    """When every row fails, nothing is set aside"""
+    flush_fn = MagicMock(side_effect=Exception("network down"))
+    buffer = write_behind.WriteBehindBuffer("test", flush_fn, batch_size=4, max_failures=1)
+    for i in range(3):
+        buffer.put({"id": i})
+
+    assert buffer.flush() == 0
+    assert buffer.pending_count() == 3
+    assert buffer.dead_rows == 0
+
+
+def test_process_journals_adopt_orphans(tmp_path):
+    """Each process gets its own journal; dead processes' rows are adopted"""
+    base = str(tmp_path / "q.journal")
+    write_behind.AppendOnlyJournal(base).append([{"id": "legacy"}])
+    write_behind.AppendOnlyJournal(f"{base}.999999999").append([{"id": "dead"}])
+    write_behind.AppendOnlyJournal(f"{base}.1").append([{"id": "live"}])  # pid 1 runs
+
+    path = write_behind.process_journal_path(base)
+    assert path == f"{base}.{os.getpid()}"
+    assert [r["id"] for r in write_behind.AppendOnlyJournal(path).read()] == ["legacy", "dead"]
+    assert not os.path.exists(base)
+    assert not os.path.exists(f"{base}.999999999")
+    assert os.path.exists(f"{base}.1")
+
+
+def test_recovers_rows_from_journal(tmp_path):
+    """A new buffer replays rows a crashed process never flushed"""
+    path = str(tmp_path / "q.journal")
+    crashed = write_behind.WriteBehindBuffer("test", MagicMock(), journal_path=path)
+    crashed.put({"id": "a"})
+    crashed.put({"id": "b"})
+
+    flush_fn = MagicMock()
+    recovered = write_behind.WriteBehindBuffer("test", flush_fn, journal_path=path)
+    assert recovered.pending_count() == 2
+    recovered.flush()
+    flush_fn.assert_called_once_with([{"id": "a"}, {"id": "b"}])
+
+
+def test_background_thread_flushes_on_interval(tmp_path):
+    """The background thread drains the buffer without an explicit flush"""
+    flush_fn = MagicMock()
+    buffer = write_behind.WriteBehindBuffer(
+        "test", flush_fn, journal_path=str(tmp_path / "q.journal"), flush_interval=0.01
+    )
+    buffer.start()
+    buffer.put({"id": 1})
+
+    deadline = time.time() + 2
+    while buffer.pending_count() and time.time() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+
+    assert buffer.pending_count() == 0
+    flush_fn.assert_called_with([{"id": 1}])
+
+
+def test_flush_all_closes_buffers(tmp_path):
+    """flush_all drains every registered buffer (used on shutdown)"""
+    flush_fn = MagicMock()
+    buffer = write_behind.WriteBehindBuffer(
+        "test", flush_fn, journal_path=str(tmp_path / "q.journal")
+    )
+    buffer.put({"id": 1})
+    write_behind.flush_all()
+    flush_fn.assert_called_once_with([{"id": 1}])
@@ -0,0 +1,376 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+TTS Audio Cache Module
+
+Content-addressed cache of synthesized speech. The key is a hash of
+everything that decides the audio: the normalized text, voice_id, model_id
+and voice settings, so the same line in the same voice is synthesized once
+and then served from:
+
+- memory: an LRU of recent clips, bounded by total bytes
+- disk: one file per clip under TTS_CACHE_DIR, bounded by total bytes,
+  least recently read evicted first. Survives restarts and is shared by
+  processes on the same host: a clip missing from this process's index is
+  looked up on disk before it counts as a miss, and the index is rebuilt
+  from the directory every TTS_CACHE_RESCAN_INTERVAL seconds on write, so
+  eviction keeps the directory as a whole within its budget. With BLOB_STORE=segments the clips are kept in
+  a segment_store.SegmentStore instead (a few append-only files, read
+  through mmap), which is faster on /tmp and overlay filesystems but owned
+  by a single process.
+
+Usage:
+    key = tts_cache_key(text, voice_id, model_id, voice_settings)
+    audio = get_tts_cache().get(key)
+    if audio is None:
+        audio = synthesize(...)
+        get_tts_cache().put(key, audio)
+
+Configuration (environment variables):
+    TTS_CACHE_MEMORY_BYTES  Bytes of audio kept in memory (default 32 MiB; 0 disables)
+    TTS_CACHE_DIR           Directory of the disk tier (default /tmp/20q_tts_cache;
+                            empty disables it)
+    TTS_CACHE_DISK_BYTES    Bytes of audio kept on disk (default 512 MiB)
+    TTS_CACHE_RESCAN_INTERVAL  Seconds between rescans of the disk tier for
+                            other processes' clips (default 60)
+    BLOB_STORE              "segments" for the segment store disk tier (default "files")
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import segment_store
+from segment_store import SegmentStore, StoreLockedError
+
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "/tmp/20q_tts_cache")
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+TTS_CACHE_RESCAN_INTERVAL = float(os.getenv("TTS_CACHE_RESCAN_INTERVAL", "60"))
+AUDIO_SUFFIX = ".mp3"
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace, so trivially different strings share audio."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def tts_cache_key(text: str, voice_id: str, model_id: str, voice_settings: Optional[dict]) -> str:
+    """Hex digest identifying one clip; text is normalized first."""
+    payload = json.dumps(
+        [normalize_text(text), voice_id, model_id, voice_settings or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Thread-safe two-tier (memory, disk) cache of audio bytes by key.
+
+    Args:
+        memory_bytes (int): Budget of the memory tier (0 disables it)
+        directory (str): Directory of the disk tier (None or "" disables it)
+        disk_bytes (int): Budget of the disk tier
+        rescan_interval (float): Seconds between rescans of the files tier
+        store (str): "files" or "segments" (default BLOB_STORE)
+        require_disk (bool): Raise StoreLockedError instead of falling back to
+            memory only when another process owns the segment store
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+        directory: Optional[str] = TTS_CACHE_DIR,
+        disk_bytes: int = TTS_CACHE_DISK_BYTES,
+        rescan_interval: float = TTS_CACHE_RESCAN_INTERVAL,
+        store: Optional[str] = None,
+        require_disk: bool = False,
+    ):
+        self.memory_bytes = memory_bytes
+        self.directory = directory or None
+        self.disk_bytes = disk_bytes
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> audio
+        self._memory_size = 0
+        self._disk = None  # key -> size, least recently used first; scanned lazily
+        self._disk_size = 0
+        self._scanned_at = 0.0
+        self._segments = None
+        if self.directory and (store or segment_store.BLOB_STORE) == "segments":
+            try:
+                self._segments = SegmentStore(self.directory, disk_bytes)
+            except StoreLockedError as e:
+                if require_disk:
+                    raise
+                print(f"TTS cache disk tier disabled: {e}")
+                self.directory = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+        audio = self._read_disk(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def get_view(self, key: str) -> Optional[memoryview]:
+        """
+        Like get(), for streaming a clip out: with the segment store the view
+        points into its mapping, so the clip is neither copied nor promoted
+        to memory.
+        """
+        if self._segments is None:
+            audio = self.get(key)
+            return None if audio is None else memoryview(audio)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return memoryview(audio)
+        view = self._segments.get(key)
+        with self._lock:
+            if view is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+        return view
+
+    def put(self, key: str, audio: Optional[bytes]) -> None:
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+        self._write_disk(key, audio)
+
+    def discard(self, key: str) -> None:
+        """Drop one entry from both tiers."""
+        with self._lock:
+            audio = self._memory.pop(key, None)
+            if audio is not None:
+                self._memory_size -= len(audio)
+            on_disk = self._disk is not None and key in self._disk
+            if on_disk:
+                self._disk_size -= self._disk.pop(key)
+        if self._segments is not None:
+            self._segments.delete(key)
+        elif on_disk:
+            self._unlink(key)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+            if self._segments is not None:
+                self._segments.clear()
+                return
+            self._load_disk_index()
+            keys = list(self._disk)
+            self._disk.clear()
+            self._disk_size = 0
+        for key in keys:
+            self._unlink(key)
+
+    def stats(self) -> dict:
+        disk = self._segments.stats() if self._segments is not None else None
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+                ),
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_entries": disk["entries"] if disk else len(self._disk or ()),
+                "disk_bytes": disk["bytes"] if disk else self._disk_size,
+            }
+
+    def close(self) -> None:
+        """Release the segment store, if any (the files tier holds nothing open)."""
+        if self._segments is not None:
+            self._segments.close()
+
+    # Memory tier (callers hold the lock)
+
+    def _remember(self, key, audio):
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    # Disk tier
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + AUDIO_SUFFIX)
+
+    def _load_disk_index(self, rescan=False):
+        """Index existing files by last access time (caller holds the lock)."""
+        if self._disk is not None and not rescan:
+            return
+        self._disk = OrderedDict()
+        self._disk_size = 0
+        self._scanned_at = time.monotonic()
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(AUDIO_SUFFIX):
+                    continue
+                try:
+                    info = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                found.append((info.st_mtime, name[: -len(AUDIO_SUFFIX)], info.st_size))
+        for _, key, size in sorted(found):
+            self._disk[key] = size
+            self._disk_size += size
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        if self._segments is not None:
+            view = self._segments.get(key)
+            return None if view is None else bytes(view)
+        with self._lock:
+            self._load_disk_index()
+        # Not in the index may still mean written by another process since
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # mtime doubles as last access time for eviction across restarts
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._disk_size -= self._disk.pop(key, 0)
+            return None
+        with self._lock:
+            self._adopt(key, len(audio))
+        return audio
+
+    def _write_disk(self, key, audio):
+        if not self.directory or len(audio) > self.disk_bytes:
+            return
+        if self._segments is not None:
+            try:
+                if key not in self._segments:
+                    self._segments.put(key, audio)
+            except OSError as e:
+                print(f"Error writing TTS cache entry: {e}")
+            return
+        with self._lock:
+            self._load_disk_index(
+                rescan=time.monotonic() - self._scanned_at >= self.rescan_interval
+            )
+            if key in self._disk:
+                return
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = None
+        if size is not None:
+            # Another process already wrote it
+            with self._lock:
+                self._adopt(key, size)
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Error writing TTS cache entry: {e}")
+            return
+        evict = []
+        with self._lock:
+            if key not in self._disk:
+                self._disk[key] = len(audio)
+                self._disk_size += len(audio)
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                evicted, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evict.append(evicted)
+        for evicted in evict:
+            self._unlink(evicted)
+
+    def _adopt(self, key, size):
+        """Index a file as the most recently used (caller holds the lock)."""
+        if key not in self._disk:
+            self._disk[key] = size
+            self._disk_size += size
+        self._disk.move_to_end(key)
+
+    def _unlink(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """Get the process-wide TTS cache."""
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache()
+        return _tts_cache
+
+
+def set_tts_cache(cache: Optional[TTSCache]) -> None:
+    """Replace (or with None, reset) the process-wide TTS cache."""
+    global _tts_cache
+    with _tts_cache_lock:
+        _tts_cache = cache
@@ -0,0 +1,312 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Voice Catalog Module
+
+Shared cache of the ElevenLabs voice list (GET /voices), which changes
+perhaps weekly but was fetched on every /voice/voices request and voice
+lookup. Per API key and base URL the list is:
+
+- fresh for VOICE_CATALOG_TTL seconds: served from memory
+- stale for VOICE_CATALOG_STALE_TTL seconds more: served from memory while
+  one background refresh runs (stale-while-revalidate)
+- expired after that: refreshed before answering. If the refresh fails the
+  old list is still served; with nothing cached the error is raised, and
+  repeated for VOICE_CATALOG_RETRY_INTERVAL seconds without calling
+  ElevenLabs again
+
+Refreshes are conditional: when ElevenLabs sent an ETag, the next request
+carries If-None-Match and a 304 just renews the list.
+
+The catalog also lets game_logic reject an unknown voice_id when a game is
+started or its TTS settings change, instead of at synthesis time.
+
+Configuration (environment variables):
+    VOICE_CATALOG_TTL             Seconds the list is fresh (default 3600)
+    VOICE_CATALOG_STALE_TTL       Seconds it is served stale while refreshing (default 86400)
+    VOICE_CATALOG_RETRY_INTERVAL  Seconds a failed first load is not retried (default 30)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import List, Optional
+
+from http_clients import get_async_http_client, get_http_client
+
+VOICE_CATALOG_TTL = float(os.getenv("VOICE_CATALOG_TTL", "3600"))
+VOICE_CATALOG_STALE_TTL = float(os.getenv("VOICE_CATALOG_STALE_TTL", "86400"))
+VOICE_CATALOG_RETRY_INTERVAL = float(os.getenv("VOICE_CATALOG_RETRY_INTERVAL", "30"))
+
+
+# States _lookup reports in which the cached list is returned right away
+SERVABLE = ("fresh", "stale", "stale-refreshing")
+
+
+class VoiceCatalogError(Exception):
+    """Non-200 (and non-304) response from the ElevenLabs voices API."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(f"ElevenLabs API error: {status_code} - {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _Entry:
+    """The voice list for one API key and base URL."""
+
+    def __init__(self):
+        self.voices = None  # list of voice objects, as ElevenLabs returns them
+        self.etag = None
+        self.fetched_at = 0.0
+        self.error = None
+        self.failed_at = 0.0
+        self.refreshing = False
+        self.lock = threading.Lock()  # one inline load at a time
+        self.async_lock = None  # the same for async callers, on async_loop
+        self.async_loop = None
+
+    def loop_lock(self) -> asyncio.Lock:
+        """The entry's asyncio.Lock for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self.async_loop is not loop:
+            self.async_lock = asyncio.Lock()
+            self.async_loop = loop
+        return self.async_lock
+
+
+class VoiceCatalog:
+    """
+    Thread-safe TTL cache of voice lists with stale-while-revalidate.
+
+    Args:
+        ttl (float): Seconds a list is fresh
+        stale_ttl (float): Seconds after that it is served while refreshing
+        retry_interval (float): Seconds a failed load is not retried
+        clock (callable): Monotonic time source (for tests)
+    """
+
+    def __init__(
+        self,
+        ttl: float = VOICE_CATALOG_TTL,
+        stale_ttl: float = VOICE_CATALOG_STALE_TTL,
+        retry_interval: float = VOICE_CATALOG_RETRY_INTERVAL,
+        clock=time.monotonic,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._tasks = set()  # background async refreshes, kept referenced
+        self.hits = 0
+        self.stale_hits = 0
+        self.fetches = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    # Public API
+
+    def voices(self, api_key: str, base_url: str) -> List[dict]:
+        """The voice list, refreshed first if it has expired."""
+        entry, state = self._lookup(api_key, base_url)
+        if state == "stale":
+            threading.Thread(
+                target=self._refresh_quietly, args=(entry, api_key, base_url), daemon=True
+            ).start()
+        if state in SERVABLE:
+            return entry.voices
+        with entry.lock:
+            if self._state(entry) == "fresh":
+                return entry.voices
+            self._check_backoff(entry)
+            try:
+                self._refresh(entry, api_key, base_url)
+            except Exception as e:
+                return self._failed(entry, e)
+        return entry.voices
+
+    async def voices_async(self, api_key: str, base_url: str) -> List[dict]:
+        """Async version of voices(), on the shared aiohttp session."""
+        entry, state = self._lookup(api_key, base_url)
+        if state == "stale":
+            task = asyncio.ensure_future(self._refresh_async_quietly(entry, api_key, base_url))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if state in SERVABLE:
+            return entry.voices
+        async with entry.loop_lock():
+            if self._state(entry) == "fresh":
+                return entry.voices
+            self._check_backoff(entry)
+            try:
+                await self._refresh_async(entry, api_key, base_url)
+            except Exception as e:
+                return self._failed(entry, e)
+        return entry.voices
+
+    def voice(self, voice_id: str, api_key: str, base_url: str) -> Optional[dict]:
+        """One voice from the list, or None if it is not in it."""
+        return _find(self.voices(api_key, base_url), voice_id)
+
+    async def voice_async(self, voice_id: str, api_key: str, base_url: str) -> Optional[dict]:
+        return _find(await self.voices_async(api_key, base_url), voice_id)
+
+    def is_known(self, voice_id: str, api_key: str, base_url: str) -> Optional[bool]:
+        """Whether voice_id is in the list; None when the list cannot be loaded."""
+        try:
+            return self.voice(voice_id, api_key, base_url) is not None
+        except Exception as e:
+            print(f"Voice catalog unavailable, not validating voice_id: {e}")
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "fetches": self.fetches,
+                "not_modified": self.not_modified,
+                "errors": self.errors,
+                "catalogs": len(self._entries),
+            }
+
+    # Internals
+
+    def _state(self, entry):
+        if entry.voices is None:
+            return "missing"
+        age = self._clock() - entry.fetched_at
+        if age < self.ttl:
+            return "fresh"
+        if age < self.ttl + self.stale_ttl:
+            return "stale"
+        return "expired"
+
+    def _lookup(self, api_key, base_url):
+        """The entry and its state; claims the background refresh of a stale one."""
+        with self._lock:
+            entry = self._entries.setdefault((base_url, api_key), _Entry())
+            state = self._state(entry)
+            if state == "fresh":
+                self.hits += 1
+            elif state == "stale":
+                self.stale_hits += 1
+                if entry.refreshing:
+                    return entry, "stale-refreshing"
+                entry.refreshing = True
+            return entry, state
+
+    def _check_backoff(self, entry):
+        if entry.voices is None and entry.error is not None:
+            if self._clock() - entry.failed_at < self.retry_interval:
+                raise entry.error
+
+    def _failed(self, entry, error):
+        with self._lock:
+            self.errors += 1
+            entry.error = error
+            entry.failed_at = self._clock()
+        if entry.voices is None:
+            raise error
+        print(f"Voice catalog refresh failed, serving the previous list: {error}")
+        return entry.voices
+
+    @staticmethod
+    def _request_headers(entry, api_key):
+        headers = {"xi-api-key": api_key}
+        if entry.etag and entry.voices is not None:
+            headers["If-None-Match"] = entry.etag
+        return headers
+
+    def _store(self, entry, status, headers, payload, detail):
+        """Apply a voices response; payload is only read for a 200."""
+        with self._lock:
+            self.fetches += 1
+            if status == 304 and entry.voices is not None:
+                self.not_modified += 1
+            elif status == 200:
+                entry.voices = payload().get("voices", [])
+                etag = headers.get("ETag")
+                entry.etag = etag if isinstance(etag, str) else None
+            else:
+                raise VoiceCatalogError(status, detail())
+            entry.fetched_at = self._clock()
+            entry.error = None
+
+    def _refresh(self, entry, api_key, base_url):
+        response = get_http_client("elevenlabs").get(
+            f"{base_url}/voices", headers=self._request_headers(entry, api_key), timeout=10
+        )
+        self._store(
+            entry, response.status_code, response.headers, response.json, lambda: response.text
+        )
+
+    async def _refresh_async(self, entry, api_key, base_url):
+        response = await get_async_http_client("elevenlabs").get(
+            f"{base_url}/voices", headers=self._request_headers(entry, api_key), timeout=10
+        )
+        payload = await response.json() if response.status == 200 else None
+        detail = await response.text()
+        self._store(entry, response.status, response.headers, lambda: payload, lambda: detail)
+
+    def _refresh_quietly(self, entry, api_key, base_url):
+        try:
+            self._refresh(entry, api_key, base_url)
+        except Exception as e:
+            self._failed(entry, e)
+        finally:
+            entry.refreshing = False
+
+    async def _refresh_async_quietly(self, entry, api_key, base_url):
+        try:
+            await self._refresh_async(entry, api_key, base_url)
+        except Exception as e:
+            self._failed(entry, e)
+        finally:
+            entry.refreshing = False
+
+
+def _find(voices, voice_id):
+    for voice in voices:
+        if voice.get("voice_id") == voice_id:
+            return voice
+    return None
+
+
+_voice_catalog = None
+_voice_catalog_lock = threading.Lock()
+
+
+def get_voice_catalog() -> VoiceCatalog:
+    """Get the process-wide voice catalog."""
+    global _voice_catalog
+    with _voice_catalog_lock:
+        if _voice_catalog is None:
+            _voice_catalog = VoiceCatalog()
+        return _voice_catalog
+
+
+def set_voice_catalog(catalog: Optional[VoiceCatalog]) -> None:
+    """Replace (or with None, reset) the process-wide voice catalog."""
+    global _voice_catalog
+    with _voice_catalog_lock:
+        _voice_catalog = catalog
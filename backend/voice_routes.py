@@ -17,18 +17,35 @@
 
 import io
 import os
-import requests
+import aiohttp
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from fastapi.responses import StreamingResponse
 
 # Import your models, Supabase utils, etc.
 from models import TextToSpeechRequest, VoiceSettings, AskQuestionRequest, VoiceResponse
 from auth_routes import get_current_user
-from game_logic import ask_openai_question, get_game, increment_questions_asked, record_question
+from http_clients import get_async_http_client
+from elevenlabs_utils import ElevenLabsError, synthesize_speech_async
+from audio_store import deliver_audio
+from voice_catalog import VoiceCatalogError, get_voice_catalog
+from game_logic import ask_openai_question_async, get_game_async, increment_questions_asked_async, record_question_async
 
 router = APIRouter()
 
+ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
+VOICE_MODEL_ID = "eleven_monolingual_v1"
+
+
+def voice_settings_payload(voice_settings: VoiceSettings) -> dict:
+    """ElevenLabs voice_settings for a request's VoiceSettings."""
+    return {
+        "stability": voice_settings.stability,
+        "similarity_boost": voice_settings.similarity_boost,
+        "use_speaker_boost": voice_settings.use_speaker_boost,
+    }
+
 # Add these voice-related endpoints to your FastAPI app
 
 
@@ -46,39 +63,25 @@ async def text_to_speech(
                 status_code=500, detail="ElevenLabs API key not configured"
             )
 
-        # Prepare the request to ElevenLabs
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{request.voice_settings.voice_id}"
-
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": elevenlabs_api_key,
-        }
-
-        data = {
-            "text": request.text,
-            "model_id": "eleven_monolingual_v1",
-            "voice_settings": {
-                "stability": request.voice_settings.stability,
-                "similarity_boost": request.voice_settings.similarity_boost,
-                "use_speaker_boost": request.voice_settings.use_speaker_boost,
-            },
-        }
-
-        # Make request to ElevenLabs
-        response = requests.post(url, json=data, headers=headers)
-
-        if response.status_code != 200:
+        # Synthesize through the TTS cache (repeated text is not re-sent)
+        try:
+            audio = await synthesize_speech_async(
+                request.text,
+                request.voice_settings.voice_id,
+                VOICE_MODEL_ID,
+                voice_settings_payload(request.voice_settings),
+                api_key=elevenlabs_api_key,
+                base_url=ELEVENLABS_API_URL,
+            )
+        except ElevenLabsError as e:
             raise HTTPException(
-                status_code=response.status_code,
-                detail=f"ElevenLabs API error: {response.text}",
+                status_code=e.status_code,
+                detail=f"ElevenLabs API error: {e.detail}",
             )
 
         # Return the audio as a streaming response
-        audio_stream = io.BytesIO(response.content)
-
         return StreamingResponse(
-            io.BytesIO(response.content),
+            io.BytesIO(audio),
             media_type="audio/mpeg",
             headers={"Content-Disposition": "attachment; filename=speech.mp3"},
         )
@@ -102,22 +105,19 @@ async def get_available_voices(current_user=Depends(get_current_user)):
                 status_code=500, detail="ElevenLabs API key not configured"
             )
 
-        url = "https://api.elevenlabs.io/v1/voices"
-        headers = {"xi-api-key": elevenlabs_api_key}
-
-        response = requests.get(url, headers=headers)
-
-        if response.status_code != 200:
+        try:
+            voices_data = await get_voice_catalog().voices_async(
+                elevenlabs_api_key, ELEVENLABS_API_URL
+            )
+        except VoiceCatalogError as e:
             raise HTTPException(
-                status_code=response.status_code,
-                detail=f"ElevenLabs API error: {response.text}",
+                status_code=e.status_code,
+                detail=f"ElevenLabs API error: {e.detail}",
             )
 
-        voices_data = response.json()
-
         # Format the response
         voices = []
-        for voice in voices_data.get("voices", []):
+        for voice in voices_data:
             voices.append(
                 VoiceResponse(
                     voice_id=voice["voice_id"],
@@ -155,21 +155,25 @@ async def speech_to_text(
 
         headers = {"Authorization": f"Bearer {openai_api_key}"}
 
-        files = {
-            "file": (audio_file.filename, audio_content, audio_file.content_type),
-            "model": (None, "whisper-1"),
-            "language": (None, "en"),
-        }
+        form = aiohttp.FormData()
+        form.add_field(
+            "file",
+            audio_content,
+            filename=audio_file.filename,
+            content_type=audio_file.content_type,
+        )
+        form.add_field("model", "whisper-1")
+        form.add_field("language", "en")
 
-        response = requests.post(url, headers=headers, files=files)
+        response = await get_async_http_client("openai").post(url, headers=headers, data=form)
 
-        if response.status_code != 200:
+        if response.status != 200:
             raise HTTPException(
-                status_code=response.status_code,
-                detail=f"OpenAI API error: {response.text}",
+                status_code=response.status,
+                detail=f"OpenAI API error: {await response.text()}",
             )
 
-        transcription = response.json()
+        transcription = await response.json()
 
         return {"transcription": transcription.get("text", "")}
 
@@ -191,14 +195,14 @@ async def api_ask_question_voice(
     Ask a question and get both text and audio response
     """
     try:
-        game = get_game(req.game_id)
+        game = await get_game_async(req.game_id)
         if game["status"] != "playing":
             return {"error": "Game is not active"}
 
-        # Get the answer
-        answer = ask_openai_question(game["secret_word"], req.question)
-        question_number = increment_questions_asked(req.game_id)
-        record_question(
+        ai_response = await ask_openai_question_async(game["secret_word"], req.question)
+        answer = ai_response["answer"]
+        question_number = await increment_questions_asked_async(req.game_id)
+        await record_question_async(
             req.game_id, current_user.id, req.question, answer, question_number
         )
 
@@ -206,41 +210,26 @@ async def api_ask_question_voice(
         elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
         if elevenlabs_api_key:
             try:
-                # Convert answer to speech
-                url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_settings.voice_id}"
-
-                headers = {
-                    "Accept": "audio/mpeg",
-                    "Content-Type": "application/json",
-                    "xi-api-key": elevenlabs_api_key,
-                }
-
-                data = {
-                    "text": answer,
-                    "model_id": "eleven_monolingual_v1",
-                    "voice_settings": {
-                        "stability": voice_settings.stability,
-                        "similarity_boost": voice_settings.similarity_boost,
-                        "use_speaker_boost": voice_settings.use_speaker_boost,
-                    },
-                }
-
-                audio_response = requests.post(url, json=data, headers=headers)
-
-                if audio_response.status_code == 200:
-                    # Encode audio as base64 for JSON response
-                    import base64
-
-                    audio_base64 = base64.b64encode(audio_response.content).decode(
-                        "utf-8"
-                    )
-
-                    return {
+                # Convert answer to speech (cached: most answers are Yes/No/Maybe)
+                audio = await synthesize_speech_async(
+                    answer,
+                    voice_settings.voice_id,
+                    VOICE_MODEL_ID,
+                    voice_settings_payload(voice_settings),
+                    api_key=elevenlabs_api_key,
+                    base_url=ELEVENLABS_API_URL,
+                )
+
+                if audio:
+                    # base64 in the body, or a link with AUDIO_DELIVERY=url
+                    result = {
                         "answer": answer,
                         "question_number": question_number,
-                        "audio": audio_base64,
                         "audio_format": "mp3",
                     }
+                    # Storing a linked clip writes to disk: keep it off the event loop
+                    await run_in_threadpool(deliver_audio, result, "audio", audio)
+                    return result
 
             except Exception as audio_error:
                 print(f"Audio generation failed: {audio_error}")
@@ -15,12 +15,22 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 from auth_routes import router as auth_router
 from game_routes import router as game_router
 from voice_routes import router as voice_router
+from leaderboard_routes import router as leaderboard_router
+from history_routes import router as history_router
+from audio_routes import router as audio_router
+from write_behind import flush_all as flush_write_behind_buffers
+from game_logic import close_completion_pipeline, get_repository
+from http_clients import close_async_http_clients, close_http_clients, open_async_http_clients
+from audio_catalog import load_audio_catalog
+from player_search import PLAYER_SEARCH_INDEX, get_player_search
+from audio_store import AUDIO_DELIVERY, get_audio_store
 
 import logging
 
@@ -30,7 +40,34 @@ logger = logging.getLogger(__name__)
 
 logger.info("Lambda cold start: app.py successfully loaded")
 
-whisper = FastAPI(title="Whisper Chase: 20 Questions")
+
+@asynccontextmanager
+async def lifespan(app):
+    # Build the player search index in the background; searches use the
+    # database until it is ready
+    if PLAYER_SEARCH_INDEX:
+        get_player_search().start_loading(get_repository())
+    # Pre-rendered audio for the fixed game lines (served without synthesis)
+    load_audio_catalog()
+    # Shared aiohttp sessions for the async upstream calls
+    await open_async_http_clients()
+    # Linked clips must be stored where this worker can serve them: open the
+    # store now so a worker that cannot own it fails at startup
+    if AUDIO_DELIVERY == "url":
+        get_audio_store()
+    yield
+    # Finish post-game work (stats, achievements) queued by finished games
+    logger.info("Shutting down: draining game completion pipeline")
+    close_completion_pipeline()
+    # Drain buffered writes (e.g. game_questions) before the process exits
+    logger.info("Shutting down: flushing write-behind buffers")
+    flush_write_behind_buffers()
+    # Close pooled upstream connections (ElevenLabs, OpenAI, Supabase Auth)
+    close_http_clients()
+    await close_async_http_clients()
+
+
+whisper = FastAPI(title="Whisper Chase: 20 Questions", lifespan=lifespan)
 
 # Add CORS middleware
 whisper.add_middleware(
@@ -43,6 +80,9 @@ whisper.add_middleware(
 whisper.include_router(auth_router)
 whisper.include_router(game_router)
 whisper.include_router(voice_router)
+whisper.include_router(leaderboard_router)
+whisper.include_router(history_router)
+whisper.include_router(audio_router)
 
 # Root Check
 @whisper.get("/")
@@ -60,13 +100,17 @@ def health_check():
     logger.info("Health endpoint called")
     return {"status": "healthy"}
 
+# Created once per execution environment. Lifespan is off because Mangum would
+# otherwise run startup/shutdown around every invocation; Lambda shutdown is
+# handled by the SIGTERM/atexit hooks installed by write_behind instead.
+mangum_handler = Mangum(whisper, lifespan="off")
+
 # Lambda handler with enhanced logging
 def handler(event, context):
     logger.info(f"Lambda invoked with event: {event}")
     
     try:
         # Use Mangum to handle the FastAPI app
-        mangum_handler = Mangum(whisper)
         response = mangum_handler(event, context)
         logger.info(f"Lambda response: {response}")
         print(f"Lambda response: {response}")
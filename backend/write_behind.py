@@ -0,0 +1,371 @@
+# This file is part of 20Q.
+#
+# Copyright (C) 2025  Trailyn Ventures, LLC
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Write-Behind Buffer Module
+
+This module lets request handlers hand rows off to a local, durable buffer
+instead of waiting on a database insert. Rows are appended to an append-only
+journal file first, so nothing is lost if the process dies, and a background
+thread flushes them to the database in batches with a single multi-row call.
+
+Key Features:
+- Append-only JSON-lines journal (one row per line, fsync'd on append)
+- Batched flushes triggered by size or by a flush interval
+- Crash recovery: rows left in the journal are replayed on startup
+- Poison rows: a batch that keeps failing is bisected, and rows that fail
+  on their own while the rest are written go to a `.dead` journal, so one
+  bad row cannot hold back the rows queued behind it
+- One journal per process (process_journal_path): workers sharing a
+  directory never rewrite each other's rows; a dead process's journal is
+  adopted by the next one to start
+- Shutdown hooks (atexit / SIGTERM) so a Lambda shutdown drains the buffer
+
+Usage:
+    buffer = WriteBehindBuffer(
+        "game_questions",
+        flush_fn=lambda rows: client.table("game_questions").upsert(rows).execute(),
+        journal_path="/tmp/20q_game_questions.journal",
+    )
+    buffer.start()
+    buffer.put({"id": "...", "question": "Is it big?"})
+"""
+
+import atexit
+import glob
+import json
+import os
+import signal
+import threading
+from typing import Callable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class AppendOnlyJournal:
+    """
+    A JSON-lines file that records are only ever appended to.
+
+    The journal is rewritten (atomically, via a temp file and rename) only to
+    drop records that have been durably flushed elsewhere. A partially written
+    trailing line, e.g. from a crash mid-append, is ignored on read.
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def append(self, records: List[dict]) -> None:
+        """Append records to the end of the journal."""
+        if not records:
+            return
+        lines = "".join(json.dumps(r, default=str) + "\n" for r in records)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def read(self) -> List[dict]:
+        """Return every complete record currently in the journal."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Torn write from a crash; the record never made it in full
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping corrupt journal line in {self.path}")
+        return records
+
+    def rewrite(self, records: List[dict]) -> None:
+        """Atomically replace the journal contents with the given records."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r, default=str) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def process_journal_path(base_path: str) -> str:
+    """
+    This process's own journal for base_path: "<base_path>.<pid>".
+
+    Journals left by processes that are no longer running (and a journal at
+    base_path itself, from before journals were per process) are moved into
+    it first, under an exclusive lock so two starting workers never adopt the
+    same file. Adopted records are replayed like any other journaled records,
+    so sinks must already tolerate duplicates.
+    """
+    own_path = f"{base_path}.{os.getpid()}"
+    directory = os.path.dirname(base_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(f"{base_path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        own = AppendOnlyJournal(own_path)
+        for path in [base_path] + sorted(glob.glob(f"{glob.escape(base_path)}.*")):
+            suffix = path[len(base_path) + 1 :]
+            if path == own_path or not os.path.isfile(path):
+                continue
+            if path != base_path:
+                if not suffix.isdigit() or _process_alive(int(suffix)):
+                    continue
+            records = AppendOnlyJournal(path).read()
+            if records:
+                print(f"Adopting {len(records)} records from orphaned journal {path}")
+                own.append(records)
+            os.remove(path)
+    return own_path
+
+
+class WriteBehindBuffer:
+    """
+    Durable buffer that flushes rows to a sink in batches from a background thread.
+
+    Args:
+        name (str): Name used in log messages (usually the table name)
+        flush_fn (callable): Called with a list of rows; must raise on failure.
+            It may be called again with rows it already stored (after a crash),
+            so it should be idempotent, e.g. an upsert that ignores duplicates.
+        journal_path (str): Journal file location, or None for memory only
+        batch_size (int): Maximum rows per flush call; reaching it wakes the flusher
+        flush_interval (float): Seconds between background flushes
+        max_failures (int): Failed flushes of the same leading batch before it
+            is bisected and rows that fail on their own are set aside in
+            `<journal_path>.dead` (logged, without a journal)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[List[dict]], object],
+        journal_path: Optional[str] = None,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_failures: int = 3,
+    ):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_failures = max(1, max_failures)
+        self.journal = AppendOnlyJournal(journal_path) if journal_path else None
+        self.dead_journal = AppendOnlyJournal(f"{journal_path}.dead") if journal_path else None
+        self.dead_rows = 0
+        self._failures = 0  # consecutive failed flushes of the leading batch
+
+        self._lock = threading.Lock()  # guards _pending and the journal file
+        self._flush_lock = threading.Lock()  # one flusher at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Crash recovery: anything still in the journal was never confirmed
+        self._pending: List[dict] = self.journal.read() if self.journal else []
+        if self._pending:
+            print(f"Recovered {len(self._pending)} unflushed {name} rows from journal")
+
+        _register(self)
+
+    def put(self, row: dict) -> None:
+        """Durably buffer a row. Returns once the row is in the journal."""
+        with self._lock:
+            if self.journal:
+                self.journal.append([row])
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, strict: bool = False) -> int:
+        """
+        Flush everything buffered so far.
+
+        Args:
+            strict (bool): Re-raise a failed batch's error instead of logging
+                it, for callers that must not go on without the rows
+
+        Returns:
+            int: Number of rows flushed. Rows from a failed batch stay buffered
+            and are retried on the next flush.
+        """
+        flushed = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = list(self._pending[: self.batch_size])
+                if not batch:
+                    break
+                dead = []
+                try:
+                    self.flush_fn(batch)
+                except Exception as e:
+                    print(f"Error flushing {self.name} write-behind buffer: {e}")
+                    self._failures += 1
+                    if self._failures < self.max_failures or len(batch) == 1:
+                        if strict:
+                            raise
+                        break
+                    mid = len(batch) // 2
+                    dead = self._bisect(batch[:mid]) + self._bisect(batch[mid:])
+                    if len(dead) == len(batch):
+                        # Nothing got through: the sink is down, not the rows
+                        if strict:
+                            raise
+                        break
+                self._failures = 0
+                with self._lock:
+                    # put() only appends, so the flushed rows are still at the front
+                    del self._pending[: len(batch)]
+                    if self.journal:
+                        self.journal.rewrite(self._pending)
+                if dead:
+                    self._set_aside(dead)
+                flushed += len(batch) - len(dead)
+        return flushed
+
+    def _bisect(self, rows: List[dict]) -> List[dict]:
+        """Write rows, halving any part that fails; returns the rows that fail alone."""
+        try:
+            self.flush_fn(rows)
+            return []
+        except Exception:
+            if len(rows) == 1:
+                return rows
+        mid = len(rows) // 2
+        return self._bisect(rows[:mid]) + self._bisect(rows[mid:])
+
+    def _set_aside(self, rows: List[dict]) -> None:
+        self.dead_rows += len(rows)
+        if self.dead_journal:
+            self.dead_journal.append(rows)
+            where = self.dead_journal.path
+        else:
+            where = f"the log: {json.dumps(rows, default=str)}"
+        print(f"Set aside {len(rows)} {self.name} rows that keep failing, in {where}")
+
+    def start(self) -> None:
+        """Start the background flush thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"write-behind-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the background thread and flush whatever is left."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
+
+
+# Registry of live buffers so shutdown hooks can drain all of them
+_buffers: List[WriteBehindBuffer] = []
+_hooks_installed = False
+
+
+def _register(buffer: WriteBehindBuffer) -> None:
+    _buffers.append(buffer)
+    install_shutdown_hooks()
+
+
+def flush_all() -> None:
+    """Stop and flush every registered buffer. Safe to call more than once."""
+    for buffer in list(_buffers):
+        try:
+            buffer.close()
+        except Exception as e:
+            print(f"Error closing {buffer.name} write-behind buffer: {e}")
+
+
+def install_shutdown_hooks() -> None:
+    """
+    Flush all buffers on interpreter exit and on SIGTERM.
+
+    AWS Lambda sends SIGTERM to the runtime before shutting an execution
+    environment down (when an extension is registered); rows that still
+    cannot be flushed stay in the journal and are replayed by the next
+    process that opens it.
+    """
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+    atexit.register(flush_all)
+
+    if threading.current_thread() is not threading.main_thread():
+        return
+    try:
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def _on_sigterm(signum, frame):
+            flush_all()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                raise SystemExit(0)
+
+        signal.signal(signal.SIGTERM, _on_sigterm)
+    except (ValueError, OSError):
+        # Signals are unavailable in this context; atexit still covers us
+        pass
@@ -0,0 +1,56 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- 20261019120000_hot_query_indexes.sql
+-- Indexes for the query shapes used by game_logic, auth_routes and the frontend
+--
+-- Already served by primary keys (no new index needed):
+--   games WHERE id = ?                                    -> games_pkey
+--   players WHERE id = ?                                  -> players_pkey
+--   game_participants WHERE game_id = ?                   -> game_participants_pkey (leading column)
+--   player_stats WHERE player_id = ?                      -> player_stats_pkey
+--   player_stats_difficulty WHERE player_id = ? AND difficulty = ?
+--                                                         -> player_stats_difficulty_pkey
+-- Checked by backend/tests/test_query_plans.py.
+
+-- game_questions: question count per (game, player) in update_player_stats.
+-- Both filter columns are keys, so count(*) is an index-only scan.
+CREATE INDEX IF NOT EXISTS game_questions_game_player_idx
+  ON public.game_questions (game_id, player_id);
+
+-- game_questions: a player's questions across games (history, FK checks on players)
+CREATE INDEX IF NOT EXISTS game_questions_player_id_idx
+  ON public.game_questions (player_id);
+
+-- game_participants: games a player has joined, newest first
+CREATE INDEX IF NOT EXISTS game_participants_player_joined_idx
+  ON public.game_participants (player_id, joined_at DESC);
+
+-- games: "my games" lists, filtered by host and status, newest first
+CREATE INDEX IF NOT EXISTS games_host_status_created_idx
+  ON public.games (host_player_id, status, created_at DESC);
+
+-- games: lobby / recent games by status, newest first
+CREATE INDEX IF NOT EXISTS games_status_created_idx
+  ON public.games (status, created_at DESC);
+
+-- games: foreign keys to players used for wins and turn lookups
+CREATE INDEX IF NOT EXISTS games_winner_id_idx
+  ON public.games (winner_id) WHERE winner_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS games_current_player_id_idx
+  ON public.games (current_player_id) WHERE current_player_id IS NOT NULL;
@@ -0,0 +1,138 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- 20261019130000_apply_game_result.sql
+-- Server-side stats aggregation for finished games
+--
+-- apply_game_result(game_id) folds a finished game into player_stats and
+-- player_stats_difficulty for every participant in one statement, so there
+-- is no read-modify-write round trip and concurrent finishes for the same
+-- player cannot overwrite each other. Called by game_logic through
+-- supabase.rpc("apply_game_result", {"p_game_id": ...}).
+
+-- Set when a game's result has been applied; makes the function idempotent
+ALTER TABLE public.games
+  ADD COLUMN IF NOT EXISTS stats_applied_at timestamp with time zone;
+
+-- Games finished before this migration were already counted by the backend's
+-- read-modify-write update_player_stats: mark them applied so nothing
+-- (a retry, the completion sweep) folds them in a second time
+UPDATE public.games
+   SET stats_applied_at = COALESCE(completed_at, now())
+ WHERE status = 'finished'
+   AND stats_applied_at IS NULL;
+
+CREATE OR REPLACE FUNCTION public.apply_game_result(p_game_id uuid)
+RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_winner_id uuid;
+  v_difficulty integer;
+BEGIN
+  -- Claim the game first; retries and duplicate finishes become no-ops
+  UPDATE public.games
+     SET stats_applied_at = now()
+   WHERE id = p_game_id
+     AND stats_applied_at IS NULL
+  RETURNING winner_id, COALESCE(difficulty, 1)
+       INTO v_winner_id, v_difficulty;
+
+  IF NOT FOUND THEN
+    RETURN false;
+  END IF;
+
+  WITH results AS (
+    SELECT gp.player_id,
+           COALESCE(gp.player_id = v_winner_id, false) AS won,
+           (SELECT count(*)::integer
+              FROM public.game_questions q
+             WHERE q.game_id = gp.game_id
+               AND q.player_id = gp.player_id) AS questions
+      FROM public.game_participants gp
+     WHERE gp.game_id = p_game_id
+  ),
+  overall AS (
+    INSERT INTO public.player_stats AS s (
+      player_id, games_played, games_won, total_questions_asked,
+      average_questions_to_win, win_rate, current_streak, best_streak,
+      fastest_win_questions, last_game_played_at
+    )
+    SELECT player_id, 1, won::integer, questions,
+           CASE WHEN won THEN questions ELSE 0 END,
+           CASE WHEN won THEN 100 ELSE 0 END,
+           won::integer, won::integer,
+           CASE WHEN won THEN questions ELSE 0 END,
+           now()
+      FROM results
+    ON CONFLICT (player_id) DO UPDATE SET
+      games_played = COALESCE(s.games_played, 0) + 1,
+      games_won = COALESCE(s.games_won, 0) + EXCLUDED.games_won,
+      total_questions_asked =
+        COALESCE(s.total_questions_asked, 0) + EXCLUDED.total_questions_asked,
+      average_questions_to_win = CASE
+        WHEN EXCLUDED.games_won = 1 THEN
+          (COALESCE(s.average_questions_to_win, 0) * COALESCE(s.games_won, 0)
+           + EXCLUDED.total_questions_asked) / (COALESCE(s.games_won, 0) + 1)
+        ELSE s.average_questions_to_win
+      END,
+      win_rate = round(
+        (COALESCE(s.games_won, 0) + EXCLUDED.games_won) * 100.0
+        / (COALESCE(s.games_played, 0) + 1), 2),
+      current_streak = CASE
+        WHEN EXCLUDED.games_won = 1 THEN COALESCE(s.current_streak, 0) + 1
+        ELSE 0
+      END,
+      best_streak = GREATEST(
+        COALESCE(s.best_streak, 0),
+        CASE WHEN EXCLUDED.games_won = 1 THEN COALESCE(s.current_streak, 0) + 1 ELSE 0 END),
+      fastest_win_questions = CASE
+        WHEN EXCLUDED.games_won = 1
+         AND (COALESCE(s.fastest_win_questions, 0) = 0
+              OR EXCLUDED.fastest_win_questions < s.fastest_win_questions)
+        THEN EXCLUDED.fastest_win_questions
+        ELSE s.fastest_win_questions
+      END,
+      last_game_played_at = EXCLUDED.last_game_played_at
+    RETURNING 1
+  )
+  INSERT INTO public.player_stats_difficulty AS d (
+    player_id, difficulty, games_played, games_won, total_questions_asked,
+    average_questions_to_win, win_rate
+  )
+  SELECT player_id, v_difficulty, 1, won::integer, questions,
+         CASE WHEN won THEN questions ELSE 0 END,
+         CASE WHEN won THEN 100 ELSE 0 END
+    FROM results
+  ON CONFLICT (player_id, difficulty) DO UPDATE SET
+    games_played = COALESCE(d.games_played, 0) + 1,
+    games_won = COALESCE(d.games_won, 0) + EXCLUDED.games_won,
+    total_questions_asked =
+      COALESCE(d.total_questions_asked, 0) + EXCLUDED.total_questions_asked,
+    average_questions_to_win = CASE
+      WHEN EXCLUDED.games_won = 1 THEN
+        (COALESCE(d.average_questions_to_win, 0) * COALESCE(d.games_won, 0)
+         + EXCLUDED.total_questions_asked) / (COALESCE(d.games_won, 0) + 1)
+      ELSE d.average_questions_to_win
+    END,
+    win_rate = round(
+      (COALESCE(d.games_won, 0) + EXCLUDED.games_won) * 100.0
+      / (COALESCE(d.games_played, 0) + 1), 2);
+
+  RETURN true;
+END;
+$$;
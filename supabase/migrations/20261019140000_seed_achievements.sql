@@ -0,0 +1,30 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- 20261019140000_seed_achievements.sql
+-- Achievement catalog awarded by the game completion pipeline
+-- (rules in backend/achievements.py)
+
+INSERT INTO public.achievements (name, description, icon_name, rarity) VALUES
+  ('First Win', 'Win your first game', 'trophy', 'common'),
+  ('Hat Trick', 'Win three games in a row', 'flame', 'rare'),
+  ('Unstoppable', 'Win ten games in a row', 'zap', 'epic'),
+  ('Quick Thinker', 'Win a game in five questions or fewer', 'timer', 'rare'),
+  ('Mind Reader', 'Win a game with a single question', 'brain', 'epic'),
+  ('Regular', 'Play ten games', 'calendar', 'common'),
+  ('Veteran', 'Play one hundred games', 'medal', 'rare')
+ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,24 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- 20261019150000_leaderboard_refresh_index.sql
+-- Lets the backend leaderboard pull only the stats rows changed since its
+-- last refresh (player_stats.last_game_played_at is set by apply_game_result)
+
+CREATE INDEX IF NOT EXISTS player_stats_last_game_played_at_idx
+  ON public.player_stats (last_game_played_at)
+  WHERE last_game_played_at IS NOT NULL;
@@ -0,0 +1,150 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- 20261019160000_player_game_history.sql
+-- Per-player game history projection
+--
+-- One row per (player, finished game): the join of game_participants, games
+-- and the player's question count for that game, written once by the
+-- "history" stage of the game completion pipeline. The history endpoint
+-- pages through it by (completed_at, game_id) with an index range scan, so
+-- its cost does not depend on how many games a player has played. The
+-- per-player summary comes from player_stats / player_stats_difficulty.
+
+CREATE TABLE IF NOT EXISTS public.player_game_history (
+  player_id uuid NOT NULL,
+  game_id uuid NOT NULL,
+  completed_at timestamp without time zone NOT NULL,
+  difficulty integer,
+  result text NOT NULL CHECK (result IN ('won', 'lost')),
+  secret_word text,
+  questions_asked integer NOT NULL DEFAULT 0,
+  opponent_ids uuid[] NOT NULL DEFAULT '{}'::uuid[],
+  CONSTRAINT player_game_history_pkey PRIMARY KEY (player_id, game_id),
+  CONSTRAINT player_game_history_player_id_fkey FOREIGN KEY (player_id) REFERENCES public.players(id),
+  CONSTRAINT player_game_history_game_id_fkey FOREIGN KEY (game_id) REFERENCES public.games(id)
+);
+
+-- Newest-first pages (scanned backwards), unfiltered and filtered by result
+-- or difficulty. Ascending columns keep the (completed_at, game_id) row
+-- comparison used for the cursor an index condition.
+CREATE INDEX IF NOT EXISTS player_game_history_recent_idx
+  ON public.player_game_history (player_id, completed_at, game_id);
+
+CREATE INDEX IF NOT EXISTS player_game_history_result_idx
+  ON public.player_game_history (player_id, result, completed_at, game_id);
+
+CREATE INDEX IF NOT EXISTS player_game_history_difficulty_idx
+  ON public.player_game_history (player_id, difficulty, completed_at, game_id);
+
+-- Write a finished game's history rows; safe to call more than once
+CREATE OR REPLACE FUNCTION public.record_game_history(p_game_id uuid)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH inserted AS (
+    INSERT INTO public.player_game_history (
+      player_id, game_id, completed_at, difficulty, result, secret_word,
+      questions_asked, opponent_ids
+    )
+    SELECT gp.player_id,
+           g.id,
+           COALESCE(g.completed_at, now()),
+           g.difficulty,
+           CASE WHEN gp.player_id = g.winner_id THEN 'won' ELSE 'lost' END,
+           g.secret_word,
+           (SELECT count(*)::integer
+              FROM public.game_questions q
+             WHERE q.game_id = g.id
+               AND q.player_id = gp.player_id),
+           COALESCE(
+             (SELECT array_agg(o.player_id ORDER BY o.joined_at)
+                FROM public.game_participants o
+               WHERE o.game_id = g.id
+                 AND o.player_id <> gp.player_id),
+             '{}'::uuid[])
+      FROM public.games g
+      JOIN public.game_participants gp ON gp.game_id = g.id
+     WHERE g.id = p_game_id
+       AND g.status = 'finished'
+    ON CONFLICT (player_id, game_id) DO NOTHING
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM inserted;
+$$;
+
+-- One page of a player's history, newest first. The cursor is the
+-- (completed_at, game_id) of the last row of the previous page. Pages are
+-- capped at 100 rows plus one look-ahead row that tells whether more exist.
+CREATE OR REPLACE FUNCTION public.player_game_history_page(
+  p_player_id uuid,
+  p_limit integer DEFAULT 20,
+  p_before_completed_at timestamp without time zone DEFAULT NULL,
+  p_before_game_id uuid DEFAULT NULL,
+  p_result text DEFAULT NULL,
+  p_difficulty integer DEFAULT NULL
+)
+RETURNS SETOF public.player_game_history
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  v_sql text := 'SELECT * FROM public.player_game_history WHERE player_id = $1';
+BEGIN
+  -- Only the filters in use are added, so each shape gets its own index plan
+  IF p_result IS NOT NULL THEN
+    v_sql := v_sql || ' AND result = $2';
+  END IF;
+  IF p_difficulty IS NOT NULL THEN
+    v_sql := v_sql || ' AND difficulty = $3';
+  END IF;
+  IF p_before_completed_at IS NOT NULL THEN
+    v_sql := v_sql || ' AND (completed_at, game_id) < ($4, $5)';
+  END IF;
+  v_sql := v_sql || ' ORDER BY completed_at DESC, game_id DESC LIMIT $6';
+
+  RETURN QUERY EXECUTE v_sql
+    USING p_player_id, p_result, p_difficulty, p_before_completed_at,
+          p_before_game_id, LEAST(GREATEST(p_limit, 1), 101);
+END;
+$$;
+
+-- Backfill games that finished before this migration
+INSERT INTO public.player_game_history (
+  player_id, game_id, completed_at, difficulty, result, secret_word,
+  questions_asked, opponent_ids
+)
+SELECT gp.player_id,
+       g.id,
+       COALESCE(g.completed_at, g.created_at, now()),
+       g.difficulty,
+       CASE WHEN gp.player_id = g.winner_id THEN 'won' ELSE 'lost' END,
+       g.secret_word,
+       (SELECT count(*)::integer
+          FROM public.game_questions q
+         WHERE q.game_id = g.id
+           AND q.player_id = gp.player_id),
+       COALESCE(
+         (SELECT array_agg(o.player_id ORDER BY o.joined_at)
+            FROM public.game_participants o
+           WHERE o.game_id = g.id
+             AND o.player_id <> gp.player_id),
+         '{}'::uuid[])
+  FROM public.games g
+  JOIN public.game_participants gp ON gp.game_id = g.id
+ WHERE g.status = 'finished'
+ON CONFLICT (player_id, game_id) DO NOTHING;
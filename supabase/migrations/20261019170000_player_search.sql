@@ -0,0 +1,73 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+-- 20261019170000_player_search.sql
+-- Username search for the leaderboard search box
+--
+-- The API answers searches from an in-memory index (backend/player_search.py).
+-- These indexes serve the search_players() function, which the API calls
+-- while a cold process is still loading that index:
+-- - players_username_prefix_idx: a range scan for prefix matches, already
+--   in result order, so it stops after p_limit rows
+-- - players_username_trgm_idx: pg_trgm GIN index for substring matches
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS players_username_prefix_idx
+  ON public.players ((lower(username) COLLATE "C"));
+
+CREATE INDEX IF NOT EXISTS players_username_trgm_idx
+  ON public.players USING gin (lower(username) gin_trgm_ops);
+
+-- Prefix matches (alphabetical), then substring matches for queries of
+-- 3+ characters. The query is inlined as a literal so the planner can use
+-- the prefix index for LIKE 'abc%'.
+CREATE OR REPLACE FUNCTION public.search_players(p_query text, p_limit integer DEFAULT 10)
+RETURNS TABLE (id uuid, username text, avatar_url text)
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  v_term text := lower(btrim(p_query));
+  v_pattern text := replace(replace(replace(v_term, '\', '\\'), '%', '\%'), '_', '\_');
+  v_limit integer := LEAST(GREATEST(p_limit, 1), 50);
+  v_found integer;
+BEGIN
+  IF v_term = '' THEN
+    RETURN;
+  END IF;
+
+  RETURN QUERY EXECUTE format(
+    'SELECT p.id, p.username, p.avatar_url FROM public.players p
+      WHERE lower(p.username) COLLATE "C" LIKE %L
+      ORDER BY lower(p.username) COLLATE "C", p.id
+      LIMIT %s',
+    v_pattern || '%', v_limit);
+  GET DIAGNOSTICS v_found = ROW_COUNT;
+
+  IF length(v_term) >= 3 AND v_found < v_limit THEN
+    RETURN QUERY EXECUTE format(
+      'SELECT p.id, p.username, p.avatar_url FROM public.players p
+        WHERE lower(p.username) LIKE %L
+          AND lower(p.username) COLLATE "C" NOT LIKE %L
+        ORDER BY lower(p.username) COLLATE "C", p.id
+        LIMIT %s',
+      '%' || v_pattern || '%', v_pattern || '%', v_limit - v_found);
+  END IF;
+END;
+$$;
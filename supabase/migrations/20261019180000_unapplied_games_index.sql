@@ -0,0 +1,33 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- 20261019180000_unapplied_games_index.sql
+-- Lets the backend's game completion sweep find finished games whose stats
+-- were never applied (a job lost with a recycled instance) without
+-- scanning every game
+
+CREATE INDEX IF NOT EXISTS games_unapplied_idx
+  ON public.games (completed_at)
+  WHERE status = 'finished' AND stats_applied_at IS NULL;
+
+-- The sweep re-applies whatever matches the index. Games finished before the
+-- sweep shipped were counted when they finished (20261019130000 marks the
+-- older ones); make sure none is left looking unapplied before it first runs
+UPDATE public.games
+   SET stats_applied_at = COALESCE(completed_at, now())
+ WHERE status = 'finished'
+   AND stats_applied_at IS NULL;
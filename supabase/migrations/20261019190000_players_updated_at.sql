@@ -0,0 +1,50 @@
+-- This file is part of 20Q.
+--
+-- Copyright (C) 2025  Trailyn Ventures, LLC
+--
+-- This program is free software: you can redistribute it and/or modify
+-- it under the terms of the GNU General Public License as published by
+-- the Free Software Foundation, either version 3 of the License, or
+-- (at your option) any later version.
+--
+-- This program is distributed in the hope that it will be useful,
+-- but WITHOUT ANY WARRANTY; without even the implied warranty of
+-- MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+-- GNU General Public License for more details.
+--
+-- You should have received a copy of the GNU General Public License
+-- along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+-- 20261019190000_players_updated_at.sql
+-- Lets each API instance's in-memory username index (backend/player_search.py)
+-- pull only the players who signed up or changed their profile since its
+-- last refresh, including changes made through other instances. Only
+-- username and avatar changes (what the index holds) move updated_at
+
+ALTER TABLE public.players
+  ADD COLUMN IF NOT EXISTS updated_at timestamp without time zone;
+
+UPDATE public.players
+   SET updated_at = COALESCE(created_at, now())
+ WHERE updated_at IS NULL;
+
+ALTER TABLE public.players
+  ALTER COLUMN updated_at SET DEFAULT now();
+
+CREATE OR REPLACE FUNCTION public.touch_players_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := now();
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS players_touch_updated_at ON public.players;
+CREATE TRIGGER players_touch_updated_at
+  BEFORE UPDATE OF username, avatar_url ON public.players
+  FOR EACH ROW EXECUTE FUNCTION public.touch_players_updated_at();
+
+CREATE INDEX IF NOT EXISTS players_updated_at_idx
+  ON public.players (updated_at);